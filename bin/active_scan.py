@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Run a dimer scan a batch at a time, choosing each batch from the results so far.
+"""
+
+import argparse
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Run a dimer scan a batch at a time, choosing each batch from the results so far.
+""",epilog="""
+The job and template arguments are those for batch_camcasp.py, and the
+pool is a geometry file of candidate points, usually many more than will
+be calculated, such as one written by make_scan.py. The points chosen are
+written, with their indices in the pool, to the geometry file
+<job>-active.geom, and batch_camcasp.py is run on that file to submit the
+new ones, with the --batch-options given (e.g. "-q batch --scfcode psi4").
+With --dHF it is run a second time, with --dHF, to submit the delta-HF
+jobs as well.
+
+The first batch is the first --initial points of the pool (for a Sobol or
+Halton pool these are spread evenly). When all the jobs submitted have
+finished, the SAPT(DFT) interaction energy of each (E2int, as given by
+extract_saptdft.py, or Eint = E2int + dHF with --dHF) is fitted by a
+Gaussian-process surrogate, as a function of the inverse atom-atom
+distances of the dimer (see surrogate.py). Points with energies above
+--emax are left out of the fit. The leave-one-out r.m.s. error of the
+fit estimates its accuracy; if it is below --target the scan is
+complete. Otherwise the next --batch points are chosen from the pool, as
+those that most reduce the uncertainty of the surrogate over the pool,
+and submitted.
+
+Without --wait, one step is taken: the script reports on the jobs
+submitted, chooses and submits the next batch if they have all finished,
+and exits, so it can be run by hand or from cron as jobs finish. With
+--wait N it checks every N seconds until the scan is complete. The state
+of each job is found from its log, as by scan_status.py (see
+jobstatus.py), and a job whose log hasn't changed for --stale hours
+(default 24) is taken to have been killed. Jobs that fail are left out;
+delete their directories and they will be run again. Any point chosen
+that has a cluster file from batch_camcasp.py but no job directory is
+submitted again, once in each run of this script, before the scan goes
+on; if it still has none it is counted as failed. Points skipped by the
+close-contact check of batch_camcasp.py, which have neither, are left
+out. The scan stops when --max-points points have
+been chosen. The progress of the fit is appended to <job>-active.log.
+""")
+
+parser.add_argument("job", help="Job name for the scan")
+parser.add_argument("template", help="Cluster-file template")
+parser.add_argument("pool", help="Geometry file of candidate points")
+parser.add_argument("--initial", type=int, default=20, help="Number of points in the first batch")
+parser.add_argument("--batch", type=int, default=10, help="Number of points in each later batch")
+parser.add_argument("--target", type=float, default=0.5,
+                    help="Leave-one-out r.m.s. error at which to stop (default 0.5)")
+parser.add_argument("--emax", type=float, default=100.0,
+                    help="Greatest energy fitted (default 100)")
+parser.add_argument("--unit", "--units", help="Energy unit (default kJ/mol)",
+                    choices=["cm-1","kJ/mol","au","hartree","eV","meV","K","kelvin","kcal/mol"],
+                    default="kJ/mol")
+parser.add_argument("--max-points", type=int, default=1000,
+                    help="Greatest number of points to calculate (default 1000)")
+parser.add_argument("--dHF", action="store_true",
+                    help="Run the delta-HF jobs too, and include the delta-HF energy")
+parser.add_argument("--stale", type=float, default=24.0,
+                    help="Hours without a change to the log after which a running job"
+                    " is taken to have failed (default 24)")
+parser.add_argument("--wait", type=int, default=0,
+                    help="Seconds between checks; 0 (default) to take one step and exit")
+parser.add_argument("--batch-options", default="",
+                    help="Options for batch_camcasp.py, as one string")
+
+args = parser.parse_args()
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy is needed for active_scan.py")
+    exit(1)
+import contacts
+import jobstatus
+import scandata
+import surrogate
+from cltspec import parse_clt, CltError
+
+selfile = f"{args.job}-active.geom"
+#  Job directory suffixes of the runs for each point
+suffixes = ["", "_dHF"] if args.dHF else [""]
+logfile = f"{args.job}-active.log"
+
+try:
+    spec = parse_clt(args.template)
+    pool = scandata.read_geometry(args.pool)
+    G = np.array([[float(v) for v in g[:7]] for _, g in pool]).reshape(-1, 7)
+    X = surrogate.descriptors(spec, G)
+except (OSError, ValueError, CltError, contacts.ContactError) as e:
+    print(e)
+    exit(1)
+where = {index: i for i, (index, _) in enumerate(pool)}
+
+
+def log(message):
+    print(message)
+    with open(logfile, "a") as LOG:
+        LOG.write(f"{time.strftime('%Y-%m-%d %H:%M:%S')}  {message}\n")
+
+
+def survey():
+    """The points chosen so far, by state: a dictionary of the energies of
+    those finished, and lists of those pending, failed, skipped by the
+    close-contact check, and to be submitted again"""
+    done, pending, failed, skipped, missing = {}, [], [], [], []
+    if not os.path.exists(selfile):
+        return done, pending, failed, skipped, missing
+    for index, _ in scandata.read_geometry(selfile):
+        job = f"{args.job}_{index}"
+        values = scandata.point_values(job, job, args.unit) if os.path.isdir(job) else None
+        energy = scandata.interaction_energy(values, args.dHF) if values else None
+        if energy is not None:
+            done[index] = energy
+            continue
+        dirs = [job + suffix for suffix in suffixes]
+        states = [jobstatus.classify(dir, job) for dir in dirs if os.path.isdir(dir)]
+        if any(s.state == "failed" or s.state == "running"
+               and s.age() > 3600*args.stale for s in states):
+            failed.append(index)
+        elif all(os.path.isdir(dir) for dir in dirs):
+            pending.append(index)
+        elif os.path.isdir(job) or os.path.exists(f"{job}.clt"):
+            #  Set up by batch_camcasp.py, but a job directory is missing
+            missing.append(index)
+        else:
+            skipped.append(index)
+    return done, pending, failed, skipped, missing
+
+
+def submit(indices):
+    """Add the points to the geometry file of points chosen, and run
+    batch_camcasp.py on it. Returns True if it succeeded."""
+    new = not os.path.exists(selfile)
+    with open(selfile, "a") as OUT:
+        if new:
+            OUT.write(f"!  Points chosen from {args.pool} for {args.job}\n")
+        for i in indices:
+            index, g = pool[i]
+            OUT.write(f"{index:>8s}  {'  '.join(g)}\n")
+    for suffix in suffixes:
+        arguments = ["batch_camcasp.py", args.job, args.template, selfile] \
+            + (["--dHF"] if suffix else []) + shlex.split(args.batch_options)
+        print(" ".join(arguments))
+        sys.stdout.flush()
+        rc = subprocess.call(arguments)
+        if rc:
+            log(f"batch_camcasp.py failed, rc = {rc}")
+            return False
+    return True
+
+
+#  Points submitted again by this run
+resubmitted = set()
+
+
+def step():
+    """Take one step of the scan. Returns True when it is complete."""
+    done, pending, failed, skipped, missing = survey()
+    chosen = len(done) + len(pending) + len(failed) + len(skipped) + len(missing)
+    if chosen == 0:
+        log(f"Submitting the first {min(args.initial, len(pool))} points")
+        return not submit(range(min(args.initial, len(pool))))
+    again = [index for index in missing if index not in resubmitted]
+    if again:
+        log(f"Submitting {len(again)} points again")
+        resubmitted.update(again)
+        return not submit([])
+    #  Points that still have no job directory can't be set up
+    failed += missing
+    if pending:
+        print(f"{len(done)} points finished, {len(pending)} pending, {len(failed)} failed")
+        return False
+    fit = [index for index, e in done.items() if e <= args.emax and index in where]
+    if len(fit) < 3:
+        log(f"Only {len(fit)} points with energies below {args.emax:g} {args.unit}:"
+            " can't fit the surrogate")
+        return True
+    rows = [where[index] for index in fit]
+    y = np.array([done[index] for index in fit])
+    gp = surrogate.GaussianProcess().fit(X[rows], y)
+    rms = float(np.sqrt(np.mean(gp.loo_errors()**2)))
+    log(f"{len(fit)} points fitted ({len(failed)} failed, {len(skipped)} skipped):"
+        f" leave-one-out r.m.s. error {rms:.4f} {args.unit}")
+    if rms <= args.target:
+        log(f"Target accuracy {args.target:g} {args.unit} reached")
+        return True
+    if chosen >= args.max_points:
+        log(f"{chosen} points chosen: the limit of {args.max_points} has been reached")
+        return True
+    exclude = [where[index] for index in list(done) + failed + skipped if index in where]
+    if len(exclude) >= len(pool):
+        log("All the points in the pool have been used")
+        return True
+    new = surrogate.select(gp, X, min(args.batch, args.max_points - chosen), exclude)
+    log(f"Submitting {len(new)} more points")
+    return not submit(new)
+
+
+while True:
+    if step() or not args.wait:
+        break
+    sys.stdout.flush()
+    time.sleep(args.wait)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Compress the large result and interface files of finished CamCASP jobs.
+"""
+
+import argparse
+import fnmatch
+import glob
+import os
+import re
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from compressed import compress, open_any, plain_name
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Compress the large result and interface files of finished CamCASP jobs.
+""",epilog="""
+E.g.
+  archive_results.py H2O2_scan_* --nproc 8
+  archive_results.py --manifest jobs.txt --method zst
+
+Each argument is a job directory made by runcamcasp.py; arguments that
+are not directories are ignored, as by extract_saptdft.py. If the job has
+finished (its OUT/<job>.log says "Job <job> finished"), the files in the
+job directory and its OUT directory that match the patterns (by default
+*.fchk, *-asc.movecs, *.out and *-data-summary.data) are compressed with
+gzip (--method gz, the default) or zstd (--method zst, which needs the
+zstandard module), and the originals deleted. Jobs that haven't finished,
+or failed, are left alone unless --force is given. Files smaller than
+--min-size kB are not worth compressing and are also left alone.
+
+Up to --nproc files are compressed at once.
+
+extract_saptdft.py, extract_ct.py, read_scan.py and readfchk.py read the
+compressed files directly, so archived jobs can still be analysed. The MO
+files of an archived job are not used if the job is run again, so its SCF
+calculations are repeated. --decompress restores the original files.
+""")
+
+parser.add_argument("dirs", nargs="*", default=[], help="Job directories")
+parser.add_argument("--manifest", help="File listing job directories")
+parser.add_argument("--method", choices=["gz", "zst"], default="gz",
+                    help="Compression method (default gz)")
+parser.add_argument("--level", type=int, help="Compression level")
+parser.add_argument("--patterns", nargs="+",
+                    default=["*.fchk", "*-asc.movecs", "*.out", "*-data-summary.data"],
+                    help="Patterns for the files to compress")
+parser.add_argument("--min-size", type=float, default=4.0,
+                    help="Smallest file to compress, in kB (default 4)")
+parser.add_argument("--nproc", type=int, default=os.cpu_count() or 1,
+                    help="Number of files to compress at once")
+parser.add_argument("--force", action="store_true",
+                    help="Compress files of jobs that have not finished")
+parser.add_argument("--decompress", action="store_true",
+                    help="Restore the compressed files")
+parser.add_argument("--dry-run", "-n", action="store_true",
+                    help="List the files without changing them")
+args = parser.parse_args()
+
+dirs = list(args.dirs)
+if args.manifest:
+    with open(args.manifest) as M:
+        dirs.extend(line.strip() for line in M if line.strip() and not line.startswith("#"))
+if not dirs:
+    parser.error("No job directories given")
+
+
+def finished(dir):
+    """True if the job in dir finished normally"""
+    for log in glob.glob(os.path.join(dir, "OUT", "*.log")):
+        job = os.path.basename(log)[:-4]
+        with open_any(log, errors="replace") as LOG:
+            if re.search(rf'^Job {re.escape(job)} finished', LOG.read(), flags=re.M):
+                return True
+    return False
+
+
+def candidates(dir):
+    """Files of the job to be compressed, or decompressed"""
+    files = []
+    for d in [dir, os.path.join(dir, "OUT")]:
+        if not os.path.isdir(d):
+            continue
+        for f in sorted(os.listdir(d)):
+            path = os.path.join(d, f)
+            if not os.path.isfile(path):
+                continue
+            if args.decompress:
+                if plain_name(f) != f and any(fnmatch.fnmatch(plain_name(f), p)
+                                              for p in args.patterns):
+                    files.append(path)
+            elif plain_name(f) == f and any(fnmatch.fnmatch(f, p) for p in args.patterns) \
+                    and os.path.getsize(path) >= 1024*args.min_size:
+                files.append(path)
+    return files
+
+
+def decompress(file):
+    """Restore the compressed file, and delete it"""
+    target = plain_name(file)
+    with open_any(file, "rb") as IN, open(target + ".part", "wb") as OUT:
+        shutil.copyfileobj(IN, OUT, 1 << 20)
+    shutil.copystat(file, target + ".part")
+    os.replace(target + ".part", target)
+    os.remove(file)
+    return target
+
+
+def process(file):
+    """Compress or decompress the file; returns (file, size before, size after, error)"""
+    before = os.path.getsize(file)
+    try:
+        if args.decompress:
+            new = decompress(file)
+        else:
+            new = compress(file, args.method, args.level)
+    except (OSError, EOFError, ValueError) as e:
+        return file, before, before, str(e)
+    return file, before, os.path.getsize(new), None
+
+
+files = []
+skipped = []
+for dir in dirs:
+    if not os.path.isdir(dir):
+        continue
+    if not args.decompress and not args.force and not finished(dir):
+        skipped.append(dir)
+        continue
+    files.extend(candidates(dir))
+
+if skipped:
+    print(f"{len(skipped)} jobs have not finished and have been left alone:")
+    print("  " + " ".join(skipped[:10]) + (" ..." if len(skipped) > 10 else ""))
+
+if args.dry_run:
+    for f in files:
+        print(f)
+    exit(0)
+
+before = after = 0
+failed = 0
+with ThreadPoolExecutor(max_workers=max(1, args.nproc)) as pool:
+    for file, b, a, error in pool.map(process, files):
+        if error:
+            print(f"{file}: {error}")
+            failed += 1
+        before += b
+        after += a
+
+action = "Decompressed" if args.decompress else "Compressed"
+print(f"{action} {len(files) - failed} files: {before/1048576:.1f} MB -> {after/1048576:.1f} MB")
+if failed:
+    exit(1)
@@ -0,0 +1,64 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Library of the Dalton basis sets in $CAMCASP/basis/dalton.
+
+Each basis file is read when it is first needed, and kept for the rest
+of the process. The s and p functions used for the farbond ghost atoms
+in the MC+ basis are read from the file of the same name in the sp/
+subdirectory; it is an error if there isn't one, as it has always been.
+
+provides functions:
+* library
+
+provides classes:
+* BasisLibrary
+* BasisError
+"""
+
+import os
+
+
+class BasisError(Exception):
+    pass
+
+
+class BasisLibrary:
+    """The basis sets in a Dalton basis directory, read as they are needed.
+
+    texts[name] is the text of the basis file, where name is the path
+    used in the #include lines of the .DALtemplate file, e.g. "sadlej/O"
+    or "midbond/Mb_3s2p1d".
+    """
+    def __init__(self, basis_dir):
+        self.dir = basis_dir
+        self.texts = {}
+
+    def _read(self, name):
+        name = os.path.normpath(name.strip())
+        if name not in self.texts:
+            try:
+                with open(os.path.join(self.dir, name), encoding="latin-1") as B:
+                    self.texts[name] = B.read()
+            except OSError:
+                raise BasisError(f"Basis {name} not found in {self.dir}")
+        return self.texts[name]
+
+    def text(self, name):
+        """Text of the basis file for name, e.g. "sadlej/O" """
+        return self._read(name)
+
+    def sp(self, name):
+        """Text of the s and p functions of the basis for name, from the
+        sp/ subdirectory"""
+        return self._read(os.path.join("sp", name.strip()))
+
+
+_libraries = {}
+
+def library(basis_dir):
+    """The BasisLibrary for basis_dir, one per process"""
+    if basis_dir not in _libraries:
+        _libraries[basis_dir] = BasisLibrary(basis_dir)
+    return _libraries[basis_dir]
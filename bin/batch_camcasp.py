@@ -6,10 +6,15 @@ as specified by a cluster-file template and a geometry file.
 """
 
 import os
-import re
 import sys
 import argparse
+import shutil
 import subprocess
+import tempfile
+from cltspec import parse_clt, standard_runtype, CltError, JobSpec
+from clustercache import patch_setup, check_patch
+from jobmodel import Predictor
+from scandata import read_geometry
 
 
 parser=argparse.ArgumentParser(formatter_class = argparse.RawDescriptionHelpFormatter,
@@ -40,6 +45,25 @@ cluster file template. Lines in the geometry file beginning with "!" are
 ignored. The job is run either in a directory <job> (for sapt-dft
 calculations) or <job>_dHF (for delta-HF calculations). 
 
+Before the jobs are set up, the atoms of the two molecules are placed
+for every point, and points where an atom of A and an atom of B are
+closer than --min-contact times the sum of their van der Waals radii are
+reported and skipped (see contacts.py). The SCF calculations often fail
+for such points, and their energies are of little use. The molecules are
+the first two named in the cluster file, and the check needs NumPy.
+
+active_scan.py runs a scan a batch at a time through this script,
+choosing each batch of points from a large pool by a surrogate fitted to
+the energies found so far, until the surrogate is accurate enough.
+
+A geometry file that covers the distances and orientations evenly, with
+fewer points than a regular grid, can be generated by make_scan.py from
+the cluster-file template. A large set of candidate geometries can be
+screened first by
+screen_scan.py, which evaluates the long-range (multipole) energies of
+all of them at once, and writes a geometry file without the points
+that are inside the repulsive wall or too far apart to matter.
+
 The -q or --queue may be set to "bg", "batch" or "none". The last of
 these may be used to check that the files have been set up correctly.
 The jobs will not be run in this case. It is strongly recommended that
@@ -50,10 +74,29 @@ below a certain level (usually 1.5).
 When the calculations have completed, the extract_saptdft.py script
 will extract a table of the energies for all dimer geometries:
 extract_saptdft.py <job>_*
+and export_scan.py will write the geometries and all the energy terms
+as a NumPy .npz or CSV file for fitting:
+export_scan.py <job> <geomfile> --npz <job>.npz
 
 If any of the jobs fail, delete just their directories, and run the
 whole set again when the problems have been fixed. Any jobs for which
-the directories are present will be skipped.
+the directories are present will be skipped. scan_status.py reports how
+many jobs have finished, failed or are still running, and lists the
+failed ones and their points for this.
+
+With --template-mode, the files for all the jobs are set up before any
+are submitted. The cluster program is run for the first two jobs only,
+and the files for the others are obtained by changing the job name and
+the atom coordinates in those for the first job. This is only done if
+the files for the second job obtained in this way agree with those from
+the cluster program. It is not possible if the files contain other
+geometry-dependent data, such as midbond positions.
+
+The memory and time needed by each job are estimated from the profile
+records of earlier jobs (see jobmodel.py). The jobs are submitted in
+order of decreasing estimated time, and if there are profile records for
+this kind of job, the memory (unless given by --memory) and the wall
+time requested from the scheduler are set from the estimates.
 """
 )
 
@@ -75,6 +118,12 @@ parser.add_argument("--scfcode", help="Force use of scfcode",
                     choices=["dalton2006","dalton","dalton2013","nwchem","psi4",""], default="")
 parser.add_argument("--nproc", help="Number of processors to use")
 parser.add_argument("--cores", help="Number of cores on machine")
+parser.add_argument("--template-mode", action="store_true",
+                    help="set up the cluster files for the first job only, and patch"
+                    " them for the others")
+parser.add_argument("--min-contact", type=float, default=0.5, metavar="SCALE",
+                    help="skip points with atoms closer than SCALE times the sum of their"
+                    " van der Waals radii (default 0.5, 0 for no check)")
 parser.add_argument("-v", "--verbose", action="store_true",
                     help="print additional information about the job")
 
@@ -99,54 +148,140 @@ else:
         #  Use the Linux batch queue unless overridden
         queue = "batch"
 
-#  Read template file
+#  Read template file, and parse it once for all the jobs
 with open(args.template) as T:
     template = T.read()
+try:
+    spec = parse_clt(args.template, text=template)
+except CltError as e:
+    print(e)
+    exit(1)
+
+points = []
+for index, g in read_geometry(args.geomfile):
+    job = f"{args.job}_{index}"
+    if os.path.exists(job+suffix):
+        #  Directory already exists for this job.
+        #  We assume that this job has been completed.
+        continue
+    points.append(dict(job=job, Rx=g[0], Ry=g[1], Rz=g[2],
+                       alpha=g[3], Nx=g[4], Ny=g[5], Nz=g[6],
+                       basis=args.basis, type=type, task=task))
 
-skip = 0
-g = []
-with open(args.geomfile) as GEOM:
-    for line in GEOM:
-        #  Skip blank lines and lines starting with "!" or "#".
-        if re.match(r'\s*(!|#|$)', line):
-            pass
-        #  Exit if line starts with "end"
-        elif re.match(r' *end', line, flags=re.I):
-            break
+if args.min_contact > 0 and points:
+    #  Skip the points where the molecules overlap too much
+    try:
+        import contacts
+    except ImportError:
+        print("NumPy is needed for the close-contact check, which has been skipped")
+    else:
+        try:
+            ratio, describe = contacts.contact(spec, points, args.min_contact)
+        except contacts.ContactError as e:
+            print(f"Close-contact check not possible: {e}")
         else:
-            #  Check for "skip nn" line
-            m = re.match(r' *skip +(\d+)', line, flags=re.I)
-            if m:
-                #  Skip lines
-                skip = int(m.group(1))
-                continue
-            if skip > 0:
-                skip -= 1
-                continue
-            g = line.split()
-            job = f"{args.job}_{g[0]}"
-            if os.path.exists(job+suffix):
-                #  Directory already exists for this job.
-                #  We assume that this job has been completed.
-                pass
-            else:
-                with open(f"{job}{suffix}.clt","w") as CLT:
-                    CLT.write(template.format(job=job, Rx=g[1], Ry=g[2], Rz=g[3],
-                                              alpha=g[4], Nx=g[5], Ny=g[6], Nz=g[7],
-                                              basis=args.basis, type=type, task=task))
-
-                arguments = ["submit_camcasp.py", "-q", args.queue, job,
-                             "--clt", f"{job}{suffix}.clt", "-d", job+suffix,
-                             "--ifexists", "abort"]
-                if args.direct:
-                    arguments.extend(["--direct"])
-                if args.memory:
-                    arguments.extend(["-M", args.memory])
-                if args.scfcode:
-                    arguments.extend(["--scfcode", args.scfcode])
-                if args.verbose:
-                    arguments.extend(["--verbose"])
-                    print(" ".join(arguments))
-
-                subprocess.call(arguments)
-      
+            close = [i for i in range(len(points)) if ratio[i] < args.min_contact]
+            for i in close:
+                print(f"Skipping {points[i]['job']}: {describe(i)}")
+            if close:
+                print(f"{len(close)} of {len(points)} points skipped")
+            points = [p for i, p in enumerate(points) if ratio[i] >= args.min_contact]
+
+jobs = []
+specs = {}
+for values in points:
+    job = values["job"]
+    with open(f"{job}{suffix}.clt","w") as CLT:
+        CLT.write(template.format(**values))
+    jobspec = spec.format(**values)
+    jobspec.file = f"{job}{suffix}.clt"
+    jobspec.save(f"{job}{suffix}.spec")
+    jobs.append(job)
+    specs[job] = jobspec
+
+#  Estimate the requirements of each job from the profile records of
+#  earlier jobs, and submit the longest first
+predictor = Predictor.load()
+cores = int(args.cores or os.getenv("CORES") or 2)
+cores_camcasp = int(os.getenv("CORES_CAMCASP") or 2)
+estimates = {}
+for job in jobs:
+    jobspec = specs[job]
+    runtype = standard_runtype(jobspec.runtype) or ("deltahf" if args.dHF else "saptdft")
+    scfcode = args.scfcode or jobspec.scfcode or os.getenv("CAMCASP_SCFCODE", "psi4")
+    if scfcode.startswith("dalton") and scfcode != "dalton2006":
+        scfcode = "dalton"
+    estimates[job] = predictor.estimate(jobspec, runtype, scfcode, cores, cores_camcasp)
+    if args.verbose:
+        print(f"{job}: {estimates[job]}")
+jobs.sort(key=lambda job: estimates[job].time, reverse=True)
+
+options = []
+if args.direct:
+    options.extend(["--direct"])
+if args.memory:
+    options.extend(["-M", args.memory])
+if args.scfcode:
+    options.extend(["--scfcode", args.scfcode])
+if args.verbose:
+    options.extend(["--verbose"])
+
+def job_arguments(job):
+    return [job, "--clt", f"{job}{suffix}.clt", "-d", job+suffix,
+            "--spec", os.path.join(here, f"{job}{suffix}.spec")]
+
+def setup(job, reference=None):
+    """Set up the files for a job without running it"""
+    arguments = ["runcamcasp.py"] + job_arguments(job) + ["--setup", "--ifexists", "abort"]
+    if reference:
+        arguments.extend(["--setup-from", reference+suffix])
+    if args.scfcode:
+        arguments.extend(["--scfcode", args.scfcode])
+    if args.verbose:
+        print(" ".join(arguments))
+    with open(os.devnull, "w") as NULL:
+        return subprocess.call(arguments, stdout=None if args.verbose else NULL)
+
+restart = []
+if args.template_mode and len(jobs) > 2:
+    #  Set up the first two jobs in full, and check that the second can
+    #  be obtained by patching the files for the first.
+    reference = jobs[0]
+    for job in jobs[:2]:
+        if setup(job) > 0:
+            print(f"Setup failed for {job}")
+            exit(1)
+    check = tempfile.mkdtemp(dir=here)
+    refspec = JobSpec.load(os.path.join(reference+suffix, reference+".spec"))
+    files = patch_setup(reference+suffix, reference, refspec, check, jobs[1],
+                        JobSpec.load(f"{jobs[1]}{suffix}.spec"))
+    if files is None:
+        error = "atom positions can't be matched unambiguously"
+    else:
+        error = check_patch(check, jobs[1]+suffix)
+    shutil.rmtree(check)
+    if error:
+        print(f"Template mode can't be used for this scan: {error}")
+        reference = None
+    else:
+        print(f"Setting up files for the remaining jobs from those for {reference}")
+    for job in jobs[2:]:
+        if setup(job, reference) > 0:
+            print(f"Setup failed for {job}")
+            exit(1)
+    restart = ["--restart"]
+
+for job in jobs:
+    #  Size the scheduler request from the estimate, if it is based on
+    #  profile records
+    request = []
+    if estimates[job].steps:
+        memory, walltime = estimates[job].request()
+        request = ["--walltime", walltime]
+        if not args.memory:
+            request.extend(["-M", str(memory)])
+    arguments = ["submit_camcasp.py", "-q", args.queue] + request[:2] + job_arguments(job) \
+                + ["--ifexists", "abort"] + restart + options + request[2:]
+    if args.verbose:
+        print(" ".join(arguments))
+    subprocess.call(arguments)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+#  -*-  coding: utf-8  -*-
+
+"""
+Carry out the dispersion (Casimir) step of localize.py for a batch of
+molecules, and collect the dispersion potentials into a single file.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import glob
+import os
+import re
+import sys
+from camcasp import die, dispersion
+
+parser=argparse.ArgumentParser(formatter_class = argparse.RawDescriptionHelpFormatter,
+description="""
+Calculate dispersion coefficients for a batch of molecules and collect them
+into a single indexed potential file.
+""", epilog="""
+Each job directory is one in which a CamCASP properties calculation has
+been run and the localization (and normally the refinement) steps of
+localize.py have been completed, e.g.
+  batch_casimir.py H2O/avtz NH3/avtz CH4/avtz --subdir L2 --nproc 4
+The directories may also be listed in a manifest file, one per line:
+  <directory> [<name>] [key=value ...]
+where <name> is the CamCASP job name and the keys may be any of subdir,
+limit, wsmlimit, hlimit, weight, isotropic (yes/no) and norefine (yes/no),
+overriding the command-line settings for that job. Lines starting with
+"!" or "#" are ignored. If the job name is omitted, it is taken from the
+<name>_casimir.prss file in the directory.
+
+The settings have the same meaning as for localize.py, and the file names
+follow the same conventions, so that for each job the casimir output is
+<prefix>_casimir.out and the potential is in <prefix>_C<n>.pot in the job
+directory (or its --subdir subdirectory). Jobs for which the potential
+file already exists are not recalculated unless --force is specified.
+Up to --nproc jobs are run at once.
+
+The potentials are concatenated, in the order given, into <output>.pot,
+each preceded by a line
+  ! INDEX <n> <name> <directory>
+and an index file <output>.index is written with one line for each site
+pair of each molecule, giving the index, molecule name, site names, the
+line number in <output>.pot at which the site-pair block starts, and the
+isotropic C6, C8 and C10 coefficients (hartree bohr^n).
+""")
+
+parser.add_argument("dirs", nargs="*", default=[], help="Job directories")
+parser.add_argument("--manifest", help="File listing job directories")
+parser.add_argument("--subdir", "-d", help="Subdirectory for localization files")
+parser.add_argument("--limit", default=2, type=int,
+                    help="Maximum rank for local polarizabilities (default 2)")
+parser.add_argument("--wsmlimit", type=int,
+                    help="Maximum rank for refined local polarizabilities (default = limit)")
+parser.add_argument("--hlimit", "--Hlimit", type=int,
+                    help="Maximum rank for local polarizabilities on hydrogen (default = limit)")
+parser.add_argument("--weight", type=int, default=3, choices=list(range(0,7)),
+                    help="weight scheme used in refinement (default 3)")
+parser.add_argument("--isotropic", action="store_true",
+                    help="Use the isotropic refined polarizabilities")
+parser.add_argument("--norefine", action="store_true",
+                    help="Use the unrefined localized polarizabilities")
+parser.add_argument("--force", action="store_true",
+                    help="Recalculate dispersion coefficients even if already present")
+parser.add_argument("--nproc", "-n", type=int, default=os.cpu_count(),
+                    help="Number of jobs to run at once (default number of cores)")
+parser.add_argument("-o", "--output", default="dispersion",
+                    help="Prefix for consolidated output files (default dispersion)")
+parser.add_argument("--debug", "--keep", action="store_true",
+                    help="Don't delete intermediate files")
+parser.add_argument("--verbose", "-v", action="count", default=0,
+                    help="Print additional information")
+
+args = parser.parse_args()
+
+yes = ["yes", "y", "true", "on"]
+
+
+class CasimirJob:
+    """Settings for the dispersion calculation for one job directory"""
+    def __init__(self, directory, name=None):
+        self.dir = directory.rstrip("/")
+        self.name = name
+        self.subdir = args.subdir
+        self.limit = args.limit
+        self.wsmlimit = args.wsmlimit
+        self.hlimit = args.hlimit
+        self.weight = args.weight
+        self.isotropic = args.isotropic
+        self.norefine = args.norefine
+
+    def setup(self):
+        """Work out the file names used by localize.py for these settings"""
+        if self.subdir:
+            self.wdir = os.path.join(self.dir, self.subdir)
+        else:
+            self.wdir = self.dir
+        if not self.name:
+            prss = glob.glob(os.path.join(self.wdir,"*_casimir.prss"))
+            if len(prss) != 1:
+                return f"Can't identify the job name in {self.wdir}"
+            self.name = re.sub(r'_casimir\.prss$', '', os.path.basename(prss[0]))
+        if self.wsmlimit:
+            wsmlimit = min(self.limit,self.wsmlimit)
+        else:
+            wsmlimit = self.limit
+        if self.hlimit:
+            self.hlimit = min(self.hlimit,wsmlimit)
+        else:
+            self.hlimit = wsmlimit
+        iso = "iso" if self.isotropic else ""
+        if self.norefine:
+            self.prefix = f"{self.name}_L{self.limit}{iso}"
+        else:
+            self.prefix = f"{self.name}_ref_wt{self.weight}_L{wsmlimit}{iso}"
+            self.limit = wsmlimit
+        maxN = {1: "6", 2: "10", 3: "12"}.get(self.wsmlimit, "n")
+        self.potfile = f"{self.prefix}_C{maxN}{iso}.pot"
+        return None
+
+
+def read_manifest(file):
+    """Read a list of CasimirJob entries from a manifest file"""
+    jobs = []
+    with open(file) as MAN:
+        for n, line in enumerate(MAN, start=1):
+            if re.match(r'\s*(!|#|$)', line):
+                continue
+            words = line.split()
+            job = CasimirJob(words.pop(0))
+            if words and "=" not in words[0]:
+                job.name = words.pop(0)
+            for word in words:
+                m = re.match(r'(\w+)=(\S+)$', word)
+                if not m or not hasattr(job, m.group(1).lower()):
+                    die(f"{file}:{n}: unrecognised entry {word}")
+                key, value = m.group(1).lower(), m.group(2)
+                if key in ["isotropic", "norefine"]:
+                    value = value.lower() in yes
+                elif key in ["limit", "wsmlimit", "hlimit", "weight"]:
+                    value = int(value)
+                setattr(job, key, value)
+            jobs.append(job)
+    return jobs
+
+
+def run(job):
+    """Carry out the dispersion step for one job. Returns an error message or None."""
+    error = job.setup()
+    if error:
+        return error
+    potfile = os.path.join(job.wdir, job.potfile)
+    if os.path.exists(potfile) and not args.force:
+        if args.verbose > 0:
+            print(f"{potfile} present -- dispersion coefficients already calculated")
+        return None
+    header = f"! Dispersion coefficients for {job.name} from {job.wdir}\n"
+    return dispersion(job.name, job.prefix, job.limit, job.hlimit, job.potfile,
+                      header=header, wdir=job.wdir, debug=args.debug)
+
+
+def isotropic_coefficients(lines):
+    """Find the site pairs in a dispersion potential and their isotropic
+    C6, C8 and C10 coefficients.
+
+    Returns a list of (site1, site2, line offset, C6, C8, C10) tuples.
+    """
+    pairs = []
+    columns = None
+    for n, line in enumerate(lines):
+        m = re.match(r'\s*(\S+)\s+(\S+)\s+(C\d+(\s+C\d+)*)\s*$', line)
+        if m:
+            columns = m.group(3).split()
+            pairs.append([m.group(1), m.group(2), n, "", "", ""])
+            continue
+        if columns and re.match(r'\s*00\s+00\s+0\s', line):
+            values = line.split()[3:]
+            for ix, c in enumerate(["C6","C8","C10"]):
+                if c in columns and columns.index(c) < len(values):
+                    pairs[-1][3+ix] = values[columns.index(c)]
+            columns = None
+    return [tuple(p) for p in pairs]
+
+
+jobs = [CasimirJob(d) for d in args.dirs]
+if args.manifest:
+    jobs.extend(read_manifest(args.manifest))
+if not jobs:
+    die("No job directories specified")
+
+print(f"Calculating dispersion coefficients for {len(jobs)} jobs, {args.nproc} at a time")
+sys.stdout.flush()
+with ThreadPoolExecutor(max_workers=max(1,args.nproc)) as pool:
+    errors = list(pool.map(run, jobs))
+
+failed = 0
+potlines = []
+index = []
+for ix, (job, error) in enumerate(zip(jobs, errors), start=1):
+    if error:
+        print(f"{job.dir}: {error}")
+        failed += 1
+        continue
+    with open(os.path.join(job.wdir, job.potfile)) as POT:
+        lines = POT.readlines()
+    start = len(potlines) + 1
+    potlines.append(f"! INDEX {ix} {job.name} {job.wdir}\n")
+    for pair in isotropic_coefficients(lines):
+        s1, s2, offset, c6, c8, c10 = pair
+        index.append(f"{ix:5d}  {job.name:16s} {s1:8s} {s2:8s} {start+1+offset:8d}"
+                     f"  {c6:>14s} {c8:>14s} {c10:>14s}\n")
+    potlines.extend(lines)
+    if not lines[-1].endswith("\n"):
+        potlines.append("\n")
+
+with open(args.output + ".pot","w") as OUT:
+    OUT.writelines(potlines)
+with open(args.output + ".index","w") as OUT:
+    OUT.write(f"! {'Index':>5s}  {'Molecule':16s} {'Site1':8s} {'Site2':8s} {'Line':>8s}"
+              f"  {'C6':>14s} {'C8':>14s} {'C10':>14s}\n")
+    OUT.writelines(index)
+
+print(f"""Dispersion potentials for {len(jobs)-failed} jobs are in {args.output}.pot
+Index of site pairs is in {args.output}.index""")
+if failed > 0:
+    print(f"{failed} jobs failed")
+    exit(1)
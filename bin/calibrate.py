@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Run a small benchmark job with different numbers of cores, and record
+the best settings for this type of node in the calibration table used
+by the "auto" settings in camcasp.rc.
+"""
+
+import argparse
+import math
+import os
+import resource
+import shutil
+import subprocess
+from time import perf_counter
+
+import hardware
+from cltspec import parse_clt, standard_runtype, CltError
+
+camcasp = os.environ.get("CAMCASP", "")
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Calibrate the automatic resource settings for this type of node.
+""",epilog="""
+The benchmark job (by default the helium dimer test job) is run first
+with 1 CamCASP core and each of the numbers of SCF cores listed, and
+then with the chosen number of SCF cores and each of the numbers of
+CamCASP cores listed. The number of cores chosen in each case is the
+largest for which the parallel efficiency, relative to the smallest
+number tried, is at least --efficiency.
+
+The memory recorded is the node's usable memory shared in proportion to
+the cores used, so that jobs can be run side by side, but not less than
+1.5 times the peak memory used by the benchmark.
+
+The entry is added to the calibration table (default
+$CAMCASP/calibration.dat) for this node type, the runtype of the job and
+the SCF code, replacing any earlier entry. Use --runtype "*" to make the
+entry apply to all runtypes.
+
+Run this once on each type of node, on an otherwise idle node.
+""")
+
+parser.add_argument("clt", nargs="?",
+                    default=os.path.join(camcasp, "tests", "He2", "aTZ_MC", "He2.clt"),
+                    help="Cluster file for the benchmark job")
+parser.add_argument("--scfcode", help="SCF code to use", default="")
+parser.add_argument("--runtype", help="Runtype for the table entry"
+                    " (default that of the benchmark job)")
+parser.add_argument("--cores", type=int, nargs="+",
+                    help="Numbers of SCF cores to try (default 1, 2, 4, ...)")
+parser.add_argument("--camcasp-cores", type=int, nargs="+", default=[1, 2, 4],
+                    help="Numbers of CamCASP cores to try")
+parser.add_argument("--efficiency", type=float, default=0.5,
+                    help="Minimum parallel efficiency")
+parser.add_argument("--table", help="Calibration table to update",
+                    default=os.path.join(camcasp, "calibration.dat"))
+parser.add_argument("--dir", default="calibrate",
+                    help="Directory for the benchmark jobs")
+parser.add_argument("--keep", action="store_true",
+                    help="Don't delete the benchmark job directories")
+parser.add_argument("--dry-run", action="store_true",
+                    help="Only show the resources detected")
+args = parser.parse_args()
+
+resources = hardware.detect()
+node = resources.node_type()
+print(resources)
+if args.dry_run:
+    exit(0)
+
+try:
+    spec = parse_clt(args.clt)
+except (CltError, OSError) as e:
+    print(e)
+    exit(1)
+job = os.path.splitext(os.path.basename(args.clt))[0]
+if args.runtype:
+    runtype = args.runtype
+elif spec.runtype:
+    runtype = standard_runtype(spec.runtype) or "*"
+else:
+    runtype = "properties" if len(spec.molecules) == 1 else "saptdft"
+scfcode = args.scfcode or spec.scfcode or os.environ.get("CAMCASP_SCFCODE", "psi4")
+if scfcode in ["dalton2013", "dalton2015", "dalton2016"]:
+    scfcode = "dalton"
+table = os.path.abspath(args.table)
+here = os.getcwd()
+
+usable = resources.usable_cores()
+if args.cores:
+    scf_cores = [n for n in args.cores if n <= usable]
+else:
+    scf_cores = [2**k for k in range(int(math.log2(usable)) + 1)]
+camcasp_cores = [n for n in args.camcasp_cores if n <= usable]
+
+os.makedirs(args.dir, exist_ok=True)
+shutil.copy(args.clt, args.dir)
+os.chdir(args.dir)
+peak = 0.0
+
+
+def run(cores, cores_camcasp):
+    """Run the benchmark job, and return the elapsed time"""
+    global peak
+    name = f"{job}_{cores}_{cores_camcasp}"
+    arglist = ["runcamcasp.py", job, "--clt", os.path.basename(args.clt),
+               "--directory", name, "--work", name, "--ifexists", "delete",
+               "--scfcode", scfcode, "--cores", str(cores),
+               "--cores-camcasp", str(cores_camcasp),
+               "-M", str(max(1, int(resources.usable_memory_gb())))]
+    t = perf_counter()
+    with open(f"{name}.out", "w") as OUT:
+        rc = subprocess.call(arglist, stdout=OUT, stderr=subprocess.STDOUT)
+    t = perf_counter() - t
+    if rc > 0:
+        print(f"Benchmark job failed: see {os.path.join(args.dir, name)}.out")
+        exit(4)
+    #  ru_maxrss is in kB on Linux
+    peak = max(peak, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss/1024**2)
+    print(f"{cores:4d} SCF cores  {cores_camcasp:4d} CamCASP cores  {t:10.1f} s")
+    if not args.keep:
+        shutil.rmtree(name, ignore_errors=True)
+    return t
+
+
+def best(times):
+    """Largest number of cores with the required parallel efficiency"""
+    n0 = min(times)
+    choice = n0
+    for n in sorted(times):
+        if times[n0]*n0/(times[n]*n) >= args.efficiency:
+            choice = n
+    return choice
+
+
+times = {n: run(n, camcasp_cores[0]) for n in scf_cores}
+cores = best(times)
+times = {n: run(cores, n) for n in camcasp_cores}
+cores_camcasp = best(times)
+memory_gb = max(resources.usable_memory_gb()*cores/usable, 1.5*peak, 1.0)
+
+os.chdir(here)
+if not args.keep:
+    shutil.rmtree(args.dir, ignore_errors=True)
+hardware.write_calibration(table, node, runtype, scfcode,
+                           cores, cores_camcasp, math.floor(memory_gb))
+print(f"{node}  {runtype}  {scfcode}: {cores} cores, {cores_camcasp} for CamCASP,"
+      f" {math.floor(memory_gb)} GB")
+print(f"Written to {table}")
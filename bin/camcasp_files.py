@@ -0,0 +1,985 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+# Construction of the data files for the SCF codes from the files
+# generated by the cluster program.
+
+# provides functions:
+# * make_dal
+# * make_dalHF
+# * make_dalMP2
+# * make_dalCC
+# * generate
+# * monomer
+# * dimer_mc
+# * dimer_dc
+# * dimerAB
+# * include
+# * include_sp
+# * make_dalton_datafiles
+# * make_psi4_datafile
+
+import os
+import re
+import basislib
+from camcasp import die
+
+if os.environ.get("CAMCASP"):
+    basis_dir = os.path.join(os.environ["CAMCASP"], "basis", "dalton", "")
+else:
+    basis_dir = None
+
+global ghost
+ghost = []
+
+def make_dal (job, suffix, mol, ac_off=False):
+    file = job.name + suffix
+    scfcode = job.scfcode
+    if scfcode == "dalton2006":
+        type = job.ac_type
+        if type == None or type == "NONE" or ac_off:
+            ac = "!"
+        elif type == "MULTPOLE":
+            if mol.delta_ac == 0.0:
+                ac="! "
+            else:
+                p1 = mol.p1
+                if p1 == None or p1 == 0.0: p1 = 3.5
+                p2 = mol.p2
+                if p2 == None or p2 == 0.0: p2 = 4.7
+                ac = f".DFTAC\n{mol.delta_ac:6.4f} {p1:4.2f} {p2:4.2f}"
+        else:
+            die(f"Asymptotic correction type {type} is incompatible with dalton-2006")
+        if job.cks:
+            c=""
+        else:
+            c="! "
+        if job.direct:
+            d=""
+        else:
+            d="! "
+        with open(file, "w") as A:
+            A.write(template["DFT2006"].format(FUNC=job.func,AC=ac,CKS=c,dir=d))
+    else:
+        #  Dalton 2013 or later
+        type = job.ac_type
+        if not type:
+            type = "MULTPOLE"
+        if type == "NONE" or mol.delta_ac == 0.0 or ac_off:
+            ac = "!"
+        elif type in ["MULTPOLE","LB94","CS00"]:
+            join = job.ac_join
+            #  recommended: TANH, 3.0 4.0
+            if not join:
+                join = "TANH"
+            elif join == "TH":
+                join = "LINEAR"
+            if join == "LINEAR" or join == "TANH":
+                p1_def = 3.5; p2_def = 4.7
+            elif join == "GRAC":
+                p1_def = 0.5; p2_def = 40.0
+            else:
+                die(f"Unrecognized asymptotic correction connection {join}")
+            p1 = job.ac_p1
+            if p1 == None or p1 == 0.0 : p1 = p1_def
+            p2 = job.ac_p2
+            if p2 == None or p2 == 0.0 : p2 = p2_def
+            ac = f""".DFTAC\n{type}\n{join}\n"""
+            acvar = mol.ac_variable
+            if acvar:
+                ac += "VARSHIFT\n"
+            else:
+                ac += "FIXSHIFT\n"
+            # print acshift, p1, p2
+            ac += f"{mol.delta_ac:8.5f} {mol.delta_ac:8.5f} {p1:4.1f} {p2:4.1f}"
+        else:
+            die(f"Unrecognized asymptotic correction type {type}")
+        direct = job.direct
+        if direct:
+            d=""
+        else:
+            d="! "
+        with open(file, "w") as A:
+            A.write(template["DFT2013"].format(FUNC=job.func,AC=ac,dir=d))
+
+def make_dalHF (file, direct):
+    with open(file, "w") as A:
+        if direct:
+            d=""
+        else:
+            d="! "
+        A.write(template["HF"].format(dir=d))
+
+def make_dalMP2(file, direct):
+    with open(file, "w") as A:
+        if direct:
+            d=""
+        else:
+            d="! "
+        A.write(template["MP2"].format(dir=d))
+
+def make_dalCC (file, direct):
+    with open(file, "w") as A:
+        if direct:
+            d=""
+        else:
+            d="! "
+        A.write(template["CC"].format(dir=d))
+
+def generate(jobname, runtype="properties", basistype="", nomb=False,
+             mono=False):
+    """  Generate .mol files for a CamCASP job.
+
+    Translates a template file generated by cluster into a Dalton .mol file.
+    runtype may be properties, saptdft, delta-HF or supermol.
+    basistype may be mc, mc+, dc, dc+ or mono
+    nomb=True means that no mid-bond functions are to be used.
+    The last two are irrelevant for a properties calculation.
+    """
+
+    ABbasis=False
+
+    #  Set the mb
+    if nomb or basistype == "mc" or basistype == "dc":
+        use_midbond = False
+    elif basistype == "mc+" or basistype == "dc+":
+        use_midbond = True
+    else:
+        use_midbond = False
+
+    #  Now for some special cases:
+    if runtype == "deltahf":
+    #  Only dc or dc+ basis types are allowed:
+        if basistype == "dc" or basistype == "dc+":
+            #  We also need the dimer AB
+            ABbasis = True
+        else:
+            print(f"ERROR: Inappropriate basis type {basistype}")
+            die("Use only DC or DC+ basis types for a Delta-HF calculation.")
+
+    elif runtype == "supermol":
+        #  Also need the dimer AB
+        ABbasis = True
+
+    basistype=str.lower(basistype)
+    # print(f"Basis type = {basistype}")
+    if basistype == "mono":
+        pass
+    elif use_midbond and (basistype == "mc+" or basistype == "dc+"):
+        print("Mid-bond basis functions will be used\n")
+    else:
+        print("Mid-bond basis functions will not be used\n")
+
+    with open(f"{jobname}.DALtemplate") as IN:
+        lines=IN.readlines()
+        # print(lines)
+
+    if basistype == "mono":
+        # print("calling monomer")
+        monomer(jobname, lines)
+    elif basistype == "dc" or basistype == "dc+":
+        dimer_dc(jobname, lines, basistype, use_midbond)
+    elif basistype == "mc" or basistype == "mc+":
+        dimer_mc(jobname, lines, basistype, use_midbond)
+
+    if ABbasis:
+        dimerAB(jobname, lines, basistype, use_midbond)
+
+    return
+
+
+def monomer(jobname,lines):
+
+    """Monomer run. Create only one file, for molecule A."""
+
+    import re
+
+    # print("Entering monomer")
+    with open(f"{jobname}_A.mol", "w") as OUT:
+        # print(f"{jobname}_A.mol opened")
+        molA=True
+        molB=True
+        for line in lines[:]:
+            # print(line)
+            if re.match(r'#molecule A', line):
+                molA=True
+                molB=False
+            elif re.match(r'#molecule B', line):
+                molA=False
+                molB=True
+            elif re.match(r'#midbond', line):
+                molA=False
+                molB=False
+            elif re.match(r'#include', line) and molA:
+                m = re.match(r'#include +(.+)$', line)
+                include(m.group(1),OUT,False)
+            elif molA:
+                OUT.write(line)
+
+def dimer_mc(jobname, lines, basistype, use_midbond):
+
+    """Calculation using the monomer basis (mc or mc+).
+
+    Molecule A: include basis functions for molecule A. For mc+, also
+    include farbond (s & p) functions for molecule B, and midbond
+    functions if specified.
+    Molecule B: include basis functions for molecule B. For mc+, also
+    include farbond (s & p) functions for molecule A, and midbond
+    functions if specified.
+    """
+
+    import re
+
+    global ghost
+    ghost = []
+    with open(f"{jobname}_A.mol","w")as OUT:
+        molA = True
+        molB = True
+        mb = True
+        for line in lines[:]:
+            if re.search(r'Atomtypes=', line):
+                m=re.search(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', line)
+                if basistype == "mc+":
+                    n=int(m.group(1))+int(m.group(2))
+                    if use_midbond:
+                        n=n+1
+                else:
+                    n=int(m.group(1))
+                line=re.sub(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', "Atomtypes=" + str(n), line)
+                line=re.sub(r'Charge=\s+(-?\d+)\s+\+\s+(-?\d+)', r'Charge=\1', line)
+                OUT.write(line)
+
+            elif re.match(r'#molecule A', line):
+                molA = True
+                molB = False
+                mb = False
+            elif re.match(r'#molecule B', line):
+                if basistype == "mc+":
+                    molA = False
+                    molB = True
+                    mb = False
+                else:
+                    molA = False
+                    molB = False
+                    mb = False
+            elif re.match(r'#midbond', line):
+                if basistype == "mc+":
+                    molA = False
+                    molB = False
+                    mb=use_midbond
+                else:
+                    molA = False
+                    molB = False
+                    mb = False
+            elif re.match(r'#include', line):
+                m=re.match(r'#include +(.+)$', line)
+                bfn=m.group(1)
+                if molA:
+                    include(bfn,OUT,False)
+                if basistype == "mc+":
+                    if mb:
+                        include(bfn,OUT,True)
+                    if molB:
+                        include_sp(bfn)
+            elif re.match(r'Charge', line):
+                m=re.match(r'Charge=\s*(\d+\.\d+)', line)
+                # If the charge is 1.0 it is a hydrogen.
+                # itis_h = (m.group(1) == "1.0")
+                if m.group(1) == "1.0":
+                    itis_h=True
+                else:
+                    itis_h=False
+                if molA:
+                    OUT.write(line)
+                if mb:
+                    line = re.sub(r'=\s+\d+\.', '=0.', line)
+                    ghost.append(line)
+                if molB:
+                    if itis_h:
+                        line="Charge=0.0 Atoms=1 Blocks=1 1 \n"
+                    else:
+                        line="Charge=0.0 Atoms=1 Blocks=2 1 1 \n"
+                    ghost.append(line)
+            else:
+                if molA:
+                    OUT.write(line)
+                elif mb or molB:
+                    ghost.append(line)
+        OUT.writelines(ghost)
+
+    #  Molecule B
+    ghost = []
+    with open(f"{jobname}_B.mol","w") as OUT:
+        molA = True
+        molB = True
+        mb = True
+        for line in lines[:]:
+            if re.search(r'Atomtypes=', line):
+                m=re.search(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', line)
+                if basistype == "mc+":
+                    n=int(m.group(1))+int(m.group(2))
+                    if use_midbond:
+                        n=n+1
+                else:
+                    n=int(m.group(2))
+                line=re.sub(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', "Atomtypes=" + str(n), line)
+                line=re.sub(r'Charge=\s*(-?\d+)\s+\+\s+(-?\d+)', r'Charge=\2', line)
+                OUT.write(line)
+            elif re.match(r'#molecule A', line):
+                if basistype == "mc+":
+                    molA = True
+                    molB = False
+                    mb = False
+                else:
+                    molA = False
+                    molB = False
+                    mb = False
+            elif re.match(r'#molecule B', line):
+                molA = False
+                molB = True
+                mb = False
+            elif re.match(r'#midbond', line):
+                if basistype == "mc+":
+                    molA = False
+                    molB = False
+                    mb=use_midbond
+                else:
+                    molA = False
+                    molB = False
+                    mb = False
+            elif re.match(r'#include', line):
+                m=re.match(r'#include +(.+)$', line)
+                bfn=m.group(1)
+                if molB:
+                    include(bfn,OUT,False)
+                if basistype == "mc+":
+                    if mb:
+                        include(bfn,OUT,True)
+                    if molA:
+                        include_sp(bfn)
+            elif re.match(r'Charge', line):
+                m=re.match(r'Charge=\s*(\d+\.\d+)', line)
+                # If the charge is 1.0 it is a hydrogen.
+                itis_h = (m.group(1) == "1.0")
+                if molA:
+                    if itis_h:
+                        line="Charge= 0.0 Atoms=1 Blocks=1 1 \n"
+                    else:
+                        line="Charge= 0.0 Atoms=1 Blocks=2 1 1 \n"
+                    ghost.append(line)
+                if mb:
+                    line = re.sub(r'=\s+\d+\.', '=0.', line)
+                    ghost.append(line)
+                if molB:
+                    OUT.write(line)
+            else:
+                if molB:
+                    OUT.write(line)
+                elif molA or mb:
+                    ghost.append(line)
+        OUT.writelines(ghost)
+
+
+def dimer_dc (jobname, lines, basistype, use_midbond):
+
+    """Dimer basis calculation (dc or dc+).
+    Molecule A: include all basis functions, with ghost nuclei for
+    molecule B, and for the midbond functions if specified.
+    Likewise for molecule B.
+    """
+
+    import re
+
+    global ghost
+    ghost = []
+    with open(f"{jobname}_A.mol","w") as OUT:
+        molA = True
+        molB = True
+        mb = True
+        for line in lines[:]:
+            if re.search(r'Atomtypes=', line):
+                m=re.search(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', line)
+                n=int(m.group(1))+int(m.group(2))
+                if basistype == "dc+" and use_midbond:
+                    n=n+1
+                line=re.sub(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', "Atomtypes=" + str(n), line)
+                line=re.sub(r'Charge=\s*(-?\d+)\s+\+\s+(-?\d+)', r'Charge=\1', line)
+                OUT.write(line)
+            elif re.match(r'#molecule A', line):
+                molA = True
+                molB = False
+                mb = False
+            elif re.match(r'#molecule B', line):
+                molA = False
+                molB = True
+                mb = False
+            elif re.match(r'#midbond', line):
+                if basistype == "dc":
+                    molA = False
+                    molB = False
+                    mb = False
+                else:
+                    molA = False
+                    molB = False
+                    mb = use_midbond
+            elif re.match(r'#include', line):
+                m=re.match(r'#include +(.+)$', line)
+                bfn=m.group(1)
+                if molA:
+                    include(bfn,OUT,False)
+                elif molB or mb:
+                    include(bfn,OUT,True)
+            elif re.match(r'Charge', line):
+                if molA:
+                    OUT.write(line)
+                elif molB or mb:
+                    line = re.sub(r'=\s*\d+\.', '=  0.', line)
+                    ghost.append(line)
+            else:
+                if molA:
+                    OUT.write(line)
+                elif mb or molB:
+                    ghost.append(line)
+        OUT.writelines(ghost)
+
+    #  Molecule B: include all basis functions, with ghost nuclei for
+    #      molecule A, and for the midbond functions if specified.
+    ghost = []
+    with open(f"{jobname}_B.mol", "w") as OUT:
+        molA = True
+        molB = True
+        mb = True
+        for line in lines[:]:
+            if re.search(r'Atomtypes', line):
+                m=re.search(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', line)
+                n=int(m.group(1))+int(m.group(2))
+                if basistype == "dc+" and use_midbond:
+                    n=n+1
+                line=re.sub(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', 'Atomtypes=' + str(n), line)
+                line=re.sub(r'Charge=\s*(-?\d+)\s+\+\s+(-?\d+)', r'Charge=\2', line)
+                OUT.write(line)
+            elif re.match('#molecule A', line):
+                molA = True
+                molB = False
+                mb = False
+            elif re.match(r'#molecule B', line):
+                molA = False
+                molB = True
+                mb = False
+            elif re.match(r'#midbond', line):
+                if basistype == "dc+":
+                    molA = False
+                    molB = False
+                    mb=use_midbond
+                else:
+                    molA = False
+                    molB = False
+                    mb = False
+            elif re.match(r'#include', line):
+                m=re.match(r'#include +(.+)$', line)
+                bfn=m.group(1)
+                if molB:
+                    include(bfn,OUT,False) 
+                elif molA or mb:
+                    include(bfn,OUT,True) 
+            elif re.match(r'Charge', line):
+                if molA or mb:
+                    line = re.sub(r'=\s+\d+\.', '=0.', line)
+                    ghost.append(line)
+                elif molB:
+                    OUT.write(line)
+            else:
+                if molB:
+                    OUT.write(line)
+                elif molA or mb:
+                    ghost.append(line)
+        OUT.writelines(ghost)
+
+
+def dimerAB(jobname, lines, basistype, use_midbond):
+
+    """Set up the data file for dimer AB.
+
+    Needed only for supermolecular and Delta-HF calculations.
+    """
+
+    import re
+
+    # print("Entering dimerAB")
+    with open(f"{jobname}_AB.mol", "w") as OUT:
+        molA = True
+        molB = True
+        mb = False
+        for line in lines[:]:
+            # print(line, end="")
+            if re.search(r'Atomtypes', line):
+                m=re.search(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', line)
+                n=int(m.group(1))+int(m.group(2))
+                if use_midbond:
+                    n=n+1
+                line = re.sub(r'Atomtypes=\s+(\d+)\s+\+\s+(\d+)', 'Atomtypes=' + str(n), line)
+                # Set dimer charge to the sum of the monomer charges
+                m = re.search(r'Charge=\s*(-?\d+)\s+\+\s+(-?\d+)', line)
+                if m:
+                    Qtot = int(m.group(1))+int(m.group(2))
+                else:
+                    Qtot = 0
+                line = re.sub(r'Charge=\s+(-?\d+)\s+\+\s+(-?\d+)', 'Charge=' + str(Qtot), line)
+                OUT.write(line)
+            elif re.match(r'#molecule A', line):
+                molA = True
+                molB = False
+                mb = False
+            elif re.match(r'#molecule B', line):
+                molA = False
+                molB = True
+                mb = False
+            elif re.match(r'#midbond', line):
+                if basistype == "dc":
+                    molA = False
+                    molB = False
+                    mb = False
+                else:
+                    molA = False
+                    molB = False
+                    mb=use_midbond
+            elif re.match(r'#include', line):
+                m=re.match(r'#include +(.+)$', line)
+                if molA or molB or mb:
+                    include(m.group(1),OUT,False)
+            elif re.match(r'Charge', line):
+                if mb:
+                    line = re.sub(r'=\s+\d+\.', '=0.', line)
+                if molA or molB or mb:
+                    OUT.write(line)
+            elif molA or mb or molB:
+                OUT.write(line)
+
+
+
+def _library():
+    if basis_dir is None:
+        die("Environment variable CAMCASP has not been defined")
+    return basislib.library(basis_dir)
+
+
+def include(name,F,gh):
+    """Copy basis "name" to output stream F or to the ghost atom defn."""
+    try:
+        text = _library().text(name)
+    except basislib.BasisError as e:
+        die(str(e))
+    if gh:
+        ghost.append(text)
+    else:
+        F.write(text)
+
+
+def include_sp(name):
+    """Copy basis "name" to ghost lines, including only s and p
+    functions."""
+    try:
+        ghost.append(_library().sp(name))
+    except basislib.BasisError as e:
+        die(f"{e}: the farbond s and p functions are needed for the MC+ basis")
+
+
+              
+#-----------------------------------------------------------------------
+
+#  Templates for Dalton .dal files
+template = {}
+
+template["DFT2006"]="""**DALTON INPUT
+.RUN WAVE FUNCTION
+{dir}.DIRECT
+**INTEGRALS
+.NOSUP
+.PRINT
+    1
+**WAVE FUNCTIONS
+.DFT
+{FUNC}
+.INTERFACE
+*AUXILIARY INPUT
+.NOSUPMAT
+*ORBITALS
+.NOSUPSYM
+.AO DELETE
+    1.0E-6
+.CMOMAX
+    1000.0
+*DFT INPUT
+{CKS}.CKS
+.DFTELS
+0.01
+{AC}
+.RADINT
+1.0E-13
+.ANGINT
+35
+*SCF INPUT
+.THRESH
+1.0D-6
+*ORBITAL INPUT
+*END OF INPUT
+"""
+
+# 2021: Removed the .NOSUPSYM commands from the *ORBITALS block as it is no longer
+#  supported.
+template["DFT2013"] = """**DALTON INPUT
+.RUN WAVE FUNCTION
+{dir}.DIRECT
+**INTEGRALS
+.NOSUP
+.PRINT
+    1
+**WAVE FUNCTIONS
+.DFT
+{FUNC}
+.INTERFACE
+*AUXILIARY INPUT
+.NOSUPMAT
+*ORBITALS
+.AO DELETE
+    1.0E-6
+.CMOMAX
+    1000.0
+*DFT INPUT
+! .CKS
+.DFTELS
+0.01
+{AC}
+.RADINT
+1.0E-13
+.ANGINT
+35
+*SCF INPUT
+.THRESH
+1.0D-6
+*ORBITAL INPUT
+*END OF INPUT
+"""
+
+template["HF"] = """**DALTON INPUT
+.RUN WAVE FUNCTION
+{dir}.DIRECT
+**INTEGRALS
+.NOSUP
+.PRINT
+    1
+**WAVE FUNCTIONS
+.HF
+.INTERFACE
+*AUXILIARY INPUT
+.NOSUPMAT
+.NOSUPSYM
+.AO DELETE
+    1.0E-6
+.CMOMAX
+    1000.0
+*SCF INPUT
+.THRESH
+1.0D-6
+*ORBITAL INPUT
+*END OF INPUT
+"""
+
+template["MP2"] = """**DALTON INPUT
+.RUN WAVE FUNCTION
+{dir}.DIRECT
+**INTEGRALS
+.NOSUP
+.PRINT
+    1
+**WAVE FUNCTIONS
+.HF
+.MP2
+.INTERFACE
+*AUXILIARY INPUT
+.NOSUPMAT
+*ORBITALS
+*SCF INPUT
+.THRESH
+1.0D-6
+*ORBITAL INPUT
+*END OF INPUT
+"""
+
+template["CC"] = """**DALTON INPUT
+.RUN WAVE FUNCTION
+{dir}.DIRECT
+**INTEGRALS
+.NOSUP
+.PRINT
+    1
+**WAVE FUNCTIONS
+.CC
+*CC INPUT
+.CC(T)
+*SCF INPUT
+.THRESH
+1.0D-6
+*ORBITAL INPUT
+*END OF INPUT
+"""
+
+
+def make_dalton_datafiles(job,verbosity):
+    """ Set up data files for a Dalton job"""
+    #  job.scfcode may be dalton or dalton2006
+    mola = job.mola
+    molb = job.molb
+    
+    if job.runtype == "saptdft":
+        #  SAPT(DFT)
+        generate(job.name, runtype="saptdft", basistype=job.basistype, nomb=job.nomidbond)
+        if job.method == "HF":
+            make_dalHF(f"{job.name}_A.dal", job.direct)
+            make_dalHF(f"{job.name}_B.dal", job.direct)
+        else:
+            make_dal(job, "_A.dal", mola)
+            make_dal(job, "_B.dal", molb)
+
+    elif job.runtype == "deltahf":
+        generate(job.name, runtype="deltahf", basistype=job.basistype, nomb=job.nomidbond)
+        make_dalHF(f"{job.name}_AB.dal", job.direct)
+        make_dalHF(f"{job.name}_A.dal", job.direct)
+        make_dalHF(f"{job.name}_B.dal", job.direct)
+
+    elif job.runtype == "sapt":
+        generate(job.name, runtype="sapt", basistype=job.basistype, nomb=job.nomidbond)
+        make_dalHF(f"{job.name}_A.dal", job.direct)
+        make_dalHF(f"{job.name}_B.dal", job.direct)
+    
+    elif job.runtype == "properties":
+        generate(job.name, runtype="properties", basistype="mono")
+        if job.method == "HF":
+            make_dalHF(f"{job.name}_A.dal", job.direct)
+        else:
+            make_dal(job, "_A.dal", mola)
+      
+    elif job.runtype == "supermol":
+        generate(job.name, runtype="supermol", basistype=job.basistype, nomb=job.nomidbond)
+        if job.method == "HF":
+            make_dalHF(f"{job.name}_A.dal", job.direct)
+            make_dalHF(f"{job.name}_B.dal", job.direct)
+            make_dalHF(f"{job.name}_AB.dal", job.direct)
+        elif job.method == "MP2":
+            make_dalMP2(f"{job.name}_A.dal", job.direct)
+            make_dalMP2(f"{job.name}_B.dal", job.direct)
+            make_dalMP2(f"{job.name}_AB.dal", job.direct)
+        elif job.method == "CC":
+            make_dalCC(f"{job.name}_A.dal", job.direct)
+            make_dalCC(f"{job.name}_B.dal", job.direct)
+            make_dalCC(f"{job.name}_AB.dal", job.direct)
+        elif job.method == "DFT":
+            # Here we do not use the AC so ac_off is set
+            # and the mol class data is irrelevant
+            make_dal(job, "_A.dal", mola, ac_off=True)
+            make_dal(job, "_B.dal", molb, ac_off=True)
+            make_dal(job, "_AB.dal", mola, ac_off=True)
+
+    #  End of make_dalton_datafiles
+
+def make_psi4_datafile(job, verbosity):
+    mola = job.mola
+    molb = job.molb
+    with open(f"{job.name}.psi4") as IN, open(f"{job.name}_AB.in","w") as OUT:
+        if verbosity > 0:
+            print(f"AC shifts: {mola.delta_ac:7.4f}, {molb.delta_ac:7.4f}")
+            print(f"Basis {job.basis}, Aux basis {job.auxbasis},",
+                  f"Atomaux basis {job.atomauxbasis}, functional {job.func}")
+        for line in IN.readlines():
+            if re.search(r'JK_BASIS', line):
+                line = line.format(JK_BASIS=auxbasis_list[auxbasis_map[job.auxbasis]])
+            elif re.search(r'RI_BASIS', line):
+                line = line.format(RI_BASIS=auxbasis_list[auxbasis_map[job.auxbasis]])
+            elif re.search(r'BASIS', line):
+                line = line.format(BASIS=basis_map[job.basis])
+            elif re.search(r'FUNC', line):
+                line = line.format(FUNC=job.func)
+            elif re.search(r'DO_DHF', line):
+                line = line.format(DO_DHF="True")
+            elif re.search(r'AC_SHIFT_A', line):
+                line = line.format(AC_SHIFT_A=str(mola.delta_ac))
+            elif re.search(r'AC_SHIFT_B', line):
+                line = line.format(AC_SHIFT_B=str(molb.delta_ac))
+            OUT.write(line)
+
+
+#  This table translates various basis-set abbreviations into the names
+#  used by Psi4
+basis_map = {
+  "user-def": "user-def",
+  "sadlej":           "sadlej-pvtz",
+  "adz":              "aug-cc-pvdz",
+  "avdz":             "aug-cc-pvdz",
+  "aug-cc-pvdz":      "aug-cc-pvdz",
+  "atz":              "aug-cc-pvtz",
+  "avtz":             "aug-cc-pvtz",
+  "aug-cc-pvtz":      "aug-cc-pvtz",
+  "aqz":              "aug-cc-pvqz",
+  "avqz":             "aug-cc-pvqz",
+  "aug-cc-pvqz":      "aug-cc-pvqz",
+  "dz":               "cc-pvdz",
+  "vdz":              "cc-pvdz",
+  "cc-pvdz":          "cc-pvdz",
+  "tz":               "cc-pvtz",
+  "vtz":              "cc-pvtz",
+  "cc-pvtz":          "cc-pvtz",
+  "datz":             "d-aug-cc-pvtz",
+  "davtz":            "d-aug-cc-pvtz",
+  "d-aug-cc-pvtz":    "d-aug-cc-pvtz",
+  "2-tzvp":           "def2-tzvp",
+  "tzvp-2":           "def2-tzvp",
+  "def2tzvp":         "def2-tzvp",
+  "def2-tzvp":        "def2-tzvp",
+  "2-tzvpp":          "def2-tzvpp",
+  "tzvpp-2":          "def2-tzvpp",
+  "def2tzvpp":        "def2-tzvpp",
+  "def2-tzvpp":       "def2-tzvpp",
+  "dz-pp":            "cc-pvdz-pp",
+  "vdz-pp":           "cc-pvdz-pp",
+  "cc-pvdz-pp":       "cc-pvdz-pp",
+  "tz-pp":            "cc-pvtz-pp",
+  "vtz-pp":           "cc-pvtz-pp",
+  "cc-pvtz-pp":       "cc-pvtz-pp",
+  "qz-pp":            "cc-pvqz-pp",
+  "vqz-pp":           "cc-pvqz-pp",
+  "cc-pvqz-pp":       "cc-pvqz-pp",
+  "adz-pp":           "aug-cc-pvdz-pp",
+  "avdz-pp":          "aug-cc-pvdz-pp",
+  "aug-cc-pvdz-pp":   "aug-cc-pvdz-pp",
+  "atz-pp":           "aug-cc-pvtz-pp",
+  "avtz-pp":          "aug-cc-pvtz-pp",
+  "aug-cc-pvtz-pp":   "aug-cc-pvtz-pp",
+  "aqz-pp":           "aug-cc-pvqz-pp",
+  "avqz-pp":          "aug-cc-pvqz-pp",
+  "aug-cc-pvqz-pp":   "aug-cc-pvqz-pp",
+  "aug-sadlej":       "aug-sadlej-pvtz",
+  "aug-sadlej-pvtz":  "aug-sadlej",
+  "auga-sadlej":      "auga-sadlej-pvtz",
+  "auga-sadlej-pvtz": "auga-sadlej-pvtz",
+  "augb-sadlej":      "augb-sadlej-pvtz",
+  "augb-sadlej-pvtz": "augb-sadlej-pvtz",
+  "def2-qzvpp":       "def2-qzvpp",
+}                   
+
+#  This table translates the Psi4 names into the names used by Dalton
+dalton_map = {
+"user-def":         "user-def",
+"sadlej-pvtz":      "sadlej",
+"aug-cc-pvdz":      "aug-cc-pVDZ",
+"aug-cc-pvdz":      "aug-cc-pVTZ",
+"aug-cc-pvqz":      "aug-cc-pVQZ",
+"cc-pvdz":          "cc-pVDZ",
+"cc-pvtz":          "cc-pVTZ",
+"d-aug-cc-pvtz":    "d-aug-cc-pVTZ",
+"def2-tzvp":        "def2-TZVP",
+"def2-tzvpp":       "def2-TZVPP",
+"cc-pvdz-pp":       "cc-pVDZ-PP",
+"cc-pvtz-pp":       "cc-pVTZ-PP",
+"cc-pvqz-pp":       "cc-pVQZ-PP",
+"aug-cc-pvdz-pp":   "aug-cc-pVDZ-PP",
+"aug-cc-pvtz-pp":   "aug-cc-pVTZ-PP",
+"aug-cc-pvqz-pp":   "aug-cc-pVQZ-PP",
+"aug-sadlej":       "aug-sadlej",
+"auga-sadlej-pvtz": "augA-sadlej",
+"augb-sadlej-pvtz": "augB-sadlej",
+"def2-qzvpp":       "def2-qzvpp",
+}
+#  This table translates the Psi4 names into the names used by NWChem
+nwchem_map = {
+"user-def":         "user-def",
+"sadlej-pvtz":      "sadlej_pVTZ",
+"aug-cc-pvdz":      "aug-cc-pVDZ",
+"aug-cc-pvdz":      "aug-cc-pVTZ",
+"aug-cc-pvqz":      "aug-cc-pVQZ",
+"cc-pvdz":          "cc-pVDZ",
+"cc-pvtz":          "cc-pVTZ",
+"d-aug-cc-pvtz":    "d-aug-cc-pVTZ",
+"def2-tzvp":        "def2-TZVP",
+"def2-tzvpp":       "def2-TZVPP",
+"cc-pvdz-pp":       "cc-pVDZ-PP",
+"cc-pvtz-pp":       "cc-pVTZ-PP",
+"cc-pvqz-pp":       "cc-pVQZ-PP",
+"aug-cc-pvdz-pp":   "aug-cc-pVDZ-PP",
+"aug-cc-pvtz-pp":   "aug-cc-pVTZ-PP",
+"aug-cc-pvqz-pp":   "aug-cc-pVQZ-PP",
+"aug-sadlej":       "aug-sadlej_pvtz",
+"auga-sadlej-pvtz": "augA-sadlej_pvtz",
+"augb-sadlej-pvtz": "augB-sadlej_pvtz",
+"def2-qzvpp":       "def2-qzvpp",
+}
+
+#  This is the list of auxiliary basis sets
+auxbasis_list = [
+  "user-def",
+  "aug-cc-pvdz",
+  "aug-cc-pvtz",
+  "aug-cc-pvqz",
+  "cc-pvdz",
+  "cc-pvtz",
+  "cc-pvqz",
+  "dgauss-a1-c",
+  "dgauss-a1-x",
+  "dgauss-a2-c",
+  "dgauss-a2-x",
+  "j-basis/tzvpp",
+  "j-basis/svp",
+  "jk-basis/tzvp-2",
+  "jk-basis/tzvpp",
+  "jk-basis/tzvpp-2",
+  "jk-basis/qzvp-2",
+  "jk-basis/qzvpp-2",
+  "def2-tzvp",
+  "def2-tzvpp",
+  "aug-cc-pvdz-pp",
+  "aug-cc-pvtz-pp",
+  "aug-cc-pvqz-pp",
+  "cc-pvdz-pp",
+  "cc-pvtz-pp",
+  "cc-pvqz-pp",
+  "def-tzvpp",
+  "def-qzvpp",
+  "weigend-coulomb",
+]
+
+#  This table maps various abbreviated auxiliary basis set names onto
+#  the index of proper names above.
+auxbasis_map = {
+  'user-def': 0,
+  'adz': 1,'avdz': 1,'aug-cc-pvdz': 1,
+  'sadlej': 2,'sadlej-pvtz': 2,'atz': 2,'avtz': 2,'aug-cc-pvtz': 2,
+  'aug-sadlej': 2,'aug-sadlej-pvtz': 2,
+  'auga-sadlej': 2,'auga-sadlej-pvtz': 2,
+  'augb-sadlej': 2,'augb-sadlej-pvtz': 2,
+  'aqz': 3,'avqz': 3,'aug-cc-pvqz': 3,
+  'dz': 4,'vdz': 4,'cc-pvdz': 4,
+  'tz': 5,'vtz': 5,'cc-pvtz': 5,
+  'qz': 6,'vqz': 6,'cc-pvqz': 6,
+  'dgauss-a1-c': 7,'a1-c': 7,
+  'dgauss-a1-x': 8,'a1-x': 8,
+  'dgauss-a2-c': 9,'a2-c': 9,
+  'dgauss-a2-x': 10,'a2-x': 10,
+  'j-tzvpp': 11,
+  'j-svp': 12,
+  'jk-tzvp-2': 13,
+  'jk-tzvpp': 14,
+  'jk-tzvpp-2': 15,
+  'jk-qzvp-2': 16,
+  'jk-qzvpp-2': 17,
+  'datz': 3,'davtz': 3,'d-aug-cc-pvtz': 3,
+  'def2-tzvp': 18,
+  'def2-tzvpp': 19,
+  'adz-pp': 20,'avdz-pp': 20,'aug-cc-pvdz-pp': 20,
+  'atz-pp': 21,'avtz-pp': 21,'aug-cc-pvtz-pp': 21,
+  'aqz-pp': 22,'avqz-pp': 22,'aug-cc-pvqz-pp': 22,
+  'dz-pp': 23,'vdz-pp': 23,'cc-pvdz-pp': 23,
+  'tz-pp': 24,'vtz-pp': 24,'cc-pvtz-pp': 24,
+  'qz-pp': 25,'vqz-pp': 25,'cc-pvqz-pp': 25,
+  'def-tzvpp': 26,
+  'def-qzvpp': 27,
+  'weigend-coulomb': 28,
+}
@@ -0,0 +1,885 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+# Reading the cluster file, and running the job.
+
+# provides functions:
+# * read_clt  (uses cltspec.parse_clt)
+# * job_steps
+# * run_job
+# * execute
+# * dispersion
+
+# provides classes:
+# * JobError
+# * Step
+# * Wait
+
+import os
+import re
+from contextlib import contextmanager, ExitStack
+from sys import stderr
+from camcasp import Mol, die
+from camcasp_files import basis_map
+
+def read_clt(job, verbosity, spec=None):
+    """Extract job and molecule information from the cluster file
+
+    The cluster file is parsed by cltspec.parse_clt, unless a JobSpec that
+    has already been obtained from it is provided. The JobSpec is kept as
+    job.spec.
+    """
+
+    from cltspec import parse_clt, standard_runtype, CltError
+
+    if spec is None:
+        try:
+            spec = parse_clt(job.cltfile)
+        except CltError as e:
+            die(str(e))
+    job.spec = spec
+
+    def where(key):
+        """File and line number of keyword, for diagnostics"""
+        if key in spec.lines:
+            return f"{spec.file}:{spec.lines[key]}: "
+        return f"{spec.file}: "
+
+    for lineno, line in spec.unknown:
+        if verbosity > 1: print(f"{spec.file}:{lineno}: not used here: {line}")
+
+    #  Defaults
+    job.runtype = spec.runtype
+    job.method = spec.method or "DFT"
+    job.func = spec.func or "PBE0"
+    job.basis = ""
+    job.basistype = spec.basistype
+    job.auxbasis = spec.auxbasis
+    job.auxbasistype = spec.auxbasistype
+    job.atomauxbasis = spec.atomauxbasis
+    job.atomauxbasistype = spec.atomauxbasistype
+    job.isabasis = spec.isabasis
+    job.count = 0
+    job.kernel = spec.kernel or "ALDA+CHF"
+    job.daltoncks = spec.daltoncks
+    job.nomidbond = spec.nomidbond
+    job.ac_type = spec.ac_type
+    job.ac_join = spec.ac_join
+    job.ac_p1 = spec.ac_p1
+    job.ac_p2 = spec.ac_p2
+    job.imports.extend(spec.imports)
+
+    #  File prefix (job name): Allow '-' and '.' in the prefix. This is useful
+    #  for names like NH3-OH-R6.0. It must match the job name and need not be
+    #  specified here.
+    job.prefix = spec.prefix
+    if spec.prefix and spec.prefix != job.name:
+        die(where("prefix") + "The file prefix, if specified, must be the same as the job name")
+
+    #  SCF code: ignore if already set on the command line
+    if spec.scfcode and not job.scfcode:
+        job.scfcode = spec.scfcode
+        if spec.direct:
+            job.direct = True
+
+    for name, m in spec.mols.items():
+        mol = Mol(name)
+        mol.ip = m.ip
+        mol.homo = m.homo
+        mol.delta_ac = m.delta_ac
+        job.mols[name] = mol
+        if verbosity > 0:
+            print(f"{name}, IP = {mol.ip:6.4f}, HOMO energy = {mol.homo:6.4f}, "
+                  f"AC-SHIFT = {mol.delta_ac:6.4f}")
+    mol_count = len(spec.molecules)
+    for name in spec.molecules:
+        if name not in job.mols:
+            die(where("molecules") + f"Molecule {name} has not been defined")
+    if mol_count > 0:
+        job.mola = job.mols[spec.molecules[0]]
+    if mol_count > 1:
+        job.molb = job.mols[spec.molecules[1]]
+    else:
+        job.molb = None
+
+    if spec.basis:
+        if spec.basis not in basis_map:
+            die(where("basis") + f"Basis {spec.basis} not recognised")
+        job.basis = basis_map[spec.basis]
+        if job.auxbasis == "": job.auxbasis = job.basis
+    if verbosity > 0:
+        print(f"main basis = {job.basis}, type = {job.basistype}")
+        print(f"aux basis = {job.auxbasis}, type = {job.auxbasistype}")
+        if job.atomauxbasis:
+            print(f"atomaux basis = {job.atomauxbasis}, type = {job.atomauxbasistype}")
+        if job.isabasis:
+            print(f"isa basis = {job.isabasis}")
+        print(f"Method = {job.method}, Functional = {job.func}")
+        print(f"kernel = {job.kernel}, DALTON CKS: {job.daltoncks}")
+
+    #  IPs and AC shifts not given in the cluster file are taken from the
+    #  shared store, if it has them (see ipstore.py)
+    if job.method.upper() == "DFT" and job.ac_type.upper() != "NONE":
+        import ipstore
+        try:
+            for message in ipstore.fill_missing(job, spec):
+                print(message)
+        except (OSError, ipstore.IPStoreError) as e:
+            print(f"IP store not used: {e}")
+
+    #  Some sanity checks
+  
+    #  Properties calculation if only one molecule specified
+    if job.runtype == "":
+        if mol_count == 1:
+            job.runtype = "properties"
+        elif mol_count == 2:
+            job.runtype = "saptdft"
+        if verbosity > 0:
+            print(f"Run-type {job.runtype} assumed")
+    if mol_count == 1 and job.runtype != "properties":
+        print(where("runtype") + f"{job.runtype} calculation was specified but only one molecule")
+        die("Job abandoned")
+    elif mol_count == 0:
+        print(where("") + "No molecules specified for calculation (MOLECULES A [and B] line omitted)")
+        die("Job abandoned")
+
+    #  Basis type defaults to mono for properties, otherwise undefined.
+    # print(job.basistype)
+    if job.basistype == "":
+        if re.match(r'propert(y|ies)',job.runtype,flags=re.I):
+            job.basistype = "mono"
+        else:
+            die(where("basis") + "Basis set type not specified")
+  
+  
+    #  Apply default asymptotic correction if necessary
+    # print(f"ac_type = {job.ac_type}, SCF code = {job.scfcode}")
+    if job.ac_type == "":
+        if job.scfcode == "nwchem":
+            job.ac_type = "CS00"
+        elif job.scfcode == "psi4":
+            job.ac_type = "GRAC"
+        elif job.scfcode == "molpro":
+            job.ac_type = "GRAC"            
+        else:
+            job.ac_type = "LB94"
+            if not job.ac_join: job.ac_join = "TANH"  
+    #  Set AC shift and fixed/variable 
+    # print(f"ac_type = {job.ac_type}, SCF code = {job.scfcode}")
+    if job.ac_type != "NONE":
+        for mol in [job.mola,job.molb]:
+            if mol:
+                # Decide on the AC-shift (mol.delta_ac) and type of shift: Variable or fixed.
+                # mol.ac_variable is used only for DALTON command files. 
+                if mol.delta_ac:
+                    mol.ac_variable = False
+                elif mol.ip and mol.homo:
+                    mol.delta_ac = mol.ip + mol.homo
+                    mol.ac_variable = False
+                elif mol.ip:
+                    if job.ac_type == "CS00":
+                        mol.delta_ac = 0.0
+                    else:
+                        mol.delta_ac = mol.ip
+                        mol.ac_variable = True
+                elif job.ac_type == "CS00":
+                    mol.delta_ac = 0.0
+                else:
+                    job.ac_type = "NONE"
+                # print( mol.name, mol.ip, mol.homo, mol.delta_ac)
+
+    #  Standardize run-type
+    runtype = standard_runtype(job.runtype)
+    if runtype is None:
+        die(where("runtype") + f"Run-type '{job.runtype}' not understood")
+    job.runtype = runtype
+
+    #  Default SCF code if not set yet
+    if not job.scfcode:
+        if os.environ.get("CAMCASP_SCFCODE"):
+            job.scfcode = os.environ.get("CAMCASP_SCFCODE").lower()
+        else:
+            job.scfcode = "psi4"
+
+    if job.scfcode not in ["dalton2006", "dalton", "nwchem", "psi4", "molpro"]:
+        print(where("scfcode") + f"Error: unrecognised SCF code: {job.scfcode}")
+        die("Available programs are Dalton2006, Dalton (i.e. Dalton2013 or later), NWChem, Psi4 and Molpro")
+    if verbosity > 0:
+        print(f"""basis = {job.basis}
+basis type = {job.basistype}
+runtype = {job.runtype}
+scfcode = {job.scfcode}
+""")
+        print(f"AC options: type = {job.ac_type}, join = {job.ac_join},",
+          f"p1 = {job.ac_p1:3.1f}, p2 = {job.ac_p2:3.1f}")
+        if job.ac_type != "NONE":
+            print("AC shifts: ")
+            for mol in [job.mola,job.molb]:
+                if mol:
+                    print(f"{mol.name}: shift = {mol.delta_ac:7.4f} ", end=' ')
+                    if mol.ac_variable:
+                        print("  variable")
+                    else:
+                        print("  fixed")
+
+
+    #  End of read_clt
+
+class JobError(Exception):
+    """Error that stops a job. The message has already been logged."""
+    pass
+
+
+class Step:
+    """A program to be run as one step of a job.
+
+    part is the part of the calculation (A, B, AB or C) if the step is to
+    be profiled, or None for the interface programs. stdin and stdout are
+    file names, relative to the directory cwd; stdout is appended to if
+    append is True, and stderr is "stdout" to send the error output to the
+    same file. env holds environment variables to be set for the program,
+    and cores and memory (GB) are the resources it may use.
+    """
+    def __init__(self, part, cmnd, cwd, stdin=None, stdout=None, append=False,
+                 stderr=None, env=None, cores=1, memory=0):
+        self.part = part
+        self.cmnd = cmnd
+        self.cwd = cwd
+        self.stdin = stdin
+        self.stdout = stdout
+        self.append = append
+        self.stderr = stderr
+        self.env = env or {}
+        self.cores = cores
+        self.memory = memory
+        self.error = ""    # Why the program couldn't be started, if it couldn't
+
+    @contextmanager
+    def files(self):
+        """Open the input and output files, giving (stdin, stdout, stderr)"""
+        import subprocess
+        with ExitStack() as stack:
+            IN = OUT = ERR = None
+            if self.stdin:
+                IN = stack.enter_context(open(os.path.join(self.cwd, self.stdin)))
+            if self.stdout:
+                OUT = stack.enter_context(open(os.path.join(self.cwd, self.stdout),
+                                               "a" if self.append else "w"))
+            if self.stderr == "stdout":
+                ERR = subprocess.STDOUT
+            yield IN, OUT, ERR
+
+    def environment(self):
+        """Environment for the program, or None to inherit this one"""
+        if not self.env:
+            return None
+        env = dict(os.environ)
+        env.update(self.env)
+        return env
+
+    def failed(self, e):
+        """The result when the program can't be started"""
+        self.error = f"Can't run {self.cmnd[0]}: {e}"
+        return 127, 0.0, 0.0
+
+    def run(self):
+        """Run the program, and return the return code, the elapsed time in
+        seconds and the peak memory in GB"""
+        import jobmodel
+        try:
+            with self.files() as (IN, OUT, ERR):
+                return jobmodel.call(self.cmnd, cwd=self.cwd, stdin=IN, stdout=OUT,
+                                     stderr=ERR, env=self.environment())
+        except OSError as e:
+            return self.failed(e)
+
+
+class Wait:
+    """Wait for the futures (MO conversions in another thread) to finish"""
+    def __init__(self, futures):
+        self.futures = futures
+
+
+def job_steps(job, verbosity=0, report=print):
+    """Carry out a CamCASP calculation, as a generator of the steps to be run.
+
+    The argument 'job' is an instance of class Job, and contains all
+    information about the job. job.name identifies the files needed for
+    the job -- they all have names that start with the specified name.
+    Normally a scratch directory will be specified by the environment
+    variable SCRATCH, but a different directory can be specified if
+    required, and runcamcasp.py may choose another with more room (see
+    scratchspace.py). A subdirectory of this directory, job.work (or
+    job.work_NN if that exists already), is used for temporary files
+    needed by the job.
+
+    Details of the scheduling:
+    job.cores = number of cores on the machine available to be used.
+
+    Normally job.cores = os.environ["CORES"], but this can be adjusted
+    from the runcamcasp.py command line using the --cores option. This
+    can be used, for example, to restrict the jobs to use only part
+    of a multicore computer.
+
+    At present, the CamCASP program itself runs in parallel, but use of more
+    than two cores is inefficient. Dalton is not parallelized.
+
+    The SCF, interface and CamCASP programs are not run here. Each is
+    yielded as a Step, and the caller runs it and sends back its return
+    code, elapsed time and peak memory, as returned by Step.run. A Wait is
+    yielded when the job must wait for the MO conversions running in
+    another thread. All files are named by absolute paths, so the current
+    directory is never changed, and a failure raises JobError instead of
+    stopping the program, so that many jobs can be run at once in one
+    process (see jobsupervisor.py). run_job is the simplest caller.
+    Messages are written to the log file and passed to report. Returns 0
+    when the job has finished.
+    """
+    version = "6.6"
+
+    from time import strftime
+    import glob
+    import shutil
+    import subprocess
+    from concurrent.futures import ThreadPoolExecutor
+    import jobmodel
+    import jobresults
+    import scratchspace
+    try:
+        import nwchem_movecs
+        import dalton_mos
+        import psi4_npz
+    except ImportError:
+        #  NumPy is not available, so readNWCHEMmos, readDALTONmos and
+        #  readfchk.py are used instead
+        nwchem_movecs = None
+        dalton_mos = None
+        psi4_npz = None
+
+
+    camcasp = os.environ["CAMCASP"]
+
+    cores = job.cores
+    cores_camcasp = job.cores_camcasp
+    memory = job.memory  # in GB
+    memoryMB = f"{memory*1024:1d}"
+
+
+    jobname = job.name
+    #  maindir is the directory created by runcamcasp.py for this job.
+    maindir = os.path.abspath(job.dir)
+    resdir = os.path.join(maindir,"OUT")
+    if not os.path.isdir(resdir):
+        try:
+            os.mkdir(resdir)
+        except OSError:
+            report(f"Can't create results directory {resdir}")
+            raise JobError(f"Can't create results directory {resdir}")
+
+    if job.logfile:
+        logfile = os.path.join(maindir,job.logfile)
+    else:
+        logfile = os.path.join(resdir,f"{jobname}.log")
+    #  The NWChem MOs, and the Psi4 MOs saved as .npz files, are converted
+    #  in a separate thread, so that the next SCF calculation can start at
+    #  once. The thread is stopped however the job ends.
+    with open(logfile,"w") as LOG, ThreadPoolExecutor(max_workers=1) as converter:
+
+        LOG.write(f"execute.py version {version}\n")
+
+        def write(string):
+            """Write the string both to OUT/<job>.log and to the report"""
+            LOG.write(string+"\n")
+            LOG.flush()
+            os.fsync(LOG.fileno())
+            report(string)
+
+        #  Elapsed time and peak memory of each step, for the profile record
+        steps = []
+
+        def fail(string):
+            """Write the string and the results manifest, and stop the job"""
+            write(string)
+            try:
+                jobresults.write(job, maindir, resdir, steps, "failed")
+            except OSError as e:
+                write(f"Can't write the results manifest: {e}")
+            raise JobError(string)
+
+        #  Don't delete existing directories -- they may be in use by other jobs.
+        wrk = os.path.abspath(job.work)
+        work = wrk
+        ix = 0
+        while True:
+            try:
+                os.mkdir(work)
+                break
+            except FileExistsError:
+                ix += 1
+                work = f"{wrk}_{ix:02d}"
+            except OSError:
+                fail(f"Can't create working directory {work}")
+
+        dalton = (job.scfcode in ["dalton","dalton2006"])
+
+        write(f"""Job {jobname} starting at {strftime('%H:%M:%S')}
+    Working directory = {work}
+    Main directory    = {maindir}
+    Results directory = {resdir}
+    """)
+
+        #  Copy the files in the main directory to the workspace, omitting
+        #  OUT directories and their contents, and files not needed there
+        unwanted = [".prss",".ornt",".DALtemplate",".bash",".clt",".cltout",".spec",".sh","~"]
+        for f in os.listdir(maindir):
+            path = os.path.join(maindir,f)
+            if os.path.isfile(path) and not any(len(f) > len(ext) and f.endswith(ext)
+                                                for ext in unwanted):
+                shutil.copy(path, work)
+        # Link data files to CamCASP scratch directory
+        wrkcc = os.path.join(work,"camcasp")
+        os.mkdir(wrkcc)
+        for f in os.listdir(work):
+            if f != "camcasp" and not f.startswith("."):
+                os.symlink(os.path.join("..",f), os.path.join(wrkcc,f))
+        write(f"cwd = {work}")
+        if verbosity > 0:
+            report(str(os.listdir(work)))
+
+        def run(M, cmnd, cwd=work, **kwargs):
+            """Run a step of the calculation, recording its resource usage"""
+            if M:
+                #  Warn before the scratch disk fills
+                warning = scratchspace.check(work, job.scratch_gb)
+                if warning:
+                    write(warning)
+            step = Step(M, cmnd, cwd, **kwargs)
+            rc, wall, gb = yield step
+            if step.error:
+                write(step.error)
+            if rc == 0 and M:
+                steps.append((M, wall, gb))
+            return rc
+
+        conversions = {}
+
+        def nwchem_mos(M):
+            """Convert the NWChem MOs for part M to the ASCII format read by CamCASP"""
+            movecs = os.path.join(work, f"{jobname}-{M}-asc.movecs")
+            if nwchem_movecs:
+                mo = nwchem_movecs.read(os.path.join(work, f"{jobname}_{M}.movecs"))
+                mo.source = f"{jobname}_{M}.movecs"
+                nwchem_movecs.write_ascii(mo, movecs)
+            else:
+                subprocess.call(["readNWCHEMmos", f"{jobname}_{M}.movecs", "--quiet",
+                                 "--ascii", movecs], cwd=work)
+            shutil.copy(movecs, maindir)
+            shutil.move(movecs, wrkcc)
+
+        def psi4_mos(M):
+            """Write the MO and basis files for part M from the Psi4 .npz file"""
+            prefix = os.path.join(work, f"{jobname}-{M}")
+            psi4_npz.convert(os.path.join(work, f"{jobname}_{M}.npz"), prefix,
+                             labels=os.path.join(work, f"{jobname}_{M}.sitenames"))
+            for f in [f"{prefix}-asc.movecs", f"{prefix}.basis"]:
+                shutil.copy(f, maindir)
+                shutil.move(f, wrkcc)
+
+        def finish_conversions():
+            """Wait for the MO conversions to finish. Returns False if any failed."""
+            if conversions:
+                yield Wait(list(conversions.values()))
+            ok = True
+            for P in list(conversions):
+                try:
+                    conversions.pop(P).result()
+                except Exception as e:
+                    write(f"Conversion of the part {P} MOs failed: {e}")
+                    ok = False
+            return ok
+
+        done = {}
+        if job.runtype == "psi4-saptdft":
+            parts = ["AB"]
+        elif job.runtype == "saptdft" or job.runtype == "sapt":
+            parts = ["A", "B", "C"]
+        elif job.runtype == "properties":
+            parts = ["A", "C"]
+        elif job.runtype == "deltahf":
+            parts = ["A", "B", "AB", "C"]
+        else:
+            fail(f"Unsupported run-type {job.runtype}")
+        write(f"Parts: {parts}")
+
+        #  M identifies the system: A, B, AB or C. Not all of these are needed in
+        #  every calculation; the list job.parts specified which are needed.
+        crash = 0
+        for M in parts:
+            if M == "C":
+                done[M] = False
+            else:
+                movecs = f"{jobname}-{M}-asc.movecs"
+                done[M] = os.path.exists(os.path.join(work,movecs))
+                if done[M]:
+                    #  No need to recalculate this part
+                    continue
+
+            if M == "C":
+                #  If A and B calculations are complete we can start CamCASP
+                if not (yield from finish_conversions()):
+                    crash = 1
+                    break
+                #  Mark the start time.
+                started = os.path.join(wrkcc,"started")
+                open(started,"a").close()
+                os.utime(started)
+
+                for P in ["A", "B"]:
+                    if P in parts and not os.path.exists(os.path.join(wrkcc,f"{jobname}-{P}-asc.movecs")):
+                        fail(f"Eigenvector file {jobname}-{P}-asc.movecs is missing.")
+
+                write(f"Starting CamCASP with {cores_camcasp} threads...")
+                rc = yield from run(M, ["camcasp"], cwd=wrkcc, stdin=f"{jobname}.cks",
+                                    stdout=f"{jobname}.out",
+                                    env={"OMP_NUM_THREADS": str(cores_camcasp)},
+                                    cores=cores_camcasp, memory=memory)
+                if rc == 0:
+                    write(f"CamCASP finished normally at {strftime('%H:%M:%S')}")
+                else:
+                    write(f"CamCASP finished with error code {rc:1d} at {strftime('%H:%M:%S')}")
+                    crash = 2
+
+            #  Not C. Start the M (A, B or AB) SCF calculation.
+            elif dalton:
+                jobM = f"{jobname}_{M}"
+                if os.path.exists(os.path.join(camcasp,"bin","dalton.sh")):
+                    cmnd = [os.path.join(camcasp,"bin","dalton.sh"),
+                            jobM, jobM, work, str(cores), memoryMB]
+                    if verbosity > 0:
+                        report(str(cmnd))
+                else:
+                    cmnd = [os.path.join(camcasp,"bin",job.scfcode),
+                    "-D", "-M", memoryMB, "-t", work, jobM, jobM]
+                rc = yield from run(M, cmnd, stdout=f"{jobM}.out", cores=cores, memory=memory)
+                if rc > 0:
+                    write(f"Part {M} failed, rc = {rc}")
+                    crash = 1
+                    break
+                # This scf completed successfully.
+                # Recent change for Dalton 2016 moves the scratch files into
+                # {jobM}.tar.gz, so we read SIRIUS.RST and SIRIFC from there,
+                # or extract them if we can't read them here.
+                mos = None
+                archive = os.path.join(work,f"{jobM}.tar.gz")
+                if os.path.exists(archive):
+                    if dalton_mos:
+                        try:
+                            mos = dalton_mos.read_archive(archive)
+                        except dalton_mos.MovecsError as e:
+                            write(f"{e}; using readDALTONmos instead")
+                    if mos is None:
+                        yield from run(None, ["tar", "xzf", f"{jobM}.tar.gz", "SIRIUS.RST", "SIRIFC"])
+                # DALTON2006 puts all temp files in $WORK/${job}_$M. DALTON2013 onwards put
+                # them in $WORK/DALTON_scratch_$USER/${job}_$M
+                else:
+                    scratch = os.path.join(work,"DALTON_scratch_" + os.environ["USER"])
+                    if os.path.isdir(scratch):
+                        dir = os.path.join(scratch, jobM)
+                        # Dalton2013 patch 2 added the process ID to the directory name,
+                        # but here the directory is already unique, so ...
+                        if not os.path.exists(dir):
+                            dir = glob.glob(f"{dir}*")[0]
+                    else:
+                        #  Dalton2006
+                        dir = os.path.join(work,jobM)
+                        # First delete any files already present in the work directory
+                        for name in ["SIRIUS.RST", "SIRIFC"]:
+                            if os.path.exists(os.path.join(work,name)):
+                                os.remove(os.path.join(work,name))
+                            if os.path.exists(os.path.join(dir,name)):
+                                shutil.copy(os.path.join(dir,name),work)
+                #  Now read the MOs and orbital energies from SIRIUS.RST and SIRIFC,
+                #  or run the DALTON interface program to do it, and put them in
+                #  {jobname}-{M}-asc.movecs.
+                sirius = (os.path.exists(os.path.join(work,"SIRIUS.RST"))
+                          and os.path.exists(os.path.join(work,"SIRIFC")))
+                if dalton_mos and not os.path.exists(archive) and sirius:
+                    try:
+                        mos = dalton_mos.read_files("SIRIUS.RST", "SIRIFC", dir=work)
+                    except dalton_mos.MovecsError as e:
+                        write(str(e))
+                if mos or sirius:
+                    movecs = f"{jobname}-{M}-asc.movecs"
+                    out = f"{jobM}.out"
+                    if mos:
+                        dalton_mos.write_ascii(mos, os.path.join(work,movecs))
+                        with open(os.path.join(work,out),"a") as OUT:
+                            OUT.write(dalton_mos.summary(mos))
+                    else:
+                        if job.scfcode == "dalton2006":
+                            readDALTONmos = "readDALTON2006mos"
+                        else:
+                            readDALTONmos = "readDALTONmos"
+                        yield from run(None, [readDALTONmos, "--ascii", movecs],
+                                       stdout=out, append=True)
+                    shutil.copy(os.path.join(work,out), resdir)
+                    shutil.copy(os.path.join(work,movecs), maindir)
+                    shutil.move(os.path.join(work,movecs), wrkcc)
+                    if os.path.exists(os.path.join(work,f"{jobname}.tar.gz")):
+                        shutil.copy(os.path.join(work,f"{jobname}.tar.gz"), maindir)
+                else:
+                    write(f"Dalton {jobname}_{M} calculation appears to have failed")
+                    crash = 1
+                    break
+
+            elif job.scfcode == "nwchem":
+                datafile = f"{jobname}_{M}.nw"
+                with open(os.path.join(work,datafile)) as NW:
+                    data = NW.read()
+                data = re.sub(r'<SCRATCHDIR>',work,data)
+                with open(os.path.join(work,datafile),"w") as NW:
+                    NW.write(data)
+
+                if os.path.exists(os.path.join(camcasp,"bin","nwchem.sh")):
+                    cmnd = [os.path.join(camcasp,"bin","nwchem.sh"), datafile, str(cores)]
+                else:
+                    cmnd = ["nwchem", datafile]
+                rc = yield from run(M, cmnd, stdout=f"{jobname}_{M}.out", stderr="stdout",
+                                    cores=cores, memory=memory)
+                if rc > 0:
+                    write(f"Part {M} failed, rc = {rc:1d}")
+                    crash = 1
+                    break
+
+                shutil.copy(os.path.join(work,f"{jobname}_{M}.out"), resdir)
+                # Now convert the MOs, while the next calculation runs
+                conversions[M] = converter.submit(nwchem_mos, M)
+
+
+            elif job.scfcode == "psi4":
+                datafile = f"{jobname}_{M}.in"
+                outfile = f"{jobname}_{M}.out"
+                npz = f"{jobname}_{M}.npz"
+                if job.psi4_npz and psi4_npz and job.runtype != "psi4-saptdft":
+                    #  Save the wavefunction as .npz instead of fchk
+                    with open(os.path.join(work,datafile)) as IN:
+                        data = IN.read()
+                    data = re.sub(r"^fchk_writer *= *psi4\.FCHKWriter\(wfn\)\n"
+                                  r"fchk_writer\.write\('([^']+)'\)\n?",
+                                  lambda m: psi4_npz.export_code(npz, m.group(1)),
+                                  data, flags=re.M)
+                    with open(os.path.join(work,datafile),"w") as IN:
+                        IN.write(data)
+                if os.path.exists(os.path.join(work,npz)):
+                    os.remove(os.path.join(work,npz))
+                if os.path.exists(os.path.join(camcasp,"bin","psi4.sh")):
+                    cmnd = [os.path.join(camcasp,"bin","psi4.sh"), datafile, outfile, str(cores)]
+                else:
+                    psi4_home = os.getenv("PSI4_HOME")
+                    if not psi4_home:
+                        write("PSI4_HOME is not set -- can't run psi4 calculations")
+                        crash = 1
+                        break
+                    cmnd = ["psi4", datafile, outfile]
+                rc = yield from run(M, cmnd, stdout=logfile, append=True,
+                                    cores=cores, memory=memory)
+                if os.path.exists(os.path.join(work,outfile)):
+                    shutil.copy(os.path.join(work,outfile), resdir)
+                if rc > 0:
+                    write(f"Part {M} failed, rc = {rc:1d}")
+                    crash = 1
+                    break
+                if job.runtype == "psi4-saptdft":
+                    #  This is a sapt(dft) calculation carried out entirely by Psi4.
+                    #  Just clean up and exit
+                    write(f"Part {M} finished")
+                    write(f"Job {jobname} finished at {strftime('%H:%M:%S')}")
+                    jobmodel.record(job, steps)
+                    jobresults.write(job, maindir, resdir, steps)
+                    converter.shutdown()
+                    #  Clean up working directory unless save was specified or a calculation failed
+                    if os.path.exists(work) and not job.debug and crash == 0:
+                        shutil.rmtree(work)
+                    return 0
+                elif os.path.exists(os.path.join(work,npz)):
+                    #  Convert the MOs while the next calculation runs
+                    shutil.copy(os.path.join(work,npz), maindir)
+                    conversions[M] = converter.submit(psi4_mos, M)
+                else:
+                    # Run the interface program:
+                    fchk = f"{jobname}_{M}.fchk"
+                    sitenames = f"{jobname}_{M}.sitenames"
+                    prefix = f"{jobname}-{M}"
+                    movecs = f"{prefix}-asc.movecs"
+                    basis = f"{prefix}.basis"
+                    shutil.copy(os.path.join(work,fchk),maindir)
+                    rc = yield from run(None, ["readfchk.py", fchk, "--prefix", prefix,
+                                               "--labels", sitenames, "--dalton"])
+                    if rc > 0:
+                        write("Error from readfchk.py")
+                        crash = 1
+                        break
+                    for f in [movecs, basis]:
+                        shutil.copy(os.path.join(work,f), maindir)
+                        shutil.move(os.path.join(work,f), wrkcc)
+
+
+            elif job.scfcode == "molpro":
+                datafile = f"{jobname}_{M}.molp"
+                outfile = f"{jobname}_{M}.out"
+                with open(os.path.join(work,datafile)) as MOL:
+                    data = MOL.read()
+                data = re.sub(r'<SCRATCHDIR>',work,data)
+                with open(os.path.join(work,datafile),"w") as MOL:
+                    MOL.write(data)
+
+                if os.path.exists(os.path.join(camcasp,"bin","molpro.sh")):
+                    cmnd = [os.path.join(camcasp,"bin","molpro.sh"), datafile, outfile, str(cores)]
+                else:
+                    molpro_home=os.getenv("MOLPRO_HOME")
+                    if not molpro_home:
+                        write("MOLPRO_HOME is not set -- can't run Molpro calculations")
+                        crash = 1
+                        break
+                    cmnd = ["molpro", datafile]
+
+                rc = yield from run(M, cmnd, stdout=outfile, stderr="stdout",
+                                    cores=cores, memory=memory)
+                if rc > 0:
+                    write(f"Part {M} failed, rc = {rc:1d}")
+                    crash = 1
+                    break
+
+                shutil.copy(os.path.join(work,outfile), resdir)
+                # Now run the interface program:
+                movecs = f"{jobname}-{M}-asc.movecs"
+                yield from run(None, ["mol2cam.py", outfile, f"{jobname}_{M}.movecs".lower()])
+                shutil.copy(os.path.join(work,movecs), maindir)
+                shutil.move(os.path.join(work,movecs), wrkcc)
+
+            else:
+                write(f"Error: Unrecognised SCF code: {job.scfcode}")
+                write("Allowed programs are Dalton2013 or later, Dalton2006, NWChem, Psi4 and Molpro")
+                crash = 1
+
+
+        #  All now done, or something has crashed
+        if not (yield from finish_conversions()):
+            crash = 1
+        converter.shutdown()
+
+        #  Copy available output to the results directory
+        #  Copy CamCASP data file for the record
+        if os.path.exists(os.path.join(wrkcc,f"{jobname}.cks")):
+            shutil.copy(os.path.join(wrkcc,f"{jobname}.cks"),resdir)
+        #  Copy result files
+        if os.path.exists(os.path.join(wrkcc,"data-summary.data")):
+            shutil.copy(os.path.join(wrkcc,"data-summary.data"),
+                        os.path.join(resdir, f"{jobname}-data-summary.data"))
+        #  Remove temporary files (if any), and copy any other kind of
+        #  output file written by CamCASP to the results directory
+        started = os.path.join(wrkcc,"started")
+        since = os.stat(started).st_mtime if os.path.exists(started) else None
+        for root, dirs, files in os.walk(wrkcc):
+            for f in files:
+                path = os.path.join(root,f)
+                if f.startswith("TMP"):
+                    os.remove(path)
+                elif since is not None and not os.path.islink(path) \
+                        and os.path.getmtime(path) > since:
+                    shutil.copy2(path, resdir)
+        #  Clean up working directory unless save was specified or a calculation failed
+        if os.path.exists(work) and not job.debug and crash == 0:
+            shutil.rmtree(work)
+
+        #  Machine-readable record of the results (written by fail if the
+        #  job failed)
+        if crash > 0:
+            fail(f"Job {jobname} failed at {strftime('%H:%M:%S')}\n")
+        jobresults.write(job, maindir, resdir, steps)
+        write(f"Job {jobname} finished at {strftime('%H:%M:%S')}\n")
+        jobmodel.record(job, steps)
+
+    return 0
+    # End of job_steps()
+
+
+def run_job(job, verbosity=0, report=print):
+    """Run the job, one step at a time, in this thread.
+    Returns 0 if the job finishes, and raises JobError if it fails."""
+    from concurrent.futures import wait
+    steps = job_steps(job, verbosity, report)
+    reply = None
+    while True:
+        try:
+            step = steps.send(reply)
+        except StopIteration as e:
+            return e.value
+        if isinstance(step, Wait):
+            wait(step.futures)
+            reply = None
+        else:
+            reply = step.run()
+
+
+def execute(job, verbosity):
+    """Run a CamCASP calculation. This is the job_steps generator driven by
+    run_job, as used by runcamcasp.py: the program stops if the job fails."""
+    try:
+        return run_job(job, verbosity)
+    except JobError:
+        exit(1)
+
+
+def dispersion(name, prefix, limit, hlimit, potfile, header="", wdir=".",
+               debug=False):
+    """Calculate dispersion coefficients from localized polarizabilities.
+
+    The <name>_casimir.prss file in directory wdir, with {PREFIX}, {LIMIT}
+    and {HLIMIT} replaced, is run through process to give the casimir data
+    file <prefix>_casimir.data, and casimir is run on that to give
+    <prefix>_casimir.out. The dispersion potential, in Orient form, is
+    copied from the casimir output to potfile, preceded by the header.
+    All file names are relative to wdir, and the current directory is not
+    changed, so that several of these calculations can run at once.
+
+    Returns None if successful, otherwise a string describing the error.
+    """
+
+    import subprocess
+
+    casimir_in = f"{prefix}_casimir.data"
+    casimir_out = f"{prefix}_casimir.out"
+    casimir_temp = f"{name}_casimir.temp"
+    if os.path.exists(os.path.join(wdir,"casimir_error")):
+        os.remove(os.path.join(wdir,"casimir_error"))
+    with open(os.path.join(wdir,f"{name}_casimir.prss")) as PRSS, \
+         open(os.path.join(wdir,casimir_temp),"w") as TEMP:
+        TEMP.write(PRSS.read().format(PREFIX=prefix,LIMIT=limit,HLIMIT=hlimit))
+    with open(os.path.join(wdir,casimir_temp)) as TEMP, \
+         open(os.path.join(wdir,casimir_in),"w") as DATA:
+        if subprocess.call(["process"], stdin=TEMP, stdout=DATA,
+                           stderr=stderr, cwd=wdir) > 0:
+            return f"Error in process for {prefix}"
+    if not debug:
+        os.remove(os.path.join(wdir,casimir_temp))
+    with open(os.path.join(wdir,casimir_in)) as IN, \
+         open(os.path.join(wdir,casimir_out),"w") as OUT:
+        if subprocess.call(["casimir"], stdin=IN, stdout=OUT,
+                           stderr=stderr, cwd=wdir) > 0:
+            return f"Error in casimir for {prefix}"
+    if (os.stat(os.path.join(wdir,casimir_out)).st_size == 0
+        or os.path.exists(os.path.join(wdir,"casimir_error"))):
+        return f"Dispersion coefficient calculation failed for {prefix}"
+    #  Copy dispersion potential definition to potfile
+    with open(os.path.join(wdir,potfile),"w") as OUT, \
+         open(os.path.join(wdir,casimir_out)) as IN:
+        OUT.write(header)
+        for line in IN:
+            if re.match(r'Dispersion coefficients', line):
+                OUT.write("! "+line)
+                break
+        for line in IN:
+            OUT.write(line)
+    return None
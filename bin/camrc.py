@@ -0,0 +1,288 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+# provides classes:
+# * CamRC
+
+import os
+import re
+import hardware
+
+#  Keywords for numbers of processors
+_np_keys = ["nproc", "np_psi4", "np_nwchem", "np_molpro", "np_dalton", "np_camcasp"]
+
+class CamRC:
+    """
+        Class for camcasp.rc/.camcasprc file
+    """
+    def __init__(self):
+        self.nproc = 0
+        self.np_psi4 = 0
+        self.np_nwchem = 0
+        self.np_molpro = 0        
+        self.np_dalton = 0
+        self.np_gamess = 0
+        self.np_gaussian = 0
+        self.np_camcasp = 0
+        self.memory_gb = 0
+        self.direct = False
+        #  Save Psi4 wavefunctions as .npz files rather than fchk files
+        self.psi4_npz = False
+        self.queue = ""
+        #  Settings given as "auto", chosen for each job by autoconfigure
+        self.auto = set()
+        self.calibration = ""
+        #  Scratch roots, as (directory, kind); see scratchspace.py
+        self.scratch_roots = []
+
+    def __str__(self):
+        """
+        Return string for Class CamRC
+        """
+        s = ""
+        CamRC_dict = self.__dict__
+        for item in CamRC_dict:
+            s += f"{item} : {CamRC_dict[item]} \n"
+        return s
+
+    def read_camcasprc(self,verbosity=0):
+        """
+            Find a suitable camcasp.rc or .camcasprc file and read its contents into
+            CamRC
+
+            CamCASP.rc file
+            ================
+            .camcasprc will be in $HOME 
+            camcasp.rc will be in $CAMCASP and/or in the working directory.
+           
+            Various options that may be set in a .camcasprc/camcasp.rc file
+            Look for a .camcasprc file in the current directory, or else in the
+            user's home directorY Or the $CAMCASP directory.
+            
+            Order of lookup:
+            1) camcasp.rc in current work dir
+            2) .camcasprc in $HOME
+            3) camcasp.rc in $CAMCASP
+         
+        """
+        dot_camcasprc  = ".camcasprc"   # hidden file in HOME directory
+        camcasp_dot_rc = "camcasp.rc"   # regular file in $CAMCASP or work dir
+        
+        # Search for camcasp.rc in work directory
+        camcasprc = camcasp_dot_rc
+        if not os.path.exists(camcasprc):
+            #  Look for .camcasprc in the users' home directory
+            camcasprc = os.path.join(os.environ["HOME"],dot_camcasprc)
+            if not os.path.exists(camcasprc):
+                # Try looking for camcasp.rc in the CamCASP directory
+                camcasprc = os.path.join(os.environ["CAMCASP"],camcasp_dot_rc)
+                if not os.path.exists(camcasprc):
+                    camcasprc = None
+
+        if not camcasprc:
+            print("ERROR: Could not find either camcasp.rc or .camcasprc.")
+            print("  Place camcasp.rc in $CAMCASP or in $PWD or .camcasprc in $HOME")
+            return
+        
+        # Some basic defaults:
+        self.nproc = 1
+        self.np_psi4    = self.nproc
+        self.np_nwchem  = self.nproc
+        self.np_molpro  = self.nproc
+        self.np_dalton  = self.nproc
+        self.np_camcasp = self.nproc
+        #
+        if camcasprc:
+            print(f"Found CamCASP.rc file in {camcasprc}")
+            #  Settings given explicitly override "auto", wherever the
+            #  "auto" line is in the file
+            explicit = set()
+            with open(camcasprc) as RC:
+                for line in RC:
+                    if re.match(r' *#', line) or re.match(r' *$', line):
+                        continue
+                    if re.match(r' *\w+', line):
+                        item = line.split()
+                        word = item[0].lower()
+                        if word in ["memory", "memory_gb", "memory_mb"] \
+                                and item[1].lower() == "auto":
+                            self.auto.add("memory")
+                        elif word == "nproc" and item[1].lower() == "auto":
+                            self.auto.update(_np_keys)
+                        elif word in _np_keys and item[1].lower() == "auto":
+                            self.auto.add(word)
+                        elif word == "auto":
+                            #  auto yes: all the cores and memory settings
+                            if item[1].lower() in ["yes", "on", "true"]:
+                                self.auto.update(_np_keys + ["memory"])
+                        elif word == "calibration":
+                            #  Calibration table for auto mode
+                            self.calibration = os.path.expandvars(os.path.expanduser(item[1]))
+                        elif word == "memory" or word == "memory_gb":
+                            #  Maximum memory in GB
+                            self.memory_gb = int(item[1])
+                            explicit.add("memory")
+                        elif word == "memory_mb":
+                            #  Maximum memory in MB
+                            self.memory_gb = int(int(item[1])/1024)
+                            explicit.add("memory")
+                        elif word == "direct":
+                            if item[1].lower() in ["yes", "on", "true"]:
+                                self.direct = True
+                            elif item[1].lower() in ["no", "off", "false"]:
+                                self.direct = False
+                        elif word == "psi4_npz":
+                            if item[1].lower() in ["yes", "on", "true"]:
+                                self.psi4_npz = True
+                            elif item[1].lower() in ["no", "off", "false"]:
+                                self.psi4_npz = False
+                        elif word == "nproc":
+                            #  Number of processors available for SCFcodes generally
+                            self.nproc = int(item[1])
+                            self.np_psi4    = self.nproc
+                            self.np_nwchem  = self.nproc
+                            self.np_molpro  = self.nproc
+                            self.np_dalton  = self.nproc
+                            self.np_camcasp = self.nproc
+                            explicit.update(_np_keys)
+                        elif word == "np_nwchem":
+                            #  Number of processors available for NWChem
+                            self.np_nwchem = int(item[1])
+                            explicit.add("np_nwchem")
+                        elif word == "np_psi4":
+                            #  Number of processors available for Psi4
+                            self.np_psi4 = int(item[1])
+                            explicit.add("np_psi4")
+                        elif word == "np_dalton":
+                            #  Number of processors available for Dalton
+                            self.np_dalton = int(item[1])
+                            explicit.add("np_dalton")
+                        elif word == "np_molpro":
+                            #  Number of processors available for Molpro
+                            self.np_molpro = int(item[1])
+                            explicit.add("np_molpro")
+                        elif word == "np_camcasp":
+                            #  Number of processors available for CamCASP
+                            self.np_camcasp = int(item[1])
+                            explicit.add("np_camcasp")
+                        elif word == "queue":
+                            self.queue = item[1].lower()
+                        elif word == "scratch":
+                            #  Scratch root, and optionally its kind
+                            #  (local, tmpfs or shared)
+                            self.scratch_roots.append(
+                                (os.path.expandvars(os.path.expanduser(item[1])),
+                                 item[2].lower() if len(item) > 2 else None))
+            self.auto.difference_update(explicit)
+            if verbosity > 0: 
+                print(f"Finished reading {camcasprc}")
+                print("Summary of data read:")
+                print(self.__str__())
+
+    def autoconfigure(self, runtype, scfcode, scratch=None, verbosity=0):
+        """
+            Choose the numbers of cores and the memory for a job of this
+            runtype and SCF code from the resources detected on this node
+            and the calibration table, for the settings given as "auto".
+            Settings given explicitly in the file are not changed.
+            The table is the file named by the "calibration" keyword, or
+            else $CAMCASP/calibration.dat.
+        """
+        if not self.calibration and os.environ.get("CAMCASP"):
+            self.calibration = os.path.join(os.environ["CAMCASP"], "calibration.dat")
+        resources = hardware.detect(scratch)
+        table = hardware.read_calibration(self.calibration)
+        cores, cores_camcasp, memory_gb = hardware.choose(resources, table, runtype, scfcode)
+        for key in _np_keys:
+            if key in self.auto:
+                setattr(self, key, cores_camcasp if key == "np_camcasp" else cores)
+        if "memory" in self.auto:
+            self.memory_gb = memory_gb
+        if verbosity > 0:
+            print(resources)
+            if hardware.lookup(table, resources.node_type(), runtype, scfcode):
+                print(f"Settings taken from calibration table {self.calibration}")
+            print(f"Automatic settings: {cores} cores, {cores_camcasp} for CamCASP,"
+                  f" {memory_gb} GB")
+        if resources.scratch_free_gb is not None and resources.scratch_free_gb < self.memory_gb:
+            print(f"WARNING: only {resources.scratch_free_gb:.1f} GB free in {resources.scratch}")
+        return resources
+
+
+#  ################################################################
+#  Headers for PBS and GE schedulers. Both may need to be modified.
+#  ################################################################
+
+pbs_header="""
+#!/bin/bash
+#
+##############################################################################
+# start of PBS directives (irrelevant for background jobs)
+##############################################################################
+# set the name of the job
+#PBS -N {JOB}
+#
+#  Queue to use.
+#PBS -q {QUEUE}
+#
+#  Output and error filenames. These are relative to the directory you
+#  submitted the job from so make sure it was a shared filesystem, or
+#  give an absolute path. Currently commented out.
+##PBS -o out
+##PBS -e error
+#
+#  Request that your login shell variables be available to the job
+#PBS -V
+#
+#  Use this to adjust required job time, up to the maximum for the queue
+#  It is better to use walltime than CPU time as this enables the scheduler
+#  to optimize.
+#PBS -l walltime=4:00:00,ncpus={NPROC},mem={MEMORY}gb
+#
+##############################################################################
+# Start of shell script proper. Do not put PBS directives after this point.
+##############################################################################
+#
+# Here is where you should set any environment variables your job requires,
+# because PBS won't read your shell startup files. The most common one is
+# LD_LIBRARY_PATH, required so that binaries can find their library files if
+# they're in odd places. qsub will pass the job whatever LD_LIBRARY_PATH you
+# had at submit time, so most people won't need this.
+#
+# export LD_LIBRARY_PATH=\$LD_LIBRARY_PATH
+"""
+
+ge_header = """
+# ---------------------------
+# set the name of the job
+#$ -N {JOB}
+#$ -pe openmpi {NPROC}
+#
+
+#----------------------------
+# set up the parameters for qsub
+# ---------------------------
+
+#  Mail to user at beginning/end/abort/on suspension
+#$ -m beas
+#  By default, mail is sent to the submitting user 
+#  Use  $ -M username    to direct mail to another userid 
+
+# Execute the job from the current working directory
+# Job output will appear in this directory
+#$ -cwd
+#   can use -o dirname to redirect stdout 
+#   can use -e dirname to redirect stderr
+
+#to request resources at job submission time 
+# use #-l resource=value
+# For instance, the commented out 
+# lines below request a resource of 'express'
+# and a hard CPU time of 10 minutes 
+####$ -l express
+####$ =l h_cpu=10:00
+
+#  Export these environment variables
+#$ -v PATH 
+"""
+
@@ -0,0 +1,495 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Parse a CamCASP cluster file into a job specification.
+
+The cluster file is read in a single pass. Each line is split into words,
+and the first word is looked up in a table of keywords, compiled once, that
+selects the function to handle the line. The result is a JobSpec object
+holding everything that the Python scripts need from the cluster file; the
+cluster program itself still reads the full file. A JobSpec can be saved to
+and loaded from a JSON file, so that it need not be parsed again, and a
+JobSpec parsed from a template containing placeholders such as {job} or
+{Rx} can be filled in for each job with JobSpec.format.
+
+provides functions:
+* parse_clt
+* standard_runtype
+
+provides classes:
+* CltError
+* MolSpec
+* JobSpec
+"""
+
+import copy
+import json
+import os
+import re
+
+eV = 27.21136
+bohr = 0.52917721
+
+
+class CltError(Exception):
+    """Error in a cluster file, with the file name and line number"""
+    def __init__(self, file, lineno, message):
+        self.file = file
+        self.lineno = lineno
+        self.message = message
+        super().__init__(f"{file}:{lineno}: {message}")
+
+
+class MolSpec:
+    """Molecule definition from a cluster file"""
+    def __init__(self, name):
+        self.name = name
+        self.ip = 0.0        # IP in a.u.
+        self.homo = 0.0      # HOMO energy in a.u.
+        self.delta_ac = 0.0  # AC shift in a.u.
+        self.units = ""      # Length unit for atom positions, if specified
+        self.atoms = []      # [label, Z, x, y, z] as read
+        self.joined = []     # Component molecules, for JOIN ... INTO
+        self.rotate = None   # [angle, nx, ny, nz] as read, angle in degrees
+        self.place = None    # [x, y, z] as read
+
+    def coordinates(self, unit="bohr"):
+        """Atom positions in the molecule's own frame, in the specified unit"""
+        own = "angstrom" if self.units.startswith("ang") else "bohr"
+        unit = "angstrom" if unit.startswith("ang") else "bohr"
+        factor = 1.0
+        if own == "bohr" and unit == "angstrom":
+            factor = bohr
+        elif own == "angstrom" and unit == "bohr":
+            factor = 1.0/bohr
+        return [[float(a[2])*factor, float(a[3])*factor, float(a[4])*factor]
+                for a in self.atoms]
+
+
+class JobSpec:
+    """Job specification obtained from a cluster file.
+
+    Attributes have the same names as the corresponding Job attributes.
+    Values that were not specified are left empty, and defaults are applied
+    by camcasp.read_clt when the specification is applied to a Job.
+    """
+    def __init__(self, file=""):
+        self.file = file
+        self.units = "bohr"     # Global length unit
+        self.angle = "degrees"  # Global angle unit
+        self.mols = {}          # mols[name] is a MolSpec
+        self.molecules = []     # Names of the molecules in the calculation
+        self.runtype = ""
+        self.prefix = ""
+        self.method = ""
+        self.func = ""
+        self.basis = ""
+        self.basistype = ""
+        self.auxbasis = ""
+        self.auxbasistype = ""
+        self.atomauxbasis = ""
+        self.atomauxbasistype = ""
+        self.isabasis = ""
+        self.kernel = ""
+        self.daltoncks = False
+        self.nomidbond = False
+        self.scfcode = ""
+        self.direct = False
+        self.ac_type = ""
+        self.ac_join = ""
+        self.ac_p1 = 0.0
+        self.ac_p2 = 0.0
+        self.imports = []
+        #  Line numbers of keywords, for diagnostics after parsing
+        self.lines = {}
+        #  Lines that were not recognised: (line number, text)
+        self.unknown = []
+
+    def to_dict(self):
+        d = copy.deepcopy(self.__dict__)
+        d["mols"] = {name: mol.__dict__ for name, mol in d["mols"].items()}
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        spec = cls()
+        for key, value in d.items():
+            setattr(spec, key, value)
+        mols = {}
+        for name, m in spec.mols.items():
+            mols[name] = MolSpec(name)
+            mols[name].__dict__.update(m)
+        spec.mols = mols
+        return spec
+
+    def save(self, path):
+        """Write the specification to a JSON file"""
+        with open(path, "w") as OUT:
+            json.dump(self.to_dict(), OUT, indent=1)
+
+    @classmethod
+    def load(cls, path):
+        """Read a specification written by JobSpec.save"""
+        with open(path) as IN:
+            return cls.from_dict(json.load(IN))
+
+    def format(self, **values):
+        """Return a copy with placeholders {name} replaced by the values given"""
+        def fill(x):
+            if isinstance(x, str):
+                return x.format_map(_Default(values)) if "{" in x else x
+            elif isinstance(x, list):
+                return [fill(y) for y in x]
+            elif isinstance(x, dict):
+                return {k: fill(y) for k, y in x.items()}
+            return x
+        return JobSpec.from_dict(fill(self.to_dict()))
+
+
+class _Default(dict):
+    """Leave unknown placeholders unchanged in JobSpec.format"""
+    def __missing__(self, key):
+        return "{" + key + "}"
+
+
+#  -----------------------------------------------------------------------
+#  Keyword handlers. Each is called as handler(spec, state, words, line)
+#  and returns True if the molecule-definition section has ended.
+
+def _value(words, ix, state, what):
+    try:
+        return float(words[ix])
+    except (IndexError, ValueError):
+        raise state.error(f"Can't read {what} value")
+
+def _molecule(spec, state, words, line):
+    if len(words) < 2:
+        raise state.error("Molecule name missing")
+    state.mol = MolSpec(words[1])
+    state.mol.units = spec.units
+    spec.mols[words[1]] = state.mol
+    state.block = "molecule"
+
+def _join(spec, state, words, line):
+    m = re.match(r'\s*JOIN\s+([\w,\s]+?)\s+INTO\s+([\w,-]+)', line, flags=re.I)
+    if not m:
+        raise state.error("JOIN command not understood")
+    state.mol = MolSpec(m.group(2))
+    state.mol.joined = [w for w in re.split(r'[\s,]+', m.group(1))
+                        if w and w.lower() != "and"]
+    spec.mols[m.group(2)] = state.mol
+
+def _mol_property(spec, state, words, line):
+    """I.P., HOMO or AC-SHIFT. In a molecule definition these take the form
+    {IP|HOMO [energy]|AC-SHIFT} value [eV]; in the calculation section
+    the molecule name follows the keyword."""
+    key = words[0].upper().replace(".", "")
+    if key == "IP":
+        key = "ip"
+    elif key == "HOMO":
+        key = "homo"
+    else:
+        key = "delta_ac"
+    words = [w for w in words if w.lower() != "energy"]
+    try:
+        float(words[1])
+        mol = state.mol
+        ix = 1
+    except (IndexError, ValueError):
+        if len(words) < 3:
+            raise state.error(f"{words[0]} value missing")
+        mol = spec.mols.setdefault(words[1], MolSpec(words[1]))
+        ix = 2
+    if mol is None:
+        raise state.error(f"{words[0]} given outside a molecule definition")
+    value = _value(words, ix, state, words[0])
+    if len(words) > ix+1 and re.match(r'ev', words[ix+1], flags=re.I):
+        value /= eV
+    setattr(mol, key, value)
+
+def _units(spec, state, words, line):
+    for w in words[1:]:
+        if re.match(r'(bohr|au|ang)', w, flags=re.I):
+            if state.block == "molecule" and state.mol:
+                state.mol.units = w.lower()
+            else:
+                spec.units = w.lower()
+        elif re.match(r'(deg|rad)', w, flags=re.I):
+            spec.angle = w.lower()
+
+def _rotate(spec, state, words, line):
+    #  ROTATE <mol> BY <angle> [DEGREES|RADIANS] ABOUT <nx> <ny> <nz>
+    m = re.match(r'\s*ROTATE\s+(\S+)\s+BY\s+(\S+)\s+(\w+\s+)?ABOUT\s+(\S+)\s+(\S+)\s+(\S+)',
+                 line, flags=re.I)
+    if not m:
+        raise state.error("ROTATE command not understood")
+    angle = m.group(2)
+    unit = (m.group(3) or spec.angle).strip().lower()
+    if unit.startswith("rad"):
+        try:
+            angle = repr(float(angle)*180.0/3.141592653589793)
+        except ValueError:
+            raise state.error("Rotation angle in radians must be a number")
+    mol = spec.mols.get(m.group(1))
+    if mol is None:
+        raise state.error(f"Molecule {m.group(1)} has not been defined")
+    mol.rotate = [angle, m.group(4), m.group(5), m.group(6)]
+
+def _place(spec, state, words, line):
+    #  PLACE <mol> AT <x> <y> <z>
+    m = re.match(r'\s*PLACE\s+(\S+)\s+AT\s+(\S+)\s+(\S+)\s+(\S+)', line, flags=re.I)
+    if not m:
+        raise state.error("PLACE command not understood")
+    mol = spec.mols.get(m.group(1))
+    if mol is None:
+        raise state.error(f"Molecule {m.group(1)} has not been defined")
+    mol.place = [m.group(2), m.group(3), m.group(4)]
+
+def _block(spec, state, words, line):
+    state.block = words[0].lower()
+
+def _end(spec, state, words, line):
+    state.block = ""
+
+def _run(spec, state, words, line):
+    if len(words) > 1:
+        spec.runtype = " ".join(words[1:]).lower()
+        spec.lines["runtype"] = state.lineno
+    state.section = "calculation"
+
+def _molecules(spec, state, words, line):
+    #  MOLECULES A [and] [B]
+    names = [w for w in words[1:] if w.lower() != "and"][:2]
+    if not names:
+        raise state.error("No molecule names given")
+    for s in names:
+        if s not in spec.mols and "{" not in s:
+            raise state.error(f"Molecule {s} has not been defined")
+    spec.molecules = names
+    spec.lines["molecules"] = state.lineno
+
+def _runtype(spec, state, words, line):
+    spec.runtype = words[0].lower()
+    spec.lines["runtype"] = state.lineno
+
+def _scfcode(spec, state, words, line):
+    m = re.match(r'\s*SCF-?CODE +(\w+[- ]?(\d+)?)( +(direct))?', line, flags=re.I)
+    if not m:
+        raise state.error("SCF code missing")
+    scfcode = m.group(1).lower()
+    if re.match(r'dalton[- ]?2006', scfcode):
+        scfcode = "dalton2006"
+    elif re.match(r'dalton([- ]?201[356])?', scfcode):
+        scfcode = "dalton"
+    elif re.match(r'psi4', scfcode):
+        scfcode = "psi4"
+    elif re.match(r'nwchem', scfcode):
+        scfcode = "nwchem"
+    elif re.match(r'molpro', scfcode):
+        scfcode = "molpro"
+    spec.scfcode = scfcode
+    spec.lines["scfcode"] = state.lineno
+    if m.group(4):
+        spec.direct = True
+
+def _basis(spec, state, words, line):
+    #  [MAIN-|AUX-|ATOMAUX-|ISA-]BASIS <name> [... TYPE <type>]
+    if len(words) < 2:
+        raise state.error(f"{words[0]} name missing")
+    word = words[0].upper()[:-5]
+    basis = words[1].lower()
+    m = re.search(r'TYPE\s+(\S+)', line, flags=re.I)
+    xc = m.group(1).lower() if m else ""
+    if word in ["MAIN-", ""]:
+        spec.basis = basis
+        spec.basistype = xc
+        spec.lines["basis"] = state.lineno
+    elif word == "AUX-":
+        spec.auxbasis = basis
+        spec.auxbasistype = xc
+    elif word == "ATOMAUX-":
+        spec.atomauxbasis = basis
+        spec.atomauxbasistype = xc
+    elif word == "ISA-":
+        spec.isabasis = basis
+
+def _midbond(spec, state, words, line):
+    #  Otherwise handled by cluster
+    if len(words) > 1 and words[1].upper() == "NONE":
+        spec.nomidbond = True
+
+def _method(spec, state, words, line):
+    if len(words) > 1:
+        spec.method = words[1]
+
+def _func(spec, state, words, line):
+    if len(words) > 1:
+        spec.func = words[1]
+
+def _ac(spec, state, words, line):
+    #  {AC|ASYMP[TOTIC][ CORR[ECTION]]}  [type] [join [p1 p2]]
+    #  where type = CS00, LB94, MULTPOLE, NONE or OFF
+    #  join = TH (i.e. Tozer-Handy), T-H, LINEAR or TANH or GRAC
+    spec.ac_type = "LB94"
+    spec.ac_join = "TANH"
+    words = words[1:]
+    if words and re.match(r'corr', words[0], flags=re.I):
+        words = words[1:]
+    while words:
+        if not re.match(r'[\w-]+$', words[0]):
+            #  Anything after this is a comment
+            break
+        key = words.pop(0).upper()
+        if key in ["CS00","LB94","MULTPOLE","MULTIPOLE"]:
+            spec.ac_type = "MULTPOLE" if key == "MULTIPOLE" else key
+        elif key in ["NONE","NO","OFF"]:
+            spec.ac_type = "NONE"
+        elif key in ["TH","T-H","LINEAR","TANH","GRAC"]:
+            spec.ac_join = key
+            try:
+                spec.ac_p1, spec.ac_p2 = float(words[0]), float(words[1])
+                words = words[2:]
+            except (IndexError, ValueError):
+                pass
+        else:
+            spec.unknown.append((state.lineno, f"asymptotic correction option {key}"))
+
+def _kernel(spec, state, words, line):
+    #  KERNEL (ALDA(X)?)(+CHF)?([-, ]DALTON)
+    for w in words[1:]:
+        m = re.match(r'(ALDA(X?))?(\+\w+)?$', w, flags=re.I)
+        if m and m.group(0):
+            spec.kernel = m.group(0)
+            break
+    else:
+        raise state.error("Unrecognised entry in KERNEL line. Options: (ALDA(X)?)(+CHF)([-, ]DALTON)")
+    spec.daltoncks = bool(re.search('DALTON', line, flags=re.I))
+
+def _prefix(spec, state, words, line):
+    if len(words) > 1:
+        spec.prefix = words[1]
+        spec.lines["prefix"] = state.lineno
+
+def _import(spec, state, words, line):
+    spec.imports.extend(words[1:])
+
+def _ignore(spec, state, words, line):
+    pass
+
+
+#  Keyword tables: (regular expression for the first word, handler).
+#  Keywords not listed here are passed to cluster without comment, but are
+#  recorded in JobSpec.unknown.
+_molecule_keywords = [
+    (r'MOLECULE|ATOM', _molecule),
+    (r'I\.?P\.?|HOMO|AC-SHIFT', _mol_property),
+    (r'JOIN', _join),
+    (r'UNITS?', _units),
+    (r'ROTATE', _rotate),
+    (r'PLACE', _place),
+    (r'GLOBAL', _block),
+    (r'END', _end),
+    (r'RUN(-?(TYPE|DESC|DESCRIPTION))?|JOB|FILES', _run),
+    (r'TITLE|OVERWRITE|SHOW|WRITE|MOVE|TRANSLATE|SITE-?TYPES?|TYPES?|AXES', _ignore),
+]
+_calculation_keywords = [
+    (r'FINISH', None),
+    (r'MOLECULES?|MOLS?|ATOMS?', _molecules),
+    (r'(PSI4-)?SAPT(-?DFT|\(DFT\))|DFT-?SAPT|D(ELTA)?.?HF|SAPT|'
+     r'SUPERMOL(ECULE)?|PROPERT(Y|IES)|CAMCASP|\{\w+\}', _runtype),
+    (r'SCF-?CODE', _scfcode),
+    (r'(MAIN-|AUX-|ATOMAUX-|ISA-)?BASIS', _basis),
+    (r'MIDBOND', _midbond),
+    (r'METHOD', _method),
+    (r'FUNC(TIONAL)?', _func),
+    (r'I\.?P\.?|HOMO|AC-SHIFT', _mol_property),
+    (r'AC|ASYMP\w*(-CORR\w*)?', _ac),
+    (r'KERNEL', _kernel),
+    (r'(FILE-?)?PREFIX', _prefix),
+    (r'IMPORT', _import),
+    (r'END|TASK|ATOM-?AUX-?BASIS|ORIENT|LOCALI[SZ]ATION|ISA|DMA|SAVE|'
+     r'SCF|INTERFACE|CHARGE|SPIN|MULTIPLICITY|CUTOFF|NO-?MIDBOND', _ignore),
+]
+
+
+def _compile(table):
+    """Combine a keyword table into a single regular expression, with one
+    named group for each entry."""
+    pattern = "|".join(f"(?P<k{ix}>{p})" for ix, (p, h) in enumerate(table))
+    return re.compile(f"(?:{pattern})$", flags=re.I), [h for p, h in table]
+
+_tables = {
+    "molecules": _compile(_molecule_keywords),
+    "calculation": _compile(_calculation_keywords),
+}
+_atom = re.compile(r'\s*[\w@-]+\s+-?\d*\.?\d+\s+(\S+)\s+(\S+)\s+(\S+)')
+
+
+class _State:
+    """Parser state: current section, block and molecule, and line number"""
+    def __init__(self, file):
+        self.file = file
+        self.section = "molecules"
+        self.block = ""
+        self.mol = None
+        self.lineno = 0
+
+    def error(self, message):
+        return CltError(self.file, self.lineno, message)
+
+
+_cache = {}
+
+def parse_clt(file, text=None):
+    """Parse a cluster file, or the text provided, into a JobSpec.
+
+    Raises CltError if the file contains an error. Results for files are
+    cached, keyed by path and modification time.
+    """
+    if text is None:
+        st = os.stat(file)
+        key = (os.path.abspath(file), st.st_mtime_ns, st.st_size)
+        if key in _cache:
+            return copy.deepcopy(_cache[key])
+        with open(file) as CLT:
+            text = CLT.read()
+    else:
+        key = None
+    spec = JobSpec(file)
+    state = _State(file)
+    for state.lineno, line in enumerate(text.splitlines(), start=1):
+        words = line.split()
+        if not words or words[0].startswith("!"):
+            continue
+        regex, handlers = _tables[state.section]
+        m = regex.match(words[0])
+        if m:
+            handler = handlers[int(m.lastgroup[1:])]
+            if handler is None:
+                #  FINISH
+                break
+            handler(spec, state, words, line)
+        elif state.block == "molecule" and _atom.match(line):
+            state.mol.atoms.append([words[0]] + words[1:5])
+        else:
+            spec.unknown.append((state.lineno, line.strip()))
+    if key:
+        _cache[key] = copy.deepcopy(spec)
+    return spec
+
+
+_runtypes = [(re.compile(r'(saptdft|sapt(-dft|\(dft\))|dft-?sapt)'), "saptdft"),
+             (re.compile(r'sapt'), "sapt"),
+             (re.compile(r'(d(elta)?.?hf)'), "deltahf"),
+             (re.compile(r'propert(y|ies)'), "properties"),
+             (re.compile(r'supermol(ecule)?'), "supermol"),
+             (re.compile(r'camcasp'), "camcasp"),
+             (re.compile(r'psi4-sapt(\(dft\)|-dft)'), "psi4-saptdft")]
+
+def standard_runtype(runtype):
+    """Standard name for a run-type, or None if it isn't understood"""
+    for regex, name in _runtypes:
+        if regex.match(runtype):
+            return name
+    return None
@@ -0,0 +1,285 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Re-use the output of the cluster program when setting up jobs.
+
+Two mechanisms are provided:
+
+1. A cache of cluster outputs, keyed by a hash of the cluster file, the
+   SCF code and the job name (which cluster uses to name its outputs),
+   together with the CamCASP version and the cluster program itself, so
+   that an upgrade doesn't give stale setups. If a job is set up with the
+   same cluster file and job name as one that has been processed before,
+   the files are copied from the cache instead of running cluster again.
+   The cache is in $CAMCASP_SETUP_CACHE if set, otherwise in
+   $SCRATCH/camcasp-setup-cache.
+
+2. Template mode, for scans in which only the Rotate and Place commands
+   differ between jobs. The outputs of cluster for a reference job are
+   copied, with the job name changed and the atom coordinates replaced by
+   those for the new geometry. Coordinates that are not atom positions
+   (such as midbond positions) are not changed, so template mode is only
+   valid if check_patch finds that the patched files agree with a full
+   cluster run for a second geometry.
+
+provides functions:
+* cache_key
+* cache_dir
+* fetch
+* store
+* atom_positions
+* patch_setup
+* check_patch
+"""
+
+import hashlib
+import math
+import os
+import re
+import shutil
+import tempfile
+
+from cltspec import bohr
+
+#  Files in the job directory that are not outputs of cluster
+_not_output = re.compile(r'.*\.(clt|clout|spec)$')
+
+
+def _program_id():
+    """The CamCASP version, and the path, size and modification time of the
+    cluster program"""
+    camcasp = os.environ.get("CAMCASP") \
+        or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        with open(os.path.join(camcasp, "VERSION")) as V:
+            version = V.read()
+    except OSError:
+        version = ""
+    cluster = shutil.which("cluster")
+    try:
+        st = os.stat(cluster)
+        program = f"{os.path.realpath(cluster)} {st.st_size} {st.st_mtime_ns}"
+    except (OSError, TypeError):
+        program = ""
+    return version + "\0" + program
+
+
+def cache_key(clttext, scfcode, jobname):
+    """Hash of the cluster file contents, the SCF code, the job name and
+    the version of the cluster program"""
+    h = hashlib.sha256()
+    for item in [scfcode, jobname, _program_id(), clttext]:
+        h.update(item.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def cache_dir():
+    """Directory containing the setup cache, or None if there isn't one"""
+    d = os.environ.get("CAMCASP_SETUP_CACHE")
+    if not d and os.environ.get("SCRATCH"):
+        d = os.path.join(os.environ["SCRATCH"], "camcasp-setup-cache")
+    return d
+
+
+def fetch(key, dest):
+    """Copy the cached cluster outputs with this key into directory dest.
+    Returns True if they were found."""
+    d = cache_dir()
+    if not d:
+        return False
+    entry = os.path.join(d, key)
+    if not os.path.isdir(entry):
+        return False
+    for f in os.listdir(entry):
+        shutil.copy2(os.path.join(entry, f), dest)
+    return True
+
+
+def store(key, src, files):
+    """Store the listed files from directory src in the cache"""
+    d = cache_dir()
+    if not d:
+        return
+    entry = os.path.join(d, key)
+    if os.path.isdir(entry):
+        return
+    os.makedirs(d, exist_ok=True)
+    #  Copy into a temporary directory and rename it, so that a job running
+    #  at the same time never sees an incomplete entry.
+    tmp = tempfile.mkdtemp(dir=d, prefix=".tmp-")
+    for f in files:
+        shutil.copy2(os.path.join(src, f), tmp)
+    try:
+        os.rename(tmp, entry)
+    except OSError:
+        #  Another job stored the same entry first
+        shutil.rmtree(tmp)
+
+
+def outputs(dir, before=()):
+    """Names of the cluster output files in dir, excluding those listed"""
+    return sorted(f for f in os.listdir(dir)
+                  if os.path.isfile(os.path.join(dir, f))
+                  and f not in before and not _not_output.match(f))
+
+
+def _rotation(angle, n):
+    """Matrix for a rotation by angle (degrees) about the vector n"""
+    norm = math.sqrt(sum(x*x for x in n))
+    if norm == 0.0:
+        return [[1.0,0.0,0.0],[0.0,1.0,0.0],[0.0,0.0,1.0]]
+    x, y, z = [a/norm for a in n]
+    c = math.cos(math.radians(angle))
+    s = math.sin(math.radians(angle))
+    t = 1.0 - c
+    return [[t*x*x+c,   t*x*y-s*z, t*x*z+s*y],
+            [t*x*y+s*z, t*y*y+c,   t*y*z-s*x],
+            [t*x*z-s*y, t*y*z+s*x, t*z*z+c]]
+
+
+def atom_positions(spec):
+    """Positions in bohr of the atoms of each molecule defined in the spec,
+    after any Rotate and Place commands.
+
+    Returns a list of (label, (x, y, z)) tuples.
+    """
+    scale = 1.0/bohr if spec.units.startswith("ang") else 1.0
+    atoms = []
+    for mol in spec.mols.values():
+        if not mol.atoms:
+            continue
+        r = [[1.0,0.0,0.0],[0.0,1.0,0.0],[0.0,0.0,1.0]]
+        if mol.rotate:
+            angle, nx, ny, nz = [float(v) for v in mol.rotate]
+            r = _rotation(angle, [nx, ny, nz])
+        if mol.place:
+            origin = [float(v)*scale for v in mol.place]
+        else:
+            origin = [0.0, 0.0, 0.0]
+        for atom, p in zip(mol.atoms, mol.coordinates("bohr")):
+            q = tuple(origin[i] + sum(r[i][j]*p[j] for j in range(3))
+                      for i in range(3))
+            atoms.append((atom[0], q))
+    return atoms
+
+
+_number = r'-?\d+\.\d*(?:[EeDd][-+]?\d+)?'
+#  A label, optionally followed by a nuclear charge, followed by x y z
+_coords = re.compile(rf'^(\s*)(\S+)(\s+{_number})?((?:\s+{_number}){{3}})(?=\s|$)')
+_field = re.compile(rf'(\s+)({_number})')
+
+
+def _decimals(token):
+    m = re.match(r'-?\d+\.(\d*)', token)
+    return len(m.group(1))
+
+
+def _format(value, token):
+    """Format value in the same style as token"""
+    d = _decimals(token)
+    m = re.search(r'([EeDd])', token)
+    if m:
+        return f"{value:.{d}E}".replace("E", m.group(1))
+    return f"{value:.{d}f}"
+
+
+def _patch_line(line, old, new, labels):
+    """Replace the coordinates of an atom in line, if there are any.
+    old and new are lists of (label, position) for the reference and new
+    geometries. Returns the new line, or None if the coordinates look like
+    an atom position but can't be matched unambiguously."""
+    m = _coords.match(line)
+    if not m or m.group(2).startswith("!"):
+        return line
+    label = m.group(2)
+    if label not in labels and re.sub(r'\d+$', '', label) not in labels:
+        return line
+    fields = _field.findall(m.group(4))
+    values = [float(re.sub(r'[Dd]', 'E', t)) for s, t in fields]
+    tol = max(2.0*10**(-min(_decimals(t) for s, t in fields)), 1.0e-6)
+    for unit in [1.0, bohr]:
+        found = [ix for ix, (l, p) in enumerate(old)
+                 if re.sub(r'\d+$', '', l) == re.sub(r'\d+$', '', label)
+                 and all(abs(p[i]*unit - values[i]) <= tol for i in range(3))]
+        if found:
+            targets = set(tuple(round(c, 10) for c in new[ix][1]) for ix in found)
+            if len(targets) > 1:
+                return None
+            q = new[found[0]][1]
+            s = ""
+            for i, (space, token) in enumerate(fields):
+                v = _format(q[i]*unit, token)
+                s += v.rjust(len(space) + len(token)) if len(v) < len(space) + len(token) else " " + v
+            return line[:m.start(4)] + s + line[m.end(4):]
+    return line
+
+
+def _rename(text, oldname, newname):
+    return re.sub(rf'(?<![\w.-]){re.escape(oldname)}(?![0-9A-Za-z])', newname, text)
+
+
+def patch_setup(refdir, refname, refspec, dest, name, spec):
+    """Construct the cluster outputs for job name with specification spec
+    in directory dest, from those of job refname in refdir.
+
+    Returns a list of the files written, or None if the reference files
+    can't be patched for this geometry.
+    """
+    old = atom_positions(refspec)
+    new = atom_positions(spec)
+    if len(old) != len(new):
+        return None
+    labels = set(l for l, p in old) | set(re.sub(r'\d+$', '', l) for l, p in old)
+    files = []
+    for f in outputs(refdir):
+        with open(os.path.join(refdir, f), encoding="latin-1") as IN:
+            lines = IN.read().splitlines(keepends=True)
+        text = []
+        for line in lines:
+            newline = _patch_line(line, old, new, labels)
+            if newline is None:
+                return None
+            text.append(newline)
+        newfile = _rename(f, refname, name)
+        with open(os.path.join(dest, newfile), "w", encoding="latin-1") as OUT:
+            OUT.write(_rename("".join(text), refname, name))
+        files.append(newfile)
+    return files
+
+
+def _same(line1, line2):
+    """Lines are the same except for rounding in the last decimal place"""
+    t1, t2 = line1.split(), line2.split()
+    if len(t1) != len(t2):
+        return False
+    for a, b in zip(t1, t2):
+        if a == b:
+            continue
+        if not (re.match(_number+'$', a) and re.match(_number+'$', b)):
+            return False
+        ulp = 10**(-min(_decimals(a), _decimals(b)))
+        if abs(float(re.sub(r'[Dd]','E',a)) - float(re.sub(r'[Dd]','E',b))) > 2.0*ulp:
+            return False
+    return True
+
+
+def check_patch(dir1, dir2):
+    """Check that the cluster outputs in dir1 agree with the files of the
+    same names in dir2. Returns None if they do, otherwise a description
+    of the first difference."""
+    f1, f2 = outputs(dir1), outputs(dir2)
+    missing = [f for f in f1 if f not in f2]
+    if missing:
+        return f"files missing from {dir2}: {' '.join(missing)}"
+    for f in f1:
+        with open(os.path.join(dir1, f), encoding="latin-1") as A, \
+             open(os.path.join(dir2, f), encoding="latin-1") as B:
+            a, b = A.read().splitlines(), B.read().splitlines()
+        if len(a) != len(b):
+            return f"{f}: different numbers of lines"
+        for n, (l1, l2) in enumerate(zip(a, b), start=1):
+            if not _same(l1, l2):
+                return f"{f}:{n}: {l1.strip()}  |  {l2.strip()}"
+    return None
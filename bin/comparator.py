@@ -0,0 +1,236 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Compare numerical results with check results, within tolerances.
+
+Results files are read into dictionaries of named values:
+
+* CamCASP summary files (<job>-data-summary.data): each value is named by
+  the quantity and its description, e.g.
+  "E^{2}_{ind}(A) :: DF :: PROP cks :: NoReg". If the summary file has
+  gone, the values are taken from the job's results manifest,
+  <job>-results.json (see jobresults.py), which may also be given
+  instead of the summary.
+* Tables, such as the output of extract_saptdft.py and the check_results
+  files of the scan tests: a header line of column names, preceded by the
+  unit, and then one row for each job. Each value is named
+  "<row> <column>". Entries such as ERR are read as NaN.
+* Any other file of numbers, such as multipole moment (.mom) and
+  dispersion coefficient (.pot) files: each value is named by the
+  non-numeric words on its line, or on the last line that had any, and
+  its position after them, e.g. "O1 Rank 5 [3]". Lines starting with !
+  or # are comments.
+
+Each value is compared with the check value using the tolerance for that
+quantity: an absolute tolerance and a relative one, so that values agree
+if |test - check| <= abs + rel*|check|. Tolerances are given as a list of
+(pattern, abs, rel), where the pattern is matched (by re.search) against
+the value's name; the first match applies, otherwise the default.
+
+provides functions:
+* read_summary
+* read_table
+* read_values
+* read_file
+* compare
+* compare_files
+
+provides classes:
+* Comparison
+"""
+
+import math
+import os
+import re
+
+import jobresults
+
+#  Exit codes used by the tests (see tests/run_tests.py)
+AGREE = 0
+DIFFER = 3
+FAILED = 4
+
+_float = re.compile(r'^[-+]?(\d+\.\d*|\.\d+|\d+)([EeDd][-+]?\d+)?$')
+
+
+def _number(token):
+    """The value of token if it is a floating-point number (with a decimal
+    point or an exponent), otherwise None. Integers are treated as labels."""
+    if _float.match(token) and re.search(r'[.EeDd]', token):
+        return float(re.sub(r'[Dd]', 'E', token))
+    return None
+
+
+def read_summary(file):
+    """Read a CamCASP data-summary file, or the results manifest of a job"""
+    values = {}
+    for line in jobresults.summary_lines(file):
+        m = re.match(r'(\S+)\s+([-+]?\d*\.\d+[EeDd][-+]?\d+)\s+(\S+)\s*(.*?)\s*$', line)
+        if m:
+            desc = re.sub(r'[\s:]+$', '', re.sub(r'\s+', ' ', m.group(4)))
+            key = f"{m.group(1)} :: {desc}" if desc else m.group(1)
+            if m.group(3).upper() != "CM-1":
+                key += f" [{m.group(3)}]"
+            n = 1
+            name = key
+            while name in values:
+                n += 1
+                name = f"{key} #{n}"
+            values[name] = float(re.sub(r'[Dd]', 'E', m.group(2)))
+    return values
+
+
+def read_table(file, text=None):
+    """Read a table of results with a header line.
+    Returns (columns, rows), where rows is a dictionary of lists of values
+    for each row label, in the order of the columns."""
+    if text is None:
+        with open(file, encoding="iso-8859-1") as T:
+            text = T.read()
+    columns = []
+    rows = {}
+    for line in text.splitlines():
+        w = line.split()
+        if not w:
+            continue
+        values = []
+        for token in w[1:]:
+            v = _number(token)
+            if v is None:
+                if re.match(r'ERR|NaN|-+$|\*+$', token, flags=re.I):
+                    v = math.nan
+                else:
+                    break
+            values.append(v)
+        else:
+            if values and columns and len(values) == len(columns):
+                rows[w[0]] = values
+                continue
+        if len(w) > 1 and all(_number(t) is None for t in w):
+            #  Header: the unit, then the column names
+            columns = w[1:]
+    return columns, rows
+
+
+def read_values(file):
+    """Read the numbers in any file, named by the labels on their lines"""
+    values = {}
+    label = ""
+    n = 0
+    with open(file, encoding="iso-8859-1") as F:
+        for line in F:
+            if re.match(r'\s*[!#]', line):
+                continue
+            w = line.split()
+            numbers = [_number(t) for t in w]
+            words = [t for t, v in zip(w, numbers) if v is None]
+            if words:
+                label = " ".join(words)
+                n = 0
+            for v in numbers:
+                if v is not None:
+                    key = f"{label} [{n}]"
+                    k = 1
+                    while key in values:
+                        k += 1
+                        key = f"{label} [{n}] #{k}"
+                    values[key] = v
+                    n += 1
+    return values
+
+
+def read_file(file):
+    """Read a results file into a dictionary of named values, using the
+    reader appropriate to its contents"""
+    if file.endswith("-results.json"):
+        return read_summary(file)
+    with open(file, encoding="iso-8859-1") as F:
+        text = F.read()
+    if re.search(r'Summary of CamCASP calculation', text):
+        return read_summary(file)
+    columns, rows = read_table(file, text)
+    if rows:
+        return {f"{row} {col}": v for row, vals in rows.items()
+                for col, v in zip(columns, vals)}
+    return read_values(file)
+
+
+class Comparison:
+    """Result of comparing test values with check values"""
+    def __init__(self):
+        #  (name, check, test, |difference|, allowed) for each common value
+        self.deviations = []
+        self.missing = []     # names of check values not in the test results
+        self.extra = []       # names of test values not in the check results
+
+    @property
+    def failures(self):
+        return [d for d in self.deviations
+                if not (d[3] <= d[4]) and not (math.isnan(d[1]) and math.isnan(d[2]))]
+
+    @property
+    def ok(self):
+        return not self.failures and not self.missing
+
+    def exit_code(self):
+        return AGREE if self.ok else DIFFER
+
+    def report(self, worst=10):
+        """A compact report of the comparison, with the worst deviations
+        relative to their tolerances"""
+        failures = self.failures
+        s = f"{len(self.deviations)} values compared, {len(failures)} outside tolerance"
+        if self.missing:
+            s += f", {len(self.missing)} missing"
+        if self.extra:
+            s += f", {len(self.extra)} not in check results"
+        s += "\n"
+        def ratio(d):
+            if math.isnan(d[3]):
+                return math.inf
+            return d[3]/d[4] if d[4] > 0.0 else (math.inf if d[3] > 0.0 else 0.0)
+        #  NaN in both the check and the test results counts as agreement
+        shown = [d for d in self.deviations if not (math.isnan(d[1]) and math.isnan(d[2]))]
+        shown = sorted(shown, key=ratio, reverse=True)[:worst]
+        shown = [d for d in shown if d[3] > 0.0 or math.isnan(d[3])]
+        if shown:
+            width = max(len(d[0]) for d in shown)
+            s += f"{'Quantity':{width}s} {'Check':>15s} {'Test':>15s} {'Difference':>11s} {'Tolerance':>10s}\n"
+            for name, check, test, diff, allowed in shown:
+                flag = "" if diff <= allowed else "  *"
+                s += (f"{name:{width}s} {check:15.8g} {test:15.8g} {diff:11.3e}"
+                      f" {allowed:10.2e}{flag}\n")
+        for name in self.missing[:worst]:
+            s += f"Missing from test results: {name}\n"
+        if len(self.missing) > worst:
+            s += f"... and {len(self.missing) - worst} more\n"
+        return s
+
+
+def compare(check, test, tolerances=(), abs_tol=1.0e-6, rel_tol=1.0e-6):
+    """Compare dictionaries of test and check values"""
+    patterns = [(re.compile(p), a, r) for p, a, r in tolerances]
+    result = Comparison()
+    for name, c in check.items():
+        if name not in test:
+            result.missing.append(name)
+            continue
+        t = test[name]
+        a, r = abs_tol, rel_tol
+        for p, pa, pr in patterns:
+            if p.search(name):
+                a, r = pa, pr
+                break
+        result.deviations.append((name, c, t, abs(t - c), a + r*abs(c)))
+    result.extra = [name for name in test if name not in check]
+    return result
+
+
+def compare_files(check_file, test_file, tolerances=(), abs_tol=1.0e-6, rel_tol=1.0e-6):
+    """Compare a results file with a check file.
+    Returns a Comparison, or None if either file is missing."""
+    if not os.path.exists(check_file) or not os.path.exists(test_file):
+        return None
+    return compare(read_file(check_file), read_file(test_file),
+                   tolerances, abs_tol, rel_tol)
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Compare results files with check files, within tolerances.
+"""
+
+import argparse
+import os
+
+from comparator import compare_files, AGREE, DIFFER, FAILED
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Compare results files with check files, within tolerances.
+""",epilog="""
+The files may be CamCASP summary files (<job>-data-summary.data), or
+the results manifests written with them (<job>-results.json), tables
+such as those printed by extract_saptdft.py, or any other files of
+numbers, such as multipole moment or dispersion coefficient files. Each
+value in the check file is compared with the value of the same name in
+the test file, and they agree if
+  |test - check| <= abs + rel*|check|
+The default tolerances are given by --abs and --rel, and may be changed
+for particular quantities by
+  --tol <pattern> <abs> [<rel>]
+which may be repeated. The pattern is a regular expression, matched
+against the names of the values; the first pattern that matches applies.
+Names are shown in the report, e.g.
+  "E^{2}_{disp} :: DF :: NoReg :: PROP cks" (summary file)
+  "H2O2_scan_31 elst" (table: row and column)
+  "O1 Rank 5 [3]" (other files: labels on the line and position)
+
+With two arguments, the test file is compared with the check file. With
+more, the last is a directory, and each of the other files is compared
+with the file of the same name in that directory.
+
+A report of the worst deviations (--worst, default 10), relative to their
+tolerances, is printed. The exit code is 0 if all values agree and none
+are missing from the test results, 3 if any differ, and 4 if a file is
+missing, as for the tests run by run_tests.py.
+""")
+
+parser.add_argument("files", nargs="+", help="check file and test file, or check"
+                    " files and test directory")
+parser.add_argument("--abs", type=float, default=1.0e-6, help="Default absolute tolerance")
+parser.add_argument("--rel", type=float, default=1.0e-6, help="Default relative tolerance")
+parser.add_argument("--tol", nargs="+", action="append", default=[],
+                    metavar="PATTERN ABS [REL]",
+                    help="Tolerances for values whose names match the pattern")
+parser.add_argument("--worst", type=int, default=10,
+                    help="Number of deviations to show")
+parser.add_argument("--quiet", "-q", action="store_true",
+                    help="Print only the summary line for each file")
+args = parser.parse_args()
+
+tolerances = []
+for t in args.tol:
+    if len(t) not in [2, 3]:
+        parser.error("--tol needs a pattern, an absolute tolerance and optionally a relative one")
+    try:
+        tolerances.append((t[0], float(t[1]), float(t[2]) if len(t) > 2 else 0.0))
+    except ValueError:
+        parser.error(f"Tolerances not understood: {' '.join(t)}")
+
+if len(args.files) < 2:
+    parser.error("At least two files are needed")
+if len(args.files) == 2 and not os.path.isdir(args.files[1]):
+    pairs = [tuple(args.files)]
+else:
+    testdir = args.files[-1]
+    pairs = [(f, os.path.join(testdir, os.path.basename(f))) for f in args.files[:-1]]
+
+rc = AGREE
+for check, test in pairs:
+    result = compare_files(check, test, tolerances, args.abs, args.rel)
+    if len(pairs) > 1:
+        print(f"{test}:")
+    if result is None:
+        print(f"Can't find {check if not os.path.exists(check) else test}")
+        rc = FAILED
+        continue
+    report = result.report(0 if args.quiet else args.worst)
+    print(report.splitlines()[0] if args.quiet else report, end="\n" if args.quiet else "")
+    if not result.ok and rc == AGREE:
+        rc = DIFFER
+exit(rc)
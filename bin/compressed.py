@@ -0,0 +1,130 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Read result and interface files whether or not they have been compressed.
+
+Finished jobs may be archived by archive_results.py, which compresses the
+large files with gzip (.gz) or zstd (.zst). The scripts that read these
+files use open_any in place of open and exists in place of
+os.path.exists, giving the name of the uncompressed file. If it isn't
+there, the compressed versions are looked for, and read as a stream, so
+that they are never unpacked on disk.
+
+gzip is always available. zstd needs the compression.zstd module (Python
+3.14 and later) or the zstandard package.
+
+provides functions:
+* find
+* exists
+* plain_name
+* open_any
+* compress
+"""
+
+import gzip
+import io
+import os
+import shutil
+
+SUFFIXES = [".gz", ".zst"]
+
+
+def _zstd():
+    """The zstd module, or None if there isn't one"""
+    try:
+        from compression import zstd
+        return zstd
+    except ImportError:
+        pass
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+def find(file):
+    """The name of the file, or of a compressed version of it, that exists,
+    or None"""
+    if os.path.exists(file):
+        return file
+    for suffix in SUFFIXES:
+        if os.path.exists(file + suffix):
+            return file + suffix
+    return None
+
+
+def exists(file):
+    """True if the file, or a compressed version of it, exists"""
+    return find(file) is not None
+
+
+def plain_name(file):
+    """The name of the file without any compression suffix"""
+    for suffix in SUFFIXES:
+        if file.endswith(suffix):
+            return file[:-len(suffix)]
+    return file
+
+
+def open_any(file, mode="r", encoding=None, errors=None):
+    """Open the file, or a compressed version of it, for reading.
+    mode is "r" (or "rt") for text or "rb" for binary, as for open."""
+    if mode not in ["r", "rt", "rb"]:
+        raise ValueError(f"open_any can only read files, not mode {mode}")
+    path = find(file)
+    if path is None:
+        #  Raise the usual exception
+        return open(file, mode, encoding=encoding, errors=errors)
+    if path.endswith(".gz"):
+        if mode == "rb":
+            return gzip.open(path, "rb")
+        return gzip.open(path, "rt", encoding=encoding, errors=errors)
+    if path.endswith(".zst"):
+        zstd = _zstd()
+        if zstd is None:
+            raise OSError(f"Can't read {path}: the zstandard module is needed for .zst files")
+        if zstd.__name__ == "zstandard":
+            stream = zstd.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+            stream = io.BufferedReader(stream)
+        else:
+            #  compression.zstd, which also has a ZstdDecompressor class
+            stream = zstd.open(path, "rb")
+        if mode == "rb":
+            return stream
+        return io.TextIOWrapper(stream, encoding=encoding, errors=errors)
+    return open(path, mode, encoding=encoding, errors=errors)
+
+
+def compress(file, method="gz", level=None):
+    """Compress the file to <file>.gz or <file>.zst, and delete the original.
+    Returns the name of the compressed file."""
+    target = f"{file}.{method}"
+    temp = target + ".part"
+    try:
+        with open(file, "rb") as IN:
+            if method == "gz":
+                with gzip.open(temp, "wb", compresslevel=level or 6) as OUT:
+                    shutil.copyfileobj(IN, OUT, 1 << 20)
+            elif method == "zst":
+                zstd = _zstd()
+                if zstd is None:
+                    raise OSError("The zstandard module is needed to write .zst files")
+                if zstd.__name__ == "zstandard":
+                    with open(temp, "wb") as OUT:
+                        zstd.ZstdCompressor(level=level or 3).copy_stream(IN, OUT)
+                else:
+                    #  compression.zstd
+                    with zstd.open(temp, "wb", level=level or 3) as OUT:
+                        shutil.copyfileobj(IN, OUT, 1 << 20)
+            else:
+                raise ValueError(f"Unknown compression method {method}")
+        shutil.copystat(file, temp)
+        os.replace(temp, target)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+    os.remove(file)
+    return target
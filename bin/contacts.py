@@ -0,0 +1,211 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Close-contact screening of the points of a scan.
+
+The atoms of the two molecules of a cluster-file template are placed for
+each point of a geometry file, by the ROTATE and PLACE commands of the
+template with the geometry variables substituted, and the closest contact
+of an atom of A with an atom of B is found, as a fraction of the sum of
+their van der Waals radii. Points where that fraction is below a given
+scale are too close for a useful calculation (the SCF may not even
+converge), and are skipped by batch_camcasp.py.
+
+All the points are handled together with NumPy, as long as A is fixed,
+as it normally is. If A is small the distances to all its atoms are
+evaluated, otherwise the atoms of A are sorted into the cells of a grid,
+with cell size the longest contact distance, and only the atoms of A in
+the 27 cells around each atom of B are considered.
+
+provides functions:
+* molecule_atoms
+* placed
+* closest_contacts
+* contact
+
+provides classes:
+* ContactError
+"""
+
+import re
+
+import numpy as np
+
+from cltspec import bohr
+from longrange import rotation_matrices
+
+#  van der Waals radii in angstrom, by atomic number (Bondi, with H from
+#  Rowland and Taylor and the rest of the main groups from Mantina et al.)
+vdw_radii = {
+    1: 1.10,  2: 1.40,  3: 1.81,  4: 1.53,  5: 1.92,  6: 1.70,  7: 1.55,  8: 1.52,
+    9: 1.47, 10: 1.54, 11: 2.27, 12: 1.73, 13: 1.84, 14: 2.10, 15: 1.80, 16: 1.80,
+   17: 1.75, 18: 1.88, 19: 2.75, 20: 2.31, 31: 1.87, 32: 2.11, 33: 1.85, 34: 1.90,
+   35: 1.85, 36: 2.02, 37: 3.03, 38: 2.49, 49: 1.93, 50: 2.17, 51: 2.06, 52: 2.06,
+   53: 1.98, 54: 2.16, 55: 3.43, 56: 2.68,
+}
+default_radius = 2.0
+
+
+class ContactError(Exception):
+    pass
+
+
+def _leaves(spec, name):
+    """The molecule definitions that make up molecule name, following JOINs"""
+    mol = spec.mols.get(name)
+    if mol is None:
+        raise ContactError(f"Molecule {name} has not been defined")
+    if mol.joined:
+        return [m for j in mol.joined for m in _leaves(spec, j)]
+    return [mol]
+
+
+def molecule_atoms(spec, name):
+    """Labels, van der Waals radii (bohr) and positions (bohr, in the
+    molecule's own frame) of the atoms of molecule name, with the
+    definition each comes from. Atoms with Z = 0 (dummy atoms) are left
+    out."""
+    labels, radii, positions, parts = [], [], [], []
+    for mol in _leaves(spec, name):
+        for atom, r in zip(mol.atoms, mol.coordinates("bohr")):
+            try:
+                Z = int(round(float(atom[1])))
+            except ValueError:
+                raise ContactError(f"Can't read the nuclear charge of {atom[0]} in {mol.name}")
+            if Z < 1:
+                continue
+            labels.append(atom[0])
+            radii.append(vdw_radii.get(Z, default_radius)/bohr)
+            positions.append(r)
+            parts.append(mol)
+    return labels, np.array(radii), np.array(positions).reshape(-1, 3), parts
+
+
+def _count(points):
+    if isinstance(points, dict):
+        return len(next(iter(points.values())))
+    return len(points)
+
+
+def _numbers(strings, points, what):
+    """Array (points, len(strings)) of the values of the strings from the
+    cluster file, with the template variables substituted. The points are
+    a list of dictionaries of the variables, or a dictionary of arrays."""
+    n = _count(points)
+    columns = []
+    try:
+        for s in strings:
+            m = re.fullmatch(r'\s*\{(\w+)\}\s*', s)
+            if isinstance(points, dict):
+                if m:
+                    columns.append(np.asarray(points[m.group(1)], dtype=float))
+                else:
+                    columns.append(np.full(n, float(s)))
+            else:
+                columns.append(np.array([float(s.format(**v)) for v in points]))
+    except (KeyError, ValueError, IndexError):
+        raise ContactError(f"Can't evaluate the {what} values {' '.join(strings)}")
+    return np.stack(columns, axis=1).reshape(n, len(strings))
+
+
+def placed(spec, name, points):
+    """Atom positions (points, atoms, 3) in bohr of molecule name for each
+    point, with the values of the template variables given as a list of
+    dictionaries, one for each point, or a dictionary of arrays. The radii
+    are returned too."""
+    labels, radii, positions, parts = molecule_atoms(spec, name)
+    n = _count(points)
+    X = np.empty((n, len(positions), 3))
+    scale = 1.0/bohr if spec.units.startswith("ang") else 1.0
+    for mol in set(parts):
+        atoms = np.array([p is mol for p in parts])
+        x = np.broadcast_to(positions[atoms], (n,) + positions[atoms].shape)
+        if mol.rotate:
+            r = _numbers(mol.rotate, points, f"rotation of {mol.name}")
+            x = np.einsum('nij,naj->nai', rotation_matrices(r[:, 0], r[:, 1:]), x)
+        if mol.place:
+            t = _numbers(mol.place, points, f"position of {mol.name}")
+            x = x + scale*t[:, None, :]
+        X[:, atoms, :] = x
+    return X, radii
+
+
+def _grid(xa, rmax):
+    """Atoms of A sorted into cubic cells of side rmax: the origin, the
+    numbers of cells, and an array (cells..., m) of the atom indices in
+    each cell, padded with -1"""
+    origin = xa.min(axis=0) - rmax
+    cells = np.floor((xa - origin)/rmax).astype(int)
+    shape = cells.max(axis=0) + 2
+    flat = np.ravel_multi_index(cells.T, shape)
+    m = np.bincount(flat).max()
+    table = np.full((np.prod(shape), m), -1)
+    fill = np.zeros(np.prod(shape), dtype=int)
+    for i, c in enumerate(flat):
+        table[c, fill[c]] = i
+        fill[c] += 1
+    return origin, shape, table
+
+
+def closest_contacts(xa, ra, xb, rb, scale=1.0, chunk=4096):
+    """Least ratio d_ab/(r_a + r_b) of the distance between an atom a of A
+    and an atom b of B to the sum of their radii, for each point, with the
+    positions of A xa (atoms, 3), fixed, and those of B xb (points,
+    atoms, 3). Ratios of more than scale need not be exact: the grid search
+    gives inf for points with no contact within scale."""
+    N = len(xb)
+    ratio = np.empty(N)
+    rmax = scale*(ra.max() + rb.max())
+    if len(xa) > 27 and rmax > 0:
+        origin, shape, table = _grid(xa, rmax)
+        if len(xa) <= 27*table.shape[1]:
+            table = None
+    else:
+        table = None
+    offsets = np.array([(i, j, k) for i in (-1, 0, 1) for j in (-1, 0, 1) for k in (-1, 0, 1)])
+    for start in range(0, N, chunk):
+        b = xb[start:start+chunk]
+        n = len(b)
+        if table is None:
+            d = np.linalg.norm(b[:, None, :, :] - xa[None, :, None, :], axis=3)
+            ratio[start:start+n] = np.min(d/(ra[:, None] + rb[None, :]), axis=(1, 2))
+            continue
+        cell = np.floor((b - origin)/rmax).astype(int)[:, :, None, :] + offsets
+        inside = np.all((cell >= 0) & (cell < shape), axis=3)
+        flat = np.ravel_multi_index(np.clip(cell, 0, shape - 1).transpose(3, 0, 1, 2), shape)
+        near = np.where(inside[..., None], table[flat], -1).reshape(n, len(rb), -1)
+        d = np.linalg.norm(b[:, :, None, :] - xa[np.maximum(near, 0)], axis=3)
+        r = np.where(near >= 0, d/(ra[np.maximum(near, 0)] + rb[None, :, None]), np.inf)
+        ratio[start:start+n] = r.min(axis=(1, 2))
+    return ratio
+
+
+def contact(spec, points, scale):
+    """Closest contacts of the first two molecules of spec for each point
+    (see placed for the form of points). Returns the ratio of each
+    (see closest_contacts) and a function giving a description of the
+    closest pair of atoms for a point."""
+    if len(spec.molecules) < 2:
+        raise ContactError("The cluster file doesn't name two molecules")
+    A, B = spec.molecules[:2]
+    xa, ra = placed(spec, A, points)
+    xb, rb = placed(spec, B, points)
+    if len(xa[0]) == 0 or len(xb[0]) == 0:
+        raise ContactError("No atoms found for the molecules")
+    #  In a scan A is normally fixed, and all the points are done together
+    fixed = np.allclose(xa, xa[:1])
+    if fixed:
+        ratio = closest_contacts(xa[0], ra, xb, rb, scale)
+    else:
+        ratio = np.array([closest_contacts(xa[i], ra, xb[i:i+1], rb, scale)[0]
+                          for i in range(len(xa))])
+    la = molecule_atoms(spec, A)[0]
+    lb = molecule_atoms(spec, B)[0]
+
+    def describe(i):
+        d = np.linalg.norm(xb[i][None, :, :] - xa[i][:, None, :], axis=2)
+        a, b = np.unravel_index(np.argmin(d/(ra[:, None] + rb[None, :])), d.shape)
+        return (f"atom {la[a]} of {A} and atom {lb[b]} of {B} are {d[a, b]:.3f} bohr apart,"
+                f" {d[a, b]/(ra[a] + rb[b]):.2f} of the sum of their van der Waals radii")
+    return ratio, describe
@@ -0,0 +1,168 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Read the MOs and orbital energies from the Dalton SIRIUS.RST and SIRIFC
+files, and write the MO files read by CamCASP.
+
+This does the work of the Fortran readDALTONmos programs
+(interfaces/dalton/readDALTONmos.F90) in the calling process. Both files
+are Fortran unformatted sequential files, read by movecs_io.records.
+
+SIRIUS.RST is a sequence of labelled sections. A label record holds four
+8-character words, the first "********" and the last the label; the MO
+coefficients, nbas for each of the norb MOs, are in the record after the
+NEWORB label.
+
+SIRIFC starts with three records:
+  two labels
+  POTNUC, EMY, EACTIV, EMCSCF (double precision), ISTATE, ISPIN, NACTEL, LSYM
+  NISHT, NASHT, NOCCT, NORBT, NBAST, ..., NNORBT, ... (integers)
+Then, after five more records, comes the Fock matrix in packed upper
+triangular form, with the orbital energies on its diagonal.
+
+Integers are 4 or 8 bytes, depending on how Dalton was built; the size is
+found from the length of the second record of SIRIFC, so one reader
+serves for both the 32-bit and 64-bit builds.
+
+Since Dalton 2016, SIRIUS.RST and SIRIFC are left in the archive
+<job>.tar.gz; read_archive reads them from it directly, without
+unpacking it.
+
+provides functions:
+* read
+* read_files
+* read_archive
+* write_ascii
+* write_binary
+* summary
+
+provides classes:
+* DaltonMOs
+(and MovecsError, from movecs_io)
+"""
+
+import os
+import tarfile
+import numpy as np
+from movecs_io import MovecsError, records, next_record, integers, doubles
+import movecs_io
+
+
+class DaltonMOs:
+    """MOs and orbital energies from a Dalton calculation"""
+    def __init__(self, source):
+        self.source = source   # Description of the files read
+        self.nbas = 0          # Number of basis functions
+        self.norb = 0          # Number of MOs
+        self.nocc = 0          # Number of occupied MOs
+        self.potnuc = 0.0      # Nuclear potential energy
+        self.energy = 0.0      # SCF energy
+        self.evals = None      # Orbital energies, array (norb)
+        self.vectors = None    # MO coefficients, array (norb, nbas)
+
+
+def read(RST, FC, rstname="SIRIUS.RST", fcname="SIRIFC"):
+    """Read the MOs from the binary streams RST (SIRIUS.RST) and FC (SIRIFC).
+    rstname and fcname are the names used in messages and in the Source
+    line of the ASCII MO file."""
+    mo = DaltonMOs(f"{rstname} and {fcname}")
+
+    recs = records(FC, fcname)
+    next_record(recs, fcname)                 # Labels
+    record = next_record(recs, fcname)
+    #  Four doubles and four integers
+    size = (len(record) - 32)//4
+    x = doubles(record[:32])
+    mo.potnuc, mo.energy = x[0], x[3]
+    n = integers(next_record(recs, fcname), size, fcname)
+    if len(n) < 14:
+        raise MovecsError(f"Error reading from {fcname}")
+    mo.nocc, mo.norb, mo.nbas = n[2], n[3], n[4]
+    nnorbt = n[12]
+    norb, nbas = mo.norb, mo.nbas
+    if norb*(norb+1)//2 != nnorbt:
+        raise MovecsError(f"Size mismatch reading Dalton orbital energies from {fcname}:"
+                          f" norbt = {norb}, NNORBT = {nnorbt}")
+    if nbas < norb:
+        raise MovecsError(f"Number of basis functions ({nbas}) less than MOs ({norb})")
+    for _ in range(5):
+        next_record(recs, fcname)
+    fock = doubles(next_record(recs, fcname))
+    if len(fock) < nnorbt:
+        raise MovecsError(f"Error reading from {fcname}")
+    #  Diagonal elements of the packed upper triangle
+    i = np.arange(1, norb+1)
+    mo.evals = fock[i*(i+1)//2 - 1].copy()
+
+    recs = records(RST, rstname)
+    label = b"NEWORB  "
+    for record in recs:
+        if len(record) == 32 and record[:8] == b"********" and record[24:32] == label:
+            break
+    else:
+        raise MovecsError(f"ERROR reading MOs: Error finding label {label.decode()}")
+    c = doubles(next_record(recs, rstname))
+    if len(c) < nbas*norb:
+        raise MovecsError(f"Error reading from {rstname}")
+    mo.vectors = c[:nbas*norb].reshape(norb, nbas)
+    return mo
+
+
+def read_files(rst="SIRIUS.RST", sirifc="SIRIFC", dir="."):
+    """Read the MOs from the SIRIUS.RST and SIRIFC files in directory dir"""
+    try:
+        with open(os.path.join(dir, rst), "rb") as RST, \
+             open(os.path.join(dir, sirifc), "rb") as FC:
+            return read(RST, FC, rst, sirifc)
+    except OSError as e:
+        raise MovecsError(f"Can't open {e.filename}")
+
+
+def read_archive(archive):
+    """Read the MOs from the SIRIUS.RST and SIRIFC files in a Dalton
+    <job>.tar.gz archive, without unpacking it"""
+    try:
+        with tarfile.open(archive, "r:*") as TAR:
+            #  Stop at the second of the two, rather than decompress the
+            #  rest of the archive
+            members = {}
+            member = TAR.next()
+            while member and len(members) < 2:
+                name = os.path.basename(member.name)
+                if name in ["SIRIUS.RST", "SIRIFC"] and member.isfile():
+                    members[name] = member
+                member = TAR.next()
+            for name in ["SIRIUS.RST", "SIRIFC"]:
+                if name not in members:
+                    raise MovecsError(f"{name} not found in {archive}")
+            with TAR.extractfile(members["SIRIUS.RST"]) as RST, \
+                 TAR.extractfile(members["SIRIFC"]) as FC:
+                return read(RST, FC)
+    except (OSError, tarfile.TarError) as e:
+        raise MovecsError(f"Can't read {archive}: {e}")
+
+
+def write_ascii(mo, file, title="", basis=""):
+    """Write the MOs in the ASCII format read by CamCASP"""
+    movecs_io.write_ascii(file, [("Source", mo.source), ("Title", title),
+                                 ("Code", "DALTON"), ("Basis", basis)],
+                          mo.evals, mo.vectors)
+
+
+def write_binary(mo, file):
+    """Write the orbital energies and the MO coefficients as a Fortran
+    unformatted file (vect.data)"""
+    movecs_io.write_binary(file, mo.evals, mo.vectors)
+
+
+def summary(mo):
+    """Summary of the MOs, as printed by readDALTONmos"""
+    return f"""Summary:
+ Number of occupied orbitals : {mo.nocc:6d}
+ Number of virtual  orbitals : {mo.norb - mo.nocc:6d}
+ Number of molecular orbitals: {mo.norb:6d}
+ Number of basis functions   : {mo.nbas:6d}
+ SCF energy                 : {mo.energy:14.6E} Hartree
+ Nuclear potential energy   : {mo.potnuc:14.6E} Hartree
+"""
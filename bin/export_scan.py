@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Export the geometries and energies of a scan as a table for model fitting.
+"""
+
+import argparse
+import os
+import sys
+
+import scandata
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Export the geometries and energies of a scan as a table for model fitting.
+""",epilog="""
+The scan is one set up by batch_camcasp.py: the job and geomfile
+arguments are the ones given to it, and the job for each point <index>
+of the geometry file is in the directory <job>_<index> (or
+<job>_<index>_dHF for delta-HF calculations), in the --dir directory. The
+geometry of each point is joined with all the energy terms of its
+SAPT(DFT) job, and the delta-HF energy if there is a delta-HF job, and
+written as a table with one column for each (see scandata.py for the
+column names), in the --unit unit. Points whose jobs haven't finished
+are left out.
+
+  export_scan.py H2O2 H2O2.geom --npz H2O2.npz --csv H2O2.csv
+
+The .npz file has an array for each column, so a training set is loaded
+by, for example,
+  data = numpy.load("H2O2.npz")
+  R, E = data["Rz"], data["E2_disp"]
+The CSV file has the same columns, with the unit in the header.
+
+With --append, the existing table (the .npz file if given, else the CSV
+file) is read first, and only the points that aren't in it, or have
+missing values, are read from the job directories, so that the table can
+be brought up to date cheaply as a scan proceeds. Both files are then
+written in full. The unit is that of the existing table.
+""")
+
+parser.add_argument("job", help="Job name used for the scan")
+parser.add_argument("geomfile", help="Geometry file for the scan")
+parser.add_argument("--dir", default=".", help="Directory containing the job directories")
+parser.add_argument("--npz", help="NumPy .npz file for the table")
+parser.add_argument("--csv", help="CSV file for the table")
+parser.add_argument("--unit", "--units", help="Energy unit (default kJ/mol)",
+                    choices=["cm-1","kJ/mol","au","hartree","eV","meV","K","kelvin","kcal/mol"],
+                    default="kJ/mol")
+parser.add_argument("--append", action="store_true",
+                    help="Add new points to an existing table")
+parser.add_argument("--verbose", "-v", action="store_true", help="Report missing points")
+
+args = parser.parse_args()
+
+if not args.npz and not args.csv:
+    parser.error("Give --npz and/or --csv")
+if args.npz and not args.npz.endswith(".npz"):
+    parser.error("The --npz file name must end in .npz")
+
+table = None
+if args.append:
+    existing = args.npz if args.npz and os.path.exists(args.npz) else args.csv
+    if existing and os.path.exists(existing):
+        try:
+            table = scandata.Table.load(existing)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Can't read {existing}: {e}")
+            exit(1)
+        print(f"{len(table)} points in {existing}")
+
+report = (lambda s: print(s, file=sys.stderr)) if args.verbose else None
+table, read = scandata.collect(args.job, args.geomfile, args.dir, table, args.unit, report)
+print(f"{read} points read, {len(table)} in the table")
+
+if args.npz:
+    try:
+        table.save_npz(args.npz)
+    except ImportError:
+        print("NumPy is needed for the .npz file")
+        exit(1)
+if args.csv:
+    table.save_csv(args.csv)
@@ -10,6 +10,8 @@ import sys
 import string
 import argparse
 from camcasp import die
+from compressed import exists
+import jobresults
 
 parser=argparse.ArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter,
 description="""Extract charge-transfer energy from CamCASP summary files.
@@ -18,8 +20,9 @@ For the StoneM09 procedure the directories are <path>_mc and <path>_dc
 for the two SAPT-DFT calculations. For the Misquitta13, <path>_dc is
 used if present, or <path> otherwise.
 The data are taken from <path>*/OUT/<job>.summary, if present, or
-<path>*/OUT/<job>-data-summary.data. Energy values in cm^{-1} are
-converted to kJ/mol.
+<path>*/OUT/<job>-data-summary.data, or from the results manifest
+<path>*/OUT/<job>-results.json if the summary file has gone. Energy
+values in cm^{-1} are converted to kJ/mol.
 The job file prefix (CamCASP job name) must be given. If it is in the form
 (\w+)[.-_]+(\w+) and the molecule names are not given explicitly, the names
 are taken as the first and second group in the regular expression.
@@ -116,18 +119,18 @@ for name in paths:
   energy = {}
   path = {}
   path["mc"] = os.path.join(name + "_mc", "OUT", job + ".summary")
-  if not os.path.exists(path["mc"]):
+  if not exists(path["mc"]):
     path1 = path["mc"]
     path["mc"] = os.path.join(name + "_mc", "OUT", job + "-data-summary.data")
-    if not os.path.exists(path["mc"]):
+    if not exists(path["mc"]):
       if args.verbose:
         stderr.write("Can't find " + path1 + " or " + path["mc"] + "\n")
       path["mc"]=None
   path["dc"] = os.path.join(name + "_dc", "OUT", job + ".summary")
-  if not os.path.exists(path["dc"]):
+  if not exists(path["dc"]):
     path1 = path["dc"]
     path["dc"] = os.path.join(name + "_dc", "OUT", job + "-data-summary.data")
-    if not os.path.exists(path["dc"]):
+    if not exists(path["dc"]):
       if args.verbose:
         stderr.write("Can't find {} or {}.\n".format(path1,path["dc"]))
       path["dc"] = None
@@ -136,27 +139,26 @@ for name in paths:
     #  Evaluate energies according to StoneM09
     print("\nCharge-transfer energy according to Stone & Misquitta 2009")
     for t in ("mc","dc"):
-      with open(path[t]) as IN:
-        print("Using", path[t])
-        for line in IN:
-          m = re.match(r'E\^\{2\}\_\{(\S+)\}\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*NoReg', line, flags=re.I)
-          if m:
-            # print(line)
-            cmpnt = m.group(1)
-            mol = m.group(2)
-            value = float(m.group(3))
-            inunit = m.group(5)
-            in_unit_conv = units[string.lower(inunit)]
-            value = value*out_unit_conv/in_unit_conv
-            # print(cmpnt, mol, value, inunit, un_init_conv)
-            #if unit == "CM-1":
-            #  value = value/83.5935
-            if cmpnt == "ind":
-              key = "ind" + mol + t
-            else:
-              key = "indx" + mol + t
-            energy[key] = value
-            # print(key, value)
+      print("Using", path[t])
+      for line in jobresults.summary_lines(path[t]):
+        m = re.match(r'E\^\{2\}\_\{(\S+)\}\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*NoReg', line, flags=re.I)
+        if m:
+          # print(line)
+          cmpnt = m.group(1)
+          mol = m.group(2)
+          value = float(m.group(3))
+          inunit = m.group(5)
+          in_unit_conv = units[string.lower(inunit)]
+          value = value*out_unit_conv/in_unit_conv
+          # print(cmpnt, mol, value, inunit, un_init_conv)
+          #if unit == "CM-1":
+          #  value = value/83.5935
+          if cmpnt == "ind":
+            key = "ind" + mol + t
+          else:
+            key = "indx" + mol + t
+          energy[key] = value
+          # print(key, value)
   
     energy["indABmc"] = energy["indAmc"]+energy["indBmc"]
     energy["indxABmc"] = energy["indxAmc"]+energy["indxBmc"]
@@ -202,60 +204,59 @@ for name in paths:
   if not path["dc"]:
     #  Try the path without either suffix
     path["dc"] = os.path.join(name, "OUT", job + ".summary")
-    if not os.path.exists(path["dc"]):
+    if not exists(path["dc"]):
       path["dc"] = os.path.join(name, "OUT", job + "-data-summary.data")
-  if os.path.exists(path["dc"]):
+  if exists(path["dc"]):
     print("\nCharge-transfer energy according to Misquitta 2013")
-    with open(path["dc"]) as IN:
-      print("Using", path["dc"])
-      for line in IN:
-        m = re.match(r'E\^\{2\}\_\{(\S+)\}(\(S2\))?\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*(NoReg|REG eta =) *(\d+\.\d+)?', line)
-        #m = re.match(r'E\^\{2\}\_\{(\S+)\}(\(S2\))?\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*(NoReg|REG eta =) *(\d+\.\d+)?', line, flags=re.I)
+    print("Using", path["dc"])
+    for line in jobresults.summary_lines(path["dc"]):
+      m = re.match(r'E\^\{2\}\_\{(\S+)\}(\(S2\))?\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*(NoReg|REG eta =) *(\d+\.\d+)?', line)
+      #m = re.match(r'E\^\{2\}\_\{(\S+)\}(\(S2\))?\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*(NoReg|REG eta =) *(\d+\.\d+)?', line, flags=re.I)
+      if m:
+        cmpnt = m.group(1)
+        s2    = m.group(2)
+        mol   = m.group(3)
+        value = float(m.group(4))
+        inunit = m.group(6)
+        in_unit_conv = units[string.lower(inunit)]
+        value = value*out_unit_conv/in_unit_conv
+        #print(cmpnt, mol, value, inunit)
+        #if unit == "CM-1":
+        #  value = value/83.5935
+        if m.group(7) == "NoReg":
+          eta = 0.0
+          i = 0
+        else:
+          eta = m.group(8)
+          i = 1
+        if cmpnt == "ind":
+          key = "ind" + mol + str(i)
+          energy[key] = value
+          #print(key, value, s2)
+        elif cmpnt == "ind,exch":
+          # Special case to decide whether or not to use S2 approx for exch-ind energy:
+          if (s2 == "(S2)" and not args.S2) or (s2 != "(S2)" and args.S2):
+            continue
+          else:
+            key = "indx" + mol + str(i)
+            energy[key] = value
+          #print(key, value, s2)
+        elif cmpnt == "disp":
+          key = "disp"
+          energy[key] = value
+        #print(key, value, s2)
+      if args.all:
+        m = re.match(r'E\^\{[12]\}\_\{(\w+)\}(\(S2\))? +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+)',line)
         if m:
           cmpnt = m.group(1)
-          s2    = m.group(2)
-          mol   = m.group(3)
-          value = float(m.group(4))
-          inunit = m.group(6)
+          value = float(m.group(3))
+          inunit = m.group(5)
           in_unit_conv = units[string.lower(inunit)]
           value = value*out_unit_conv/in_unit_conv
-          #print(cmpnt, mol, value, inunit)
+          # print(cmpnt, mol, value, inunit, m.group(5))
           #if unit == "CM-1":
           #  value = value/83.5935
-          if m.group(7) == "NoReg":
-            eta = 0.0
-            i = 0
-          else:
-            eta = m.group(8)
-            i = 1
-          if cmpnt == "ind":
-            key = "ind" + mol + str(i)
-            energy[key] = value
-            #print(key, value, s2)
-          elif cmpnt == "ind,exch":
-            # Special case to decide whether or not to use S2 approx for exch-ind energy:
-            if (s2 == "(S2)" and not args.S2) or (s2 != "(S2)" and args.S2):
-              continue
-            else:
-              key = "indx" + mol + str(i)
-              energy[key] = value
-            #print(key, value, s2)
-          elif cmpnt == "disp":
-            key = "disp"
-            energy[key] = value
-          #print(key, value, s2)
-        if args.all:
-          m = re.match(r'E\^\{[12]\}\_\{(\w+)\}(\(S2\))? +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+)',line)
-          if m:
-            cmpnt = m.group(1)
-            value = float(m.group(3))
-            inunit = m.group(5)
-            in_unit_conv = units[string.lower(inunit)]
-            value = value*out_unit_conv/in_unit_conv
-            # print(cmpnt, mol, value, inunit, m.group(5))
-            #if unit == "CM-1":
-            #  value = value/83.5935
-            energy[cmpnt] = value
+          energy[cmpnt] = value
   
     energy["indAB0"] = energy["indA0"]+energy["indB0"]
     energy["indxAB0"] = energy["indxA0"]+energy["indxB0"]
@@ -310,33 +311,32 @@ for name in paths:
   
   if path["mc"]:
     print("\nUsing regularized induction from the mc basis")
-    with open(path["mc"]) as IN:
-      print("Using", path["mc"])
-      for line in IN:
-        m = re.match(r'E\^\{2\}\_\{(\S+)\}\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*(NoReg|REG eta =) *(\d+\.\d+)?', line, flags=re.I)
-        if m:
-          cmpnt = m.group(1)
-          mol = m.group(2)
-          value = float(m.group(3))
-          inunit = m.group(5)
-          in_unit_conv = units[string.lower(inunit)]
-          value = value*out_unit_conv/in_unit_conv
-          # print(cmpnt, mol, value, inunit, m.group(5))
-          #if unit == "CM-1":
-          #  value = value/83.5935
-          if m.group(6) == "NoReg":
-            #  Ignore
-            continue
-          else:
-            #  Replace regularized ind components
-            eta = m.group(7)
-            i = 1
-          if cmpnt == "ind":
-            key = "ind" + mol + str(i)
-          else:
-            key = "indx" + mol + str(i)
-          energy[key] = value
-          # print(key, value)
+    print("Using", path["mc"])
+    for line in jobresults.summary_lines(path["mc"]):
+      m = re.match(r'E\^\{2\}\_\{(\S+)\}\(([AB])\) +(-?\d+\.\d+(E[ +-]\d+)?) +(\S+) +.*(NoReg|REG eta =) *(\d+\.\d+)?', line, flags=re.I)
+      if m:
+        cmpnt = m.group(1)
+        mol = m.group(2)
+        value = float(m.group(3))
+        inunit = m.group(5)
+        in_unit_conv = units[string.lower(inunit)]
+        value = value*out_unit_conv/in_unit_conv
+        # print(cmpnt, mol, value, inunit, m.group(5))
+        #if unit == "CM-1":
+        #  value = value/83.5935
+        if m.group(6) == "NoReg":
+          #  Ignore
+          continue
+        else:
+          #  Replace regularized ind components
+          eta = m.group(7)
+          i = 1
+        if cmpnt == "ind":
+          key = "ind" + mol + str(i)
+        else:
+          key = "indx" + mol + str(i)
+        energy[key] = value
+        # print(key, value)
   
     energy["indAB0"] = energy["indA0"]+energy["indB0"]
     energy["indxAB0"] = energy["indxA0"]+energy["indxB0"]
@@ -10,6 +10,8 @@ import re
 import sys
 import argparse
 from camcasp import die, findfile
+from compressed import exists, open_any, plain_name
+import jobresults
 
 parser=argparse.ArgumentParser(formatter_class = argparse.RawDescriptionHelpFormatter,
 description="""Extract sapt-dft energy terms from CamCASP summary files.
@@ -20,7 +22,11 @@ Path arguments that are not directories are silently ignored.
 The script looks for CamCASP summary files, which are expected to have
 names of the form <path>/OUT/<job><suffix>. The default suffix is
 "-data-summary.data", which is the usual form used by CamCASP. The job
-name does not have to be the same for every path.
+name does not have to be the same for every path. Files compressed by
+archive_results.py (<file>.gz or <file>.zst) are read directly. If the
+job wrote a results manifest, <path>/OUT/<job>-results.json, the SCF
+energies for the delta-HF energy are read from it instead of the SCF
+output files.
 
 If a directory <path>_dHF is present in the argument list, it is assumed
 to contain a delta-HF calculation, and the delta-HF energy is extracted
@@ -172,10 +178,10 @@ for path in args.paths:
     else:
         name = path
         isdhf = False
-    summary = findfile(os.path.join(path,"OUT"),args.suffix)
+    summary = findfile(os.path.join(path,"OUT"),args.suffix,compressed=True)
     if not summary:
         continue
-    job = re.sub(args.suffix, "", os.path.basename(summary))
+    job = re.sub(args.suffix, "", os.path.basename(plain_name(summary)))
 
     if verbosity > 0: print(path, name)
     if name not in energy:
@@ -184,25 +190,31 @@ for path in args.paths:
 
     if isdhf:
         #  Delta-HF
+        manifest = jobresults.load(os.path.join(path, "OUT"), job)
+        ehf = {}
+        if manifest:
+            ehf = {suffix: manifest["scf_energies"][suffix]
+                   for suffix in ["A","B","AB"] if suffix in manifest["scf_energies"]}
         ok = True
         for suffix in ["A","B","AB"]:
             file = os.path.join(path, "OUT", job + "_" + suffix + ".out")
-            if not os.path.exists(file):
+            if suffix not in ehf and not exists(file):
                 ok = False
                 if verbosity > 0: stderr.write("No file " + file + "\n")
                 break
         if not ok:
             continue
-        ehf = {}
         for suffix in ["A","B","AB"]:
+            if suffix in ehf:
+                continue
             ok = False
             file = os.path.join(name + "_dHF", "OUT", job + "_" + suffix + ".out")
-            if not os.path.exists(file):
+            if not exists(file):
                 print( "Can't find file", file)
                 exit(1)
             if verbosity > 0:
                 print(file)
-            with open(file) as IN:
+            with open_any(file) as IN:
                 for line in IN:
                     m = re.match(r'\@? +(Final HF energy:|Total SCF energy =|Total Energy =) +(-?\d+\.\d+)',line)
                     if m:
@@ -215,53 +227,52 @@ for path in args.paths:
         if verbosity > 1:
             print( "E_AB =", ehf["AB"]*unit, "E_A =", ehf["A"]*unit, "E_B =", ehf["B"]*unit)
     
-        with open(summary) as IN:
-            for line in IN:
-                #  Ignore regularized energy terms
-                if re.search(r' REG ', line):
-                    continue
-                                                                  # Groups
-                energies = re.compile(r'''E\^\{[12]\}             #     E^{n} where n = 1 or 2 
-                                          \_\{(\w+)(\,exch)?\}    # 1 2 _{component} or _{component,exch}
-                                          (\(S2\))?               # 3   match (S2) if present
-                                          (\((A|B)\))?            # 4 5 match (A) or (B) if present
-                                          \s+                     #     space. group(5) will be A or B.
-                                          (-?\d+\.\d+(E[+-]\d+)?) # 6 7 match a floating point number of the
-                                                                  #     form (-)mmmm.nnnnE(+|-)pp
-                                                                  #     The exponential is optional and
-                                                                  #     will be group(7)
-                                          \s+                     #     space
-                                          (\S+)                   # 8   text
-                                          \s+                     #     more space
-                                          ([\S,\s]*)              # 9   text with space
-                                          ''',re.I|re.VERBOSE)
-                m = energies.search(line)
-
-                if m:
-                    # print('dHF GOT LINE ',line)
-                    # print('Groups  1: ',m.group(1),' 2: ',m.group(2),' 3: ',m.group(3))
-                    # print('Groups  4: ',m.group(4),' 5: ',m.group(5),' 6: ',m.group(6))
-                    # print('Groups  7: ',m.group(7),' 8: ',m.group(8),' 9: ',m.group(9))
-                    cmpnt = m.group(1)
-                    # Special case to decide whether or not to use S2 approx for exchange energy:
-                    if cmpnt == "exch":
-                        if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
-                            continue
-                    if m.group(2) == ",exch":
-                        cmpnt = "ex" + cmpnt
-                    # Another special case to decide whether or not to use S2 approx for exch-ind energy:
-                    if cmpnt == "exind":
-                        if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
-                            continue
-                    if m.group(5) != "":
-                        if m.group(5) in ["A","B"]:
-                            cmpnt = cmpnt + m.group(5)
-                    value = float(m.group(6))
-                    inunit = m.group(8)
-                    if verbosity > 0: print(f"{cmpnt:6s} {value:10.3f} {inunit:3s}")
-                    u = units[inunit.lower()]
-                    value = value*unit/u
-                    ehf[cmpnt] = value
+        for line in jobresults.summary_lines(summary):
+            #  Ignore regularized energy terms
+            if re.search(r' REG ', line):
+                continue
+                                                              # Groups
+            energies = re.compile(r'''E\^\{[12]\}             #     E^{n} where n = 1 or 2 
+                                      \_\{(\w+)(\,exch)?\}    # 1 2 _{component} or _{component,exch}
+                                      (\(S2\))?               # 3   match (S2) if present
+                                      (\((A|B)\))?            # 4 5 match (A) or (B) if present
+                                      \s+                     #     space. group(5) will be A or B.
+                                      (-?\d+\.\d+(E[+-]\d+)?) # 6 7 match a floating point number of the
+                                                              #     form (-)mmmm.nnnnE(+|-)pp
+                                                              #     The exponential is optional and
+                                                              #     will be group(7)
+                                      \s+                     #     space
+                                      (\S+)                   # 8   text
+                                      \s+                     #     more space
+                                      ([\S,\s]*)              # 9   text with space
+                                      ''',re.I|re.VERBOSE)
+            m = energies.search(line)
+
+            if m:
+                # print('dHF GOT LINE ',line)
+                # print('Groups  1: ',m.group(1),' 2: ',m.group(2),' 3: ',m.group(3))
+                # print('Groups  4: ',m.group(4),' 5: ',m.group(5),' 6: ',m.group(6))
+                # print('Groups  7: ',m.group(7),' 8: ',m.group(8),' 9: ',m.group(9))
+                cmpnt = m.group(1)
+                # Special case to decide whether or not to use S2 approx for exchange energy:
+                if cmpnt == "exch":
+                    if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
+                        continue
+                if m.group(2) == ",exch":
+                    cmpnt = "ex" + cmpnt
+                # Another special case to decide whether or not to use S2 approx for exch-ind energy:
+                if cmpnt == "exind":
+                    if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
+                        continue
+                if m.group(5) != "":
+                    if m.group(5) in ["A","B"]:
+                        cmpnt = cmpnt + m.group(5)
+                value = float(m.group(6))
+                inunit = m.group(8)
+                if verbosity > 0: print(f"{cmpnt:6s} {value:10.3f} {inunit:3s}")
+                u = units[inunit.lower()]
+                value = value*unit/u
+                ehf[cmpnt] = value
         #  Old output files may not have the full E^(1)_exch as well as E^(1)_exch(S2)
         if "exch" in ehf:
             try:
@@ -279,69 +290,68 @@ for path in args.paths:
 
     else:
         #  Normal sapt-dft
-        with open(summary) as IN:
-            for line in IN:
-                                                                # Groups
-                energies = re.compile(r'''E\^\{[12]\}             #     E^{n} where n = 1 or 2 
-                                          \_\{(\w+)(\,exch)?\}    # 1 2 _{component} or _{component,exch}
-                                          (\(S2\))?               # 3   match (S2) if present
-                                          (\((A|B)\))?            # 4 5 match (A) or (B) if present
-                                          \s+                     #     space. group(5) will be A or B.
-                                          (-?\d+\.\d+(E[+-]\d+)?) # 6 7 match a floating point number of the
-                                                                  #     form (-)mmmm.nnnnE(+|-)pp
-                                                                  #     The exponential is optional and
-                                                                  #     will be group(7)
-                                          \s+                     #     space
-                                          (\S+)                   # 8   text
-                                          \s+                     #     more space
-                                          ([\S,\s]*)              # 9   text with space
+        for line in jobresults.summary_lines(summary):
+                                                            # Groups
+            energies = re.compile(r'''E\^\{[12]\}             #     E^{n} where n = 1 or 2 
+                                      \_\{(\w+)(\,exch)?\}    # 1 2 _{component} or _{component,exch}
+                                      (\(S2\))?               # 3   match (S2) if present
+                                      (\((A|B)\))?            # 4 5 match (A) or (B) if present
+                                      \s+                     #     space. group(5) will be A or B.
+                                      (-?\d+\.\d+(E[+-]\d+)?) # 6 7 match a floating point number of the
+                                                              #     form (-)mmmm.nnnnE(+|-)pp
+                                                              #     The exponential is optional and
+                                                              #     will be group(7)
+                                      \s+                     #     space
+                                      (\S+)                   # 8   text
+                                      \s+                     #     more space
+                                      ([\S,\s]*)              # 9   text with space
+                                      ''',re.I|re.VERBOSE)
+            m = energies.search(line)
+            if m:
+                # print('GOT LINE ',line)
+                # print('Groups  1: ',m.group(1),' 2: ',m.group(2),' 3: ',m.group(3))
+                # print('Groups  4: ',m.group(4),' 5: ',m.group(5),' 6: ',m.group(6))
+                # print('Groups  7: ',m.group(7),' 8: ',m.group(8),' 9: ',m.group(9))
+                cmpnt = m.group(1)
+                # Special case to decide whether or not to use S2 approx for exchange energy:
+                if cmpnt == "exch":
+                    if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
+                        continue
+                if m.group(2) == ",exch":
+                    cmpnt = "ex" + cmpnt
+                # Another special case to decide whether or not to use S2 approx for exch-ind energy:
+                if cmpnt == "exind":
+                    if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
+                        continue
+                # Special case for ind and exind: 
+                if cmpnt == "ind" or cmpnt == "exind":
+                    # Search group(10) for the string: REG eta = <value>
+                    if re.search(r' REG ', line):
+                        reg = re.compile(r'''
+                            REG\s+eta\s+=\s+         #    REG eta = 
+                            (-?\d+\.\d+(E[+-]\d+)?)  # 1  value
                                           ''',re.I|re.VERBOSE)
-                m = energies.search(line)
-                if m:
-                    # print('GOT LINE ',line)
-                    # print('Groups  1: ',m.group(1),' 2: ',m.group(2),' 3: ',m.group(3))
-                    # print('Groups  4: ',m.group(4),' 5: ',m.group(5),' 6: ',m.group(6))
-                    # print('Groups  7: ',m.group(7),' 8: ',m.group(8),' 9: ',m.group(9))
-                    cmpnt = m.group(1)
-                    # Special case to decide whether or not to use S2 approx for exchange energy:
-                    if cmpnt == "exch":
-                        if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
-                            continue
-                    if m.group(2) == ",exch":
-                        cmpnt = "ex" + cmpnt
-                    # Another special case to decide whether or not to use S2 approx for exch-ind energy:
-                    if cmpnt == "exind":
-                        if (m.group(3) == "(S2)" and not args.S2) or (m.group(3) != "(S2)" and args.S2):
-                            continue
-                    # Special case for ind and exind: 
-                    if cmpnt == "ind" or cmpnt == "exind":
-                        # Search group(10) for the string: REG eta = <value>
-                        if re.search(r' REG ', line):
-                            reg = re.compile(r'''
-                                REG\s+eta\s+=\s+         #    REG eta = 
-                                (-?\d+\.\d+(E[+-]\d+)?)  # 1  value
-                                              ''',re.I|re.VERBOSE)
-                            mm = reg.search(m.group(9))
-                            if mm:
-                                if mm.group(1):
-                                    eta = float(mm.group(1))
-                                    if reg_eta == eta:
-                                        cmpnt = cmpnt + "R"
-                                    else:
-                                        continue
+                        mm = reg.search(m.group(9))
+                        if mm:
+                            if mm.group(1):
+                                eta = float(mm.group(1))
+                                if reg_eta == eta:
+                                    cmpnt = cmpnt + "R"
                                 else:
                                     continue
                             else:
                                 continue
-                    if m.group(5) != "":
-                        if m.group(5) in ["A","B"]:
-                            cmpnt = cmpnt + m.group(5)
-                    value = float(m.group(6))
-                    inunit = m.group(8)
-                    if verbosity > 0: print(f"{cmpnt:6s} {value:10.3f} {inunit:3s}")
-                    u = units[inunit.lower()]
-                    value = value*unit/u
-                    energy[name][cmpnt] = float(value)
+                        else:
+                            continue
+                if m.group(5) != "":
+                    if m.group(5) in ["A","B"]:
+                        cmpnt = cmpnt + m.group(5)
+                value = float(m.group(6))
+                inunit = m.group(8)
+                if verbosity > 0: print(f"{cmpnt:6s} {value:10.3f} {inunit:3s}")
+                u = units[inunit.lower()]
+                value = value*unit/u
+                energy[name][cmpnt] = float(value)
         if args.dhf and "dHF" not in energy[name]:
             energy[name]["dHF"] = float(args.dhf)
         if "exch" not in energy[name]:
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Fit the overlap model E = K S^alpha to the results of an energy scan.
+"""
+
+import argparse
+import json
+import sys
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Fit the overlap model E = K S^alpha to the results of an energy scan.
+""",epilog="""
+The energies file is the Energy-file written by the energy-scan module of
+CamCASP, and the overlap file the Overlap-file written for the same
+points with "Energies Overlap" (see examples/overlap-model). Each energy
+column given by --energy (default E(1)exch) is fitted separately, to
+  E = K S^alpha                      (total model)
+where S is the total density overlap, and to
+  E = sum_t K_t sum_{ab in t} S_ab^alpha   (distributed model)
+where S_ab is the overlap of site a of A with site b of B, and t the type
+of the site pair, e.g. C-O (see overlapfit.py). Without an overlap file,
+only the total model is fitted, with S from the TotOverlap column of the
+energies file.
+
+The exponent alpha is fitted (on the --grid of values, then refined)
+unless it is fixed by --alpha; with --alpha 1 the K are those found by
+the overlap-model module of CamCASP. Points are selected and weighted as
+in that module: energies outside [--emin, --emax] are left out, and the
+relative error of each point has the weight exp(-width*(ln(E/e0))^2).
+--emin, --emax and --e0 are in kJ/mol.
+
+With --bootstrap N, N bootstrap samples of the points are fitted as well,
+all at once, and the standard deviations of their parameters are given
+as error estimates. The K are in the --unit energy unit (default kJ/mol)
+per unit overlap^alpha. The parameters are printed, and written to the
+--json file if given.
+
+E.g.
+  fit_overlap.py scan/OUT/CO-CO-energies.dat ovlap/OUT/CO-CO-overlap.dat \\
+      --bootstrap 1000 --json CO-CO-overlap-model.json
+""")
+
+parser.add_argument("energies", help="Energy-scan energies file")
+parser.add_argument("overlaps", nargs="?", help="Energy-scan overlap file")
+parser.add_argument("--energy", nargs="+", default=["E(1)exch"],
+                    help="Energy columns to fit (default E(1)exch)")
+parser.add_argument("--model", choices=["total", "distributed", "both"], default="both",
+                    help="Overlap model to fit (default both)")
+parser.add_argument("--alpha", type=float, help="Fix the exponent alpha")
+parser.add_argument("--grid", type=float, nargs=3, default=[0.5, 1.5, 0.01],
+                    metavar=("START", "STOP", "STEP"), help="Grid of alpha values")
+parser.add_argument("--bootstrap", type=int, default=0,
+                    help="Number of bootstrap samples for error estimates")
+parser.add_argument("--seed", type=int, default=1, help="Seed for the bootstrap samples")
+parser.add_argument("--emin", type=float, default=0.01, help="Least energy used (kJ/mol)")
+parser.add_argument("--emax", type=float, default=100.0, help="Greatest energy used (kJ/mol)")
+parser.add_argument("--e0", type=float, default=20.0, help="Energy of greatest weight (kJ/mol)")
+parser.add_argument("--width", type=float, default=0.4343, help="Width parameter of the weights")
+parser.add_argument("--no-symmetrize", action="store_true",
+                    help="Don't treat the pair types a-b and b-a as the same")
+parser.add_argument("--unit", "--units", help="Energy unit for K (default kJ/mol)",
+                    choices=["cm-1","kJ/mol","au","hartree","eV","meV","K","kelvin","kcal/mol"],
+                    default="kJ/mol")
+parser.add_argument("--json", help="File for the fitted parameters")
+
+args = parser.parse_args()
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy is needed for fit_overlap.py")
+    exit(1)
+import overlapfit
+from scandata import units
+
+try:
+    unit, labels, data = overlapfit.read_energies(args.energies)
+    for e in args.energy:
+        if e not in labels:
+            raise overlapfit.OverlapError(f"No column {e} in {args.energies}")
+    models = {}
+    if args.overlaps:
+        sites_a, sites_b, geometry, S = overlapfit.read_overlaps(args.overlaps)
+        if len(geometry) != len(data) \
+                or not np.allclose(geometry[:, :3], data[:, 1:4], atol=1e-3):
+            raise overlapfit.OverlapError(f"The points in {args.overlaps} aren't those"
+                                          f" in {args.energies}")
+        if args.model in ["total", "both"]:
+            models["total"] = (["total"], np.ones((1,) + S.shape[1:]))
+        if args.model in ["distributed", "both"]:
+            models["distributed"] = overlapfit.pair_types(sites_a, sites_b,
+                                                          not args.no_symmetrize)
+    else:
+        if "TotOverlap" not in labels or not np.any(data[:, labels.index("TotOverlap")]):
+            raise overlapfit.OverlapError(f"No overlaps in {args.energies}:"
+                                          " give the overlap file")
+        if args.model == "distributed":
+            raise overlapfit.OverlapError("The distributed model needs the overlap file")
+        S = data[:, labels.index("TotOverlap")].reshape(-1, 1, 1)
+        models["total"] = (["total"], np.ones((1, 1, 1)))
+except (OSError, overlapfit.OverlapError) as e:
+    print(e)
+    exit(1)
+
+scale = units[args.unit.lower()]/units["kj/mol"]
+results = {"energies": args.energies, "overlaps": args.overlaps, "unit": args.unit,
+           "fits": {}}
+failed = False
+for e in args.energy:
+    E = overlapfit.to_kjmol(data[:, labels.index(e)], unit)
+    results["fits"][e] = {}
+    for model, (names, mask) in models.items():
+        try:
+            f = overlapfit.fit(E, S, mask, names, alpha=args.alpha, grid=args.grid,
+                               bootstrap=args.bootstrap, seed=args.seed, emin=args.emin,
+                               emax=args.emax, e0=args.e0, width=args.width)
+        except overlapfit.OverlapError as x:
+            print(f"\n{e}, {model} overlap model: {x}")
+            failed = True
+            continue
+        d = f.to_dict()
+        d["K"] = {t: k*scale for t, k in d["K"].items()}
+        if "K_error" in d:
+            d["K_error"] = {t: k*scale for t, k in d["K_error"].items()}
+        results["fits"][e][model] = d
+        print(f"\n{e}, {model} overlap model, {d['points']} points,"
+              f" r.m.s. error {d['rms']:.2f}%")
+        if "bootstrap" in d:
+            print(f"  alpha  {d['alpha']:12.5f} +- {d['alpha_error']:.5f}"
+                  f"{'  (fixed)' if args.alpha is not None else ''}")
+            for t in names:
+                print(f"  K {t:8s} {d['K'][t]:12.6g} +- {d['K_error'][t]:.3g} {args.unit}")
+        else:
+            print(f"  alpha  {d['alpha']:12.5f}{'  (fixed)' if args.alpha is not None else ''}")
+            for t in names:
+                print(f"  K {t:8s} {d['K'][t]:12.6g} {args.unit}")
+        sys.stdout.flush()
+
+if args.json:
+    with open(args.json, "w") as OUT:
+        json.dump(results, OUT, indent=1)
+
+if failed:
+    exit(1)
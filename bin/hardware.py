@@ -0,0 +1,227 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Detect the resources available to a job, and choose settings for it.
+
+The core count, NUMA layout, memory and any cgroup CPU and memory limits
+are read from /proc and /sys, and the free space in the scratch
+directory is found. The settings for a job (cores for the SCF code,
+cores for CamCASP and memory) are taken from a calibration table if it
+has an entry for this type of node, otherwise from simple rules.
+
+The calibration table is a text file, normally $CAMCASP/calibration.dat,
+with lines
+  <node-type>  <runtype>  <scfcode>  <cores>  <cores_camcasp>  <memory_gb>
+where runtype and scfcode may be "*" to match any. Lines starting with
+"#" are comments. Entries are written by calibrate.py, which runs a
+benchmark job with different settings; the node type is as given by
+Resources.node_type.
+
+provides functions:
+* detect
+* read_calibration
+* write_calibration
+* lookup
+* choose
+
+provides classes:
+* Resources
+"""
+
+import glob
+import os
+import re
+import shutil
+
+GB = 1024**3
+
+
+def _read(path):
+    try:
+        with open(path) as F:
+            return F.read().strip()
+    except OSError:
+        return None
+
+
+def _cpulist(s):
+    """Number of CPUs in a list like 0-3,8-11"""
+    n = 0
+    for part in s.split(","):
+        if "-" in part:
+            a, b = part.split("-")
+            n += int(b) - int(a) + 1
+        elif part:
+            n += 1
+    return n
+
+
+class Resources:
+    """Resources available to jobs on this node"""
+    def __init__(self):
+        self.cpus = os.cpu_count() or 1  # CPUs on the node
+        self.cores = self.cpus           # CPUs that this process may use
+        self.cpu_limit = None            # cgroup CPU quota, in CPUs
+        self.numa_nodes = []             # CPUs in each NUMA node
+        self.model = ""
+        self.memory_gb = 0.0             # Total memory
+        self.available_gb = 0.0          # Memory available now
+        self.memory_limit_gb = None      # cgroup memory limit
+        self.scratch = None
+        self.scratch_free_gb = None
+
+    def usable_cores(self):
+        """Cores that a job can use, allowing for any cgroup limit"""
+        n = self.cores
+        if self.cpu_limit:
+            n = min(n, max(1, int(self.cpu_limit)))
+        return n
+
+    def usable_memory_gb(self):
+        """Memory that a job can use, allowing for any cgroup limit"""
+        m = self.available_gb or self.memory_gb
+        if self.memory_limit_gb:
+            m = min(m, self.memory_limit_gb)
+        return m
+
+    def node_type(self):
+        """Identifier for this type of node, used in the calibration table"""
+        model = re.sub(r'\(\w+\)|CPU|Processor|@.*$', '', self.model)
+        model = re.sub(r'\W+', '_', model.strip()).strip("_") or "unknown"
+        return f"{model}_{self.cpus}c_{round(self.memory_gb):d}G"
+
+    def __str__(self):
+        s = f"""Node type            : {self.node_type()}
+CPUs on node         : {self.cpus}
+CPUs available       : {self.cores}
+cgroup CPU limit     : {self.cpu_limit}
+NUMA nodes (CPUs)    : {self.numa_nodes}
+Memory (GB)          : {self.memory_gb:.1f} total, {self.available_gb:.1f} available
+cgroup memory limit  : {self.memory_limit_gb}
+Scratch directory    : {self.scratch}"""
+        if self.scratch_free_gb is not None:
+            s += f"\nScratch free (GB)    : {self.scratch_free_gb:.1f}"
+        return s
+
+
+def detect(scratch=None):
+    """Find the resources available on this node"""
+    r = Resources()
+    try:
+        r.cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        pass
+
+    #  cgroup v2, then v1
+    quota = _read("/sys/fs/cgroup/cpu.max")
+    if quota:
+        q, p = quota.split()[:2]
+        if q != "max":
+            r.cpu_limit = int(q)/int(p)
+    else:
+        q = _read("/sys/fs/cgroup/cpu/cpu.cfs_quota_us")
+        p = _read("/sys/fs/cgroup/cpu/cpu.cfs_period_us")
+        if q and p and int(q) > 0:
+            r.cpu_limit = int(q)/int(p)
+
+    for node in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        r.numa_nodes.append(_cpulist(_read(node) or ""))
+
+    cpuinfo = _read("/proc/cpuinfo") or ""
+    m = re.search(r'^model name\s*:\s*(.*)$', cpuinfo, flags=re.M)
+    if m:
+        r.model = m.group(1)
+
+    meminfo = _read("/proc/meminfo") or ""
+    m = re.search(r'^MemTotal:\s*(\d+) kB', meminfo, flags=re.M)
+    if m:
+        r.memory_gb = int(m.group(1))*1024/GB
+    m = re.search(r'^MemAvailable:\s*(\d+) kB', meminfo, flags=re.M)
+    if m:
+        r.available_gb = int(m.group(1))*1024/GB
+
+    limit = _read("/sys/fs/cgroup/memory.max") or \
+            _read("/sys/fs/cgroup/memory/memory.limit_in_bytes")
+    if limit and limit != "max" and int(limit) < 2**60:
+        r.memory_limit_gb = int(limit)/GB
+
+    r.scratch = scratch or os.environ.get("SCRATCH")
+    if r.scratch and os.path.isdir(r.scratch):
+        r.scratch_free_gb = shutil.disk_usage(r.scratch).free/GB
+    return r
+
+
+def read_calibration(file):
+    """Read a calibration table.
+    Returns a list of (node-type, runtype, scfcode, cores, cores_camcasp,
+    memory_gb) tuples."""
+    table = []
+    if not file or not os.path.exists(file):
+        return table
+    with open(file) as CAL:
+        for n, line in enumerate(CAL, start=1):
+            if re.match(r'\s*(#|$)', line):
+                continue
+            w = line.split()
+            try:
+                table.append((w[0], w[1], w[2], int(w[3]), int(w[4]), float(w[5])))
+            except (IndexError, ValueError):
+                print(f"{file}:{n}: calibration entry not understood -- ignored")
+    return table
+
+
+def write_calibration(file, node, runtype, scfcode, cores, cores_camcasp, memory_gb):
+    """Add an entry to a calibration table, replacing any existing entry
+    for the same node type, runtype and SCF code"""
+    lines = []
+    if os.path.exists(file):
+        with open(file) as CAL:
+            for line in CAL:
+                w = line.split()
+                if len(w) >= 3 and w[:3] == [node, runtype, scfcode]:
+                    continue
+                lines.append(line)
+    else:
+        lines.append("#  node-type  runtype  scfcode  cores  cores_camcasp  memory_gb\n")
+    lines.append(f"{node}  {runtype}  {scfcode}  {cores:d}  {cores_camcasp:d}  {memory_gb:.1f}\n")
+    with open(file, "w") as CAL:
+        CAL.writelines(lines)
+
+
+def lookup(table, node, runtype, scfcode):
+    """Best calibration entry for this node type and job, or None.
+    Exact matches of runtype and scfcode are preferred to wildcards."""
+    best = None
+    for entry in table:
+        if entry[0] != node:
+            continue
+        score = 0
+        for value, want in [(entry[1], runtype), (entry[2], scfcode)]:
+            if value == want:
+                score += 2
+            elif value == "*":
+                score += 1
+            else:
+                score = -1
+                break
+        if score >= 0 and (best is None or score > best[0]):
+            best = (score, entry)
+    return best[1] if best else None
+
+
+def choose(resources, table, runtype, scfcode):
+    """Choose (cores, cores_camcasp, memory_gb) for a job"""
+    cores = resources.usable_cores()
+    memory = resources.usable_memory_gb()
+    entry = lookup(table, resources.node_type(), runtype, scfcode)
+    if entry:
+        return (min(entry[3], cores), min(entry[4], cores),
+                max(1, min(int(entry[5]), int(memory))))
+    #  No calibration: keep the SCF code within one NUMA node, and use at
+    #  most two threads for CamCASP, which scales poorly beyond that.
+    if resources.numa_nodes:
+        scf = min(cores, max(resources.numa_nodes))
+    else:
+        scf = cores
+    return (max(1, scf), max(1, min(2, cores)), max(1, int(0.8*memory)))
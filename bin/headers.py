@@ -33,7 +33,7 @@ header = {"PBS": """
 # Use this to adjust required job time, up to the maximum for the queue
 # It is better to use walltime than CPU time as this enables the scheduler
 # to optimize.
-#PBS -l walltime=4:00:00,ncpus={np},mem={mem}gb
+#PBS -l walltime={walltime},ncpus={np},mem={mem}gb
 #
 ##############################################################################
 # Start of shell script proper. Do not put PBS directives after this point.
@@ -82,14 +82,15 @@ header = {"PBS": """
 """}
 
 
-def get_header(scheduler,job_name,queue,nproc,memory_gb):
+def get_header(scheduler,job_name,queue,nproc,memory_gb,walltime="4:00:00"):
     """Return the header for the specified scheduler with the parameters supplied"""
 
     if not scheduler:
         #  SCHEDULER unset or ""
         return("")
     elif scheduler in header:
-        return header[scheduler].format(job=job_name,q=queue,np=nproc,mem=memory_gb)
+        return header[scheduler].format(job=job_name,q=queue,np=nproc,mem=memory_gb,
+                                        walltime=walltime)
     else:
         print(f'''Scheduler {scheduler} not recognised. To install a new one, edit
 {os.path.join(CamCASP,"bin","headers.py")}
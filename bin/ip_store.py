@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Look up, compute or add the IPs and AC shifts of molecules in the shared store.
+"""
+
+import argparse
+import sys
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Look up, compute or add the IPs and AC shifts of molecules in the shared store.
+""",epilog="""
+The store (see ipstore.py) is the file named by CAMCASP_IPSTORE, or
+$HOME/.cache/camcasp/ip-store.jsonl, together with the tables in
+$CAMCASP/data. read_clt takes the IP, and if possible the AC shift, of
+any molecule in a cluster file that doesn't give them from the store, so
+they need only be calculated once.
+
+For each molecule of the cluster file (or those given by --molecule) the
+fingerprint of its geometry and the entry of the store that would be used
+are printed. The functional and basis are those of the cluster file
+(PBE0 by default), unless given by --functional and --basis. Then
+
+  --compute         calculates the IP and HOMO energy by Delta-DFT with
+                    Psi4, for the molecules that have no entry for their
+                    own geometry, functional and basis, and adds them
+  --ip IP           adds the IP given (a.u., or eV with --eV), and the
+                    HOMO energy if given by --homo, for one molecule,
+                    e.g. from a calculation done by hand
+
+E.g.
+  ip_store.py H2O2.clt
+  ip_store.py H2O2.clt --compute --nproc 8
+  ip_store.py H2O.clt --ip 12.62 --eV --basis aug-cc-pvtz
+
+--list prints all the entries of the store.
+""")
+
+parser.add_argument("clt", nargs="?", help="Cluster file")
+parser.add_argument("--molecule", nargs="+", default=[], help="Molecules to look up")
+parser.add_argument("--functional", help="Functional (default that of the cluster file, or PBE0)")
+parser.add_argument("--basis", help="Basis (default that of the cluster file)")
+parser.add_argument("--charge", type=int, default=0, help="Charge of the molecules (default 0)")
+parser.add_argument("--compute", action="store_true", help="Calculate missing values with Psi4")
+parser.add_argument("--nproc", type=int, default=1, help="Cores for Psi4")
+parser.add_argument("--memory", default="2 GB", help="Memory for Psi4 (default 2 GB)")
+parser.add_argument("--keep", action="store_true", help="Keep the Psi4 files")
+parser.add_argument("--ip", type=float, help="IP to add")
+parser.add_argument("--homo", type=float, help="HOMO energy to add")
+parser.add_argument("--eV", action="store_true", help="--ip and --homo are in eV")
+parser.add_argument("--list", action="store_true", help="List the entries of the store")
+
+args = parser.parse_args()
+
+import ipstore
+from camcasp_files import basis_map
+from cltspec import parse_clt, CltError, eV
+
+store = ipstore.IPStore()
+if args.list:
+    for e in store.entries:
+        print(f"{e['formula']:12s} {e.get('fingerprint') or '':26s} {e['functional']:6s}"
+              f" {e['basis'] or '':14s} {e['ip']:9.6f}"
+              + (f" {e['homo']:9.6f}" if e.get("homo") is not None else " " + 9*" ")
+              + f"  {e.get('source', '')}")
+if not args.clt:
+    if not args.list:
+        parser.error("a cluster file is needed")
+    exit(0)
+
+try:
+    spec = parse_clt(args.clt)
+except (OSError, CltError) as e:
+    print(e)
+    exit(1)
+functional = (args.functional or spec.func or "PBE0").upper()
+basis = basis_map.get((args.basis or spec.basis).lower(), (args.basis or spec.basis).lower())
+if not basis:
+    print("The basis must be given, in the cluster file or by --basis")
+    exit(1)
+names = args.molecule or spec.molecules or list(spec.mols)
+if args.ip is not None and len(names) != 1:
+    parser.error("--ip needs exactly one molecule: use --molecule")
+
+for name in names:
+    mol = spec.mols.get(name)
+    if mol is None:
+        print(f"Molecule {name} has not been defined in {args.clt}")
+        exit(1)
+    try:
+        fp = ipstore.fingerprint(mol)
+        if fp is None:
+            print(f"{name}: no atoms of its own")
+            continue
+        if args.ip is not None:
+            scale = 1.0/eV if args.eV else 1.0
+            e = store.add(mol, functional, basis, args.ip*scale,
+                          None if args.homo is None else args.homo*scale, args.charge,
+                          source=f"given for {name} in {args.clt}")
+            print(f"{name} {fp}: added IP = {e['ip']:.6f}")
+            continue
+        if args.compute:
+            e = ipstore.ensure(store, mol, functional, basis, args.charge,
+                               cores=args.nproc, memory=args.memory, keep=args.keep)
+        else:
+            e = store.lookup(fp, functional, basis, args.charge)
+    except ipstore.IPStoreError as e:
+        print(e)
+        exit(1)
+    if e is None:
+        print(f"{name} {fp}: not in the store")
+        continue
+    method = "experiment" if e["functional"] == "EXPT" else f"{e['functional']}/{e['basis']}"
+    shift = ""
+    if e["functional"] == functional and e["basis"] == basis and e.get("delta_ac") is not None:
+        shift = f", AC shift {e['delta_ac']:.6f}"
+    print(f"{name} {fp}: IP {e['ip']:.6f} a.u. ({e['ip']*eV:.3f} eV){shift},"
+          f" {method}, {e.get('source') or e['formula']}")
+sys.stdout.flush()
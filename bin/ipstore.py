@@ -0,0 +1,404 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Shared store of ionization potentials and asymptotic-correction shifts.
+
+Every DFT monomer needs its vertical IP, or the AC shift IP + e(HOMO),
+for the asymptotic correction. These are found by Delta-DFT calculations,
+IP = E(N-1) - E(N), which need only be done once for each molecule,
+functional and basis. The store keeps the results, one JSON object per
+line, in the file named by the environment variable CAMCASP_IPSTORE, or
+in $HOME/.cache/camcasp/ip-store.jsonl; a research group can share one
+file by pointing CAMCASP_IPSTORE at it. Setting CAMCASP_IPSTORE to "none"
+turns the store off.
+
+Each entry gives the molecular formula, a fingerprint of the geometry,
+the charge, the functional and the basis (as named by Psi4, e.g.
+aug-cc-pvtz), and the IP, HOMO energy and AC shift in a.u. The
+fingerprint is the formula with a hash of the interatomic distances,
+rounded to 0.02 bohr and sorted with the elements of each pair, so it
+doesn't depend on the position, orientation or atom order of the
+molecule, and a molecule read from another cluster file in another unit
+still matches. The store is seeded, when it is read, with the tables
+$CAMCASP/data/IPs_and_AC-Shifts_PBE0aTZ.dat (PBE0/aug-cc-pVTZ) and
+$CAMCASP/data/IP.txt (mostly experimental or PBE0/Sadlej values). These
+have no geometry, so they could belong to any isomer, and are only used
+for a molecule whose geometry isn't available, such as one made by JOIN,
+when its name is a formula (e.g. H2O, or water).
+
+read_clt uses lookup (through fill_missing) for each molecule whose IP
+and AC shift are not given in the cluster file. Only entries for the
+functional of the job, or experimental values, are used: one for the
+same functional and basis is preferred to one for the same functional,
+and that to an experimental value. The HOMO energy and AC shift are only
+used if the functional and basis are those of the job, since the shift
+depends on them; otherwise only the IP is used, and the shift is chosen
+by the SCF program.
+
+ensure computes the IP and HOMO energy of a molecule with Psi4 (two SCF
+calculations, N and N-1 electrons) if the store doesn't have them for
+its geometry, functional and basis, and adds them. The ip_store.py
+script gives access to the store from the command line.
+
+provides functions:
+* store_file
+* formula
+* fingerprint
+* seed_entries
+* compute
+* ensure
+* fill_missing
+
+provides classes:
+* IPStore
+* IPStoreError
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from time import strftime
+
+from cltspec import eV
+
+#  Element symbols, by atomic number
+elements = """X
+H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni
+Cu Zn Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe
+Cs Ba La Ce Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg
+Tl Pb Bi Po At Rn""".split()
+
+#  Names used in data/IP.txt that are not formulae
+_aliases = {
+    "water": "H2O", "methane": "CH4", "formamide": "CH3NO", "n-methylpropanamide": "C4H9NO",
+    "helium": "He", "neon": "Ne", "argon": "Ar", "zinc": "Zn", "urea": "CH4N2O",
+    "benzene": "C6H6", "carbamazepine": "C15H12N2O", "hydantoin": "C3H4N2O2",
+    "formaldehyde": "CH2O", "acetylene": "C2H2", "thymine": "C5H6N2O2",
+    "pyridine": "C5H5N", "thiophene": "C4H4S", "toluene": "C7H8",
+}
+
+#  Resolution of the distances in the fingerprint, bohr
+_resolution = 0.02
+
+
+class IPStoreError(Exception):
+    pass
+
+
+def store_file():
+    """File containing the store, or None if it has been turned off"""
+    file = os.environ.get("CAMCASP_IPSTORE",
+                          os.path.join(os.path.expanduser("~"), ".cache", "camcasp",
+                                       "ip-store.jsonl"))
+    return None if file.lower() == "none" else file
+
+
+def _data_dir():
+    return os.path.join(os.environ.get("CAMCASP")
+                        or os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "data")
+
+
+def _hill(counts):
+    """Formula in Hill order: C, H, then the other elements alphabetically,
+    or all alphabetically if there is no carbon"""
+    order = sorted(counts)
+    if "C" in counts:
+        order = ["C"] + (["H"] if "H" in counts else []) \
+            + [e for e in order if e not in ["C", "H"]]
+    return "".join(e + (str(counts[e]) if counts[e] > 1 else "") for e in order)
+
+
+def _atoms(mol):
+    """Element symbols and positions (bohr) of the atoms of a MolSpec,
+    leaving out dummy atoms"""
+    symbols, positions = [], []
+    for atom, r in zip(mol.atoms, mol.coordinates("bohr")):
+        try:
+            Z = int(round(float(atom[1])))
+        except ValueError:
+            raise IPStoreError(f"Can't read the nuclear charge of {atom[0]} in {mol.name}")
+        if 0 < Z < len(elements):
+            symbols.append(elements[Z])
+            positions.append(r)
+    return symbols, positions
+
+
+def formula(mol):
+    """Molecular formula of a MolSpec, in Hill order"""
+    counts = {}
+    for e in _atoms(mol)[0]:
+        counts[e] = counts.get(e, 0) + 1
+    return _hill(counts)
+
+
+def fingerprint(mol):
+    """Fingerprint of the geometry of a MolSpec: its formula and a hash of
+    its interatomic distances. None for a molecule without atoms of its own
+    (such as one made by JOIN)."""
+    symbols, positions = _atoms(mol)
+    if not symbols:
+        return None
+    pairs = []
+    for i in range(len(symbols)):
+        for j in range(i):
+            d = sum((a - b)**2 for a, b in zip(positions[i], positions[j]))**0.5
+            pairs.append((*sorted([symbols[i], symbols[j]]), int(round(d/_resolution))))
+    f = formula(mol)
+    return f"{f}:{hashlib.sha1((f + repr(sorted(pairs))).encode()).hexdigest()[:12]}"
+
+
+def _parse_formula(name):
+    """Formula in Hill order and charge for a name such as H2O or Cl-, or
+    None if it isn't a formula"""
+    name = _aliases.get(name.lower(), name)
+    m = re.fullmatch(r'((?:[A-Z][a-z]?\d*)+)([-+]?)', name)
+    if not m:
+        return None
+    counts = {}
+    for e, n in re.findall(r'([A-Z][a-z]?)(\d*)', m.group(1)):
+        if e not in elements[1:]:
+            return None
+        counts[e] = counts.get(e, 0) + (int(n) if n else 1)
+    return _hill(counts), {"-": -1, "+": 1, "": 0}[m.group(2)]
+
+
+def _entry(formula, charge, functional, basis, ip, homo=None, source="", fp=None):
+    return {"formula": formula, "fingerprint": fp, "charge": charge,
+            "functional": functional.upper(), "basis": basis.lower(),
+            "ip": ip, "homo": homo,
+            "delta_ac": ip + homo if homo is not None else None, "source": source}
+
+
+def seed_entries(datadir=None):
+    """The entries from the tables in the data directory"""
+    datadir = datadir or _data_dir()
+    entries = []
+    file = os.path.join(datadir, "IPs_and_AC-Shifts_PBE0aTZ.dat")
+    try:
+        with open(file, encoding="iso-8859-1") as T:
+            rows = [line.split(",") for line in T if not line.startswith("#")]
+    except OSError:
+        rows = []
+    for row in rows[2:]:
+        f = _parse_formula(row[0].strip())
+        try:
+            ip, homo, expt = float(row[1]), float(row[2]), float(row[4])
+        except (IndexError, ValueError):
+            continue
+        if f:
+            #  The AC shift is IP + e(HOMO), as in read_clt
+            source = f"data/{os.path.basename(file)}"
+            entries.append(_entry(*f, "PBE0", "aug-cc-pvtz", ip, homo, source=source))
+            ref = row[5].strip() if len(row) > 5 else ""
+            entries.append(_entry(*f, "EXPT", "", expt, source=f"{source}: {ref}"))
+    file = os.path.join(datadir, "IP.txt")
+    try:
+        with open(file, encoding="iso-8859-1") as T:
+            lines = T.read().splitlines()
+    except OSError:
+        lines = []
+    #  The table is between the second and third rules
+    rules = [i for i, line in enumerate(lines) if line.startswith("=====")]
+    table = []
+    for line in lines[rules[1]+1:rules[2]] if len(rules) > 2 else []:
+        m = re.match(r'(\S*)\s+(\d+\.\d+)\s+(.*)$', line)
+        if m and (m.group(1) or table):
+            #  A value without a name is another value for the molecule above
+            table.append([m.group(1) or table[-1][0], float(m.group(2)), m.group(3)])
+        elif table:
+            table[-1][2] += " " + line.strip()
+    for name, ip, description in table:
+        f = _parse_formula(name)
+        if not f:
+            continue
+        if "Method[1]" in description:
+            m = re.search(r'aug-cc-pV[DTQ]Z', description, flags=re.I)
+            basis = m.group(0) if m else "sadlej-pvtz"
+            functional = "PBE0"
+        else:
+            basis, functional = "", "EXPT"
+        entries.append(_entry(*f, functional, basis, ip, source=f"data/IP.txt: {name}"))
+    return entries
+
+
+class IPStore:
+    """The entries of the store file, and the seed entries"""
+    def __init__(self, file=None, seed=True):
+        self.file = file or store_file()
+        self.entries = seed_entries() if seed else []
+        if self.file and os.path.exists(self.file):
+            with open(self.file) as S:
+                for line in S:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+
+    def lookup(self, fp, functional="", basis="", charge=0, formula=None):
+        """The best entry for the molecule with fingerprint fp, or None.
+        If fp is None, the molecule's geometry isn't available, and the
+        entries without a geometry for the formula are used instead."""
+        if fp is None and formula is None:
+            return None
+        functional, basis = functional.upper(), basis.lower()
+        best, rank = None, None
+        for e in self.entries:
+            if e.get("charge", 0) != charge or e.get("ip") is None:
+                continue
+            if fp is not None and e.get("fingerprint") != fp:
+                continue
+            if fp is None and (e.get("fingerprint") is not None
+                               or e.get("formula") != formula):
+                continue
+            if e["functional"] == functional and e["basis"] == basis:
+                method = 2
+            elif e["functional"] == functional:
+                method = 1
+            elif e["functional"] == "EXPT":
+                method = 0
+            else:
+                continue
+            #  Later entries replace earlier ones of the same rank
+            if rank is None or method >= rank:
+                best, rank = e, method
+        return best
+
+    def add(self, mol, functional, basis, ip, homo=None, charge=0, source=""):
+        """Add an entry for MolSpec mol to the store file, and return it"""
+        if not self.file:
+            raise IPStoreError("The IP store has been turned off (CAMCASP_IPSTORE=none)")
+        entry = _entry(formula(mol), charge, functional, basis, ip, homo, source,
+                       fingerprint(mol))
+        entry["date"] = strftime("%Y-%m-%d %H:%M:%S")
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.file)), exist_ok=True)
+            #  A single write of a short line, so that entries added at the
+            #  same time by different jobs are not interleaved
+            with open(self.file, "a") as S:
+                S.write(json.dumps(entry) + "\n")
+        except OSError as e:
+            raise IPStoreError(f"Can't add to the IP store {self.file}: {e}")
+        self.entries.append(entry)
+        return entry
+
+
+_psi4_input = """memory {memory}
+
+molecule neutral {{
+{charge} 1
+{atoms}
+units bohr
+symmetry c1
+no_reorient
+no_com
+}}
+
+molecule ion {{
+{ion} 2
+{atoms}
+units bohr
+symmetry c1
+no_reorient
+no_com
+}}
+
+set basis {basis}
+set reference rks
+E0, wfn = energy('{functional}', molecule=neutral, return_wfn=True)
+homo = wfn.epsilon_a().get(wfn.nalpha() - 1)
+set reference uks
+E1 = energy('{functional}', molecule=ion)
+psi4.core.print_out("\\nIPSTORE %.10f %.10f %.10f\\n" % (E0, E1, homo))
+"""
+
+
+def compute(mol, functional, basis, charge=0, cores=1, memory="2 GB", keep=False):
+    """IP and HOMO energy (a.u.) of MolSpec mol by Delta-DFT with Psi4.
+    The neutral molecule is taken to be a closed-shell singlet."""
+    symbols, positions = _atoms(mol)
+    if not symbols:
+        raise IPStoreError(f"Molecule {mol.name} has no atoms")
+    atoms = "\n".join(f"{e:2s} {x:16.10f} {y:16.10f} {z:16.10f}"
+                      for e, (x, y, z) in zip(symbols, positions))
+    work = tempfile.mkdtemp(prefix=f"ip-{mol.name}-")
+    try:
+        with open(os.path.join(work, "ip.in"), "w") as IN:
+            IN.write(_psi4_input.format(memory=memory, charge=charge, ion=charge+1,
+                                        atoms=atoms, basis=basis.lower(),
+                                        functional=functional.lower()))
+        script = os.path.join(os.environ.get("CAMCASP", ""), "bin", "psi4.sh")
+        if os.path.exists(script):
+            cmnd = [script, "ip.in", "ip.out", str(cores)]
+        else:
+            cmnd = ["psi4", "-n", str(cores), "ip.in", "ip.out"]
+        try:
+            rc = subprocess.call(cmnd, cwd=work, stdout=subprocess.DEVNULL)
+        except OSError as e:
+            raise IPStoreError(f"Can't run Psi4: {e}")
+        try:
+            with open(os.path.join(work, "ip.out"), errors="replace") as OUT:
+                m = re.search(r'^IPSTORE (\S+) (\S+) (\S+)$', OUT.read(), flags=re.M)
+        except OSError:
+            m = None
+        if rc != 0 or not m:
+            raise IPStoreError(f"The Psi4 calculation of the IP of {mol.name} failed"
+                               + (f"; see {work}/ip.out" if keep else ""))
+        E0, E1, homo = (float(v) for v in m.groups())
+        return E1 - E0, homo
+    finally:
+        if not keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def ensure(store, mol, functional, basis, charge=0, **kwargs):
+    """The entry of the store for the geometry of MolSpec mol with the
+    functional and basis, computing and adding it if there isn't one.
+    kwargs are passed to compute."""
+    e = store.lookup(fingerprint(mol), functional, basis, charge)
+    if e and e.get("fingerprint") and e["functional"] == functional.upper() \
+            and e["basis"] == basis.lower() and e.get("homo") is not None:
+        return e
+    ip, homo = compute(mol, functional, basis, charge, **kwargs)
+    return store.add(mol, functional, basis, ip, homo, charge,
+                     source=f"Delta-DFT {functional}/{basis} with Psi4")
+
+
+def fill_missing(job, spec, store=None):
+    """Set the IP (and, if the functional and basis match, the HOMO energy
+    and AC shift) of the molecules of the job that have neither an IP nor
+    an AC shift from the store. Returns a list of messages describing what
+    was done."""
+    messages = []
+    if store is None:
+        if not store_file():
+            return messages
+        store = IPStore()
+    for mol in [job.mola, job.molb]:
+        if mol is None or mol.ip or mol.delta_ac:
+            continue
+        m = spec.mols.get(mol.name)
+        try:
+            fp = fingerprint(m) if m else None
+        except IPStoreError:
+            fp = None
+        #  Without a geometry, the name may be a formula
+        f = _parse_formula(mol.name)
+        e = store.lookup(fp, job.func, job.basis,
+                         formula=f[0] if fp is None and f and f[1] == 0 else None)
+        if e is None:
+            continue
+        mol.ip = e["ip"]
+        exact = e["functional"] == job.func.upper() and e["basis"] == job.basis.lower()
+        if exact and e.get("homo") is not None:
+            mol.homo = e["homo"]
+        method = "experiment" if e["functional"] == "EXPT" else f"{e['functional']}/{e['basis']}"
+        messages.append(f"{mol.name}: IP = {mol.ip:6.4f} a.u. ({mol.ip*eV:.3f} eV)"
+                        + (f", HOMO energy = {mol.homo:6.4f}" if mol.homo else "")
+                        + f" from the IP store ({method}, {e.get('source') or e['formula']})")
+    return messages
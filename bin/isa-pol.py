@@ -1,4 +1,4 @@
-#!/usr/bin/env python2
+#!/usr/bin/env python3
 #  -*-  coding:  iso-8859-1  -*-
 
 """Convert an ISA-display job into an ISA-pol job and run it.
@@ -16,6 +16,7 @@ CamCASP = os.environ["CAMCASP"]
 sys.path = [os.path.join(CamCASP,"bin")] + sys.path
 
 from camcasp import newdir
+from cltspec import JobSpec, parse_clt, CltError
 
 
 parser = argparse.ArgumentParser(
@@ -25,7 +26,8 @@ description="""Convert an ISA-display job into an ISA-pol job and run it.
 isa-pol.py <job> -d <directory> [--clt <clt-file>] [-q <queue>]
 The cluster-file need not normally be specified. The script will look
 for a *.clt file in the specified directory.
-The molecule name must be specified if different from the job name. 
+The molecule name is taken from the job specification saved when the
+job was set up, or from the cluster file, unless specified. 
 """)
 
 
@@ -43,15 +45,15 @@ here = os.getcwd()
 if os.path.exists(args.directory):
   os.chdir(args.directory)
 else:
-  print "Can't find directory {}".format(args.directory)
+  print("Can't find directory {}".format(args.directory))
   exit(1)
 
 clt = glob.glob("*.clt")
 if len(clt) == 0:
-  print "Cluster file missing"
+  print("Cluster file missing")
   exit(1)
 elif len(clt) > 1:
-  print "More than one .clt file in {}".format(args.directory)
+  print("More than one .clt file in {}".format(args.directory))
   exit(1)
 else:
   cltfile = clt[0]
@@ -59,7 +61,18 @@ else:
 if args.molecule:
   molecule = args.molecule
 else:
-  molecule = job
+  try:
+    if os.path.exists(job + ".spec"):
+      spec = JobSpec.load(job + ".spec")
+    else:
+      spec = parse_clt(cltfile)
+  except CltError as e:
+    print(e)
+    exit(1)
+  if spec.molecules:
+    molecule = spec.molecules[0]
+  else:
+    molecule = job
 
 isa_file = "{}_atoms.ISA".format(molecule)
 
@@ -70,7 +83,7 @@ if not os.path.exists(isa_file):
     # and rename OUT directory
     os.rename("OUT","OUT_isa")
   else:
-    print "Can't find ISA results file {}".format(os.path.join("OUT",isa_file))
+    print("Can't find ISA results file {}".format(os.path.join("OUT",isa_file)))
     exit(1)
 
 # Save old output directory, if any, and make new one
@@ -79,7 +92,7 @@ newdir("OUT")
 isa_pol_cmnds = os.path.join(CamCASP,"data","camcasp-cmnds",
                            "isa-pol-from-isa-restart")
 if not os.path.exists(isa_pol_cmnds):
-  print "Can't find isa-pol command file {}".format(isa_pol_cmnds)
+  print("Can't find isa-pol command file {}".format(isa_pol_cmnds))
   exit(1)
 
 #  Move ISA results file up
@@ -0,0 +1,346 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Estimate the memory and elapsed time needed by a job before it is run.
+
+Each job run by execute records, for each SCF calculation and for the
+CamCASP step, the elapsed time and the peak memory used. These profile
+records are appended, one JSON object per line, to the file named by the
+environment variable CAMCASP_PROFILES, or to
+$HOME/.cache/camcasp/profiles.jsonl.
+
+The size of each step is measured by an estimate of the number of basis
+functions, obtained from the cardinal number and augmentation of the
+basis, the basis type and the atoms of each molecule. For each kind of
+step (SCF calculations with each SCF code, and the CamCASP step for each
+run-type) the logarithms of the time and memory are fitted to
+  c0 + c1 log(nbf) + c2 log(cores)
+by least squares over the profile records. The coefficients are drawn
+towards rough default values, which are all that is used until there are
+records for that kind of step, and the exponents stay close to them
+unless there are records for several sizes of job, so that a few records
+don't give wild extrapolations. The fit is repeated whenever a
+Predictor is loaded, so new records are used as soon as they are
+written.
+
+provides functions:
+* basis_functions
+* sizes
+* scratch_gb
+* call
+* record
+* profile_file
+
+provides classes:
+* Estimate
+* Predictor
+"""
+
+import json
+import math
+import os
+import re
+import subprocess
+from time import perf_counter, strftime
+
+from cltspec import standard_runtype
+
+#  Default coefficients (c0, c1, c2) of log(seconds) and log(GB)
+_prior = {
+    "scf":     {"wall": (math.log(2.0e-6), 3.0, -0.7),
+                "maxrss_gb": (math.log(2.0e-5), 2.0, 0.0)},
+    "camcasp": {"wall": (math.log(1.0e-7), 3.5, -0.5),
+                "maxrss_gb": (math.log(8.0e-7), 2.7, 0.0)},
+}
+#  Weights of the default coefficients, in units of one record. The
+#  constant term is set almost entirely by the records, but the exponents
+#  only change when there are records for jobs of several sizes.
+_prior_weight = (0.01, 4.0, 4.0)
+
+#  Functions in a typical midbond set (3s2p1d)
+_midbond = 14
+
+#  Parts of the calculation for each run-type, as in execute
+_parts = {
+    "saptdft": ["A", "B", "C"],
+    "sapt": ["A", "B", "C"],
+    "properties": ["A", "C"],
+    "deltahf": ["A", "B", "AB", "C"],
+    "psi4-saptdft": ["AB"],
+}
+
+
+def profile_file():
+    """File containing the profile records"""
+    return os.environ.get("CAMCASP_PROFILES",
+                          os.path.join(os.path.expanduser("~"), ".cache", "camcasp",
+                                       "profiles.jsonl"))
+
+
+def basis_functions(basis, z):
+    """Estimated number of basis functions for an atom with nuclear charge z"""
+    m = re.search(r'([dtq5])z', basis)
+    x = {"d": 2, "t": 3, "q": 4, "5": 5}[m.group(1)] if m else 3
+    if re.match(r'(d-?aug|da)', basis):
+        aug = 2
+    elif re.match(r'(aug|a[dtq5v]|sadlej)', basis):
+        aug = 1
+    else:
+        aug = 0
+    if z <= 2:
+        return x*(x+1)*(2*x+1)//6 + aug*x*x
+    n = (x+1)*(x+2)*(2*x+3)//6 + aug*(x+1)**2
+    if z > 10:
+        n += 4
+    return n
+
+
+def _atoms(spec, name):
+    """Nuclear charges of the atoms of molecule name"""
+    mol = spec.mols.get(name)
+    if mol is None:
+        return []
+    if mol.atoms:
+        z = []
+        for atom in mol.atoms:
+            try:
+                z.append(float(atom[1]))
+            except (IndexError, ValueError):
+                z.append(1.0)
+        return [q for q in z if q > 0.0]
+    return [q for part in mol.joined for q in _atoms(spec, part)]
+
+
+def sizes(spec, runtype=None):
+    """Estimated numbers of basis functions for each part of the job: A, B
+    and AB for the SCF calculations, and C for the CamCASP step."""
+    runtype = runtype or standard_runtype(spec.runtype or "") \
+              or ("properties" if len(spec.molecules) == 1 else "saptdft")
+    basistype = spec.basistype or ("mono" if runtype == "properties" else "mc+")
+    mols = [_atoms(spec, name) for name in spec.molecules[:2]]
+    n = [sum(basis_functions(spec.basis, z) for z in atoms) for atoms in mols]
+    midbond = 0 if spec.nomidbond or not basistype.endswith("+") else _midbond
+    parts = {}
+    if runtype == "properties" or len(n) == 1:
+        parts["A"] = n[0] if n else 0
+        parts["C"] = parts["A"]
+        return parts
+    for M, own, other, far in [("A", n[0], n[1], len(mols[1])),
+                               ("B", n[1], n[0], len(mols[0]))]:
+        if basistype.startswith("dc"):
+            parts[M] = own + other + midbond
+        elif basistype == "mc+":
+            #  s and p functions on the partner's atoms
+            parts[M] = own + midbond + 4*far
+        else:
+            parts[M] = own
+    if "AB" in _parts.get(runtype, []):
+        parts["AB"] = n[0] + n[1] + midbond
+    parts["C"] = max(parts["A"], parts["B"])
+    return parts
+
+
+def scratch_gb(spec, runtype, scfcode, direct=True):
+    """Estimated scratch space, in GB, needed by the job's work directory.
+    Unless the SCF calculations are direct, the two-electron integrals are
+    written to disk, about 12 bytes for each of the nbf**4/8 unique ones.
+    Psi4 (density fitting) and CamCASP keep three-index integrals, with an
+    auxiliary basis of about 3 nbf functions. The MO and checkpoint files
+    are small by comparison."""
+    parts = sizes(spec, runtype)
+    nbf = max([parts.get(M, 0) for M in _parts.get(runtype, []) if M != "C"], default=0)
+    if scfcode == "psi4":
+        scf = 24.0*nbf**3
+    elif direct:
+        scf = 400.0*nbf**2
+    else:
+        scf = 12.0*nbf**4/8
+    camcasp = 24.0*parts.get("C", 0)**3
+    return (scf + camcasp)/1024**3
+
+
+def call(cmnd, **kwargs):
+    """Run the command as subprocess.call does, and return the return code,
+    the elapsed time in seconds and the peak memory in GB used by the
+    command and the processes it waited for."""
+    t = perf_counter()
+    p = subprocess.Popen(cmnd, **kwargs)
+    while True:
+        try:
+            pid, status, usage = os.wait4(p.pid, 0)
+            break
+        except InterruptedError:
+            continue
+    p.returncode = os.waitstatus_to_exitcode(status)
+    #  ru_maxrss is in kB on Linux
+    return p.returncode, perf_counter() - t, usage.ru_maxrss/1024**2
+
+
+def record(job, steps, file=None):
+    """Append a profile record for the job to the profile file.
+    steps is a list of (part, seconds, GB) for the steps that were run."""
+    parts = sizes(job.spec, job.runtype)
+    rec = {
+        "job": job.name,
+        "date": strftime("%Y-%m-%d %H:%M:%S"),
+        "runtype": job.runtype,
+        "scfcode": job.scfcode,
+        "basis": job.spec.basis,
+        "basistype": job.basistype,
+        "cores": job.cores,
+        "cores_camcasp": job.cores_camcasp,
+        "memory": job.memory,
+        "steps": [{"part": M, "nbf": parts.get(M, parts.get("C", 0)),
+                   "wall": round(wall, 2), "maxrss_gb": round(gb, 3)}
+                  for M, wall, gb in steps],
+    }
+    file = file or profile_file()
+    try:
+        os.makedirs(os.path.dirname(file), exist_ok=True)
+        #  A single write of a short line, so that records from jobs
+        #  finishing at the same time are not interleaved
+        with open(file, "a") as PROF:
+            PROF.write(json.dumps(rec) + "\n")
+    except OSError:
+        #  The profile is an optimization only
+        pass
+
+
+def _solve(a, b):
+    """Solve the linear equations a x = b by Gaussian elimination"""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for k in range(n):
+        p = max(range(k, n), key=lambda i: abs(m[i][k]))
+        m[k], m[p] = m[p], m[k]
+        for i in range(k+1, n):
+            f = m[i][k]/m[k][k]
+            for j in range(k, n+1):
+                m[i][j] -= f*m[k][j]
+    x = [0.0]*n
+    for k in reversed(range(n)):
+        x[k] = (m[k][n] - sum(m[k][j]*x[j] for j in range(k+1, n)))/m[k][k]
+    return x
+
+
+class Estimate:
+    """Estimated requirements of a job"""
+    def __init__(self):
+        self.scf_time = 0.0        # seconds, all SCF calculations
+        self.scf_memory_gb = 0.0   # peak, any SCF calculation
+        self.camcasp_time = 0.0
+        self.camcasp_memory_gb = 0.0
+        self.steps = 0             # Number of profiled steps used
+
+    @property
+    def time(self):
+        return self.scf_time + self.camcasp_time
+
+    @property
+    def memory_gb(self):
+        return max(self.scf_memory_gb, self.camcasp_memory_gb)
+
+    def request(self):
+        """Memory (GB) and wall time (H:MM:SS) to request from a scheduler,
+        with a margin for error"""
+        memory = math.ceil(1.25*self.memory_gb + 1.0)
+        t = int(1.5*self.time + 600)
+        return memory, f"{t//3600:d}:{t//60%60:02d}:{t%60:02d}"
+
+    def __str__(self):
+        def hms(t):
+            t = int(t)
+            return f"{t//3600:d}:{t//60%60:02d}:{t%60:02d}"
+        if self.steps:
+            source = f"fitted to {self.steps} profiled steps"
+        else:
+            source = "default model: no profile records for this kind of job"
+        return (f"SCF {self.scf_memory_gb:.1f} GB, {hms(self.scf_time)};"
+                f" CamCASP {self.camcasp_memory_gb:.1f} GB, {hms(self.camcasp_time)}"
+                f" ({source})")
+
+
+class Predictor:
+    """Model of job requirements fitted to the profile records"""
+    def __init__(self):
+        #  coefficients[(kind, target)] = (c0, c1, c2), and counts[kind] is
+        #  the number of profiled steps of that kind
+        self.coefficients = {}
+        self.counts = {}
+
+    @staticmethod
+    def _kind(step, runtype, scfcode):
+        if step == "C":
+            return ("camcasp", runtype)
+        return ("scf", scfcode)
+
+    @classmethod
+    def load(cls, file=None):
+        """Fit the model to the records in the profile file"""
+        file = file or profile_file()
+        data = {}
+        try:
+            with open(file) as PROF:
+                for line in PROF:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        #  Incomplete line from an interrupted write
+                        continue
+                    for step in rec.get("steps", []):
+                        kind = cls._kind(step["part"], rec["runtype"], rec["scfcode"])
+                        cores = rec["cores_camcasp"] if step["part"] == "C" else rec["cores"]
+                        if step["nbf"] > 0:
+                            data.setdefault(kind, []).append(
+                                (step["nbf"], max(cores, 1), step["wall"], step["maxrss_gb"]))
+        except OSError:
+            pass
+        predictor = cls()
+        for kind, rows in data.items():
+            predictor.fit(kind, rows)
+        return predictor
+
+    def fit(self, kind, rows):
+        """Fit the coefficients for one kind of step to (nbf, cores, seconds,
+        GB) rows, drawing them towards the default values"""
+        self.counts[kind] = len(rows)
+        for ix, target in [(2, "wall"), (3, "maxrss_gb")]:
+            prior = _prior[kind[0]][target]
+            a = [[_prior_weight[i] if i == j else 0.0 for j in range(3)] for i in range(3)]
+            b = [w*c for w, c in zip(_prior_weight, prior)]
+            for row in rows:
+                if row[ix] <= 0.0:
+                    continue
+                x = [1.0, math.log(row[0]), math.log(row[1])]
+                y = math.log(row[ix])
+                for i in range(3):
+                    b[i] += x[i]*y
+                    for j in range(3):
+                        a[i][j] += x[i]*x[j]
+            self.coefficients[(kind, target)] = _solve(a, b)
+
+    def _predict(self, kind, target, nbf, cores):
+        c = self.coefficients.get((kind, target), _prior[kind[0]][target])
+        return math.exp(c[0] + c[1]*math.log(max(nbf, 1)) + c[2]*math.log(max(cores, 1)))
+
+    def estimate(self, spec, runtype, scfcode, cores=1, cores_camcasp=1):
+        """Estimate the requirements of a job with this specification"""
+        e = Estimate()
+        parts = sizes(spec, runtype)
+        kinds = set()
+        for M in _parts.get(runtype, []):
+            nbf = parts.get(M, 0)
+            kind = self._kind(M, runtype, scfcode)
+            kinds.add(kind)
+            n = cores_camcasp if M == "C" else cores
+            t = self._predict(kind, "wall", nbf, n)
+            gb = self._predict(kind, "maxrss_gb", nbf, n)
+            if M == "C":
+                e.camcasp_time += t
+                e.camcasp_memory_gb = max(e.camcasp_memory_gb, gb)
+            else:
+                e.scf_time += t
+                e.scf_memory_gb = max(e.scf_memory_gb, gb)
+        e.steps = sum(self.counts.get(kind, 0) for kind in kinds)
+        return e
@@ -0,0 +1,180 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+The results manifest of a job, OUT/<job>-results.json.
+
+When a job run by runcamcasp.py (or jobsupervisor.py) ends, whether it
+has finished or failed, job_steps writes this file with everything that
+the extraction scripts would otherwise have to parse out of the text
+files:
+
+  format        version of the layout (1)
+  job, status   job name, and "finished" or "failed"
+  date          when the file was written
+  runtype, scfcode
+  spec          the job specification (cltspec.JobSpec.to_dict)
+  energies      the entries of <job>-data-summary.data, in order, each
+                with its name, value, unit and description as in the
+                file, and, for energy terms, the order, component (e.g.
+                "ind,exch"), molecule (A, B, UC or ""), whether it is the
+                S2 approximation, and the regularization parameter eta
+                (null if not regularized)
+  scf_energies  total energy (hartree) of each SCF calculation, from
+                OUT/<job>_<part>.out
+  files         size in bytes of each file in the job and OUT directories,
+                by path relative to the job directory
+  profile       elapsed time and peak memory of each step, as recorded in
+                the profile file (see jobmodel.py)
+
+extract_saptdft.py, extract_ct.py and comparator.py read the summary
+through summary_lines. The summary file itself is smaller and quicker to
+read than the manifest, so the manifest is only used if the summary file
+has gone (e.g. when only the manifest has been kept), and for the
+delta-HF energies, from scf_energies, instead of the SCF output files. A
+manifest older than the summary file is ignored, so that a summary file
+that has been edited or replaced by hand still counts.
+
+provides functions:
+* manifest_path
+* summary_records
+* scf_energy
+* write
+* load
+* summary_lines
+"""
+
+import glob
+import json
+import os
+import re
+from time import strftime
+
+from compressed import exists, open_any, find
+
+FORMAT = 1
+
+#  A line of the summary file: name, value, unit and description
+_line = re.compile(r'(\S+)\s+([-+]?\d*\.\d+[EeDd][-+]?\d+)\s+(\S+)\s*(.*?)\s*$')
+#  An energy term, e.g. E^{2}_{ind,exch}(S2)(A)
+_term = re.compile(r'E\^\{(\d)\}_\{([\w,]+)\}(\(S2\))?(\((\w+)\))?$', re.I)
+#  Total energy in the output of an SCF code
+_scf = re.compile(r'\s*@?(Final HF energy:|Total SCF energy =|Total Energy =|'
+                  r'Total DFT energy =|DFT Final Energy:|RHF Final Energy:)\s+(-?\d+\.\d+)')
+
+
+def manifest_path(outdir, job):
+    """Path of the manifest for the job with results in directory outdir"""
+    return os.path.join(outdir, f"{job}-results.json")
+
+
+def summary_records(file):
+    """The entries of a data-summary file (which may be compressed), as
+    dictionaries"""
+    records = []
+    with open_any(file, encoding="iso-8859-1") as S:
+        for line in S:
+            m = _line.match(line)
+            if not m:
+                continue
+            name, value, unit, desc = m.groups()
+            rec = {"name": name, "value": float(re.sub(r'[Dd]', 'E', value)),
+                   "unit": unit, "description": desc}
+            t = _term.match(name)
+            if t:
+                eta = re.search(r'REG eta =\s*(-?\d+\.\d+)', desc)
+                rec.update({"order": int(t.group(1)), "component": t.group(2),
+                            "molecule": t.group(5) or "", "S2": bool(t.group(3)),
+                            "eta": float(eta.group(1)) if eta else None})
+            records.append(rec)
+    return records
+
+
+def scf_energy(file):
+    """Total energy from the output file of an SCF calculation, or None"""
+    if not exists(file):
+        return None
+    with open_any(file, errors="replace") as OUT:
+        for line in OUT:
+            m = _scf.match(line)
+            if m:
+                return float(m.group(2))
+    return None
+
+
+def write(job, maindir, resdir, steps, status="finished"):
+    """Write the manifest for the job, whose files are in maindir and its
+    results in resdir. steps is a list of (part, seconds, GB) for the
+    steps that were run. Returns the path of the manifest."""
+    jobname = job.name
+    summary = os.path.join(resdir, f"{jobname}-data-summary.data")
+    scf = {}
+    for out in sorted(glob.glob(os.path.join(resdir, f"{jobname}_*.out"))):
+        part = os.path.basename(out)[len(jobname)+1:-4]
+        e = scf_energy(out)
+        if e is not None:
+            scf[part] = e
+    path = manifest_path(resdir, jobname)
+    files = {}
+    for d in [maindir, resdir]:
+        for f in sorted(os.listdir(d)):
+            p = os.path.join(d, f)
+            if os.path.isfile(p) and p != path:
+                files[os.path.relpath(p, maindir)] = os.path.getsize(p)
+    manifest = {
+        "format": FORMAT,
+        "job": jobname,
+        "status": status,
+        "date": strftime("%Y-%m-%d %H:%M:%S"),
+        "runtype": job.runtype,
+        "scfcode": job.scfcode,
+        "spec": job.spec.to_dict() if getattr(job, "spec", None) else None,
+        "energies": summary_records(summary) if os.path.exists(summary) else [],
+        "scf_energies": scf,
+        "files": files,
+        "profile": [{"part": M, "wall": round(wall, 2), "maxrss_gb": round(gb, 3)}
+                    for M, wall, gb in steps],
+    }
+    with open(path + ".part", "w") as OUT:
+        json.dump(manifest, OUT, indent=1)
+    os.replace(path + ".part", path)
+    return path
+
+
+def load(outdir, job, summary=None):
+    """The manifest of the job, or None if there isn't one, it can't be
+    read, or it is older than the summary file (if given)"""
+    path = manifest_path(outdir, job)
+    try:
+        with open(path) as M:
+            manifest = json.load(M)
+        if summary:
+            s = find(summary)
+            if s and os.path.getmtime(s) > os.path.getmtime(path):
+                return None
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT:
+        return None
+    return manifest
+
+
+def summary_lines(file):
+    """The lines of a summary file, read from the file if it exists, and
+    otherwise made from the job's manifest if the file is
+    <job>-data-summary.data (or a compressed copy). A manifest file may
+    also be given."""
+    dir, base = os.path.split(file)
+    if base.endswith("-results.json"):
+        job, summary = base[:-len("-results.json")], None
+    else:
+        job = re.sub(r'-data-summary\.data(\.gz|\.zst)?$', '', base)
+        summary = file
+    if summary and exists(summary):
+        with open_any(summary, encoding="iso-8859-1") as S:
+            return S.readlines()
+    manifest = load(dir, job) if job != base else None
+    if manifest is None:
+        raise OSError(f"Can't read {file}")
+    return [f"{r['name']:26s} {r['value']:.16E}  {r['unit']:8s} {r['description']}\n"
+            for r in manifest["energies"]]
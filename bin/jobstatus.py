@@ -0,0 +1,222 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+The state of the jobs of a scan, from the files in their directories.
+
+Each job <job>_<index> (or <job>_<index>_dHF) of a scan run by
+batch_camcasp.py is classified as
+
+  queued    the directory has been set up but there is no log yet
+  running   OUT/<job>.log exists but doesn't say that the job has ended
+  finished  the log ends "Job <job> finished at ..." (or the results
+            manifest says so), and the summary file has been written if
+            the job has a CamCASP step
+  failed    the log ends "Job <job> failed at ...", the manifest says so,
+            or the job finished without writing its summary file
+
+Only the start and end of the log are read, so the cost is much the same
+for every job however long its log. The log also gives the parts of the
+job and its scratch working directory; a failed job leaves that directory
+behind for inspection, and the MO files of the parts that were completed
+(<job>-<part>-asc.movecs in the job directory), which are used again if
+the job is restarted.
+
+A job that has been killed, or that stopped with an error before it could
+write the last line of its log, looks like a running job whose log hasn't
+changed for a long time; status gives the age of the log so that such
+jobs can be picked out.
+
+The states of the jobs can be kept in a cache file, keyed by the
+modification times of the job directory, its OUT directory and the log.
+Every file that a job writes changes one of these, so only the jobs that
+have changed since the cache was written are read again, and for a scan
+of many thousands of jobs, most of them long finished, a rerun costs
+little more than listing the directories.
+
+provides functions:
+* job_dirs
+* classify
+* scan
+
+provides classes:
+* JobState
+"""
+
+import json
+import os
+import re
+import time
+from ast import literal_eval
+
+from compressed import exists
+from jobresults import manifest_path
+
+FORMAT = 1
+states = ["queued", "running", "finished", "failed"]
+
+#  The end of the log is read up to this many bytes
+_tail = 4096
+_workdir = re.compile(r'\s*Working directory = (.*?)\s*$', re.M)
+_parts = re.compile(r'^Parts: (\[.*\])\s*$', re.M)
+
+
+class JobState:
+    """The state of one job: its directory name, index, state, the parts
+    of the job and those whose MO files are present, whether the summary
+    file is present, the scratch working directory and the time when the
+    log was last changed (None if there is no log)"""
+    def __init__(self, name, index, state, parts=(), mos=(), summary=False,
+                 work=None, changed=None):
+        self.name = name
+        self.index = index
+        self.state = state
+        self.parts = list(parts)
+        self.mos = list(mos)
+        self.summary = summary
+        self.work = work
+        self.changed = changed
+
+    def age(self, now=None):
+        """Seconds since the log was last changed, or None"""
+        if self.changed is None:
+            return None
+        return (now or time.time()) - self.changed
+
+    def to_dict(self):
+        return dict(self.__dict__)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**d)
+
+
+def job_dirs(job, dHF=False, top="."):
+    """The directories of the jobs of scan job in directory top, as a list
+    of (name, index, os.DirEntry), in the order of the indices"""
+    suffix = "_dHF" if dHF else ""
+    pattern = re.compile(re.escape(job) + r'_(.+)' + re.escape(suffix) + '$')
+    found = []
+    with os.scandir(top) as entries:
+        for entry in entries:
+            m = pattern.match(entry.name)
+            if not m or (not dHF and entry.name.endswith("_dHF")):
+                continue
+            if entry.is_dir():
+                found.append((entry.name, m.group(1), entry))
+    found.sort(key=lambda f: (len(f[1]), f[1]))
+    return found
+
+
+def _read_log(path):
+    """The start and the end of the log file, or None if it can't be read"""
+    try:
+        with open(path, "rb") as LOG:
+            head = LOG.read(_tail)
+            LOG.seek(0, os.SEEK_END)
+            size = LOG.tell()
+            if size > len(head):
+                LOG.seek(max(len(head), size - _tail))
+                tail = LOG.read()
+            else:
+                tail = b""
+    except OSError:
+        return None
+    return head.decode("iso-8859-1"), (head + tail)[-_tail:].decode("iso-8859-1")
+
+
+def classify(jobdir, jobname, logmtime=None):
+    """The JobState of job jobname in directory jobdir. The index is left
+    as None, and the time of the log is found if not given."""
+    outdir = os.path.join(jobdir, "OUT")
+    logfile = os.path.join(outdir, f"{jobname}.log")
+    if logmtime is None:
+        try:
+            logmtime = os.stat(logfile).st_mtime
+        except OSError:
+            logmtime = None
+    log = _read_log(logfile) if logmtime is not None else None
+    if log is None:
+        return JobState(jobdir, None, "queued")
+    head, tail = log
+    m = _workdir.search(head)
+    work = m.group(1) if m else None
+    m = _parts.search(head) or _parts.search(tail)
+    try:
+        parts = literal_eval(m.group(1)) if m else []
+    except (ValueError, SyntaxError):
+        parts = []
+    mos = [P for P in parts if P != "C"
+           and exists(os.path.join(jobdir, f"{jobname}-{P}-asc.movecs"))]
+    summary = exists(os.path.join(outdir, f"{jobname}-data-summary.data"))
+    lines = tail.rstrip().splitlines()
+    last = lines[-1] if lines else ""
+    if last.startswith(f"Job {jobname} finished at"):
+        state = "finished"
+    elif last.startswith(f"Job {jobname} failed at"):
+        state = "failed"
+    else:
+        state = "running"
+        #  The manifest is written just before the last line of the log
+        try:
+            with open(manifest_path(outdir, jobname)) as M:
+                status = json.load(M).get("status")
+        except (OSError, ValueError):
+            status = None
+        if status in ["finished", "failed"]:
+            state = status
+    if state == "finished" and "C" in parts and not summary:
+        state = "failed"
+    return JobState(jobdir, None, state, parts, mos, summary, work, logmtime)
+
+
+def _key(entry, outdir, logfile):
+    """The modification times that show whether a job has changed"""
+    key = [entry.stat().st_mtime_ns]
+    for path in [outdir, logfile]:
+        try:
+            key.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            key.append(None)
+    return key
+
+
+def scan(job, dHF=False, top=".", cache=None):
+    """The JobStates of all the jobs of scan job in directory top, in the
+    order of the indices. If a cache file is given, the states of jobs that
+    haven't changed since it was written are taken from it, and it is
+    brought up to date."""
+    saved = {}
+    if cache:
+        try:
+            with open(cache) as C:
+                data = json.load(C)
+            if data.get("format") == FORMAT:
+                saved = data["jobs"]
+        except (OSError, ValueError, KeyError):
+            saved = {}
+    records = {}
+    result = []
+    for name, index, entry in job_dirs(job, dHF, top):
+        jobname = f"{job}_{index}"
+        jobdir = os.path.join(top, name)
+        outdir = os.path.join(jobdir, "OUT")
+        logfile = os.path.join(outdir, f"{jobname}.log")
+        key = _key(entry, outdir, logfile)
+        old = saved.get(name)
+        if old and old["key"] == key:
+            state = JobState.from_dict(old["state"])
+        else:
+            state = classify(jobdir, jobname, None if key[2] is None else key[2]/1e9)
+            state.name = name
+        state.index = index
+        records[name] = {"key": key, "state": state.to_dict()}
+        result.append(state)
+    if cache and records != saved:
+        try:
+            with open(cache + ".part", "w") as C:
+                json.dump({"format": FORMAT, "job": job, "jobs": records}, C)
+            os.replace(cache + ".part", cache)
+        except OSError:
+            pass
+    return result
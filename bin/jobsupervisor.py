@@ -0,0 +1,284 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Run many CamCASP jobs at once in one process.
+
+Each job is carried out by the camcasp_run.job_steps generator, which
+does the file handling for the job and yields the programs to be run (the
+SCF calculations, the interface programs and CamCASP itself) as Steps.
+The Supervisor drives the generators of all the jobs in an asyncio event
+loop, and starts each program with asyncio.create_subprocess_exec when
+the cores and memory that it needs are free in a budget shared by all the
+jobs, so that the SCF and CamCASP steps of different jobs are interleaved
+without over-committing the node. Since no job changes the current
+directory or stops the program, a failed job is just reported, and the
+others carry on.
+
+The elapsed time and the peak memory of each step are recorded in the
+profile file, as for jobs run by runcamcasp.py (see jobmodel.py). The
+memory is sampled from /proc while the program runs, so it is only
+recorded for steps that take longer than the sampling interval.
+
+The jobs are set up beforehand, by runcamcasp.py --setup, and prepare_job
+then does for each of them what runcamcasp.py --restart does before
+running the job. The scratch directory for each job may be chosen as it
+starts by a scratchspace.Placement, which keeps account of the space
+expected to be used by the jobs that are running.
+
+provides functions:
+* prepare_job
+
+provides classes:
+* Budget
+* Supervisor
+"""
+
+import asyncio
+import copy
+import glob
+import os
+from time import perf_counter, strftime
+
+from camcasp import Job, camcasp
+from camcasp_run import read_clt, job_steps, JobError, Wait
+from camrc import CamRC
+from cltspec import JobSpec
+import jobmodel
+
+
+def prepare_job(dir, scratch, camrc=None, cores=0, cores_camcasp=0, memory=0,
+                scfcode=None, direct=False, debug=False, verbosity=0):
+    """A Job for the job set up in directory dir, ready to run, with the
+    settings that runcamcasp.py --restart would give it. Settings that are
+    not given are taken from camrc (a CamRC, read here if not supplied),
+    and the memory, if there are profile records for this kind of job,
+    from the jobmodel estimate. Raises JobError if the job can't be run."""
+    dir = os.path.abspath(dir)
+    specs = glob.glob(os.path.join(dir, "*.spec"))
+    if len(specs) != 1:
+        raise JobError(f"Can't find the job specification in {dir}")
+    name = os.path.basename(specs[0])[:-5]
+    spec = JobSpec.load(specs[0])
+    job = Job(name)
+    job.dir = dir
+    job.restart = True
+    job.debug = debug
+    job.cltfile = os.path.join(dir, os.path.basename(spec.file or f"{name}.clt"))
+    job.work = os.path.join(scratch, name)
+    if scfcode in ["dalton", "dalton2013", "dalton2015", "dalton2016"]:
+        job.scfcode = "dalton"
+    else:
+        job.scfcode = scfcode
+    #  read_clt reports errors in the job specification by stopping
+    try:
+        read_clt(job, verbosity, spec)
+    except SystemExit:
+        raise JobError(f"Error in the job specification for {name}")
+    if os.path.exists(os.path.join(camcasp, "bin", f"no_{job.scfcode}")):
+        raise JobError(f"It appears that {job.scfcode} is not installed")
+
+    if camrc is None:
+        camrc = CamRC()
+        camrc.read_camcasprc(verbosity)
+    camrc = copy.copy(camrc)
+    if camrc.auto:
+        camrc.autoconfigure(job.runtype, job.scfcode, scratch, verbosity)
+    job.direct = direct or camrc.direct
+    job.psi4_npz = camrc.psi4_npz
+    np = {"nwchem": camrc.np_nwchem, "psi4": camrc.np_psi4, "dalton": camrc.np_dalton,
+          "dalton2006": camrc.np_dalton, "molpro": camrc.np_molpro}
+    job.cores = cores or np.get(job.scfcode) or camrc.nproc \
+        or int(os.environ.get("CORES", 2))
+    job.cores_camcasp = cores_camcasp or camrc.np_camcasp or camrc.nproc \
+        or int(os.environ.get("CORES_CAMCASP", 2))
+    job.memory = memory or camrc.memory_gb
+    if not job.memory:
+        estimate = jobmodel.Predictor.load().estimate(spec, job.runtype, job.scfcode,
+                                                      job.cores, job.cores_camcasp)
+        job.memory = estimate.request()[0] if estimate.steps else 8
+    return job
+
+
+class Budget:
+    """Cores and memory (GB) shared by the steps of all the jobs"""
+    def __init__(self, cores, memory):
+        self.cores = cores
+        self.memory = memory
+        self.free_cores = cores
+        self.free_memory = memory
+        self._condition = None
+
+    def fit(self, cores, memory):
+        """The request, reduced if necessary so that it can be met when
+        nothing else is running"""
+        return min(max(cores, 1), self.cores), min(memory, self.memory)
+
+    async def acquire(self, cores, memory):
+        """Wait until the cores and memory are free, and take them.
+        Returns the amounts taken, to be given back to release."""
+        if self._condition is None:
+            self._condition = asyncio.Condition()
+        cores, memory = self.fit(cores, memory)
+        async with self._condition:
+            await self._condition.wait_for(
+                lambda: cores <= self.free_cores and memory <= self.free_memory)
+            self.free_cores -= cores
+            self.free_memory -= memory
+        return cores, memory
+
+    async def release(self, cores, memory):
+        async with self._condition:
+            self.free_cores += cores
+            self.free_memory += memory
+            self._condition.notify_all()
+
+
+def _tree_rss(pid):
+    """Resident memory, in kB, of the process and its descendants"""
+    total = 0
+    todo = [pid]
+    while todo:
+        p = todo.pop()
+        try:
+            with open(f"/proc/{p}/status") as S:
+                for line in S:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1])
+                        break
+            for children in glob.glob(f"/proc/{p}/task/*/children"):
+                with open(children) as C:
+                    todo.extend(int(c) for c in C.read().split())
+        except (OSError, ValueError):
+            #  The process has finished
+            pass
+    return total
+
+
+class Supervisor:
+    """Run the steps of many jobs at once within a budget of cores and
+    memory, reporting the progress of all of them"""
+    def __init__(self, cores, memory, max_jobs=0, interval=1.0, verbosity=0,
+                 report=print, placement=None):
+        self.budget = Budget(cores, memory)
+        #  scratchspace.Placement choosing the scratch root for each job as
+        #  it starts, or None to use the work directories set by prepare_job
+        self.placement = placement
+        #  Number of jobs that may be under way at once. Each job runs one
+        #  program at a time, so there is nothing to gain from more jobs
+        #  than cores, and each job has its own scratch directory.
+        self.max_jobs = max_jobs or cores
+        self.interval = interval      # Seconds between memory samples
+        self.verbosity = verbosity
+        self.report = report
+        self.status = {}              # waiting, running, finished or failed
+        self.errors = {}              # Why each failed job failed
+
+    def progress(self, name, event):
+        """Report an event for a job, with the state of the whole batch"""
+        counts = {s: 0 for s in ["finished", "failed", "running", "waiting"]}
+        for s in self.status.values():
+            counts[s] += 1
+        b = self.budget
+        self.report(f"[{strftime('%H:%M:%S')}] {counts['finished']} finished,"
+                    f" {counts['failed']} failed, {counts['running']} running,"
+                    f" {counts['waiting']} waiting;"
+                    f" cores {b.cores - b.free_cores}/{b.cores},"
+                    f" memory {b.memory - b.free_memory:g}/{b.memory:g} GB"
+                    f"  {name}: {event}")
+
+    async def run_step(self, name, step):
+        """Run a Step when its resources are free, and return its return code,
+        elapsed time in seconds and peak memory in GB"""
+        cores, memory = await self.budget.acquire(step.cores, step.memory)
+        try:
+            if step.part and self.verbosity > 0:
+                self.progress(name, f"part {step.part} started")
+            t = perf_counter()
+            peak = 0
+            try:
+                with step.files() as (IN, OUT, ERR):
+                    proc = await asyncio.create_subprocess_exec(
+                        *step.cmnd, cwd=step.cwd, stdin=IN, stdout=OUT, stderr=ERR,
+                        env=step.environment())
+            except OSError as e:
+                return step.failed(e)
+            waiter = asyncio.ensure_future(proc.wait())
+            try:
+                while not waiter.done():
+                    await asyncio.wait({waiter}, timeout=self.interval)
+                    if not waiter.done():
+                        peak = max(peak, _tree_rss(proc.pid))
+            except asyncio.CancelledError:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                raise
+            return proc.returncode, perf_counter() - t, peak/1024**2
+        finally:
+            await self.budget.release(cores, memory)
+
+    async def run_job(self, job):
+        """Run one job. Returns 0 if it finished, 1 if it failed."""
+        name = job.name
+
+        def message(string):
+            if self.verbosity > 1:
+                self.report(f"{name}: {string}")
+
+        self.status[name] = "running"
+        self.progress(name, "started")
+        reply = None
+        steps = None
+        try:
+            if self.placement:
+                warning = self.placement.place(job)
+                if warning:
+                    self.progress(name, warning)
+            steps = job_steps(job, self.verbosity, message)
+            while True:
+                try:
+                    step = steps.send(reply)
+                except StopIteration:
+                    break
+                if isinstance(step, Wait):
+                    await asyncio.gather(*[asyncio.wrap_future(f) for f in step.futures],
+                                         return_exceptions=True)
+                    reply = None
+                else:
+                    reply = await self.run_step(name, step)
+        except Exception as e:
+            #  Any error fails this job only, and the others carry on
+            if steps is not None:
+                #  Stop the job's MO conversion thread
+                steps.close()
+            self.status[name] = "failed"
+            if not isinstance(e, (JobError, OSError)):
+                e = f"{type(e).__name__}: {e}"
+            self.errors[name] = f"{str(e).strip()} (see {job.dir}/OUT/{name}.log)"
+            self.progress(name, f"failed: {self.errors[name]}")
+            return 1
+        finally:
+            if self.placement:
+                self.placement.release(job)
+        self.status[name] = "finished"
+        self.progress(name, "finished")
+        return 0
+
+    async def run(self, jobs):
+        """Run the jobs, in order, as the budget allows. Returns the number
+        that failed."""
+        for job in jobs:
+            self.status[job.name] = "waiting"
+        slots = asyncio.Semaphore(self.max_jobs)
+
+        async def run(job):
+            async with slots:
+                return await self.run_job(job)
+
+        results = await asyncio.gather(*[run(job) for job in jobs])
+        return sum(results)
+
+    def run_all(self, jobs):
+        """Run the jobs, and return the number that failed"""
+        return asyncio.run(self.run(jobs))
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 #  -*-  coding: utf-8  -*-
 
-from camcasp import die, findfile, replace
+from camcasp import die, findfile, replace, dispersion
 import argparse
 import glob
 import os
@@ -163,8 +163,8 @@ args = parser.parse_args()
 name = args.name
 verbosity = args.verbosity
 
-def write_header(FILE,prefix):
-    FILE.write(f"""{prefix} Localisation settings for {args.name}
+def settings_header(prefix):
+    return f"""{prefix} Localisation settings for {args.name}
 {prefix} Axes file:       {axes}
 {prefix} Pol file format: {args.format}
 {prefix} Limit:           {limit}
@@ -179,7 +179,10 @@ def write_header(FILE,prefix):
 {prefix} SVD threshold:   {args.svd}
 {prefix} NoRefine?:       {args.norefine}
 {prefix}
-""")
+"""
+
+def write_header(FILE,prefix):
+    FILE.write(settings_header(prefix))
 
 
 if args.clean or args.cleanall:
@@ -650,11 +653,8 @@ if "disp" not in args.force and os.path.exists(casimir_out) and os.stat(casimir_
     print(f"File {casimir_out} present -- dispersion coefficients already calculated")
     exit(0)
 else:
-    casimir_temp = name+"_casimir.temp"
     if verbosity > 0: print("Calculating the dispersion coefficients ... ", end=' ')
     sys.stdout.flush()
-    if os.path.exists("casimir_error"):
-        os.remove("casimir_error")
     if args.wsmlimit == 1:
         maxN = "6"
     elif args.wsmlimit == 2:
@@ -667,28 +667,11 @@ else:
         potfile = f"{prefix}_C{maxN}iso.pot"
     else:
         potfile = f"{prefix}_C{maxN}.pot"
-    with open(name+"_casimir.prss") as PRSS, open(casimir_temp,"w") as TEMP:
-        TEMP.write(PRSS.read().format(PREFIX=prefix,LIMIT=limit,HLIMIT=hlimit))
-    with open(casimir_temp) as TEMP, open(casimir_in,"w") as DATA:
-        if subprocess.call(["process"], stdin=TEMP, stdout=DATA, stderr=sys.stderr) > 0:
-            die("Error in process")
-    if not args.debug: os.remove(name+"_casimir.temp")
-    with open(casimir_in) as IN, open(casimir_out,"w") as OUT:
-        if subprocess.call(["casimir"], stdin=IN, stdout=OUT, stderr=sys.stderr) > 0:
-            die("Error in casimir")
-    if os.stat(casimir_out).st_size == 0 or os.path.exists("casimir_error"):
-        die("Dispersion coefficient calculation failed")
+    error = dispersion(name, prefix, limit, hlimit, potfile,
+                       header=settings_header("! "), debug=args.debug)
+    if error:
+        die(error)
     else:
-        #  Copy dispersion potential definition to potfile
-        with open(potfile,"w") as OUT, open(casimir_out) as IN:
-            write_header(OUT,"! ")
-            for line in IN:
-                if re.match(r'Dispersion coefficients', line):
-                    OUT.write("! "+line)
-                    break
-            for line in IN:
-                OUT.write(line)
         if verbosity > 0: print(" done")
         print(f"""Dispersion coefficients are in {casimir_out}.
 The dispersion potential, in Orient form, is in {potfile}.""")
-
@@ -0,0 +1,410 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Long-range (multipole expansion) energies of two rigid molecules, for
+many relative orientations at once.
+
+The molecules are described by their distributed multipoles (an Orient
+.mom file, as written by the DMA and ISA modules), optionally their
+local polarizabilities (an Orient .pol file from localize.py, or a
+CamCASP format-B .pol file) and the isotropic site-site dispersion
+coefficients (a .pot file from casimir). Molecule A is fixed at the
+origin of its axes, and each configuration places the origin of B at
+(Rx, Ry, Rz) and rotates it by alpha degrees about (Nx, Ny, Nz), as in a
+geometry file for batch_camcasp.py or the ENERGY-SCAN module.
+
+All quantities are in atomic units, with the multipoles Q_lk in the real
+spherical-tensor form used by Orient and CamCASP (Q00, Q10, Q11c, Q11s,
+Q20, ...). The interaction function of a multipole of rank l1 on site a
+with one of rank l2 on site b, at R = r_b - r_a, is
+  T_{l1k1,l2k2} = (-1)^l2 [(2L)!/((2l1)!(2l2)!)]^(1/2)
+                  sum_K <l1k1,l2k2|LK> R_LK(R/|R|) / |R|^(L+1),  L = l1+l2
+with the real Clebsch-Gordan coefficients of $CAMCASP/data/realcg and the
+real Racah-normalized solid harmonics R_LK. Multipoles of rank up to 4
+can be used. The energies are
+  elst   sum_ab Q^a T^ab Q^b
+  ind    -1/2 sum_a V^a alpha^a V^a, V^a = sum_b T^ab Q^b, and the same for
+         B; only local polarizabilities are used, and the induced moments
+         are not iterated. By default only the isotropic dipole-dipole
+         polarizability of each site is used, which does not depend on
+         the local axes of the .pol file; with full=True all the local
+         polarizabilities are used, and must be referred to the axes of
+         the molecule.
+  disp   -sum_ab sum_n f_n(beta R) C_n/R^n, n = 6, 8, 10, with the
+         isotropic coefficients for the site types (the site names
+         without their numbers), and Tang-Toennies damping f_n if beta is
+         given.
+The arrays are processed in chunks, so that millions of configurations
+can be evaluated in bounded memory.
+
+provides functions:
+* solid_harmonics
+* interaction
+* rotation_matrices
+* rotate_multipoles
+* read_mom
+* read_pol
+* read_pot
+* closest_contact
+* energies
+
+provides classes:
+* LongRangeError
+* Molecule
+"""
+
+import math
+import os
+import re
+
+import numpy as np
+
+from compressed import open_any
+
+_realcg = os.path.join(os.environ.get("CAMCASP")
+                       or os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                       "data", "realcg")
+MAXRANK = 4
+BOHR = 0.529177210903
+
+
+class LongRangeError(Exception):
+    pass
+
+
+def solid_harmonics(u, lmax):
+    """Real Racah-normalized solid harmonics R_lk(u) of the vectors u
+    (..., 3), for l = 0..lmax, as an array (..., (lmax+1)^2) in the order
+    00, 10, 11c, 11s, 20, 21c, 21s, 22c, 22s, ..."""
+    x, y, z = u[..., 0], u[..., 1], u[..., 2]
+    r2 = x*x + y*y + z*z
+    out = np.empty(u.shape[:-1] + ((lmax+1)**2,))
+    #  (x + iy)^m, and R_lm(c+is) = sqrt(2(l-m)!/(l+m)!) q_lm (x+iy)^m, where
+    #  q_lm is a polynomial in z and r^2 with q_mm = (2m-1)!!
+    xy = np.ones_like(x) + 0j
+    for m in range(lmax + 1):
+        q_prev = np.zeros_like(z)
+        q = np.full_like(z, float(np.prod(np.arange(2*m-1, 0, -2))) if m > 0 else 1.0)
+        for l in range(m, lmax + 1):
+            if l > m:
+                q, q_prev = ((2*l-1)*z*q - (l+m-1)*r2*q_prev)/(l-m), q
+            if m == 0:
+                out[..., l*l] = q
+            else:
+                f = math.sqrt(2*math.factorial(l-m)/math.factorial(l+m))*q*xy
+                out[..., l*l + 2*m - 1] = f.real
+                out[..., l*l + 2*m] = f.imag
+        xy = xy*(x + 1j*y)
+    return out
+
+
+_cg = {}
+
+
+def _coupling(l1, l2):
+    """Array (2l1+1, 2l2+1, 2L+1) of the interaction coefficients for
+    ranks l1 and l2, L = l1+l2, including the factor
+    (-1)^l2 [(2L)!/((2l1)!(2l2)!)]^(1/2)"""
+    if (l1, l2) in _cg:
+        return _cg[(l1, l2)]
+    L = l1 + l2
+    c = np.zeros((2*l1+1, 2*l2+1, 2*L+1))
+    if l1 == 0 or l2 == 0:
+        for k in range(2*L+1):
+            c[k if l1 else 0, k if l2 else 0, k] = 1.0
+    else:
+        file = os.path.join(_realcg, f"realcg_{l1}_{l2}")
+        try:
+            with open(file) as CG:
+                for line in CG:
+                    k1, k2, K, i1, i2, i3, i4 = [int(w) for w in line.split()]
+                    if L*L <= K < (L+1)**2 and i3 > 0:
+                        c[k1, k2, K - L*L] = i1/i2*math.sqrt(i3/i4)
+        except OSError:
+            raise LongRangeError(f"Can't read the coupling coefficients {file}")
+    c *= (-1)**l2*math.sqrt(math.factorial(2*L)/(math.factorial(2*l1)*math.factorial(2*l2)))
+    _cg[(l1, l2)] = c
+    return c
+
+
+def interaction(R, rank1, rank2):
+    """Interaction functions T_tu for the vectors R (N, 3) from site a to
+    site b, for multipoles of ranks 0..rank1 on a and 0..rank2 on b, as an
+    array (N, (rank1+1)^2, (rank2+1)^2)"""
+    r = np.sqrt(np.einsum('ni,ni->n', R, R))
+    Lmax = rank1 + rank2
+    S = solid_harmonics(R/r[:, None], Lmax)
+    T = np.empty((len(R), (rank1+1)**2, (rank2+1)**2))
+    for l1 in range(rank1 + 1):
+        for l2 in range(rank2 + 1):
+            L = l1 + l2
+            F = S[:, L*L:(L+1)**2]/r[:, None]**(L+1)
+            T[:, l1*l1:(l1+1)**2, l2*l2:(l2+1)**2] = np.einsum('nK,tuK->ntu', F,
+                                                                _coupling(l1, l2))
+    return T
+
+
+def rotation_matrices(alpha, N):
+    """Rotation matrices (M, 3, 3) for rotations by alpha (M) degrees
+    about the axes N (M, 3). A zero axis gives no rotation."""
+    n = np.linalg.norm(N, axis=1)
+    N = N/np.where(n > 0, n, 1.0)[:, None]
+    a = np.radians(alpha)
+    c, s = np.cos(a), np.sin(a)
+    K = np.zeros((len(N), 3, 3))
+    K[:, 0, 1], K[:, 0, 2], K[:, 1, 2] = -N[:, 2], N[:, 1], -N[:, 0]
+    K -= K.transpose(0, 2, 1)
+    return np.eye(3) + s[:, None, None]*K + (1 - c)[:, None, None]*(K @ K)
+
+
+_samples = np.random.default_rng(12345).standard_normal((2*(MAXRANK+1)**2, 3))
+
+
+def _wigner(rot, rank):
+    """Real rotation matrices D (M, n, n), n = (rank+1)^2, block diagonal
+    in l, such that R_l(rot r) = D R_l(r) for the solid harmonics"""
+    Y = solid_harmonics(_samples, rank)
+    Yrot = solid_harmonics(np.einsum('mij,sj->msi', rot, _samples), rank)
+    D = np.zeros((len(rot), (rank+1)**2, (rank+1)**2))
+    for l in range(rank + 1):
+        b = slice(l*l, (l+1)**2)
+        D[:, b, b] = np.einsum('ks,msj->mjk', np.linalg.pinv(Y[:, b]), Yrot[:, :, b])
+    return D
+
+
+def rotate_multipoles(Q, D):
+    """Multipoles Q (n) rotated by the matrices D (M, n', n'), n' >= n"""
+    n = len(Q)
+    return np.einsum('mij,j->mi', D[:, :n, :n], Q)
+
+
+class Molecule:
+    """Sites, multipoles and polarizabilities of a molecule in its own axes"""
+    def __init__(self, name=""):
+        self.name = name
+        self.sites = []
+        self.positions = np.zeros((0, 3))
+        self.multipoles = []     # array of length (rank+1)^2 for each site
+        self.pol = {}            # local polarizability matrix for each site
+
+    def types(self):
+        return [re.sub(r'\d+$', '', s) or s for s in self.sites]
+
+    def rank(self):
+        return max(int(round(math.sqrt(len(q)))) - 1 for q in self.multipoles)
+
+
+def read_mom(file, rank=None):
+    """Read distributed multipoles from an Orient-format .mom file, up to
+    the given rank (default all, at most 4). Returns a Molecule."""
+    mol = Molecule(os.path.basename(file))
+    positions = []
+    scale = 1.0
+    with open_any(file) as MOM:
+        words = []
+        for line in MOM:
+            line = re.sub(r'!.*', '', line)
+            if re.match(r'\s*units\s+angstrom', line, flags=re.I):
+                scale = 1.0/BOHR
+                continue
+            words.extend(line.split())
+    i = 0
+    while i < len(words):
+        m = None
+        if i + 5 < len(words):
+            try:
+                x, y, z = (float(w) for w in words[i+1:i+4])
+                m = words[i+4].lower() == "rank"
+            except ValueError:
+                m = None
+        if not m:
+            if words[i].lower() == "units":
+                i += 2
+                continue
+            raise LongRangeError(f"{file}: can't read the site starting '{words[i]}'")
+        name = words[i]
+        r = int(words[i+5])
+        i += 6
+        if i < len(words) and words[i].lower() == "type":
+            i += 2
+        n = (r+1)**2
+        q = np.array([float(re.sub(r'[Dd]', 'E', w)) for w in words[i:i+n]])
+        if len(q) < n:
+            raise LongRangeError(f"{file}: too few multipoles for site {name}")
+        i += n
+        keep = min(r, MAXRANK if rank is None else min(rank, MAXRANK))
+        mol.sites.append(name)
+        positions.append([x*scale, y*scale, z*scale])
+        mol.multipoles.append(q[:(keep+1)**2])
+    mol.positions = np.array(positions)
+    return mol
+
+
+def read_pol(file, mol):
+    """Read the static local polarizabilities of the sites of mol from an
+    Orient-format .pol file (the first section, as written by
+    localize.py) or a CamCASP format-B file (FREQ2 0)"""
+    with open_any(file) as POL:
+        lines = POL.readlines()
+    pol = {}
+    fmtB = any(line.startswith("POL ") for line in lines)
+    i = 0
+    sections = 0
+    while i < len(lines):
+        line = lines[i]
+        w = line.split()
+        i += 1
+        if fmtB:
+            m = re.match(r'POL\s+SITE-LABELS\s+(\S+)\s+(\S+).*RANK\s+0\s*:\s*(\d+)\s+BY\s+0\s*:\s*(\d+)'
+                         r'\s+FREQ2\s+(\S+)', line)
+            if not m:
+                continue
+            block = []
+            while i < len(lines) and not lines[i].startswith("END"):
+                block.extend(float(v) for v in lines[i].split())
+                i += 1
+            n1, n2 = (int(m.group(3))+1)**2, (int(m.group(4))+1)**2
+            if m.group(1) == m.group(2) and float(m.group(5)) == 0.0 and n1 == n2:
+                pol[m.group(1)] = np.array(block).reshape(n1, n2)
+        else:
+            if line.startswith("#"):
+                sections += 1
+                if sections > 1 and pol:
+                    break
+                continue
+            if len(w) == 2 and not re.match(r'[-+.\d]', w[0]):
+                block = []
+                while i < len(lines) and lines[i].split():
+                    block.extend(float(v) for v in lines[i].split())
+                    i += 1
+                n = int(round(math.sqrt(len(block))))
+                if n*n != len(block):
+                    raise LongRangeError(f"{file}: polarizability {w[0]} {w[1]} isn't square")
+                if w[0] == w[1]:
+                    pol[w[0]] = np.array(block).reshape(n, n)
+    missing = [s for s in mol.sites if s not in pol]
+    if len(missing) == len(mol.sites):
+        raise LongRangeError(f"{file}: no polarizabilities for the sites of {mol.name}")
+    mol.pol = pol
+    return mol
+
+
+def read_pot(file):
+    """Isotropic dispersion coefficients (C6, C8, C10) for each pair of
+    site types, from a .pot file written by casimir"""
+    C = {}
+    pair = None
+    with open_any(file) as POT:
+        for line in POT:
+            w = line.split()
+            if len(w) >= 3 and w[2] == "C6":
+                pair = tuple(sorted(w[:2]))
+            elif pair and len(w) >= 4 and w[:3] == ["00", "00", "0"]:
+                c = [float(re.sub(r'[Dd]', 'E', v)) for v in w[3:]] + [0.0]*4
+                C[pair] = (c[0], c[2], c[4])
+    if not C:
+        raise LongRangeError(f"{file}: no isotropic dispersion coefficients")
+    return C
+
+
+def closest_contact(A, B, geometry, chunk=4096):
+    """Least distance (bohr) between a site of A and a site of B for each
+    row of geometry"""
+    geometry = np.asarray(geometry, dtype=float)
+    rmin = np.empty(len(geometry))
+    for start in range(0, len(geometry), chunk):
+        g = geometry[start:start+chunk]
+        rot = rotation_matrices(g[:, 3], g[:, 4:7])
+        posB = g[:, None, :3] + np.einsum('nij,bj->nbi', rot, B.positions)
+        d = posB[:, None, :, :] - A.positions[None, :, None, :]
+        rmin[start:start+chunk] = np.sqrt(np.min(np.einsum('nabi,nabi->nab', d, d), axis=(1, 2)))
+    return rmin
+
+
+def _tt(n, x):
+    """Tang-Toennies damping function f_n(x)"""
+    term = np.ones_like(x)
+    total = np.ones_like(x)
+    for k in range(1, n + 1):
+        term = term*x/k
+        total += term
+    return 1.0 - np.exp(-x)*total
+
+
+def _field(T, Q):
+    """Generalized fields V_t = sum_u T_tu Q_u for (N, t, u) and (N, u)"""
+    return np.einsum('ntu,nu->nt', T, Q)
+
+
+def _induction(V, alpha, D=None, full=False):
+    """-1/2 V alpha V, with alpha rotated by D if given"""
+    if not full:
+        iso = np.trace(alpha[1:4, 1:4])/3.0
+        return -0.5*iso*np.einsum('ni,ni->n', V[:, 1:4], V[:, 1:4])
+    n = min(len(alpha), V.shape[1])
+    a = alpha[:n, :n]
+    if D is not None:
+        a = np.einsum('mij,jk,mlk->mil', D[:, :n, :n], a, D[:, :n, :n])
+        return -0.5*np.einsum('ni,nij,nj->n', V[:, :n], a, V[:, :n])
+    return -0.5*np.einsum('ni,ij,nj->n', V[:, :n], a, V[:, :n])
+
+
+def energies(A, B, geometry, dispersion=None, beta=None, full=False, chunk=4096):
+    """Long-range energies (hartree) of molecules A and B for each row
+    (Rx, Ry, Rz, alpha, Nx, Ny, Nz) of geometry (lengths in bohr). Returns a
+    dictionary of arrays "elst", "ind" and "disp" (the last two zero if
+    there are no polarizabilities or dispersion coefficients)."""
+    geometry = np.asarray(geometry, dtype=float)
+    M = len(geometry)
+    result = {"elst": np.zeros(M), "ind": np.zeros(M), "disp": np.zeros(M)}
+    polA = [A.pol.get(s) for s in A.sites]
+    polB = [B.pol.get(s) for s in B.sites]
+    prA = 1 if not full else max([int(round(math.sqrt(len(p)))) - 1 for p in polA if p is not None] or [0])
+    prB = 1 if not full else max([int(round(math.sqrt(len(p)))) - 1 for p in polB if p is not None] or [0])
+    prA, prB = min(prA, MAXRANK), min(prB, MAXRANK)
+    rank = max(B.rank(), prB if B.pol else 0)
+    tA, tB = A.types(), B.types()
+    for start in range(0, M, chunk):
+        g = geometry[start:start+chunk]
+        n = len(g)
+        rot = rotation_matrices(g[:, 3], g[:, 4:7])
+        D = _wigner(rot, rank)
+        posB = g[None, :, :3] + np.einsum('nij,bj->bni', rot, B.positions)
+        QB = [rotate_multipoles(q, D) for q in B.multipoles]
+        elst = np.zeros(n)
+        disp = np.zeros(n)
+        VA = [np.zeros((n, (prA+1)**2)) for _ in A.sites]
+        VB = [np.zeros((n, (prB+1)**2)) for _ in B.sites]
+        for a, qa in enumerate(A.multipoles):
+            ra = int(round(math.sqrt(len(qa)))) - 1
+            for b, qb in enumerate(QB):
+                rb = int(round(math.sqrt(qb.shape[1]))) - 1
+                R = posB[b] - A.positions[a]
+                #  One set of interaction functions serves for the fields at
+                #  both sites, as T^ba(-R) is the transpose of T^ab(R)
+                T = interaction(R, max(ra, prA if polA[a] is not None else 0),
+                                max(rb, prB if polB[b] is not None else 0))
+                elst += np.einsum('t,ntu,nu->n', qa, T[:, :len(qa), :qb.shape[1]], qb)
+                if polA[a] is not None:
+                    VA[a] += _field(T[:, :(prA+1)**2, :qb.shape[1]], qb)
+                if polB[b] is not None:
+                    VB[b] += np.einsum('t,ntu->nu', qa, T[:, :len(qa), :(prB+1)**2])
+                if dispersion:
+                    C = dispersion.get(tuple(sorted([tA[a], tB[b]])))
+                    if C:
+                        r = np.sqrt(np.einsum('ni,ni->n', R, R))
+                        for c, p in zip(C, (6, 8, 10)):
+                            f = _tt(p, beta*r) if beta else 1.0
+                            disp -= f*c/r**p
+        ind = np.zeros(n)
+        for a, p in enumerate(polA):
+            if p is not None:
+                ind += _induction(VA[a], p, None, full)
+        for b, p in enumerate(polB):
+            if p is not None:
+                ind += _induction(VB[b], p, D, full)
+        result["elst"][start:start+n] = elst
+        result["ind"][start:start+n] = ind
+        result["disp"][start:start+n] = disp
+    return result
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Generate a geometry file for a dimer scan from a quasi-random sequence.
+"""
+
+import argparse
+import sys
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Generate a geometry file for a dimer scan from a quasi-random sequence.
+""",epilog="""
+The template is the cluster-file template for batch_camcasp.py, and the
+geometry file written has the form it needs,
+  index  Rx  Ry  Rz  alpha  Nx  Ny  Nz
+with lengths in the units of the template and alpha in degrees. The
+directions of R and the orientations of B are spread evenly over the
+sphere and over all rotations, and the distances |R| over the shells
+whose edges are given by --shells, with the number of points in each
+shell given by --points (one number for all the shells, or one for
+each). The geometries are taken from a Sobol sequence (default), a
+Halton sequence or at random; see scangeom.py. With --seed, the
+sequence is shifted at random, so that different seeds give different
+sets of points.
+
+The points are screened as batch_camcasp.py screens them, using the
+molecules of the template: those where an atom of A is closer to an atom
+of B than --min-contact times the sum of their van der Waals radii are
+rejected, and more points are taken from the sequence, in rounds of
+--batch times the number still needed, until every shell has its points.
+Screening by the long-range energy as well is done by screen_scan.py on
+the file written, e.g.
+
+  make_scan.py H2O2.clt H2O2.geom --shells 4.5 6 8 12 --points 400 300 100
+  screen_scan.py H2O2.geom --mom H2O.mom --pol H2O.pol --output H2O2-kept.geom
+  batch_camcasp.py H2O2 H2O2.clt H2O2-kept.geom
+
+The indices start at --start, so that points can be added to an existing
+scan without changing its job names. Millions of points can be generated;
+only NumPy is needed.
+""")
+
+parser.add_argument("template", help="Cluster-file template for the scan")
+parser.add_argument("geomfile", help="Geometry file to write")
+parser.add_argument("--shells", type=float, nargs="+", required=True,
+                    help="Edges of the distance shells, in the length unit of the template")
+parser.add_argument("--points", type=int, nargs="+", required=True,
+                    help="Number of points in each shell, or one number for all")
+parser.add_argument("--method", choices=["sobol", "halton", "random"], default="sobol",
+                    help="Sequence for the geometries (default sobol)")
+parser.add_argument("--seed", type=int, help="Seed for a random shift of the sequence")
+parser.add_argument("--min-contact", type=float, default=0.5, metavar="SCALE",
+                    help="Reject points with atoms closer than SCALE times the sum of their"
+                    " van der Waals radii (default 0.5, 0 for no check)")
+parser.add_argument("--batch", type=float, default=2.0,
+                    help="Candidates in each round, per point still needed (default 2)")
+parser.add_argument("--rounds", type=int, default=50, help="Greatest number of rounds")
+parser.add_argument("--start", type=int, default=1, help="First index (default 1)")
+
+args = parser.parse_args()
+
+nshells = len(args.shells) - 1
+if nshells < 1 or any(b <= a for a, b in zip(args.shells, args.shells[1:])):
+    parser.error("--shells needs at least two edges, in increasing order")
+if len(args.points) == 1:
+    args.points = args.points*nshells
+if len(args.points) != nshells:
+    parser.error(f"--points needs 1 or {nshells} numbers")
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy is needed for make_scan.py")
+    exit(1)
+import contacts
+import scangeom
+from cltspec import parse_clt, CltError
+from scandata import geometry
+
+try:
+    spec = parse_clt(args.template)
+except (OSError, CltError) as e:
+    print(e)
+    exit(1)
+
+need = np.array(args.points)
+kept = [[] for _ in range(nshells)]
+skip = 0
+rejected = 0
+for _ in range(args.rounds):
+    n = int(np.ceil(args.batch*need.sum()))
+    u = scangeom.sequence(args.method, n, 6, skip=skip, seed=args.seed)
+    skip += n
+    G, shell = scangeom.geometries(u, args.shells, need)
+    if args.min_contact > 0:
+        try:
+            ratio, _ = contacts.contact(spec, dict(zip(geometry, G.T)), args.min_contact)
+        except contacts.ContactError as e:
+            print(f"Close-contact check not possible: {e}")
+            exit(1)
+        good = ratio >= args.min_contact
+        rejected += int(np.sum(~good))
+        G, shell = G[good], shell[good]
+    for s in range(nshells):
+        if need[s] > 0:
+            g = G[shell == s][:need[s]]
+            kept[s].append(g)
+            need[s] -= len(g)
+    if need.sum() == 0:
+        break
+else:
+    print(f"Only {sum(args.points) - need.sum()} of {sum(args.points)} points found"
+          f" in {args.rounds} rounds")
+    for s in range(nshells):
+        if need[s] > 0:
+            print(f"  {need[s]} points missing between {args.shells[s]:g}"
+                  f" and {args.shells[s+1]:g}")
+
+G = np.vstack([g for k in kept for g in k])
+with open(args.geomfile, "w") as OUT:
+    OUT.write(f"!  {args.method} geometries for {args.template},"
+              f" shells {' '.join(f'{r:g}' for r in args.shells)}\n")
+    OUT.write(f"!  index {'   '.join(f'{c:>9s}' for c in geometry)}\n")
+    for i, g in enumerate(G, start=args.start):
+        OUT.write(f"{i:8d} " + " ".join(f"{v:12.6f}" for v in g) + "\n")
+
+print(f"{len(G)} points written to {args.geomfile}"
+      + (f", {rejected} rejected for close contacts" if rejected else ""))
+sys.stdout.flush()
+if need.sum() > 0:
+    exit(1)
@@ -0,0 +1,120 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Reading Fortran unformatted files and writing CamCASP MO files.
+
+The SCF codes write their MOs in Fortran unformatted sequential files, in
+which each record is preceded and followed by a 4-byte record length.
+Records longer than 2 GB are split into subrecords, marked by a negative
+length. The records are read here from any binary stream, such as an open
+file or a member of a tar archive, so the files need not be copied or
+unpacked first.
+
+The MO files read by CamCASP are written in the ASCII format written by
+the Fortran interface programs (readNWCHEMmos, readDALTONmos), or in their
+binary (vect.data) format.
+
+provides functions:
+* records
+* next_record
+* integers
+* doubles
+* format_values
+* write_ascii
+* write_binary
+
+provides classes:
+* MovecsError
+"""
+
+import re
+import numpy as np
+
+
+class MovecsError(Exception):
+    """Error reading a file of MOs"""
+    pass
+
+
+def records(F, file):
+    """Generator for the records of a Fortran unformatted file, read from
+    the binary stream F. file is the name used in error messages."""
+    while True:
+        chunks = []
+        while True:
+            head = F.read(4)
+            if not head and not chunks:
+                return
+            if len(head) < 4:
+                raise MovecsError(f"Unexpected end of file {file}")
+            n = int.from_bytes(head, "little", signed=True)
+            data = F.read(abs(n))
+            if len(data) < abs(n) or len(F.read(4)) < 4:
+                raise MovecsError(f"Unexpected end of file {file}")
+            chunks.append(data)
+            if n >= 0:
+                break
+        yield chunks[0] if len(chunks) == 1 else b"".join(chunks)
+
+
+def next_record(recs, file):
+    """The next record from records(), which must exist"""
+    try:
+        return next(recs)
+    except StopIteration:
+        raise MovecsError(f"Unexpected end of file {file}")
+
+
+def integers(record, size, file):
+    """The integers, of size 4 or 8 bytes, in a record"""
+    if size not in [4, 8] or len(record) % size:
+        raise MovecsError(f"Error reading from {file}")
+    return np.frombuffer(record, dtype=f"<i{size}").tolist()
+
+
+def doubles(record):
+    """The double-precision numbers in a record, as a NumPy array"""
+    return np.frombuffer(record, dtype="<f8", count=len(record)//8)
+
+
+def format_values(values):
+    """Values written as by the Fortran format (1p,(5e24.15))"""
+    values = np.asarray(values).tolist()
+    n = len(values)
+    fmt = ("%24.15E"*5 + "\n")*(n//5)
+    if n % 5:
+        fmt += "%24.15E"*(n % 5) + "\n"
+    #  Fortran drops the E from 3-digit exponents
+    return re.sub(r'E([-+]\d\d\d)', r'\1', fmt % tuple(values))
+
+
+def write_ascii(file, header, evals, vectors):
+    """Write an ASCII MO file.
+    header is a list of (keyword, value) for the lines before BFNS, evals
+    the orbital energies and vectors the MO coefficients, an array of
+    shape (number of MOs, number of basis functions)."""
+    nmo, nbf = vectors.shape
+    with open(file, "w") as ASC:
+        for keyword, value in header:
+            ASC.write(f"{keyword:10s}{value}\n")
+        ASC.write(f"BFNS      {nbf:1d}\n")
+        ASC.write(f"NMOS      {nmo:1d}\n")
+        ASC.write(f"Energies  {nmo:1d}\n")
+        ASC.write(format_values(evals[:nmo]))
+        for m in range(nmo):
+            ASC.write(f"MO {m+1:1d}   Energy {format_values(evals[m:m+1])}")
+            ASC.write(format_values(vectors[m]))
+        ASC.write("END\n")
+
+
+def write_binary(file, evals, vectors):
+    """Write the orbital energies and the MO coefficients, an array of
+    shape (number of MOs, number of basis functions), as two records of a
+    Fortran unformatted file (vect.data)."""
+    with open(file, "wb") as B:
+        for array in [evals, vectors]:
+            marker = np.array([array.nbytes], dtype="<i4").tobytes()
+            B.write(marker)
+            B.write(np.ascontiguousarray(array, dtype="<f8").tobytes())
+            B.write(marker)
@@ -0,0 +1,134 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Read NWChem binary .movecs files, and write the MO files read by CamCASP.
+
+This does the work of the Fortran readNWCHEMmos program in the calling
+process. The .movecs file is a Fortran unformatted sequential file written
+by movecs_write in $NWCHEM/src/ddscf/vectors.F (see
+interfaces/nwchem/README). The records are
+
+  convergence information (not used)
+  SCF type (character*20)
+  length of title, title
+  length of basis name, basis name
+  nsets, nbf, nmo(1:nsets)
+  for each set: occ(1:nbf), evals(1:nbf), then each of the nmo(set)
+  vectors, written in records of at most 524287 values.
+
+Integers may be 4 or 8 bytes, depending on how NWChem was built; the
+size is taken from the record length. The records are read by
+movecs_io.records.
+
+write_ascii writes the -asc.movecs file exactly as readNWCHEMmos --ascii
+does, and write_binary the vect.data file of readNWCHEMmos --binary.
+
+provides functions:
+* read
+* write_ascii
+* write_binary
+* convert
+
+provides classes:
+* MOVectors
+(and MovecsError, from movecs_io)
+"""
+
+import numpy as np
+from movecs_io import MovecsError, records, next_record, integers, doubles
+import movecs_io
+
+
+class MOVectors:
+    """Contents of an NWChem .movecs file"""
+    def __init__(self, source):
+        self.source = source   # File name, as given
+        self.scftype = ""
+        self.title = ""
+        self.basis = ""
+        self.nbf = 0
+        self.nmo = []          # Number of vectors in each set
+        self.occ = []          # Occupation numbers for each set, arrays (nbf)
+        self.evals = []        # Orbital energies for each set, arrays (nbf)
+        self.vectors = []      # MO coefficients for each set, arrays (nmo, nbf)
+
+
+def read(file):
+    """Read an NWChem .movecs file and return an MOVectors object"""
+    try:
+        F = open(file, "rb")
+    except OSError:
+        raise MovecsError(f"Can't open {file}")
+    with F:
+        recs = records(F, file)
+        mo = MOVectors(file)
+        next_record(recs, file)            # Convergence information
+        mo.scftype = next_record(recs, file).decode("iso-8859-1").strip()
+        next_record(recs, file)            # Length of title
+        mo.title = next_record(recs, file).decode("iso-8859-1").rstrip()
+        next_record(recs, file)            # Length of basis name
+        mo.basis = next_record(recs, file).decode("iso-8859-1").rstrip()
+        #  The record for nsets holds one integer, and so gives the integer size
+        record = next_record(recs, file)
+        size = len(record)
+        nsets = integers(record, size, file)[0]
+        mo.nbf = nbf = integers(next_record(recs, file), size, file)[0]
+        mo.nmo = integers(next_record(recs, file), size, file)[:nsets]
+        if len(mo.nmo) < nsets:
+            raise MovecsError(f"Error reading from {file}")
+        for nmo in mo.nmo:
+            occ = doubles(next_record(recs, file))
+            evals = doubles(next_record(recs, file))
+            if len(occ) < nbf or len(evals) < nbf:
+                raise MovecsError(f"Error reading from {file}")
+            mo.occ.append(occ[:nbf])
+            mo.evals.append(evals[:nbf])
+            vectors = np.empty((nmo, nbf))
+            for m in range(nmo):
+                start = 0
+                while start < nbf:
+                    v = doubles(next_record(recs, file))
+                    if start + len(v) > nbf:
+                        raise MovecsError("Mistake in vector count")
+                    vectors[m, start:start+len(v)] = v
+                    start += len(v)
+            mo.vectors.append(vectors)
+    return mo
+
+
+def _set(mo):
+    if len(mo.nmo) > 1:
+        raise MovecsError(f"MOvecs file {mo.source} contains more than one set")
+    return mo.nmo[0], mo.evals[0], mo.vectors[0]
+
+
+def write_ascii(mo, file):
+    """Write the MOs in the ASCII format read by CamCASP"""
+    nmo, evals, vectors = _set(mo)
+    movecs_io.write_ascii(file, [("Source", mo.source), ("Title", mo.title),
+                                 ("Code", "NWChem")], evals, vectors)
+
+
+def write_binary(mo, file):
+    """Write the orbital energies and the nbf x nbf matrix of MO
+    coefficients as a Fortran unformatted file (vect.data). Energies of
+    missing vectors are set to the largest double precision number."""
+    nmo, evals, vectors = _set(mo)
+    nbf = mo.nbf
+    e = np.full(nbf, np.finfo(np.float64).max)
+    e[:nmo] = evals[:nmo]
+    vec = np.zeros((nbf, nbf))
+    vec[:nmo] = vectors
+    movecs_io.write_binary(file, e, vec)
+
+
+def convert(file, ascii=None, binary=None):
+    """Read a .movecs file and write it in ASCII and/or binary format.
+    Returns the MOVectors object."""
+    mo = read(file)
+    if ascii:
+        write_ascii(mo, ascii)
+    if binary:
+        write_binary(mo, binary)
+    return mo
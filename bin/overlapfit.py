@@ -0,0 +1,250 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Fit the overlap model of short-range energies to energy-scan results.
+
+The energy-scan module writes a table of energies for a list of dimer
+geometries (Energy-file) and, with "Energies Overlap", the density
+overlaps S_ab between the sites a of molecule A and b of molecule B
+(Overlap-file). The overlap model is
+  E = K S^alpha
+for the total overlap S = sum_ab S_ab, or, for the distributed model,
+  E = sum_t K_t sum_{ab in t} S_ab^alpha
+where t runs over the types of site pair (from the site names, e.g. C-O
+for C1 and O2, and, if the model is symmetrized between the molecules,
+O-C is the same as C-O). The exponent alpha is the same for all pairs.
+
+For a given alpha the K are found by weighted linear least squares, so
+the fit is done for a grid of alpha values at once, and the best alpha
+refined by parabolic interpolation on the grid. Bootstrap samples (points
+drawn at random with replacement) are fitted together in the same way, as
+stacked normal equations, and the spread of their parameters gives the
+error estimates. Only NumPy is needed.
+
+The weights and energy limits are those used by the overlap-model module
+of CamCASP: points with E outside [emin, emax] are left out, and the
+relative error of each of the others has the weight
+exp(-width*(ln(E/e0))^2). With alpha fixed at 1 the fit is the same as
+that module's.
+
+provides functions:
+* read_energies
+* read_overlaps
+* pair_types
+* fit
+* to_kjmol
+
+provides classes:
+* OverlapError
+* Fit
+"""
+
+import re
+
+import numpy as np
+
+from compressed import open_any
+from scandata import units
+
+
+class OverlapError(Exception):
+    pass
+
+
+def _header(IN):
+    """Read the keyword lines of an energy-scan file as far as the LABELS
+    line. Returns the keywords and the labels."""
+    keys = {}
+    for line in IN:
+        w = line.split()
+        if not w:
+            continue
+        if w[0] == "LABELS":
+            return keys, w[1:]
+        keys.setdefault(w[0], " ".join(w[1:]))
+    raise OverlapError("No LABELS line")
+
+
+def _rows(IN):
+    rows = []
+    for line in IN:
+        if line.startswith("END"):
+            break
+        if line.strip():
+            rows.append([float(re.sub(r'[Dd]', 'E', v)) for v in line.split()])
+    return np.array(rows)
+
+
+def read_energies(file):
+    """Read an energy-scan energy file. Returns the energy unit, the column
+    labels and an array of the values, one row for each point."""
+    with open_any(file) as IN:
+        keys, labels = _header(IN)
+        data = _rows(IN)
+    if data.ndim != 2 or data.shape[1] != len(labels):
+        raise OverlapError(f"{file}: wrong number of values for the labels")
+    return keys.get("ENERGY-UNITS", "CM-1"), labels, data
+
+
+def read_overlaps(file):
+    """Read an energy-scan overlap file. Returns the sites of A and B, the
+    geometry (Rx, Ry, Rz, alpha, Nx, Ny, Nz) of each point, and the
+    overlaps, an array (points, sites of A, sites of B)."""
+    sites_a, blocks = [], []
+    labels = []
+    with open_any(file) as IN:
+        for line in IN:
+            if line.startswith("SITE-A"):
+                sites_a.append(line.split()[1])
+            elif line.startswith("LABELS") and len(sites_a) > len(blocks):
+                labels = line.split()[1:]
+                blocks.append(_rows(IN))
+    if not blocks:
+        raise OverlapError(f"{file}: no overlaps found")
+    sites_b = labels[7:]
+    geometry = blocks[0][:, :7]
+    for b in blocks:
+        if b.shape != (len(geometry), 7 + len(sites_b)) or not np.allclose(b[:, :7], geometry):
+            raise OverlapError(f"{file}: the blocks for the sites of A don't match")
+    return sites_a, sites_b, geometry, np.stack([b[:, 7:] for b in blocks], axis=1)
+
+
+def _type(site):
+    """Site type: the site name without the number"""
+    return re.sub(r'\d+$', '', site) or site
+
+
+def pair_types(sites_a, sites_b, symmetrize=True):
+    """Names of the pair types, and an array (types, sites of A, sites of B)
+    of 1 for each pair of that type, otherwise 0"""
+    names = []
+    of = {}
+    for a in sites_a:
+        for b in sites_b:
+            ta, tb = _type(a), _type(b)
+            if symmetrize:
+                ta, tb = sorted([ta, tb])
+            of[(a, b)] = f"{ta}-{tb}"
+            if of[(a, b)] not in names:
+                names.append(of[(a, b)])
+    mask = np.zeros((len(names), len(sites_a), len(sites_b)))
+    for i, a in enumerate(sites_a):
+        for j, b in enumerate(sites_b):
+            mask[names.index(of[(a, b)]), i, j] = 1.0
+    return names, mask
+
+
+def _design(S, mask, alpha):
+    """The model functions sum_{ab in t} S_ab^alpha, array (alpha, points,
+    types), for the overlaps S (points, sites of A, sites of B)"""
+    Sa = np.power(S[None, ...], np.asarray(alpha, dtype=float)[:, None, None, None])
+    return np.einsum('kiab,tab->kit', Sa, mask)
+
+
+def _normal_solve(G, r):
+    """Solve the normal equations G K = r, for any number of leading
+    dimensions. A tiny ridge keeps types with no overlap (e.g. a pair that
+    never occurs in a bootstrap sample), or sites that are nearly linearly
+    dependent, from making G singular."""
+    p = G.shape[-1]
+    G = G + 1e-12*np.trace(G, axis1=-2, axis2=-1)[..., None, None]*np.eye(p)
+    return np.linalg.solve(G, r[..., None])[..., 0]
+
+
+def _solve(X, E, W):
+    """Weighted least squares for each alpha and each sample at once. X is
+    (alpha, points, types), E (points) and W (samples, points). Returns K
+    (samples, alpha, types) and the weighted sum of squared residuals
+    (samples, alpha)."""
+    na, n, p = X.shape
+    outer = np.einsum('kip,kiq->ikpq', X, X).reshape(n, -1)
+    G = (W @ outer).reshape(len(W), na, p, p)
+    r = (W @ (X*E[None, :, None]).transpose(1, 0, 2).reshape(n, -1)).reshape(len(W), na, p)
+    K = _normal_solve(G, r)
+    sse = (W @ E**2)[:, None] - np.einsum('skp,skp->sk', K, r)
+    return K, sse
+
+
+class Fit:
+    """Parameters of an overlap model fit, with bootstrap statistics"""
+    def __init__(self, names, alpha, K, rms, points, samples=None):
+        self.names = names        # Pair types, or ["total"]
+        self.alpha = alpha
+        self.K = K                # dictionary of K for each type
+        self.rms = rms            # weighted r.m.s. relative error, percent
+        self.points = points      # number of points fitted
+        self.samples = samples    # (alpha, K) arrays for the bootstrap fits
+
+    def errors(self):
+        """Standard deviations of alpha and the K over the bootstrap fits,
+        or None"""
+        if self.samples is None:
+            return None
+        alpha, K = self.samples
+        return float(np.std(alpha)), dict(zip(self.names, np.std(K, axis=0).tolist()))
+
+    def to_dict(self):
+        d = {"alpha": self.alpha, "K": self.K, "rms": self.rms, "points": self.points}
+        e = self.errors()
+        if e:
+            d["bootstrap"] = len(self.samples[0])
+            d["alpha_error"], d["K_error"] = e
+        return d
+
+
+def fit(E, S, mask, names, alpha=None, grid=(0.5, 1.5, 0.01), bootstrap=0, seed=1,
+        emin=0.01, emax=100.0, e0=20.0, width=0.4343):
+    """Fit the overlap model to energies E (points), in kJ/mol, with overlaps
+    S (points, sites of A, sites of B) and pair types given by mask (see
+    pair_types). If alpha is given, it is fixed, otherwise it is fitted,
+    first on the grid (start, stop, step). With bootstrap > 0, that number
+    of bootstrap samples is fitted as well. Returns a Fit."""
+    use = (E >= emin) & (E <= emax)
+    if use.sum() <= len(names):
+        raise OverlapError(f"Only {use.sum()} points with energies between {emin} and {emax}")
+    E, S = E[use], S[use]
+    #  Relative errors, weighted
+    wt = np.exp(-width*np.log(E/e0)**2)
+    w = wt/E**2
+    n = len(E)
+    W = w[None, :]
+    if bootstrap > 0:
+        rng = np.random.default_rng(seed)
+        counts = np.stack([np.bincount(rng.integers(0, n, n), minlength=n)
+                           for _ in range(bootstrap)])
+        W = np.vstack([W, counts*w])
+    if alpha is not None:
+        alphas = np.array([float(alpha)])
+    else:
+        alphas = np.arange(grid[0], grid[1] + grid[2]/2, grid[2])
+    K, sse = _solve(_design(S, mask, alphas), E, W)
+    best = np.argmin(sse, axis=1)
+    a = alphas[best]
+    if len(alphas) > 2:
+        #  Parabola through the grid minimum and its neighbours
+        i = np.clip(best, 1, len(alphas) - 2)
+        s = np.arange(len(W))
+        y0, y1, y2 = sse[s, i-1], sse[s, i], sse[s, i+1]
+        curv = y0 - 2*y1 + y2
+        step = np.where(curv > 0, 0.5*(y0 - y2)/np.where(curv > 0, curv, 1.0), 0.0)
+        a = alphas[i] + np.clip(step, -1.0, 1.0)*grid[2]
+        #  Solve again for each sample at its own alpha
+        X = _design(S, mask, a)
+        G = np.einsum('ki,kip,kiq->kpq', W, X, X)
+        r = np.einsum('ki,kip,i->kp', W, X, E)
+        K = _normal_solve(G, r)
+    else:
+        K = K[:, 0]
+    fitted = _design(S, mask, a[:1])[0] @ K[0]
+    rms = float(100*np.sqrt(np.sum(w*(E - fitted)**2)/np.sum(wt)))
+    samples = (a[1:], K[1:]) if bootstrap > 0 else None
+    return Fit(names, float(a[0]), dict(zip(names, K[0].tolist())), rms, n, samples)
+
+
+def to_kjmol(values, unit):
+    """Convert energies from the unit of an energy-scan file to kJ/mol"""
+    u = unit.lower()
+    if u not in units:
+        raise OverlapError(f"Unknown energy unit {unit}")
+    return values*units["kj/mol"]/units[u]
@@ -0,0 +1,333 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Export Psi4 wavefunctions as NumPy .npz files, and write the MO and basis
+files read by CamCASP from them.
+
+Psi4 calculations for CamCASP normally end by writing a formatted
+checkpoint (.fchk) file with psi4.FCHKWriter, which readfchk.py parses to
+write the <prefix>-asc.movecs and <prefix>.basis files. The fchk file is
+large, slow to parse, and holds the MO coefficients to only 8 significant
+figures. If the psi4_npz option is set (in camcasp.rc, or --psi4-npz for
+runcamcasp.py), the FCHKWriter lines of the Psi4 input are replaced by
+the code from export_code, which saves the same information, in the same
+conventions as the fchk file, straight from the wavefunction object:
+
+  shell_types    angular momentum of each shell, negative for spherical
+                 (pure) shells with l > 1, as in the fchk file
+  nprim          number of primitives in each shell
+  shell_atom     atom of each shell (counting from 0)
+  exponents      primitive exponents
+  coefficients   contraction coefficients, normalized as in the fchk file
+  Z              atomic numbers (0 for ghost atoms)
+  charges        nuclear charges (0 for ghost atoms)
+  coords         atom positions in bohr, shape (natom, 3)
+  energy         total energy
+  evals          alpha orbital energies
+  vectors        alpha MO coefficients, shape (nmo, nbf), with the p
+                 functions in the order x, y, z
+  restricted     whether the alpha and beta orbitals are the same
+
+The coefficients are reordered and normalized as psi4.FCHKWriter does,
+for spherical basis sets only; for Cartesian basis sets the fchk file is
+written instead, and readfchk.py is used as before.
+
+write_ascii writes the MO file at full precision, in the format written
+by readNWCHEMmos, and write_basis writes the .basis file exactly as
+readfchk.py does. read_fchk reads an fchk file into the same form, so
+that an fchk file can be converted to an .npz file (see read_psi4_npz.py).
+
+provides functions:
+* export_code
+* read
+* read_fchk
+* save
+* read_labels
+* dalton_order
+* write_ascii
+* write_basis
+* convert
+
+provides classes:
+* Psi4MOs
+(and MovecsError, from movecs_io)
+"""
+
+import os
+import re
+import numpy as np
+from movecs_io import MovecsError
+import movecs_io
+from compressed import open_any
+
+#  Arrays in the .npz file
+_keys = ["shell_types", "nprim", "shell_atom", "exponents", "coefficients", "Z",
+         "charges", "coords", "energy", "evals", "vectors", "restricted"]
+
+#  Number of basis functions for each fchk shell type
+_size = {-4: 9, -3: 7, -2: 5, -1: 4, 0: 1, 1: 3, 2: 6, 3: 10, 4: 15}
+
+#  Basis-function component orders for spherical shells. Psi4 gives them
+#  in the order 0, 1c, 1s, 2c, 2s, ...; Dalton (and so CamCASP) in the
+#  order ... 2s, 1s, 0, 1c, 2c, ...
+_dalton = {
+  -2: [4, 2, 0, 1, 3],
+  -3: [6, 4, 2, 0, 1, 3, 5],
+  -4: [8, 6, 4, 2, 0, 1, 3, 5, 7],
+}
+
+#  Code appended to a Psi4 input in place of the FCHKWriter lines. It needs
+#  nothing from CamCASP, since it runs in the Psi4 process.
+_export = """
+#  Export the wavefunction for CamCASP (see $CAMCASP/bin/psi4_npz.py)
+def _camcasp_export(wfn, npzfile, fchkfile):
+    import numpy
+    basis = wfn.basisset()
+    if not basis.has_puream():
+        #  Cartesian basis: readfchk.py does the reordering
+        psi4.FCHKWriter(wfn).write(fchkfile)
+        return
+    mol = wfn.molecule()
+    natom = mol.natom()
+    C = wfn.Ca_subset("AO", "ALL").to_array()
+    types, nprim, atom, exps, coefs = [], [], [], [], []
+    offset = 0
+    for k in range(basis.nshell()):
+        s = basis.shell(k)
+        am = s.am
+        types.append(-am if am > 1 else am)
+        nprim.append(s.nprimitive)
+        atom.append(basis.shell_to_center(k))
+        #  The coefficients as given in the basis file, as FCHKWriter writes
+        for p in range(s.nprimitive):
+            exps.append(s.exp(p))
+            coefs.append(s.original_coef(p))
+        if am == 1:
+            #  Psi4 orders spherical p functions z, x, y
+            C[offset:offset+3] = C[[offset+1, offset+2, offset]]
+        offset += s.nfunction
+    C[abs(C) < 1e-12] = 0.0
+    numpy.savez(npzfile, shell_types=types, nprim=nprim, shell_atom=atom,
+                exponents=exps, coefficients=coefs,
+                Z=[int(mol.Z(i)) for i in range(natom)],
+                charges=[mol.Z(i) for i in range(natom)],
+                coords=mol.geometry().to_array(), energy=wfn.energy(),
+                evals=wfn.epsilon_a_subset("AO", "ALL").to_array(),
+                vectors=C.T, restricted=wfn.same_a_b_orbs())
+
+_camcasp_export(wfn, '{npz}', '{fchk}')
+"""
+
+
+class Psi4MOs:
+    """Basis set, MOs and orbital energies from a Psi4 calculation"""
+    def __init__(self, source):
+        self.source = source       # Description of the file read
+        self.shell_types = None    # Type of each shell, as in the fchk file
+        self.nprim = None          # Number of primitives in each shell
+        self.shell_atom = None     # Atom of each shell, counting from 0
+        self.exponents = None      # Primitive exponents
+        self.coefficients = None   # Contraction coefficients
+        self.Z = None              # Atomic numbers
+        self.charges = None        # Nuclear charges
+        self.coords = None         # Atom positions in bohr, array (natom, 3)
+        self.energy = 0.0          # Total energy
+        self.evals = None          # Orbital energies, array (nmo)
+        self.vectors = None        # MO coefficients, array (nmo, nbf)
+        self.restricted = True     # Same alpha and beta orbitals
+
+    @property
+    def nbf(self):
+        return self.vectors.shape[1]
+
+    @property
+    def nmo(self):
+        return self.vectors.shape[0]
+
+
+def export_code(npz, fchk):
+    """Psi4 input code to save the wavefunction wfn in the file npz, or in
+    the fchk file if the basis set is Cartesian"""
+    return _export.replace("{npz}", npz).replace("{fchk}", fchk)
+
+
+def _check(mo):
+    """Check that the arrays are consistent"""
+    if any(t not in _size for t in mo.shell_types):
+        raise MovecsError(f"Unsupported shell type in {mo.source}")
+    nshell = len(mo.shell_types)
+    nbf = sum(_size[t] for t in mo.shell_types)
+    if len(mo.nprim) != nshell or len(mo.shell_atom) != nshell:
+        raise MovecsError(f"Inconsistent shell information in {mo.source}")
+    if len(mo.exponents) != sum(mo.nprim) or len(mo.coefficients) != sum(mo.nprim):
+        raise MovecsError(f"Inconsistent numbers of primitives in {mo.source}")
+    if mo.vectors.ndim != 2 or mo.vectors.shape[1] != nbf:
+        raise MovecsError(f"MO coefficients in {mo.source} don't match the basis set:"
+                          f" {nbf} basis functions")
+    if len(mo.evals) != mo.nmo:
+        raise MovecsError(f"Numbers of MOs and orbital energies differ in {mo.source}")
+    return mo
+
+
+def read(file):
+    """Read the .npz file written by the export_code and return a Psi4MOs
+    object"""
+    try:
+        data = np.load(file, allow_pickle=False)
+    except (OSError, ValueError) as e:
+        raise MovecsError(f"Can't read {file}: {e}")
+    mo = Psi4MOs(file)
+    with data:
+        missing = [key for key in _keys if key not in data.files]
+        if missing:
+            raise MovecsError(f"{file} is not a Psi4 wavefunction file: no {', '.join(missing)}")
+        for key in _keys:
+            setattr(mo, key, data[key])
+    mo.energy = float(mo.energy)
+    mo.restricted = bool(mo.restricted)
+    mo.coords = mo.coords.reshape(-1, 3)
+    return _check(mo)
+
+
+def save(mo, file):
+    """Save a Psi4MOs object as an .npz file"""
+    np.savez_compressed(file, **{key: getattr(mo, key) for key in _keys})
+
+
+def read_fchk(file):
+    """Read the basis set and MOs from a Psi4 fchk file (which may be
+    compressed) and return a Psi4MOs object"""
+    sections = {}
+    with open_any(file) as F:
+        line = F.readline()
+        while line:
+            m = re.match(r'(\S.{0,39}?)\s+([IRC])\s+(N=)?\s*(\S+)\s*$', line[:80])
+            line = F.readline()
+            if not m:
+                continue
+            text, kind, array, value = m.groups()
+            if not array:
+                sections[text] = float(value) if kind == "R" else value
+                continue
+            n = int(value)
+            values = []
+            while line and not re.match(r'[A-Za-z]', line):
+                values.extend(line.split())
+                line = F.readline()
+            if kind == "I":
+                sections[text] = np.array(values[:n], dtype=int)
+            elif kind == "R":
+                sections[text] = np.array(values[:n], dtype=float)
+    mo = Psi4MOs(f"Psi4 fchk file {file}")
+    try:
+        mo.shell_types = sections["Shell types"]
+        mo.nprim = sections["Number of primitives per shell"]
+        mo.shell_atom = sections["Shell to atom map"] - 1
+        mo.exponents = sections["Primitive exponents"]
+        mo.coefficients = sections["Contraction coefficients"]
+        mo.Z = sections["Atomic numbers"]
+        mo.charges = sections["Nuclear charges"]
+        mo.coords = sections["Current cartesian coordinates"].reshape(-1, 3)
+        mo.energy = float(sections.get("Total Energy", 0.0))
+        if "Alpha Orbital Energies" in sections:
+            mo.evals = sections["Alpha Orbital Energies"]
+            c = sections["Alpha MO coefficients"]
+            beta = sections.get("Beta Orbital Energies")
+        else:
+            #  Psi4 1.2
+            mo.evals = sections["orbital energies"]
+            c = sections["MO coefficients (C)"]
+            beta = None
+    except KeyError as e:
+        raise MovecsError(f"No {e.args[0]} section in {file}")
+    if len(c) % len(mo.evals):
+        raise MovecsError(f"Inconsistency in number of alpha coefficients in {file}")
+    mo.vectors = c.reshape(len(mo.evals), -1)
+    mo.restricted = beta is None or np.allclose(beta, mo.evals, rtol=0.0, atol=1e-10)
+    return _check(mo)
+
+
+def read_labels(labels=None, sites=None):
+    """Site names and types, from a .sitenames file (name and optionally
+    type on each line) or else a .sites file, as read by readfchk.py"""
+    names, types = [], []
+    if labels and os.path.exists(labels):
+        with open(labels) as S:
+            for line in S:
+                v = line.split()
+                if v:
+                    names.append(v[0])
+                    types.append(v[1] if len(v) > 1 else "")
+    elif sites and os.path.exists(sites):
+        with open(sites) as S:
+            for line in S:
+                m = re.match(r' +\@?(\w+) +-?\d+\.\d+', line)
+                if m:
+                    names.append(m.group(1))
+                    m = re.search(r'Type +(\w+)', line)
+                    types.append(m.group(1) if m else "")
+    else:
+        raise MovecsError("No site or label file found")
+    return names, types
+
+
+def dalton_order(shell_types):
+    """Index array that reorders the basis functions of each spherical
+    shell from the Psi4 order to the Dalton order"""
+    order = []
+    start = 0
+    for t in shell_types:
+        order.extend(start + k for k in _dalton.get(t, range(_size[t])))
+        start += _size[t]
+    return np.array(order)
+
+
+def write_ascii(mo, file, dalton=True):
+    """Write the MOs in the ASCII format read by CamCASP, with the basis
+    functions in the Dalton order unless dalton is False"""
+    if not mo.restricted:
+        raise MovecsError(f"{mo.source} appears to be for an open-shell system"
+                          " -- alpha and beta orbitals differ")
+    vectors = mo.vectors[:, dalton_order(mo.shell_types)] if dalton else mo.vectors
+    header = [("Source", mo.source)]
+    if dalton:
+        header.append(("Title", "M.O. coefficients re-ordered for dalton"))
+    movecs_io.write_ascii(file, header, mo.evals, vectors)
+
+
+def write_basis(mo, file, names, types):
+    """Write the basis set in the format written by readfchk.py, with the
+    given site names and types"""
+    natom = len(mo.Z)
+    if len(names) < natom:
+        raise MovecsError(f"{len(names)} site names given for {natom} atoms")
+    kstart = np.concatenate(([0], np.cumsum(mo.nprim)))
+    with open(file, "w") as B:
+        atom = -1
+        for i, t in enumerate(mo.shell_types):
+            if mo.shell_atom[i] != atom:
+                atom = mo.shell_atom[i]
+                if atom > 0:
+                    B.write("      ---\n")
+                x, y, z = mo.coords[atom]
+                B.write(f"    {names[atom]:10s} {mo.charges[atom]:5.1f}"
+                        f"  {x:15.8f} {y:15.8f} {z:15.8f} Type {types[atom]:1s}\n")
+            B.write(f" {'SPDFGH'[abs(t)] if t != -1 else 'S':1s}  {mo.nprim[i]:1d}\n")
+            for n, j in enumerate(range(kstart[i], kstart[i+1]), start=1):
+                B.write(f"{n:6d} {mo.exponents[j]:16.8f} {mo.coefficients[j]:14.8f}\n")
+        B.write("      ---\n")
+
+
+def convert(file, prefix, labels=None, sites=None, dalton=True, basis=".basis"):
+    """Read a Psi4 .npz (or fchk) file and write <prefix>-asc.movecs and
+    <prefix><basis>. Returns the Psi4MOs object."""
+    names, types = read_labels(labels, sites)
+    if re.search(r'\.fchk(\.gz|\.zst)?$', file):
+        mo = read_fchk(file)
+    else:
+        mo = read(file)
+        mo.source = f"Psi4 npz file {os.path.basename(file)}"
+    write_ascii(mo, f"{prefix}-asc.movecs", dalton)
+    write_basis(mo, f"{prefix}{basis}", names, types)
+    return mo
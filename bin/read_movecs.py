@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Read an NWChem .movecs file and write the MOs in the formats read by CamCASP.
+"""
+
+import argparse
+
+import nwchem_movecs
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Read an NWChem .movecs file and write the MOs in the formats read by CamCASP.
+""",epilog="""
+This is a Python version of the readNWCHEMmos program, and takes the same
+arguments:
+  read_movecs.py <job>_<M>.movecs [--ascii <job>-<M>-asc.movecs] [--binary <file>] [--quiet]
+The ASCII file is identical to the one written by readNWCHEMmos. Only
+files with a single set of MOs (closed-shell or restricted open-shell
+calculations) can be converted.
+
+runcamcasp.py uses the same code to convert the MOs of NWChem calculations
+without running a separate program.
+""")
+
+parser.add_argument("movecs", help="NWChem .movecs file")
+parser.add_argument("--ascii", help="ASCII MO file to write")
+parser.add_argument("--binary", "--to", help="Binary MO file (vect.data) to write")
+parser.add_argument("--quiet", action="store_true", help="Don't print the file contents")
+
+args = parser.parse_args()
+
+try:
+    mo = nwchem_movecs.convert(args.movecs, ascii=args.ascii, binary=args.binary)
+except nwchem_movecs.MovecsError as e:
+    print(e)
+    exit(1)
+
+if not args.quiet:
+    print(f"File {args.movecs}")
+    print(f"Title: {mo.title}")
+    print(f"SCF type: {mo.scftype}")
+    print(f"Basis: {mo.basis}")
+    print(f"Basis set size: {mo.nbf}")
+    print(f"Number of sets: {len(mo.nmo)}")
+    print("Number of vectors in each set:")
+    print("".join(f"{n:8d}" for n in mo.nmo))
+    for set, nmo in enumerate(mo.nmo, start=1):
+        print(f"Set {set}")
+        occ = mo.occ[set-1]
+        for i in range(0, nmo, 10):
+            print("".join(f"{x:7.2f}" for x in occ[i:min(i+10, nmo)]))
+        evals = mo.evals[set-1]
+        for i in range(0, nmo, 5):
+            print("".join(f"{x:15.8f}" for x in evals[i:min(i+5, nmo)]))
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Write the MO and basis files read by CamCASP from a Psi4 wavefunction .npz file.
+"""
+
+import argparse
+
+import psi4_npz
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Write the MO and basis files read by CamCASP from a Psi4 wavefunction .npz file.
+""",epilog="""
+E.g.
+  read_psi4_npz.py H2O2_A.npz --prefix H2O2-A --labels H2O2_A.sitenames --dalton
+  read_psi4_npz.py H2Odimer_A.fchk --npz H2Odimer_A.npz
+
+The .npz file is written by the Psi4 calculations of a job if the
+psi4_npz option is set in camcasp.rc (or runcamcasp.py --psi4-npz is
+used); see psi4_npz.py for its contents. The arguments are those of
+readfchk.py, which does the same from the .fchk file: <prefix>-asc.movecs
+and <prefix>.basis are written, with the basis function components
+reordered for dalton if --dalton is given, and the site names (and types)
+taken from the --labels file or else the --sites file. The basis file is
+the same as the one written by readfchk.py, and the MO file is written at
+full precision.
+
+An fchk file (possibly compressed) may be given instead of the .npz file.
+With --npz, its contents are saved as an .npz file, and the MO and basis
+files are only written if --prefix is given.
+""")
+
+parser.add_argument("file", help="Psi4 .npz (or .fchk) file")
+parser.add_argument("--prefix", help="Prefix for the MO and basis set files")
+parser.add_argument("--dalton", action="store_true",
+                    help="Reorder basis function components for dalton")
+parser.add_argument("--labels", help="File containing site labels")
+parser.add_argument("--sites", help="File containing the site list")
+parser.add_argument("--basis", help="Suffix for basis-function file", default=".basis")
+parser.add_argument("--npz", help="Save the wavefunction read from an fchk file in this .npz file")
+parser.add_argument("--verbose", "-v", action="store_true", help="More output")
+
+args = parser.parse_args()
+
+if not args.prefix and not args.npz:
+    parser.error("Nothing to do: give --prefix and/or --npz")
+
+try:
+    if args.npz:
+        mo = psi4_npz.read_fchk(args.file)
+        psi4_npz.save(mo, args.npz)
+    if args.prefix:
+        mo = psi4_npz.convert(args.file, args.prefix, args.labels, args.sites,
+                              args.dalton, args.basis)
+except psi4_npz.MovecsError as e:
+    print(e)
+    exit(1)
+
+if args.verbose:
+    print(f"File {args.file}")
+    print(f"{len(mo.Z)} atoms, {len(mo.shell_types)} shells, {mo.nbf} basis functions,"
+          f" {mo.nmo} MOs")
+    print(f"Total energy = {mo.energy:20.12f}")
@@ -9,6 +9,7 @@ import os
 import os.path
 import re
 import sys
+from compressed import exists, open_any
 
 parser=argparse.ArgumentParser(formatter_class = argparse.RawDescriptionHelpFormatter,
 description = """Extract data from one or more CamCASP energy-scan files and construct
@@ -75,7 +76,7 @@ for c in range(len(args.cols)):
     col.append(int(args.cols[c]))
 
 for dir in args.dirs:
-  if not os.path.exists(os.path.join(dir,args.file)):
+  if not exists(os.path.join(dir,args.file)):
     print("Can't find file {}".format(os.path.join(dir,args.file)))
     continue
   else:
@@ -87,7 +88,7 @@ for dir in args.dirs:
     OUT.write("NAME {}\n".format(args.mapname))
   if args.gridname:
     OUT.write("GRID {}\n".format(args.gridname))
-  with open(os.path.join(dir,args.file)) as IN: 
+  with open_any(os.path.join(dir,args.file)) as IN: 
     while True:
       line = IN.readline()
       m=re.match(r'([-A-Z]+)',line)
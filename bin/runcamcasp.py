@@ -31,6 +31,10 @@ import string
 import subprocess
 from time import sleep
 from camcasp import *
+from cltspec import JobSpec
+import clustercache
+import jobmodel
+import scratchspace
 
 env_camcasp = os.environ.get("CAMCASP")
 if not env_camcasp:
@@ -86,7 +90,9 @@ and files in it are overwritten.
 
 Note that in a restarted job, this script reads the copy of the .clt
 file in the job directory -- not the one in the current directory,
-which may have been changed. However none of the files for the job are
+which may have been changed. (The job specification obtained from it
+when the job was set up is saved in <job>.spec and is used instead if
+the .clt file has not been changed since.) However none of the files for the job are
 regenerated. In particular, the .cks file containing the data for the
 CamCASP step is not changed by this script on a restart, so it may be
 edited before the restart to change options or correct errors. The
@@ -99,10 +105,39 @@ specified in several ways. In order of priority, from highest to lowest,
 2. SCFCODE entry in the cluster file, if present.
 3. Environment variable CAMCASP_SCFCODE, if set.
 4. Psi4, which is now recommended and the default.
+
+The files generated by the cluster program are saved in a cache, in
+$CAMCASP_SETUP_CACHE if set or otherwise in $SCRATCH/camcasp-setup-cache,
+and are re-used if a job is set up again with the same job name, an
+identical cluster file and SCF code, and the same version of cluster.
+Use --nocache to run cluster regardless. For scans in which
+only the geometry changes, --setup-from <directory> sets up the files by
+changing the job name and atom coordinates in those of the job in the
+given directory; batch_camcasp.py --template-mode does this after checking
+that the result agrees with a full setup.
+
+With --setup, the memory and time needed by the job are estimated from
+the profile records of earlier jobs (see jobmodel.py) and printed.
+
+The job's scratch files are written in a work directory <job> (or
+<job>_NN) under the --scratch directory if given, otherwise under
+$SCRATCH or one of the scratch directories listed in camcasp.rc. The one
+chosen is the first with room for the files that the job is expected to
+write (much more if the integrals are not direct), preferring a tmpfs if
+the job needs only a small part of it, then local disk, then shared
+filesystems. A warning is given if there doesn't seem to be room
+anywhere, and in the log if the disk is nearly full when a step starts.
+Only the results are copied back to the job directory.
+
+With --psi4-npz (or "psi4_npz yes" in camcasp.rc), Psi4 calculations save
+their wavefunctions as NumPy .npz files rather than fchk files, and the
+MO and basis files for CamCASP are written from them in this process
+while the next calculation runs (see psi4_npz.py).
 """)
 
 parser.add_argument("job", help="Job name and prefix for job file names")
 parser.add_argument("--clt", help="Name of cluster file (default <job>.clt)")
+parser.add_argument("--spec", help="Job specification already parsed from the cluster file")
 parser.add_argument("--directory", "-d",  help="Directory to run job in (default <job>)")
 parser.add_argument("--scfcode", help="Specify scfcode",
                     choices=["dalton2006", "dalton", "dalton2013", "dalton2015",
@@ -123,8 +158,8 @@ parser.add_argument("-q", "--queue",
                     help="Queue for job (bg, batch, none) DEPRECATED",
                     default="", choices=["bg", "batch", "none"])
 parser.add_argument("--scratch", help="Scratch directory (default is the\
-                    environment variable SCRATCH, if set)",
-                    default=env_scratch)
+                    environment variable SCRATCH or one of the scratch\
+                    directories in camcasp.rc, whichever has room for the job)")
 parser.add_argument("--work", help="Work subdirectory (under scratch)",
                     default="")
 parser.add_argument("--cores", help="Number of cores available for all jobs",
@@ -133,12 +168,17 @@ parser.add_argument("--cores-camcasp", help="Number of cores available for CamCA
                     type=int, default=0)
 parser.add_argument("--direct", help="Use direct integral management",
                     action="store_true")
+parser.add_argument("--psi4-npz", help="Save Psi4 wavefunctions as .npz files, not fchk",
+                    action="store_true")
 parser.add_argument("--restart", help="Restart job using existing directory",
                     action="store_true")
 parser.add_argument("--debug", help="Don't delete scratch files",
                     action="store_true")
 parser.add_argument("--setup", "--setup-only", help="Set up files for the job and stop",
                     action="store_true")
+parser.add_argument("--setup-from", help="Set up files by patching those of the job in this directory")
+parser.add_argument("--nocache", "--no-cache", help="Don't use the setup cache",
+                    action="store_true")
 parser.add_argument("--log", help="Path to logfile (default OUT/jobname.log)")
 parser.add_argument("--testenv", "--test-env", help="Test the environment only.",
                     action="store_true")
@@ -165,12 +205,6 @@ else:
     #  Default set in execute function
     job.logfile = ""
 
-#  The work directory under $SCRATCH
-if args.work:
-    job.work = os.path.join(args.scratch,args.work)
-else:
-    job.work = os.path.join(args.scratch,job.name)
-  
 job.debug = args.debug
 
 #  Cluster fle
@@ -218,6 +252,7 @@ if args.direct:
     job.direct = True
 else:
     job.direct = camrc.direct
+job.psi4_npz = args.psi4_npz or camrc.psi4_npz
 if args.memory: 
     job.memory = args.memory
 else:
@@ -233,7 +268,17 @@ job.imports = args.imported
 #  ==================================================
 #  Some parameters are obtained from the Cluster file
 #  ==================================================
-read_clt(job,verbosity)
+#  The cluster file is parsed once when the job is set up and the result
+#  saved as <job>.spec in the job directory. It is re-used on a restart
+#  unless the cluster file has been changed since.
+spec = None
+specfile = os.path.join(os.path.dirname(job.cltfile), job.name + ".spec")
+if args.spec:
+    spec = JobSpec.load(args.spec)
+elif job.restart and os.path.exists(specfile) \
+        and os.path.getmtime(specfile) >= os.path.getmtime(job.cltfile):
+    spec = JobSpec.load(specfile)
+read_clt(job, verbosity, spec)
 
 #  Check that the specified scfcode is installed
 if os.path.exists(os.path.join(camcasp,"bin",f"no_{job.scfcode}")):
@@ -241,7 +286,13 @@ if os.path.exists(os.path.join(camcasp,"bin",f"no_{job.scfcode}")):
     print("If it is, please re-run setup.py")
     exit(1)
 
-if args.cores:  
+#  Settings given as "auto" in camcasp.rc depend on the node and the job
+if camrc.auto:
+    camrc.autoconfigure(job.runtype, job.scfcode, args.scratch or env_scratch, verbosity)
+    if not args.memory and "memory" in camrc.auto:
+        job.memory = camrc.memory_gb
+
+if args.cores:
     job.cores = args.cores
 else:
     if job.scfcode == "nwchem":
@@ -295,6 +346,21 @@ if job.queue == "":
         print("  DEFAULTING to batch")
         job.queue = "batch"
 
+#  The work directory, under --scratch if given, otherwise under whichever
+#  of $SCRATCH and the scratch directories in camcasp.rc has room for the
+#  files that the job is expected to write
+if args.scratch:
+    roots = [scratchspace.Root(args.scratch)]
+else:
+    roots = scratchspace.roots(camrc.scratch_roots, env_scratch)
+try:
+    warning = scratchspace.Placement(roots).place(job)
+except OSError as e:
+    die(str(e))
+if warning:
+    print(warning)
+if args.work:
+    job.work = os.path.join(os.path.dirname(job.work),args.work)
 
 if verbosity > 0:
     print(job.runtime_info)
@@ -387,19 +453,47 @@ else:
     #  and run the cluster program
     print(f"Setting up files in directory {d}")
     shutil.copy(job.cltfile, d)
+    if args.setup_from:
+        args.setup_from = os.path.abspath(args.setup_from)
     job.dir = os.path.abspath(d)
     os.chdir(d)
-    print(f"See {job.dir}/{job.cltfile}.clout for output of CLUSTER")
-    #cluster_command = f"{camcasp_bin}/cluster --scfcode {job.scfcode} --job {job.name} < {job.cltfile} > {job.cltfile}.clout"
-    #print(f"Command : {cluster_command}")
-    #rc = subprocess.call(cluster_command, shell=True)
-    with open(job.cltfile + ".clout","w") as OUT, open(job.cltfile) as IN:
-        rc = subprocess.call(["cluster","--scfcode",job.scfcode,"--job",job.name], stdin=IN, stdout=OUT, stderr=OUT)
-    #rc = subprocess.call(f"cluster --scfcode {job.scfcode} --job {job.name} \
-    #        < {job.cltfile} > {job.cltfile}.clout",shell=True)
-    if rc > 0:
-        print(f"Error {rc:1d} from cluster -- job aborted")
-        exit(1)
+    with open(job.cltfile) as IN:
+        key = clustercache.cache_key(IN.read(), job.scfcode, job.name)
+    before = os.listdir(".")
+    if args.setup_from:
+        #  Template mode: patch the cluster outputs for a previous job
+        #  with the same template but a different geometry
+        refspec = [f for f in os.listdir(args.setup_from) if f.endswith(".spec")]
+        if len(refspec) != 1:
+            die(f"Can't find the job specification in {args.setup_from}")
+        refname = refspec[0][:-5]
+        refspec = JobSpec.load(os.path.join(args.setup_from, refspec[0]))
+        files = clustercache.patch_setup(args.setup_from, refname, refspec,
+                                         ".", job.name, job.spec)
+        if files is None:
+            die(f"Can't set up {job.name} from the files in {args.setup_from}")
+        with open(job.cltfile + ".clout","w") as OUT:
+            OUT.write(f"Files patched from those for {refname} in {args.setup_from}\n")
+        print(f"Files set up from those in {args.setup_from}")
+    elif not args.nocache and clustercache.fetch(key, "."):
+        with open(job.cltfile + ".clout","w") as OUT:
+            OUT.write("Files copied from the setup cache\n")
+        print("Files copied from the setup cache")
+    else:
+        print(f"See {job.dir}/{job.cltfile}.clout for output of CLUSTER")
+        #cluster_command = f"{camcasp_bin}/cluster --scfcode {job.scfcode} --job {job.name} < {job.cltfile} > {job.cltfile}.clout"
+        #print(f"Command : {cluster_command}")
+        #rc = subprocess.call(cluster_command, shell=True)
+        with open(job.cltfile + ".clout","w") as OUT, open(job.cltfile) as IN:
+            rc = subprocess.call(["cluster","--scfcode",job.scfcode,"--job",job.name], stdin=IN, stdout=OUT, stderr=OUT)
+        #rc = subprocess.call(f"cluster --scfcode {job.scfcode} --job {job.name} \
+        #        < {job.cltfile} > {job.cltfile}.clout",shell=True)
+        if rc > 0:
+            print(f"Error {rc:1d} from cluster -- job aborted")
+            exit(1)
+        if not args.nocache:
+            clustercache.store(key, ".", clustercache.outputs(".", before))
+    job.spec.save(job.name + ".spec")
 
     if job.scfcode in ["dalton", "dalton2006"]:
         make_dalton_datafiles(job,verbosity)
@@ -419,6 +513,11 @@ jobtype = {
 }
 
 if args.setup:
+    estimate = jobmodel.Predictor.load().estimate(job.spec, job.runtype, job.scfcode,
+                                                  job.cores, job.cores_camcasp)
+    print(f"Estimated requirements: {estimate}")
+    if estimate.steps and estimate.memory_gb > job.memory:
+        print(f"WARNING: the job may need more than the {job.memory} GB of memory specified")
     print(f"""Job files set up.
 Use
   runcamcasp.py {job.name} --clt {job.cltfile} -d {d} [options] --restart [&]
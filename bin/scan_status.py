@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Report the state of the jobs of a scan, and list those to be run again.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Report the state of the jobs of a scan, and list those to be run again.
+""",epilog="""
+The job argument is the job name given to batch_camcasp.py, and the jobs
+are the directories <job>_<index> (or <job>_<index>_dHF, with --dHF) in
+the current directory, or that given by --dir. Each is classified as
+queued, running, finished or failed from its OUT/<job>.log, results
+manifest, summary file and MO files (see jobstatus.py), and the number in
+each state is printed. Running jobs whose logs haven't changed for
+--stale hours (default 24) are counted as stalled: they have probably
+been killed, or stopped with an error. Failed jobs whose scratch working
+directories are still present are counted too.
+
+The states are kept in the cache file <job>-status.json (or that given by
+--cache) and only the jobs that have changed since are read again, so the
+script can be rerun often on a large scan. Use --no-cache to read every
+job.
+
+  --list STATE ...   prints the name, state and details of each job in
+                     the states given (queued, running, stalled,
+                     finished, failed, or all)
+  --failed FILE      writes the names of the failed and stalled job
+                     directories to FILE, one to a line
+  --scratch FILE     writes the scratch directories left by failed and
+                     stalled jobs to FILE
+  --resubmit FILE    writes the lines of the geometry file (--geometry)
+                     for the failed and stalled jobs to FILE
+
+With --geometry, the points of the geometry file for which there is no
+job directory are counted as not submitted; they are those skipped by
+batch_camcasp.py for close contacts, or not yet set up. To run the failed
+points again, e.g.
+
+  scan_status.py H2O2 --geometry H2O2.geom --failed failed.txt --resubmit again.geom
+  xargs rm -r < failed.txt
+  batch_camcasp.py H2O2 H2O2.clt again.geom
+
+A failed job can instead be restarted in its directory with
+"runcamcasp.py <job> --clt <job>.clt -d <dir> --restart"; the SCF
+calculations of the parts whose MO files are present (listed by --list)
+are not repeated.
+""")
+
+parser.add_argument("job", help="Job name for the scan")
+parser.add_argument("--dHF", action="store_true", help="Report on the delta-HF jobs")
+parser.add_argument("--dir", default=".", help="Directory containing the jobs (default .)")
+parser.add_argument("--geometry", help="Geometry file of the scan")
+parser.add_argument("--stale", type=float, default=24.0,
+                    help="Hours without a change to the log after which a running job"
+                    " is taken to have stalled (default 24)")
+parser.add_argument("--cache", help="Cache file (default <job>-status.json in the job directory)")
+parser.add_argument("--no-cache", action="store_true", help="Don't use a cache file")
+parser.add_argument("--list", nargs="+", default=[],
+                    choices=["queued", "running", "stalled", "finished", "failed", "all"],
+                    help="List the jobs in these states")
+parser.add_argument("--failed", help="File for the names of the failed job directories")
+parser.add_argument("--scratch", help="File for the scratch directories of failed jobs")
+parser.add_argument("--resubmit", help="Geometry file for the failed points")
+
+args = parser.parse_args()
+
+import jobstatus
+from scandata import read_geometry
+
+if args.resubmit and not args.geometry:
+    parser.error("--resubmit needs --geometry")
+
+suffix = "_dHF" if args.dHF else ""
+if args.no_cache:
+    cache = None
+else:
+    cache = args.cache or os.path.join(args.dir, f"{args.job}{suffix}-status.json")
+
+try:
+    jobs = jobstatus.scan(args.job, args.dHF, args.dir, cache)
+    points = read_geometry(args.geometry) if args.geometry else []
+except (OSError, ValueError) as e:
+    print(e)
+    exit(1)
+
+now = time.time()
+for s in jobs:
+    if s.state == "running" and s.age(now) > 3600*args.stale:
+        s.state = "stalled"
+rerun = [s for s in jobs if s.state in ["failed", "stalled"]]
+scratch = [s.work for s in rerun if s.work and os.path.isdir(s.work)]
+
+counts = {state: 0 for state in jobstatus.states[:2] + ["stalled"] + jobstatus.states[2:]}
+for s in jobs:
+    counts[s.state] += 1
+print(f"{len(jobs)} jobs: " + ", ".join(f"{n} {state}" for state, n in counts.items()))
+if scratch:
+    print(f"{len(scratch)} failed jobs have left scratch directories")
+if args.geometry:
+    have = {s.index for s in jobs}
+    missing = [index for index, _ in points if index not in have]
+    print(f"{len(points)} points in {args.geometry}, {len(missing)} not submitted")
+
+if args.list:
+    show = jobstatus.states + ["stalled"] if "all" in args.list else args.list
+    for s in jobs:
+        if s.state not in show:
+            continue
+        details = []
+        if s.parts:
+            details.append("MOs for " + (" ".join(s.mos) if s.mos else "no parts")
+                           + f" of {' '.join(P for P in s.parts if P != 'C')}")
+        if s.state in ["running", "stalled"]:
+            details.append(f"log unchanged for {s.age(now)/3600:.1f} h")
+        if s.state in ["failed", "stalled"] and s.work and os.path.isdir(s.work):
+            details.append(f"scratch {s.work}")
+        print(f"{s.name:24s} {s.state:9s} {'; '.join(details)}".rstrip())
+
+try:
+    if args.failed:
+        with open(args.failed, "w") as OUT:
+            for s in rerun:
+                OUT.write(os.path.join(args.dir, s.name) if args.dir != "." else s.name)
+                OUT.write("\n")
+    if args.scratch:
+        with open(args.scratch, "w") as OUT:
+            for work in scratch:
+                OUT.write(f"{work}\n")
+    if args.resubmit:
+        again = {s.index for s in rerun}
+        with open(args.resubmit, "w") as OUT:
+            OUT.write(f"!  Failed points of {args.job}{suffix} from {args.geometry}\n")
+            for index, g in points:
+                if index in again:
+                    OUT.write(f"{index:>8s}  {'  '.join(g)}\n")
+except OSError as e:
+    print(e)
+    exit(1)
+sys.stdout.flush()
@@ -0,0 +1,286 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Tables of the results of a scan over dimer geometries.
+
+A scan is set up by batch_camcasp.py from a geometry file, with one line
+  index  Rx  Ry  Rz  alpha  Nx  Ny  Nz
+for each point, and the SAPT(DFT) job for each point is run in a
+directory <job>_<index> (and the delta-HF job in <job>_<index>_dHF). A
+Table holds, for each point, its index, the geometry variables and every
+energy term of the SAPT(DFT) summary file, with one column for each.
+Each energy column is named from its term, for example
+  E2_ind_A          E^{2}_{ind}(A), not regularized
+  E2_ind_exch_S2    E^{2}_{ind,exch}(S2)
+  E2_ind_A_reg3     E^{2}_{ind}(A), REG eta = 3.0
+and the delta-HF columns, where there is a delta-HF job, are
+  E_HF_int          E_AB - E_A - E_B from the delta-HF SCF calculations
+  dHF               E_HF_int - (E1_elst + E1_exch + E2_ind + E2_ind_exch),
+                    with the energy terms of the delta-HF job, as in
+                    extract_saptdft.py
+A column is NaN for the points that don't have that value.
+
+The table is saved as a NumPy .npz file, with one array for each column,
+and the arrays "columns" (column names, in order) and "unit" (the energy
+unit), and as a CSV file with a header line of column names. Either can be
+read back, and points added to it.
+
+provides functions:
+* read_geometry
+* column_name
+* point_values
+* interaction_energy
+* collect
+
+provides classes:
+* Table
+"""
+
+import csv
+import math
+import os
+import re
+
+import jobresults
+from compressed import exists
+
+#  Energy units, per hartree
+units = {
+"kj/mol": 2625.5,
+"cm-1":   219475.0,
+"au":          1.0,
+"hartree":     1.0,
+"ev":      27.2113,
+"mev":     27211.3,
+"k":       315773.0,
+"kelvin":  315773.0,
+"kcal/mol":627.510,
+}
+
+geometry = ["Rx", "Ry", "Rz", "alpha", "Nx", "Ny", "Nz"]
+
+#  Terms of the SAPT(DFT) interaction energy, as in extract_saptdft.py
+sapt_terms = ["E1_elst", "E1_exch", "E2_ind_A", "E2_ind_B", "E2_ind_exch_A",
+              "E2_ind_exch_B", "E2_disp", "E2_disp_exch"]
+
+
+def read_geometry(file):
+    """The points in a geometry file, as a list of (index, values), where
+    the index is a string and values are the strings on the rest of the
+    line. Blank lines and lines starting with ! or # are ignored, a line
+    "skip n" skips the next n points, and reading stops at a line "end"."""
+    points = []
+    skip = 0
+    with open(file) as GEOM:
+        for line in GEOM:
+            if re.match(r'\s*(!|#|$)', line):
+                continue
+            if re.match(r' *end', line, flags=re.I):
+                break
+            m = re.match(r' *skip +(\d+)', line, flags=re.I)
+            if m:
+                skip = int(m.group(1))
+                continue
+            if skip > 0:
+                skip -= 1
+                continue
+            g = line.split()
+            points.append((g[0], g[1:]))
+    return points
+
+
+def column_name(record):
+    """Column name for an energy term read by jobresults.summary_records,
+    or None if it isn't an energy term"""
+    if "order" not in record:
+        return None
+    name = f"E{record['order']}_{record['component'].replace(',', '_')}"
+    if record["S2"]:
+        name += "_S2"
+    if record["molecule"]:
+        name += "_" + record["molecule"]
+    if record["eta"] is not None:
+        name += f"_reg{record['eta']:g}"
+    return name
+
+
+def _records(dir, job):
+    """Energy terms of the job in directory dir, from the summary file, or
+    the results manifest if the summary file has gone; None if the job
+    hasn't finished"""
+    outdir = os.path.join(dir, "OUT")
+    summary = os.path.join(outdir, f"{job}-data-summary.data")
+    if exists(summary):
+        return jobresults.summary_records(summary), None
+    manifest = jobresults.load(outdir, job)
+    if manifest and manifest["status"] == "finished":
+        return manifest["energies"], manifest["scf_energies"]
+    return None, None
+
+
+def _energies(records, unit):
+    """Dictionary of energy columns, in the unit (per hartree)"""
+    values = {}
+    for r in records:
+        name = column_name(r)
+        if name is None or r["unit"].lower() not in units:
+            continue
+        n = 1
+        key = name
+        while key in values:
+            n += 1
+            key = f"{name}_{n}"
+        values[key] = r["value"]*unit/units[r["unit"].lower()]
+    return values
+
+
+def point_values(dir, job, unit="kJ/mol"):
+    """Energy columns for one point: the SAPT(DFT) job in dir, and the
+    delta-HF job in dir_dHF if there is one. None if neither has finished."""
+    u = units[unit.lower()]
+    records, scf = _records(dir, job)
+    values = _energies(records, u) if records else {}
+    if os.path.isdir(dir + "_dHF"):
+        records, scf = _records(dir + "_dHF", job)
+        if records:
+            if not scf:
+                manifest = jobresults.load(os.path.join(dir + "_dHF", "OUT"), job,
+                                           os.path.join(dir + "_dHF", "OUT",
+                                                        f"{job}-data-summary.data"))
+                scf = manifest["scf_energies"] if manifest else {}
+            if not all(scf.get(M) is not None for M in ["A", "B", "AB"]):
+                scf = {M: jobresults.scf_energy(os.path.join(dir + "_dHF", "OUT", f"{job}_{M}.out"))
+                       for M in ["A", "B", "AB"]}
+            terms = _energies(records, u)
+            if all(scf.get(M) is not None for M in ["A", "B", "AB"]):
+                ehf = (scf["AB"] - scf["A"] - scf["B"])*u
+                values["E_HF_int"] = ehf
+                try:
+                    values["dHF"] = ehf - terms["E1_elst"] - terms["E1_exch"] \
+                        - terms["E2_ind"] - terms["E2_ind_exch"]
+                except KeyError:
+                    pass
+    return values or None
+
+
+def interaction_energy(values, dhf=False):
+    """The SAPT(DFT) interaction energy E2int from the energy columns of a
+    point, or Eint = E2int + dHF if dhf is true; None if a term is missing"""
+    terms = sapt_terms + (["dHF"] if dhf else [])
+    if any(values.get(t) is None or math.isnan(values[t]) for t in terms):
+        return None
+    return sum(values[t] for t in terms)
+
+
+class Table:
+    """The values for the points of a scan, by column"""
+    def __init__(self, unit="kJ/mol"):
+        self.unit = unit
+        self.points = []       # Index of each point, as a string
+        self.columns = {}      # List of values for each column, by name
+        self.rows = {}         # Row number of each point
+
+    def __len__(self):
+        return len(self.points)
+
+    def __contains__(self, point):
+        return point in self.rows
+
+    def complete(self, point):
+        """Whether the point is in the table with no missing values"""
+        row = self.rows.get(point)
+        return row is not None and not any(math.isnan(v[row]) for v in self.columns.values())
+
+    def add(self, point, values):
+        """Add the point with a dictionary of values, or replace it"""
+        row = self.rows.get(point)
+        if row is None:
+            row = len(self.points)
+            self.rows[point] = row
+            self.points.append(point)
+            for v in self.columns.values():
+                v.append(math.nan)
+        for name, value in values.items():
+            if name not in self.columns:
+                self.columns[name] = [math.nan]*len(self.points)
+            self.columns[name][row] = value
+
+    def names(self):
+        """Column names: the geometry, then the energy terms in the order
+        in which they were first found"""
+        return [c for c in geometry if c in self.columns] \
+            + [c for c in self.columns if c not in geometry]
+
+    def save_npz(self, file):
+        import numpy as np
+        names = self.names()
+        arrays = {name: np.array(self.columns[name], dtype=float) for name in names}
+        tmp = file + ".part.npz"
+        np.savez(tmp, point=np.array(self.points, dtype=str),
+                 columns=np.array(names, dtype=str), unit=np.array(self.unit), **arrays)
+        os.replace(tmp, file)
+
+    def save_csv(self, file):
+        names = self.names()
+        tmp = file + ".part"
+        with open(tmp, "w", newline="") as OUT:
+            w = csv.writer(OUT)
+            w.writerow(["point"] + [f"{name} [{self.unit}]" if name not in geometry else name
+                                    for name in names])
+            for row, point in enumerate(self.points):
+                w.writerow([point] + [repr(self.columns[name][row]) for name in names])
+        os.replace(tmp, file)
+
+    @classmethod
+    def load(cls, file):
+        """Read a table saved as an .npz or CSV file"""
+        if file.endswith(".npz"):
+            import numpy as np
+            with np.load(file, allow_pickle=False) as data:
+                table = cls(str(data["unit"]))
+                table.points = [str(p) for p in data["point"]]
+                table.rows = {p: i for i, p in enumerate(table.points)}
+                for name in data["columns"]:
+                    table.columns[str(name)] = data[str(name)].tolist()
+            return table
+        with open(file, newline="") as IN:
+            r = csv.reader(IN)
+            header = next(r)
+            table = cls()
+            names = []
+            for h in header[1:]:
+                m = re.match(r'(\S+) \[(.+)\]$', h)
+                if m:
+                    table.unit = m.group(2)
+                names.append(m.group(1) if m else h)
+            table.columns = {name: [] for name in names}
+            for row in r:
+                table.rows[row[0]] = len(table.points)
+                table.points.append(row[0])
+                for name, v in zip(names, row[1:]):
+                    table.columns[name].append(float(v))
+        return table
+
+
+def collect(job, geomfile, root=".", table=None, unit="kJ/mol", report=None):
+    """Add the points of the scan <job> in directory root, with the geometry
+    in geomfile, to the table (a new Table if not given). Points already in
+    the table with all their values are not read again. Returns the table
+    and the number of points read."""
+    if table is None:
+        table = Table(unit)
+    unit = table.unit
+    read = 0
+    for index, g in read_geometry(geomfile):
+        if table.complete(index):
+            continue
+        values = point_values(os.path.join(root, f"{job}_{index}"), f"{job}_{index}", unit)
+        if values is None:
+            if report:
+                report(f"No results for {job}_{index}")
+            continue
+        values.update({c: float(v) for c, v in zip(geometry, g)})
+        table.add(index, values)
+        read += 1
+    return table, read
@@ -0,0 +1,155 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Quasi-random geometries for dimer scans.
+
+A dimer geometry is given, as in the geometry files for batch_camcasp.py,
+by the position (Rx, Ry, Rz) of the origin of molecule B and a rotation of
+B by alpha degrees about (Nx, Ny, Nz). Six numbers in [0, 1) fix a
+geometry: two give the direction of R, uniformly over the sphere, three
+give the orientation of B, uniformly over the rotation group SO(3) by
+Shoemake's construction of a random unit quaternion, and the last gives
+the distance. The distances are divided into shells, and the share of
+the points in each shell can be chosen, so that the density of points is
+greatest where it is needed. Taking the six numbers from a
+low-discrepancy sequence (Sobol or Halton) rather than at random covers
+the space of geometries more evenly, so that fewer points are needed; any
+leading part of such a sequence is itself evenly spread, so points
+rejected by a screen can be replaced by taking more of the sequence.
+
+The sequences can be randomized by a random shift modulo 1 (a
+Cranley-Patterson rotation), which keeps their uniformity, so that
+different seeds give independent sets of points.
+
+provides functions:
+* halton
+* sobol
+* sequence
+* directions
+* orientations
+* distances
+* geometries
+"""
+
+import numpy as np
+
+_primes = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+
+#  Sobol direction numbers (Joe and Kuo) for dimensions 2 to 8: degree s,
+#  coefficients a and initial m_1 ... m_s of the primitive polynomials
+_sobol = [(1, 0, [1]), (2, 1, [1, 3]), (3, 1, [1, 3, 1]), (3, 2, [1, 1, 1]),
+          (4, 1, [1, 1, 3, 3]), (4, 4, [1, 3, 5, 13]), (5, 2, [1, 1, 5, 5, 17])]
+_bits = 32
+
+
+def halton(n, dim, skip=0):
+    """The points skip ... skip+n-1 of the Halton sequence in dim dimensions,
+    array (n, dim)"""
+    if dim > len(_primes):
+        raise ValueError(f"At most {len(_primes)} dimensions")
+    i = np.arange(skip + 1, skip + n + 1, dtype=np.int64)
+    x = np.zeros((n, dim))
+    for d, b in enumerate(_primes[:dim]):
+        k = i.copy()
+        f = 1.0/b
+        while np.any(k > 0):
+            x[:, d] += f*(k % b)
+            k //= b
+            f /= b
+    return x
+
+
+def _directions(dim):
+    """Sobol direction numbers, array (dim, bits) of integers"""
+    V = np.zeros((dim, _bits), dtype=np.uint64)
+    V[0] = [1 << (_bits - 1 - k) for k in range(_bits)]
+    for d in range(1, dim):
+        s, a, m = _sobol[d-1]
+        v = [m[k] << (_bits - 1 - k) for k in range(s)]
+        for k in range(s, _bits):
+            w = v[k-s] ^ (v[k-s] >> s)
+            for j in range(1, s):
+                if (a >> (s - 1 - j)) & 1:
+                    w ^= v[k-j]
+            v.append(w)
+        V[d] = v
+    return V
+
+
+def sobol(n, dim, skip=0):
+    """The points skip ... skip+n-1 of the Sobol sequence in dim dimensions,
+    array (n, dim), using the Gray-code order"""
+    if dim > len(_sobol) + 1:
+        raise ValueError(f"At most {len(_sobol) + 1} dimensions")
+    V = _directions(dim)
+    i = np.arange(skip, skip + n, dtype=np.uint64)
+    gray = i ^ (i >> np.uint64(1))
+    x = np.zeros((n, dim), dtype=np.uint64)
+    for k in range(_bits):
+        bit = ((gray >> np.uint64(k)) & np.uint64(1)).astype(bool)
+        x[bit] ^= V[:, k]
+    return x.astype(float)/2.0**_bits
+
+
+def sequence(method, n, dim, skip=0, seed=None):
+    """n points in [0, 1)^dim from the "sobol", "halton" or "random"
+    sequence. With a seed, the quasi-random sequences are shifted at random
+    modulo 1."""
+    rng = np.random.default_rng(seed)
+    if method == "random":
+        return rng.random((n, dim))
+    if method == "sobol":
+        u = sobol(n, dim, skip)
+    elif method == "halton":
+        u = halton(n, dim, skip)
+    else:
+        raise ValueError(f"Unknown sequence {method}")
+    if seed is not None:
+        u = (u + rng.random(dim)) % 1.0
+    return u
+
+
+def directions(u):
+    """Unit vectors (n, 3), uniform over the sphere for u (n, 2) uniform"""
+    z = 1.0 - 2.0*u[:, 0]
+    phi = 2.0*np.pi*u[:, 1]
+    s = np.sqrt(np.maximum(0.0, 1.0 - z*z))
+    return np.stack([s*np.cos(phi), s*np.sin(phi), z], axis=1)
+
+
+def orientations(u):
+    """Rotations uniform over SO(3) for u (n, 3) uniform, as angles alpha in
+    degrees (n) and unit axes (n, 3)"""
+    a, b = np.sqrt(1.0 - u[:, 0]), np.sqrt(u[:, 0])
+    t1, t2 = 2.0*np.pi*u[:, 1], 2.0*np.pi*u[:, 2]
+    q = np.stack([b*np.cos(t2), a*np.sin(t1), a*np.cos(t1), b*np.sin(t2)], axis=1)
+    #  q and -q are the same rotation: take the one with angle <= 180
+    q[q[:, 0] < 0] *= -1.0
+    alpha = np.degrees(2.0*np.arccos(np.clip(q[:, 0], -1.0, 1.0)))
+    s = np.linalg.norm(q[:, 1:], axis=1)
+    N = np.where(s[:, None] > 1e-12, q[:, 1:]/np.where(s > 1e-12, s, 1.0)[:, None],
+                 [0.0, 0.0, 1.0])
+    return alpha, N
+
+
+def distances(u, edges, weights=None):
+    """Distances for u (n) uniform in [0, 1), in the shells between
+    successive edges, with the fraction of the points in each shell
+    proportional to its weight (default its width), and uniform within it.
+    Returns the distances and the shell of each."""
+    edges = np.asarray(edges, dtype=float)
+    w = np.diff(edges) if weights is None else np.asarray(weights, dtype=float)
+    cum = np.concatenate([[0.0], np.cumsum(w)/np.sum(w)])
+    shell = np.clip(np.searchsorted(cum, u, side="right") - 1, 0, len(w) - 1)
+    f = (u - cum[shell])/np.where(w[shell] > 0, cum[shell+1] - cum[shell], 1.0)
+    return edges[shell] + f*(edges[shell+1] - edges[shell]), shell
+
+
+def geometries(u, edges, weights=None):
+    """Geometries (n, 7): Rx, Ry, Rz, alpha, Nx, Ny, Nz, for u (n, 6) in
+    [0, 1), with distances in the shells given by edges and weights (see
+    distances). Returns the geometries and the shell of each."""
+    r, shell = distances(u[:, 5], edges, weights)
+    alpha, N = orientations(u[:, 2:5])
+    return np.hstack([r[:, None]*directions(u[:, :2]), alpha[:, None], N]), shell
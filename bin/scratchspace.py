@@ -0,0 +1,185 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Choose the scratch directory for the work files of a job.
+
+Each job runs in a work directory <root>/<job> (or <root>/<job>_NN if
+that exists already), where the SCF codes write their integral and
+scratch files. Only the results are copied back to the job directory, so
+the work directory can be on any filesystem that the node can see.
+Several scratch roots may be given in camcasp.rc by lines
+  scratch <directory> [local|tmpfs|shared]
+(node-local disk, memory-backed tmpfs, or a shared filesystem such as
+Lustre or NFS; if the kind isn't given, it is found from the filesystem
+type in /proc/mounts). $SCRATCH, or the --scratch directory, is always a
+candidate as well.
+
+The scratch space that a job needs is estimated by jobmodel.scratch_gb,
+from the basis size and whether the SCF calculations are direct. A
+tmpfs root is used if the job needs only a small part of its space, since
+it takes memory from the job itself; otherwise the first local root with
+room for the job, then the first shared one. If none has room, the one
+with the most free space is used, with a warning. The space promised to
+jobs already placed by the same Placement (in jobsupervisor.py, jobs
+running at the same time) is set against the free space.
+
+provides functions:
+* filesystem_type
+* kind
+* roots
+* check
+
+provides classes:
+* Root
+* Placement
+"""
+
+import os
+import shutil
+
+import jobmodel
+
+GB = 1024**3
+
+_shared = ["lustre", "nfs", "nfs4", "gpfs", "beegfs", "cifs", "smb3", "panfs",
+           "ceph", "glusterfs", "fuse.glusterfs", "fuse.sshfs"]
+_rank = {"tmpfs": 0, "local": 1, "shared": 2}
+
+
+def filesystem_type(path):
+    """Type of the filesystem containing path, from /proc/mounts, or None"""
+    path = os.path.realpath(path)
+    best, fstype = "", None
+    try:
+        with open("/proc/mounts") as M:
+            for line in M:
+                words = line.split()
+                if len(words) < 3:
+                    continue
+                mount = words[1].replace("\\040", " ")
+                if (path == mount or path.startswith(mount.rstrip("/") + "/")) \
+                        and len(mount) >= len(best):
+                    best, fstype = mount, words[2]
+    except OSError:
+        pass
+    return fstype
+
+
+def kind(path):
+    """tmpfs, local or shared, for the filesystem containing path"""
+    fstype = filesystem_type(path)
+    if fstype in ["tmpfs", "ramfs"]:
+        return "tmpfs"
+    if fstype in _shared:
+        return "shared"
+    return "local"
+
+
+class Root:
+    """A directory in which work directories can be made"""
+    def __init__(self, path, kind=None):
+        self.path = os.path.abspath(os.path.expandvars(os.path.expanduser(path)))
+        self._kind = kind
+
+    @property
+    def kind(self):
+        if not self._kind:
+            self._kind = kind(self.path)
+        return self._kind
+
+    def free_gb(self):
+        """Free space in GB, or None if the directory can't be used"""
+        try:
+            os.makedirs(self.path, exist_ok=True)
+            return shutil.disk_usage(self.path).free/GB
+        except OSError:
+            return None
+
+    def __str__(self):
+        return f"{self.path} ({self.kind})"
+
+
+def roots(configured, default=None):
+    """Roots for the (directory, kind) pairs from camcasp.rc, followed by
+    the default directory if it isn't one of them"""
+    result = [Root(path, kind) for path, kind in configured]
+    if default and os.path.realpath(default) not in [os.path.realpath(r.path) for r in result]:
+        result.append(Root(default))
+    return result
+
+
+class Placement:
+    """Chooses scratch roots for jobs, keeping account of the space promised
+    to the jobs that it has placed and not yet released"""
+    def __init__(self, roots, margin=0.2, reserve_gb=1.0, tmpfs_fraction=0.25):
+        self.roots = roots
+        self.margin = margin                  # Fraction added to the estimate
+        self.reserve_gb = reserve_gb          # Space always to be left free
+        self.tmpfs_fraction = tmpfs_fraction  # Largest share of a tmpfs for one job
+        self.promised = {}                    # GB promised in each root
+        self.placed = {}                      # (root, GB) for each job placed
+
+    def choose(self, need_gb):
+        """The Root for a job needing need_gb GB, and a warning (or "") if
+        it isn't expected to fit in any of them"""
+        need = need_gb*(1 + self.margin) + self.reserve_gb
+        space = {}
+        for root in self.roots:
+            free = root.free_gb()
+            if free is not None:
+                space[root] = free - self.promised.get(root.path, 0.0)
+        if not space:
+            raise OSError("None of the scratch directories can be used: "
+                          + ", ".join(r.path for r in self.roots))
+        fits = [root for root in space if space[root] >= need
+                and (root.kind != "tmpfs" or need <= self.tmpfs_fraction*space[root])]
+        if fits:
+            return min(fits, key=lambda r: _rank[r.kind]), ""
+        root = max(space, key=lambda r: space[r])
+        return root, (f"WARNING: the job may need {need_gb:.1f} GB of scratch space,"
+                      f" but at most {max(space[root], 0):.1f} GB is free (in {root.path}).")
+
+    def place(self, job):
+        """Set job.work and job.scratch_gb for the job, and promise it the
+        space. Returns a warning, or "" if there is room for it."""
+        job.scratch_gb = jobmodel.scratch_gb(job.spec, job.runtype, job.scfcode, job.direct)
+        root, warning = self.choose(job.scratch_gb)
+        if warning and not job.direct:
+            warning += " It would need less with --direct."
+        job.work = os.path.join(root.path, job.name)
+        self.promised[root.path] = self.promised.get(root.path, 0.0) + job.scratch_gb
+        self.placed[job.name] = (root.path, job.scratch_gb)
+        return warning
+
+    def release(self, job):
+        """The job has finished with its scratch space"""
+        if job.name in self.placed:
+            path, gb = self.placed.pop(job.name)
+            self.promised[path] = max(self.promised[path] - gb, 0.0)
+
+
+def _usage_gb(dir):
+    """Space used by the files in dir, not following links"""
+    total = 0
+    for root, dirs, files in os.walk(dir):
+        for f in files:
+            try:
+                total += os.lstat(os.path.join(root, f)).st_blocks*512
+            except OSError:
+                pass
+    return total/GB
+
+
+def check(work, need_gb, reserve_gb=1.0):
+    """A warning if the scratch directory work hasn't room for the rest of
+    the job's files, otherwise "" """
+    try:
+        free = shutil.disk_usage(work).free/GB
+    except OSError:
+        return ""
+    more = max(need_gb - _usage_gb(work), 0.0) if need_gb else 0.0
+    if free < more + reserve_gb:
+        return (f"WARNING: only {free:.1f} GB free in the scratch directory {work};"
+                f" the job may need {more:.1f} GB more")
+    return ""
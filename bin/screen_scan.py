@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Screen the points of a scan geometry file by their long-range energies.
+"""
+
+import argparse
+import sys
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Screen the points of a scan geometry file by their long-range energies.
+""",epilog="""
+The geometry file is one for batch_camcasp.py, with lines
+  index  Rx  Ry  Rz  alpha  Nx  Ny  Nz
+The long-range energy of each point -- electrostatic, induction and
+dispersion, from the multipole expansion -- is evaluated for all the
+points together with NumPy (see longrange.py), and the points are kept
+only if the magnitude of the total is between --min and --max (in the
+--unit unit, default kJ/mol). Points with a very large long-range energy
+are usually inside the repulsive wall, or near it, where the multipole
+expansion isn't valid, and points with a very small one are too far away
+to matter in a fit, so neither is worth a SAPT(DFT) calculation. Points
+where two sites are closer than --rmin bohr are rejected too. The points
+kept are written to the --output file with their original indices, so the
+job names are the same as for the full scan, e.g.
+
+  screen_scan.py H2O2.geom --mom H2O.mom --pol H2O_static.pol \\
+      --pot H2O_C10.pot --output H2O2-screened.geom
+  batch_camcasp.py H2O2 H2O2.clt H2O2-screened.geom
+
+The --mom file gives the distributed multipoles of molecule A, in the
+Orient format written by the DMA and ISA modules, and --momB those of
+molecule B, if it is different. The --pol and --polB files give the local
+polarizabilities, in the Orient format written by localize.py or the
+CamCASP format B; only the static (first) set is used. Without them there
+is no induction energy. By default only the isotropic dipole-dipole
+polarizability of each site is used; with --full-pol the whole local
+polarizability matrix is used, and it must then be given in the axes of
+the molecule. The --pot file gives the dispersion coefficients from
+casimir; only the isotropic C6, C8 and C10 are used, damped by
+Tang-Toennies functions if --beta is given. Without it there is no
+dispersion energy. Multipoles above --rank (default 4, the greatest
+allowed) are left out.
+
+The geometry variables are in bohr, unless --angstrom is given, and
+alpha in degrees, and must be those of the molecule axes used for the
+multipoles. With --table, the energies of every point are written to the
+file, with a column "keep" that is 1 for the points kept, for inspection.
+""")
+
+parser.add_argument("geomfile", help="Geometry file for the scan")
+parser.add_argument("--mom", required=True, help="Multipole file for molecule A")
+parser.add_argument("--momB", help="Multipole file for molecule B (default as A)")
+parser.add_argument("--pol", help="Polarizability file for molecule A")
+parser.add_argument("--polB", help="Polarizability file for molecule B (default as A)")
+parser.add_argument("--pot", help="Dispersion coefficient file (.pot) from casimir")
+parser.add_argument("--beta", type=float, help="Tang-Toennies damping parameter (bohr^-1)")
+parser.add_argument("--full-pol", action="store_true",
+                    help="Use the full local polarizabilities, not just the isotropic part")
+parser.add_argument("--rank", type=int, default=4, help="Greatest multipole rank used")
+parser.add_argument("--min", type=float, default=0.1,
+                    help="Least magnitude of the long-range energy kept (default 0.1)")
+parser.add_argument("--max", type=float, default=100.0,
+                    help="Greatest magnitude of the long-range energy kept (default 100)")
+parser.add_argument("--rmin", type=float, default=0.0,
+                    help="Least site-site distance kept, in bohr (default 0)")
+parser.add_argument("--unit", "--units", help="Energy unit (default kJ/mol)",
+                    choices=["cm-1","kJ/mol","au","hartree","eV","meV","K","kelvin","kcal/mol"],
+                    default="kJ/mol")
+parser.add_argument("--angstrom", action="store_true",
+                    help="The geometry file distances are in angstrom")
+parser.add_argument("--output", "-o", required=True, help="Geometry file for the points kept")
+parser.add_argument("--table", help="File for the energies of all the points")
+parser.add_argument("--chunk", type=int, default=4096,
+                    help="Number of points evaluated together (default 4096)")
+
+args = parser.parse_args()
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy is needed for screen_scan.py")
+    exit(1)
+import longrange
+from scandata import read_geometry, units
+
+try:
+    A = longrange.read_mom(args.mom, args.rank)
+    B = longrange.read_mom(args.momB, args.rank) if args.momB else longrange.read_mom(args.mom, args.rank)
+    if args.pol:
+        longrange.read_pol(args.pol, A)
+    if args.polB or args.pol:
+        longrange.read_pol(args.polB or args.pol, B)
+    C6 = longrange.read_pot(args.pot) if args.pot else None
+    points = read_geometry(args.geomfile)
+    G = np.array([[float(v) for v in g[:7]] for _, g in points]).reshape(-1, 7)
+except (OSError, ValueError, longrange.LongRangeError) as e:
+    print(e)
+    exit(1)
+
+if args.angstrom:
+    G[:, :3] /= longrange.BOHR
+E = longrange.energies(A, B, G, C6, beta=args.beta, full=args.full_pol, chunk=args.chunk)
+scale = units[args.unit.lower()]
+total = (E["elst"] + E["ind"] + E["disp"])*scale
+keep = (np.abs(total) >= args.min) & (np.abs(total) <= args.max)
+rmin = longrange.closest_contact(A, B, G, chunk=args.chunk)
+keep &= rmin >= args.rmin
+
+with open(args.output, "w") as OUT:
+    OUT.write(f"!  {args.geomfile} screened by long-range energy,"
+              f" {args.min:g} <= |E| <= {args.max:g} {args.unit}\n")
+    OUT.write(f"!  {int(keep.sum())} of {len(points)} points kept\n")
+    for (index, g), k in zip(points, keep):
+        if k:
+            OUT.write(f"{index:>6s}  {'  '.join(g)}\n")
+
+if args.table:
+    with open(args.table, "w") as OUT:
+        OUT.write(f"!  Long-range energies in {args.unit}, site-site distances in bohr\n")
+        OUT.write(f"!{'index':>7s} {'Eelst-MP':>12s} {'Eind-MP':>12s} {'Edisp-MP':>12s}"
+                  f" {'Etotal-MP':>12s} {'Rmin':>8s} keep\n")
+        for i, (index, g) in enumerate(points):
+            OUT.write(f"{index:>8s} {E['elst'][i]*scale:12.5f} {E['ind'][i]*scale:12.5f}"
+                      f" {E['disp'][i]*scale:12.5f} {total[i]:12.5f} {rmin[i]:8.3f}"
+                      f" {int(keep[i]):4d}\n")
+
+print(f"{int(keep.sum())} of {len(points)} points kept")
+sys.stdout.flush()
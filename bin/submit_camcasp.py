@@ -42,7 +42,8 @@ system. The required header can be specified by the environment variable
 SCHEDULER, or by the --scheduler option on the command line. If the Linux
 batch queue is to be used, ensure that the SCHEDULER variable is unset.
 
-The --queue and --scheduler options, if present, must precede all other arguments.
+The --queue, --scheduler and --walltime options, if present, must precede
+all other arguments.
 The runcamcasp.py job name must be the first of the remaining (runcamcasp.py)
 arguments.
 
@@ -58,6 +59,8 @@ scheduler = os.getenv("SCHEDULER", "")
 parser.add_argument("job", help="camcasp job name")
 parser.add_argument("--queue", "-q", help="Job queue to use")
 parser.add_argument("--scheduler", "--sched", help="Name of scheduler header to use")
+parser.add_argument("--walltime", default="4:00:00",
+                    help="Wall time to request from the scheduler (H:MM:SS)")
                     
 # runcamcasp.py arguments
 parser.add_argument("arglist", nargs=argparse.REMAINDER,
@@ -130,7 +133,7 @@ argstring = " ".join(arglist)
 # print argstring
 
 #  Construct the job script
-header = get_header(scheduler,args.job,queue,nproc,memory_gb)
+header = get_header(scheduler,args.job,queue,nproc,memory_gb,args.walltime)
 jobscr = os.path.join(here,dir+".sh")
 with open(jobscr,"w") as S:
     S.write(header)
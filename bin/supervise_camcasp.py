@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Run many CamCASP jobs at once, in one process, within a budget of cores and memory.
+"""
+
+import argparse
+import glob
+import os
+import re
+
+import hardware
+import jobmodel
+import scratchspace
+from camrc import CamRC
+from camcasp_run import JobError
+from jobsupervisor import Supervisor, prepare_job
+
+if not os.environ.get("CAMCASP"):
+    print("Error: Environment variable CAMCASP has not been defined. Cannot proceed.")
+    exit(1)
+
+resources = hardware.detect()
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Run many CamCASP jobs at once, in one process, within a budget of cores and memory.
+""",epilog="""
+E.g.
+  supervise_camcasp.py H2O2_scan_* --cores 32 --memory 120
+  supervise_camcasp.py --manifest jobs.txt
+
+Each argument is a job directory whose files have been set up by
+runcamcasp.py --setup (batch_camcasp.py --template-mode sets up all the
+jobs of a scan in this way). Arguments that are not directories are
+ignored, as by extract_saptdft.py. Each job is run as runcamcasp.py
+--restart would run it, with the same files, log and results in the job
+directory, but all the jobs are run by this one process: the SCF, interface
+and CamCASP programs of all of them are started as the budget allows, so
+that while one job waits for its SCF calculation, others can be running
+theirs.
+
+The budget is --cores cores and --memory GB, by default all the cores and
+the available memory of this node. Each SCF calculation takes the number
+of cores given to the SCF code (--job-cores, or as for runcamcasp.py from
+camcasp.rc or $CORES), CamCASP takes --cores-camcasp cores, and both take
+the memory given to the job (--job-memory, or from camcasp.rc, or as
+estimated from the profile records of earlier jobs, as by runcamcasp.py
+--setup, or 8 GB). A program is not started until its cores and memory
+are free, so the node is never over-committed. At most --jobs jobs (by
+default, --cores) are under way at once.
+
+Jobs that have already finished (their OUT/<job>.log says "Job <job>
+finished") are skipped, so that the command can be repeated after
+failures have been fixed. The rest are run longest first, according to
+the profile estimates.
+
+Each job's scratch files are written under the --scratch directory if
+given, otherwise under $SCRATCH or one of the scratch directories listed
+in camcasp.rc, chosen as the job starts (see runcamcasp.py --help), with
+allowance for the space expected to be used by the jobs already running.
+
+A line is printed whenever a job starts, finishes or fails, with the
+numbers of jobs in each state and the cores and memory in use; with -v, also
+when each part of a job starts, and with -vv, all the messages written to
+the job logs. The exit code is 0 if all the jobs finished and 1 otherwise.
+""")
+
+parser.add_argument("dirs", nargs="*", default=[], help="Job directories")
+parser.add_argument("--manifest", help="File listing job directories")
+parser.add_argument("--cores", type=int, default=resources.usable_cores(),
+                    help="Cores for all the jobs (default all the usable cores)")
+parser.add_argument("--memory", type=float, default=int(resources.usable_memory_gb()),
+                    help="Memory for all the jobs, in GB (default the available memory)")
+parser.add_argument("--jobs", type=int, default=0,
+                    help="Largest number of jobs under way at once (default --cores)")
+parser.add_argument("--job-cores", type=int, default=0,
+                    help="Cores for each SCF calculation")
+parser.add_argument("--cores-camcasp", type=int, default=0,
+                    help="Cores for each CamCASP calculation")
+parser.add_argument("--job-memory", "-M", type=int, default=0,
+                    help="Memory for each job in GB")
+parser.add_argument("--scratch",
+                    help="Scratch directory (default $SCRATCH or those in camcasp.rc)")
+parser.add_argument("--scfcode", help="Specify scfcode",
+                    choices=["dalton2006", "dalton", "dalton2013", "dalton2015",
+                             "dalton2016", "nwchem", "psi4", "molpro"])
+parser.add_argument("--direct", action="store_true", help="Use direct integral management")
+parser.add_argument("--debug", action="store_true", help="Don't delete scratch files")
+parser.add_argument("--interval", type=float, default=1.0,
+                    help="Seconds between samples of the memory used by each program")
+parser.add_argument("--verbose", "-v", action="count", default=0,
+                    help="Report the progress of each job in more detail")
+args = parser.parse_args()
+
+dirs = list(args.dirs)
+if args.manifest:
+    with open(args.manifest) as M:
+        dirs.extend(line.strip() for line in M if line.strip() and not line.startswith("#"))
+if not dirs:
+    parser.error("No job directories given")
+
+
+def finished(dir):
+    """True if the job in dir has finished"""
+    for log in glob.glob(os.path.join(dir, "OUT", "*.log")):
+        job = os.path.basename(log)[:-4]
+        with open(log, errors="replace") as LOG:
+            if re.search(rf'^Job {re.escape(job)} finished', LOG.read(), flags=re.M):
+                return True
+    return False
+
+
+camrc = CamRC()
+camrc.read_camcasprc()
+if args.scratch:
+    roots = [scratchspace.Root(args.scratch)]
+else:
+    roots = scratchspace.roots(camrc.scratch_roots, os.environ.get("SCRATCH"))
+if not roots:
+    print("Error: Environment variable SCRATCH has not been defined, and --scratch not given.")
+    exit(1)
+jobs = []
+done = 0
+failed = 0
+for dir in dirs:
+    if not os.path.isdir(dir):
+        continue
+    if finished(dir):
+        done += 1
+        continue
+    try:
+        jobs.append(prepare_job(dir, roots[0].path, camrc, cores=args.job_cores,
+                                cores_camcasp=args.cores_camcasp, memory=args.job_memory,
+                                scfcode=args.scfcode, direct=args.direct,
+                                debug=args.debug, verbosity=max(args.verbose - 1, 0)))
+    except JobError as e:
+        print(f"{dir}: {e}")
+        failed += 1
+if done:
+    print(f"{done} jobs have already finished")
+if not jobs:
+    exit(1 if failed else 0)
+
+predictor = jobmodel.Predictor.load()
+estimates = {job.name: predictor.estimate(job.spec, job.runtype, job.scfcode,
+                                          job.cores, job.cores_camcasp).time
+             for job in jobs}
+jobs.sort(key=lambda job: estimates[job.name], reverse=True)
+
+print(f"Running {len(jobs)} jobs with {args.cores} cores and {args.memory:g} GB")
+supervisor = Supervisor(args.cores, args.memory, max_jobs=args.jobs,
+                        interval=args.interval, verbosity=args.verbose,
+                        placement=scratchspace.Placement(roots))
+try:
+    failed += supervisor.run_all(jobs)
+except KeyboardInterrupt:
+    print("Interrupted")
+    exit(1)
+
+if supervisor.errors:
+    print("Failed jobs:")
+    for name, error in supervisor.errors.items():
+        print(f"  {name}: {error}")
+n_finished = done + sum(1 for state in supervisor.status.values() if state == "finished")
+print(f"{n_finished} jobs finished, {failed} failed")
+exit(1 if failed else 0)
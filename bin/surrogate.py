@@ -0,0 +1,152 @@
+#  Python 3 module for CamCASP
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Gaussian-process surrogate of the interaction energy over a dimer scan,
+for choosing the next points to calculate.
+
+Each geometry is described by the inverse distances 1/r_ab between the
+atoms a of A and b of B, placed as in the cluster-file template (see
+contacts.py). These do not change when the dimer as a whole is rotated or
+moved, and are largest, and vary most, at short range, where the energy
+does too. The energies are fitted by a Gaussian process with a squared
+exponential kernel on the scaled descriptors; the length scale and the
+noise are chosen from a grid by the log marginal likelihood. The fit
+gives, for each candidate point, the predicted energy and its standard
+deviation, and, in closed form, the leave-one-out error of each point
+fitted, whose r.m.s. value estimates the accuracy of the surrogate.
+
+Candidates are chosen in batches, each as the one that most reduces the
+total predictive variance over the candidates (estimated at a set of
+reference points spread through them). After each choice the variances
+and covariances are updated as though that point had been calculated,
+which does not need its energy, so a batch is spread out rather than
+clustered where the variance is largest. This gives a more accurate
+surrogate over the whole scan than choosing the points of greatest
+variance, which lie mostly at the edges of the space. Only NumPy is
+needed.
+
+provides functions:
+* descriptors
+* select
+
+provides classes:
+* GaussianProcess
+"""
+
+import numpy as np
+
+import contacts
+from scandata import geometry
+
+
+def descriptors(spec, G):
+    """Inverse atom-atom distances (points, atoms of A * atoms of B) for
+    the geometries G (points, 7) and the first two molecules of spec"""
+    if len(spec.molecules) < 2:
+        raise contacts.ContactError("The cluster file doesn't name two molecules")
+    values = dict(zip(geometry, np.asarray(G, dtype=float).T))
+    xa, _ = contacts.placed(spec, spec.molecules[0], values)
+    xb, _ = contacts.placed(spec, spec.molecules[1], values)
+    d = np.linalg.norm(xa[:, :, None, :] - xb[:, None, :, :], axis=3)
+    return 1.0/d.reshape(len(G), -1)
+
+
+def _sqdist(X, Y):
+    return np.maximum(0.0, np.einsum('ij,ij->i', X, X)[:, None]
+                      + np.einsum('ij,ij->i', Y, Y)[None, :] - 2.0*X @ Y.T)
+
+
+class GaussianProcess:
+    """Gaussian-process regression with a squared exponential kernel"""
+    def __init__(self, scales=(0.25, 0.5, 1.0, 2.0, 4.0), noises=(1e-8, 1e-6, 1e-4, 1e-2)):
+        self.scales = scales      # length scales, relative to the median distance
+        self.noises = noises      # noise variances, relative to the signal
+        self.length = None
+        self.noise = None
+
+    def fit(self, X, y):
+        self.shift = X.mean(axis=0)
+        self.scale = np.where(X.std(axis=0) > 0, X.std(axis=0), 1.0)
+        self.X = (X - self.shift)/self.scale
+        self.ymean, self.ystd = y.mean(), (y.std() if y.std() > 0 else 1.0)
+        t = (y - self.ymean)/self.ystd
+        D = _sqdist(self.X, self.X)
+        median = np.sqrt(np.median(D[D > 0])) if np.any(D > 0) else 1.0
+        best = None
+        for s in self.scales:
+            K0 = np.exp(-0.5*D/(s*median)**2)
+            for noise in self.noises:
+                try:
+                    L = np.linalg.cholesky(K0 + noise*np.eye(len(t)))
+                except np.linalg.LinAlgError:
+                    continue
+                a = np.linalg.solve(L.T, np.linalg.solve(L, t))
+                lml = -0.5*t @ a - np.sum(np.log(np.diag(L)))
+                if best is None or lml > best[0]:
+                    best = (lml, s*median, noise, L, a)
+        if best is None:
+            raise np.linalg.LinAlgError("No kernel could be factorized")
+        _, self.length, self.noise, self.L, self.alpha = best
+        return self
+
+    def _kernel(self, Xs):
+        return np.exp(-0.5*_sqdist((Xs - self.shift)/self.scale, self.X)/self.length**2)
+
+    def predict(self, Xs, chunk=4096):
+        """Predicted values and standard deviations for the points Xs"""
+        mean, std = np.empty(len(Xs)), np.empty(len(Xs))
+        for start in range(0, len(Xs), chunk):
+            k = self._kernel(Xs[start:start+chunk])
+            v = np.linalg.solve(self.L, k.T)
+            mean[start:start+chunk] = self.ymean + self.ystd*(k @ self.alpha)
+            std[start:start+chunk] = self.ystd*np.sqrt(np.maximum(0.0, 1.0 - np.sum(v*v, axis=0)))
+        return mean, std
+
+    def loo_errors(self):
+        """Leave-one-out errors of the points fitted"""
+        Linv = np.linalg.inv(self.L)
+        diag = np.sum(Linv*Linv, axis=0)
+        return self.ystd*self.alpha/diag
+
+
+def select(gp, Xs, k, exclude=None, reference=500, candidates=20000):
+    """Indices of k points of Xs to add to the fit, chosen one at a time as
+    the point that most reduces the total predictive variance at up to
+    reference points spread through Xs, with the variances updated after
+    each choice as though that point had been added. Only the points of
+    greatest variance, up to candidates of them, are considered. Points in
+    exclude are not chosen."""
+    Z = (Xs - gp.shift)/gp.scale
+    var = (gp.predict(Xs)[1]/gp.ystd)**2
+    if exclude is not None:
+        var[exclude] = -np.inf
+    cand = np.argsort(-var)[:candidates]
+    cand = cand[var[cand] > 1e-12]
+    ref = np.unique(np.linspace(0, len(Xs) - 1, min(reference, len(Xs))).astype(int))
+    both = np.concatenate([cand, ref])
+    V = np.linalg.solve(gp.L, gp._kernel(Xs[both]).T)
+    Vc, Vr = V[:, :len(cand)], V[:, len(cand):]
+    #  Posterior covariances of the reference points with the candidates,
+    #  and of the candidates with those already chosen
+    R = np.exp(-0.5*_sqdist(Z[ref], Z[cand])/gp.length**2) - Vr.T @ Vc
+    var = var[cand]
+    chosen = []
+    C = []
+    for _ in range(min(k, len(cand))):
+        score = np.sum(R*R, axis=0)/np.where(var > 1e-12, var, np.inf)
+        j = int(np.argmax(score))
+        if not score[j] > 0:
+            break
+        c = np.exp(-0.5*_sqdist(Z[cand], Z[cand[j]:cand[j]+1])[:, 0]/gp.length**2) \
+            - Vc.T @ Vc[:, j]
+        for cp in C:
+            c -= cp*cp[j]
+        c /= np.sqrt(var[j])
+        r = R[:, j]/np.sqrt(var[j])
+        C.append(c)
+        var = var - c*c
+        R -= np.outer(r, c)
+        var[j] = 0.0
+        chosen.append(int(cand[j]))
+    return chosen
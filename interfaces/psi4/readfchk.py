@@ -9,8 +9,13 @@ import re
 import os.path
 import string
 import numpy as np
+import sys
 # import subprocess
 
+#  The CamCASP bin directory, for the compressed module
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.realpath(__file__)), "..", "..", "bin"))
+from compressed import open_any
+
 parser = argparse.ArgumentParser(
 formatter_class=argparse.RawDescriptionHelpFormatter,
 description="""Read basis set and wavefunction information from an FCHK file.
@@ -23,6 +28,10 @@ It is important to provide a .sitenames file as CamCASP needs to have the
 correct site labels attached to the basis set definitions -- they are not
 included in the .fchk file. A .sites file can be used for a single-molecule
 calculation but not for sapt(dft) or delta-hf.
+
+The fchk file may have been compressed with gzip or zstd (e.g. by
+archive_results.py), in which case <file>.gz or <file>.zst is read if
+<file> itself isn't present.
 """)
 
 
@@ -160,7 +169,7 @@ if verbose:
   
 #  Now read the fchk file      
 nobeta = 0
-with open(args.fchk) as IN:
+with open_any(args.fchk) as IN:
   line = "--"
   while line != "":
     line = IN.readline()
@@ -10,6 +10,7 @@ import argparse
 import os
 # import string
 import subprocess
+import sys
 
 this = __file__
 parser = argparse.ArgumentParser(
@@ -17,12 +18,18 @@ formatter_class=argparse.RawDescriptionHelpFormatter,
 description="""Compare the results of the test with previous check results.
 """,epilog="""
 {} args
+
+The results are extracted into test_results and compared with
+check_results. They agree if each value differs from the check value by
+no more than the tolerance. The exit code is 0 if they agree, 3 if not.
 """.format(this))
 
 
 parser.add_argument("--scfcode", help="SCF code used for the test",
                     choices=["dalton","nwchem","psi4"], default="psi4")
-parser.add_argument("--difftool", help="Difference display program", default="xxdiff")
+parser.add_argument("--difftool", help="Difference display program", default="")
+parser.add_argument("--tolerance", type=float, default=1.0e-3,
+                    help="Tolerance for differences from the check results (default 0.001)")
 
 args = parser.parse_args()
 
@@ -38,5 +45,13 @@ with open("test_results","w") as TEST:
     subprocess.call("extract_saptdft.py *", stdout=TEST,
                     stderr=subprocess.STDOUT, shell=True)
 
-subprocess.call([args.difftool, "check_results", "test_results"])
+sys.path.insert(0, os.path.join(camcasp, "bin"))
+from comparator import compare_files
+
+result = compare_files("check_results", "test_results",
+                       abs_tol=args.tolerance, rel_tol=0.0)
+print(result.report())
+if args.difftool and not result.ok:
+    subprocess.call([args.difftool, "check_results", "test_results"])
+exit(result.exit_code())
 
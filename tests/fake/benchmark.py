@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Measure the overhead of setting up, running and extracting CamCASP jobs,
+using the stand-in SCF and CamCASP programs.
+"""
+
+import argparse
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+fake = os.path.dirname(os.path.realpath(__file__))
+root = os.path.dirname(os.path.dirname(fake))
+sys.path.insert(0, os.path.join(root, "bin"))
+
+from cltspec import parse_clt, standard_runtype, CltError
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Measure the orchestration overhead per job for batches of jobs.
+""",epilog="""
+Each batch of N jobs is a scan over the separation of the molecules in the
+cluster file (default the water dimer test). Every job is run by
+runcamcasp.py in the usual way, but with the stand-in cluster, nwchem,
+psi4 and camcasp programs in this directory, which take --seconds seconds
+for each calculation (default 0) instead of the time that the real
+programs would take. The results are then extracted from all the jobs by
+extract_saptdft.py. The time per job, less the time taken by the stand-in
+calculations, measures the cost of staging files, logging, running the
+interface programs and extraction, so that changes to these can be
+measured without the real programs.
+
+The jobs run in a private copy of the $CAMCASP tree (links to the files in
+this repository, without the no_<code> files and without any psi4.sh or
+nwchem.sh), with their own scratch directory, setup cache and profile
+file, all in the --dir directory, which is deleted at the end unless
+--keep is specified. Unless --keep is given, the MO files are also deleted
+as soon as each job is finished, so that large batches don't fill the
+disk.
+
+For example,
+  benchmark.py --jobs 1 100 --parallel 8 --basis aug-cc-pvdz
+Batches of 10000 jobs take some hours. Only NWChem and Psi4 are supported
+by the stand-in programs, and readfchk.py, used for Psi4, needs numpy.
+""")
+
+parser.add_argument("--jobs", type=int, nargs="+", default=[1, 100, 10000],
+                    help="Numbers of jobs in each batch")
+parser.add_argument("--parallel", type=int, default=os.cpu_count() or 1,
+                    help="Number of jobs to run at once")
+parser.add_argument("--clt", default=os.path.join(root, "tests", "H2O_dimer",
+                                                  "nwchem", "sapt-dft.clt"),
+                    help="Cluster file for the jobs")
+parser.add_argument("--scfcode", default="nwchem", choices=["nwchem", "psi4"],
+                    help="SCF code")
+parser.add_argument("--basis", help="Basis set to use instead of that in the cluster file")
+parser.add_argument("--seconds", type=float, default=0.0,
+                    help="Time taken by each stand-in calculation")
+parser.add_argument("--burn", action="store_true",
+                    help="Keep a CPU busy during the stand-in calculations"
+                    " instead of sleeping")
+parser.add_argument("--dir", default="orchestration-benchmark",
+                    help="Directory for the benchmark jobs")
+parser.add_argument("--keep", action="store_true",
+                    help="Keep the job directories and MO files")
+args = parser.parse_args()
+
+try:
+    spec = parse_clt(args.clt)
+except (CltError, OSError) as e:
+    print(e)
+    exit(1)
+if len(spec.molecules) != 2:
+    print("The cluster file must describe a calculation for two molecules")
+    exit(1)
+runtype = standard_runtype(spec.runtype) or "saptdft"
+#  Stand-in calculations per job: the SCF calculations and CamCASP
+steps = {"saptdft": 3, "sapt": 3, "deltahf": 4}.get(runtype, 3)
+with open(args.clt) as IN:
+    clt = IN.read()
+if args.basis:
+    clt = re.sub(r'^(\s*(?:Main-)?Basis\s+)\S+', rf'\g<1>{args.basis}', clt,
+                 flags=re.M | re.I)
+mol = spec.mols[spec.molecules[1]]
+place = mol.place or ["0.0", "0.0", "0.0"]
+
+bench = os.path.abspath(args.dir)
+if os.path.exists(bench):
+    if not os.path.exists(os.path.join(bench, ".benchmark")):
+        print(f"{bench} exists and was not made by this script")
+        exit(1)
+    shutil.rmtree(bench)
+os.makedirs(bench)
+open(os.path.join(bench, ".benchmark"), "w").close()
+
+#  Private CamCASP tree
+camcasp = os.path.join(bench, "CAMCASP")
+os.makedirs(os.path.join(camcasp, "bin"))
+for f in os.listdir(root):
+    if f not in ["bin"] and not f.startswith("."):
+        os.symlink(os.path.join(root, f), os.path.join(camcasp, f))
+for f in os.listdir(os.path.join(root, "bin")):
+    if not f.startswith("no_") and f not in ["psi4.sh", "nwchem.sh", "dalton.sh", "molpro.sh"]:
+        os.symlink(os.path.join(root, "bin", f), os.path.join(camcasp, "bin", f))
+env = dict(os.environ)
+env.update({
+    "CAMCASP": camcasp,
+    "PATH": os.pathsep.join([fake, os.path.join(camcasp, "bin"), env.get("PATH", "")]),
+    "PSI4_HOME": fake,
+    "SCRATCH": os.path.join(bench, "scratch"),
+    "CAMCASP_SETUP_CACHE": os.path.join(bench, "cache"),
+    "CAMCASP_PROFILES": os.path.join(bench, "profiles.jsonl"),
+    "FAKE_SECONDS": str(args.seconds),
+    "FAKE_MODE": "burn" if args.burn else "sleep",
+})
+os.makedirs(env["SCRATCH"])
+
+
+def run(batch, n, i):
+    """Set up and run job i of the batch; returns (name, rc, seconds)"""
+    name = f"job{i:05d}"
+    #  Move the second molecule along z by up to 2 bohr over the batch
+    z = float(place[2]) + 2.0*i/max(n, 1)
+    text = re.sub(rf'^(\s*Place\s+{re.escape(mol.name)}\s+at\s+\S+\s+\S+\s+)\S+',
+                  rf'\g<1>{z:.6f}', clt, flags=re.M | re.I)
+    with open(os.path.join(batch, f"{name}.clt"), "w") as CLT:
+        CLT.write(text)
+    t = perf_counter()
+    with open(os.path.join(batch, f"{name}.log"), "w") as LOG:
+        rc = subprocess.call(["runcamcasp.py", name, "--clt", f"{name}.clt", "-d", name,
+                              "--scfcode", args.scfcode, "--ifexists", "delete",
+                              "--cores", "1", "--cores-camcasp", "1", "-M", "1"],
+                             cwd=batch, env=env, stdout=LOG, stderr=subprocess.STDOUT)
+    t = perf_counter() - t
+    if not args.keep:
+        d = os.path.join(batch, name)
+        for f in os.listdir(d) if os.path.isdir(d) else []:
+            if re.search(r'movecs$|\.fchk$|\.basis$', f):
+                os.remove(os.path.join(d, f))
+    return name, rc, t
+
+
+print(f"Run-type {runtype}, SCF code {args.scfcode}, {args.parallel} jobs at a time,"
+      f" {args.seconds} s per stand-in calculation")
+print(f"{'Jobs':>6s} {'Failed':>6s} {'Total s':>9s} {'Job s':>8s} {'Median s':>8s}"
+      f" {'Overhead s':>10s} {'Jobs/s':>7s} {'Extract s':>9s} {'ms/job':>7s}")
+for n in args.jobs:
+    batch = os.path.join(bench, f"batch_{n}")
+    os.makedirs(batch)
+    t = perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as pool:
+        results = list(pool.map(lambda i: run(batch, n, i), range(n)))
+    total = perf_counter() - t
+    failed = [name for name, rc, s in results if rc != 0]
+    times = [s for name, rc, s in results]
+    t = perf_counter()
+    with open(os.path.join(batch, "extract.out"), "w") as OUT:
+        subprocess.call(["extract_saptdft.py"] + [name for name, rc, s in results],
+                        cwd=batch, env=env, stdout=OUT, stderr=subprocess.STDOUT)
+    extract = perf_counter() - t
+    mean = statistics.mean(times)
+    print(f"{n:6d} {len(failed):6d} {total:9.2f} {mean:8.3f} {statistics.median(times):8.3f}"
+          f" {mean - steps*args.seconds:10.3f} {n/total:7.2f} {extract:9.2f}"
+          f" {1000.0*extract/n:7.2f}", flush=True)
+    if failed:
+        print(f"  Failed: {' '.join(failed[:10])}{' ...' if len(failed) > 10 else ''}"
+              f" -- see {batch}/<job>.log")
+    if not args.keep:
+        shutil.rmtree(batch)
+
+if not args.keep:
+    shutil.rmtree(bench)
@@ -0,0 +1,599 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""
+Stand-in for the cluster, nwchem, psi4 and camcasp programs, so that the
+Python layer of CamCASP can be tested and benchmarked without them.
+
+The program behaves according to the name it is invoked by; the other
+names in this directory are links to it. Each one reads the files that
+the real program would read, spends a set time, and writes its results in
+the formats read by the interface programs and the extraction scripts:
+
+cluster --scfcode <code> --job <job> < <job>.clt
+    writes <job>_<M>.nw (NWChem), or <job>_<M>.in and <job>_<M>.sitenames
+    (Psi4), for each SCF calculation M needed for the run-type, and
+    <job>.cks for CamCASP. Only NWChem and Psi4 are supported.
+nwchem <job>_<M>.nw
+    writes its output to stdout and the binary <job>_<M>.movecs file that
+    nwchem_movecs.py (or readNWCHEMmos) reads.
+psi4 <job>_<M>.in <job>_<M>.out
+    writes <job>_<M>.out and the <job>_<M>.fchk file that readfchk.py reads,
+    or the <job>_<M>.npz file if the input has the psi4_npz export code.
+camcasp < <job>.cks
+    checks the MO files named in the .cks file, and writes its output to
+    stdout and the summary to data-summary.data.
+
+The basis functions and orbitals are not real, but the numbers of basis
+functions are those of the named Dunning basis sets (as estimated by
+jobmodel.basis_functions), so the files have realistic sizes. The energies
+in data-summary.data are those of the water dimer test, scaled by a factor
+that depends on the separation of the molecules.
+
+Environment variables:
+  FAKE_SECONDS  time taken by each SCF and CamCASP calculation (default 0)
+  FAKE_MODE     sleep (default) or burn, to keep a CPU busy
+  FAKE_FAIL     steps that are to fail, e.g. "B" or "cluster,C"
+"""
+
+import math
+import os
+import random
+import re
+import struct
+import sys
+import time
+import types
+import zlib
+from fnmatch import fnmatch
+
+root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+sys.path.insert(0, os.path.join(root, "bin"))
+
+from cltspec import parse_clt, standard_runtype, CltError
+from clustercache import atom_positions
+
+#  Summary of the water dimer test, used as the pattern for data-summary.data
+summary_template = os.path.join(root, "tests", "H2O_dimer", "nwchem", "check", "OUT",
+                                "H2O2-data-summary.data")
+#  Separation of the centres of the water molecules in that test, in bohr
+r_template = 5.8505
+
+elements = ["H", "He", "Li", "Be", "B", "C", "N", "O", "F", "Ne", "Na", "Mg",
+            "Al", "Si", "P", "S", "Cl", "Ar", "K", "Ca", "Sc", "Ti", "V", "Cr",
+            "Mn", "Fe", "Co", "Ni", "Cu", "Zn", "Ga", "Ge", "As", "Se", "Br", "Kr"]
+
+#  SCF calculations for each run-type, as in execute
+scf_parts = {
+    "saptdft": ["A", "B"],
+    "sapt": ["A", "B"],
+    "properties": ["A"],
+    "deltahf": ["A", "B", "AB"],
+    "psi4-saptdft": ["AB"],
+}
+
+midbond_basis = "mb-3s2p1d"
+
+
+def fail(step):
+    """Fail if the step is listed in FAKE_FAIL"""
+    if step in re.split(r'[,\s]+', os.environ.get("FAKE_FAIL", "")):
+        print(f"Step {step} failed (FAKE_FAIL)")
+        exit(1)
+
+
+def spend(step):
+    """Spend the time set by FAKE_SECONDS on a calculation, then fail if
+    the step is listed in FAKE_FAIL"""
+    seconds = float(os.environ.get("FAKE_SECONDS") or 0.0)
+    if os.environ.get("FAKE_MODE") == "burn":
+        end = time.perf_counter() + seconds
+        while time.perf_counter() < end:
+            pass
+    elif seconds > 0.0:
+        time.sleep(seconds)
+    fail(step)
+
+
+def element(label):
+    """Element symbol and nuclear charge for an atom label, or ("", 0) for
+    a midbond"""
+    label = re.sub(r'^(@|bq|Bq|BQ)', '', label)
+    m = re.match(r'([A-Za-z]{1,2})', label)
+    if m:
+        for s in [m.group(1).capitalize(), m.group(1)[0].upper()]:
+            if s in elements:
+                return s, elements.index(s) + 1
+    return "", 0
+
+
+def shells(basis, z):
+    """Angular momenta of the shells of the named basis on an atom of
+    nuclear charge z. "mb-3s2p1d" is a midbond set, and names ending in
+    "-sp" mean just one s and one p shell, as for the partner's atoms in an
+    MC+ basis. Otherwise the shells are those of the cc-pVXZ or aug-cc-pVXZ
+    basis of the same cardinal number."""
+    basis = basis.lower()
+    m = re.match(r'mb-((?:\d+[spdfg])+)$', basis)
+    if m:
+        return [l for n, t in re.findall(r'(\d+)([spdfg])', m.group(1))
+                for l in ["spdfg".index(t)]*int(n)]
+    if basis.endswith("-sp"):
+        return [0, 1]
+    m = re.search(r'([dtq5])z', basis)
+    x = {"d": 2, "t": 3, "q": 4, "5": 5}[m.group(1)] if m else 3
+    if re.match(r'(d-?aug|da)', basis):
+        aug = 2
+    elif re.match(r'(aug|a[dtq5v]|sadlej)', basis):
+        aug = 1
+    else:
+        aug = 0
+    if z <= 2:
+        count = [x - l for l in range(x)]
+    else:
+        count = [x + 1] + [x + 1 - l for l in range(1, x + 1)]
+        if z > 10:
+            count[0] += 1
+            count[1] += 1
+    count = [n + aug for n in count]
+    return [l for l, n in enumerate(count) for k in range(n)]
+
+
+def record(F, data):
+    """Write a Fortran unformatted sequential record"""
+    F.write(struct.pack("<i", len(data)) + data + struct.pack("<i", len(data)))
+
+
+def orbitals(sites, nelec, seed):
+    """Orbital energies and coefficients for the sites, each a (label, z,
+    basis, position) tuple. Returns (energies, coefficients, total energy),
+    with coefficients[i] the coefficients of MO i."""
+    nbf = sum(2*l + 1 for s in sites for l in shells(s[2], s[1]))
+    rng = random.Random(seed)
+    nocc = nelec//2
+    energies = sorted(-rng.uniform(0.3, 0.6*max(s[1] for s in sites)**2) for i in range(nocc))
+    energies += sorted(rng.uniform(0.02, 5.0) for i in range(nbf - nocc))
+    coefficients = [[rng.uniform(-1.0, 1.0) for j in range(nbf)] for i in range(nbf)]
+    total = -sum(0.5*z**2.4 for l, z, b, p in sites if not l.startswith("@")) \
+            - 0.01*rng.random()
+    return energies, coefficients, total
+
+
+def molecule_sites(spec, name):
+    """(label, z, position) for the atoms of molecule name"""
+    mol = spec.mols[name]
+    if not mol.atoms:
+        return [a for part in mol.joined for a in molecule_sites(spec, part)]
+    one = types.SimpleNamespace(units=spec.units, mols={name: mol})
+    return [(label, float(atom[1]), p)
+            for atom, (label, p) in zip(mol.atoms, atom_positions(one))]
+
+
+def centre(atoms):
+    return [sum(a[2][i] for a in atoms)/len(atoms) for i in range(3)]
+
+
+def cluster(argv):
+    """Write the input files for the SCF calculations and CamCASP"""
+    scfcode = argv[argv.index("--scfcode") + 1] if "--scfcode" in argv else "psi4"
+    job = argv[argv.index("--job") + 1] if "--job" in argv else "job"
+    print("Stand-in cluster program")
+    try:
+        spec = parse_clt(f"{job}.clt", sys.stdin.read())
+    except CltError as e:
+        print(e)
+        exit(1)
+    if scfcode not in ["psi4", "nwchem"]:
+        print(f"The stand-in programs don't support SCF code {scfcode}")
+        exit(1)
+    fail("cluster")
+    runtype = standard_runtype(spec.runtype) \
+              or ("properties" if len(spec.molecules) == 1 else "saptdft")
+    basis = spec.basis or "aug-cc-pvtz"
+    basistype = spec.basistype or ("mono" if runtype == "properties" else "mc+")
+    func = spec.func or "PBE0"
+    mols = [molecule_sites(spec, name) for name in spec.molecules[:2]]
+
+    #  The sites for each SCF calculation: (label, z, basis, position),
+    #  with ghost atoms labelled @...
+    systems = {}
+    for M in scf_parts.get(runtype, []):
+        if M == "AB" or len(mols) == 1:
+            own = [a for m in mols for a in m]
+            other = []
+        else:
+            own, other = mols if M == "A" else mols[::-1]
+        sites = [(label, z, basis, p) for label, z, p in own]
+        if other and not basistype.startswith("mono"):
+            ghost = basis if basistype.startswith("dc") else basis + "-sp"
+            sites += [("@" + label, z, ghost, p) for label, z, p in other]
+        if len(mols) == 2 and basistype.endswith("+") and not spec.nomidbond:
+            a, b = centre(mols[0]), centre(mols[1])
+            sites.append(("@mb", 0.0, midbond_basis, [(a[i] + b[i])/2 for i in range(3)]))
+        systems[M] = sites
+
+    for M, sites in systems.items():
+        name = f"{job}_{M}"
+        if scfcode == "nwchem":
+            with open(f"{name}.nw", "w") as NW:
+                NW.write(f"""Title "  {name} Method DFT with Functional: {func} "
+Scratch_dir <SCRATCHDIR>
+Memory        1 GB
+Start {name}
+
+Charge     0
+Geometry Units Bohr nocenter noautoz noautosym
+""")
+                for label, z, b, p in sites:
+                    label = "bq" + label[1:] if label.startswith("@") else label
+                    NW.write(f"   {label:12s} {p[0]:15.8f} {p[1]:15.8f} {p[2]:15.8f}\n")
+                NW.write(f"""End
+Basis "ao basis" SPHERICAL
+      *          library     {basis}
+""")
+                done = set()
+                for label, z, b, p in sites:
+                    el, z = element(label)
+                    if label.startswith("@") and (el, b) not in done:
+                        done.add((el, b))
+                        pattern = "bqmb" if label == "@mb" else f"bq{el}*"
+                        NW.write(f"      {pattern:10s} library  {el or 'B'}  {b}\n")
+                NW.write(f"""End
+dft
+   direct
+   xc {func}
+   Mult 1
+end
+task DFT energy
+""")
+        else:
+            with open(f"{name}.in", "w") as IN:
+                IN.write(f"""memory 1 gb
+
+molecule {name} {{
+units bohr
+0 1
+""")
+                for label, z, b, p in sites:
+                    if label == "@mb":
+                        label = "@He_mb"
+                    elif label.startswith("@") and b.endswith("-sp"):
+                        label = "@" + element(label)[0] + "_sp"
+                    IN.write(f"  {label:12s} {p[0]:15.8f} {p[1]:15.8f} {p[2]:15.8f}\n")
+                IN.write(f"""symmetry c1
+no_reorient
+no_com
+}}
+
+basis {{
+  assign {basis}
+""")
+                for el in sorted(set(element(s[0])[0] for s in sites
+                                     if s[0].startswith("@") and s[2].endswith("-sp"))):
+                    IN.write(f"  assign {el}_sp {basis}-sp\n")
+                if any(s[0] == "@mb" for s in sites):
+                    IN.write(f"  assign He_mb {midbond_basis}\n")
+                IN.write(f"""}}
+
+energy, wfn = energy('{func}', return_wfn=True)
+fchk_writer = psi4.FCHKWriter(wfn)
+fchk_writer.write('{name}.fchk')
+""")
+            with open(f"{name}.sitenames", "w") as S:
+                for label, z, b, p in sites:
+                    S.write(f"{label.lstrip('@')} {label.lstrip('@')}\n")
+
+    scf = {"nwchem": "NWCHEM", "psi4": "PSI4"}[scfcode]
+    with open(f"{job}.cks", "w") as CKS:
+        CKS.write(f"""TITLE {" and ".join(spec.molecules)}
+TITLE Basis {basis} and type {basistype}
+TITLE CalculationType: {runtype}
+
+MEMORY       1 GB
+
+SET Global_data
+  Units Bohr cm-1
+  Scf-code {scf}
+  XC-func {func}
+  Overwrite yes
+END
+
+""")
+        for M, molname in zip(["A", "B"], spec.molecules):
+            sites = systems.get(M) or systems.get("AB", [])
+            CKS.write(f"""MOLECULE {molname} at 0.0 0.0 0.0
+   Charge    0
+   MO-file {job}-{M}-asc.movecs format ASCII-2
+   Basis Main
+      Spherical
+      Units Bohr
+""")
+            for label, z, b, p in sites:
+                charge = 0.0 if label.startswith("@") else z
+                label = label.lstrip("@")
+                CKS.write(f"      {label:8s} {charge:5.1f}  {p[0]:16.8f} {p[1]:16.8f}"
+                          f" {p[2]:16.8f}  TYPE {label}\n      ---\n")
+            CKS.write("   End\nEND\n\n")
+        if "AB" in systems and len(mols) == 2:
+            CKS.write(f"""MOLECULE AB at 0.0 0.0 0.0
+   MO-file {job}-AB-asc.movecs format ASCII-2
+END
+
+""")
+        CKS.write(f"""RUN-TYPE {runtype}
+  Molecules {" ".join(spec.molecules)}
+END
+
+FINISH
+""")
+
+
+def read_sites_nw(text):
+    """Sites and basis from an NWChem input file"""
+    sites = []
+    m = re.search(r'^\s*Geometry.*?$(.*?)^\s*End', text, flags=re.M | re.S | re.I)
+    for line in m.group(1).splitlines() if m else []:
+        w = line.split()
+        if len(w) == 4:
+            sites.append([w[0], [float(v) for v in w[1:]]])
+    assign = []
+    m = re.search(r'^\s*Basis.*?$(.*?)^\s*End', text, flags=re.M | re.S | re.I)
+    for line in m.group(1).splitlines() if m else []:
+        w = line.split()
+        if len(w) >= 3 and w[1].lower() == "library":
+            assign.append((w[0], w[-1] if len(w) == 3 else w[3]))
+    #  Specific patterns take precedence over "*"
+    assign.sort(key=lambda a: a[0] == "*")
+    result = []
+    for label, p in sites:
+        el, z = element(label)
+        b = next((b for pat, b in assign if fnmatch(label, pat)), "")
+        ghost = label.lower().startswith("bq")
+        result.append((("@" if ghost else "") + label, z, b, p))
+    return result
+
+
+def nwchem(argv):
+    """Stand-in for NWChem: writes the output to stdout and the .movecs file"""
+    start = time.perf_counter()
+    datafile = argv[1]
+    with open(datafile) as NW:
+        text = NW.read()
+    name = re.search(r'^\s*Start\s+(\S+)', text, flags=re.M | re.I).group(1)
+    sites = read_sites_nw(text)
+    print(f"""              Northwest Computational Chemistry Package (NWChem) stand-in
+
+ Input file: {datafile}
+
+                             Geometry "geometry" -> ""
+                             -------------------------
+  No.       Tag          Charge          X              Y              Z
+ ---- ---------------- ---------- -------------- -------------- --------------""")
+    for i, (label, z, b, p) in enumerate(sites, start=1):
+        q = 0.0 if label.startswith("@") else z
+        print(f"{i:5d} {label.lstrip('@'):16s} {q:10.4f} {p[0]:14.8f} {p[1]:14.8f} {p[2]:14.8f}")
+    spend(name.split("_")[-1])
+    nelec = int(sum(z for label, z, b, p in sites if not label.startswith("@")))
+    energies, vectors, total = orbitals(sites, nelec, zlib.crc32(text.encode()))
+    nbf = len(energies)
+    print(f"""
+  number of basis functions: {nbf}
+
+         Total DFT energy = {total:20.12f}
+
+                       DFT Final Molecular Orbital Analysis
+                       ------------------------------------
+""")
+    for i, e in enumerate(energies, start=1):
+        occ = 2.0 if i <= nelec//2 else 0.0
+        print(f" Vector {i:4d}  Occ={occ:12.6e}  E={e:13.6e}")
+    print(f"\n Task  times  cpu: {time.process_time():9.1f}s"
+          f"     wall: {time.perf_counter() - start:9.1f}s")
+
+    lenbuf = 524287
+    with open(f"{name}.movecs", "wb") as MO:
+        record(MO, b"convergence info".ljust(32))
+        record(MO, b"dft".ljust(20))
+        title = f"{name} stand-in".encode()
+        record(MO, struct.pack("<q", len(title)))
+        record(MO, title)
+        record(MO, struct.pack("<q", 8))
+        record(MO, b"ao basis")
+        record(MO, struct.pack("<q", 1))
+        record(MO, struct.pack("<q", nbf))
+        record(MO, struct.pack("<q", nbf))
+        record(MO, struct.pack(f"<{nbf}d", *[2.0 if i < nelec//2 else 0.0 for i in range(nbf)]))
+        record(MO, struct.pack(f"<{nbf}d", *energies))
+        for v in vectors:
+            for start in range(0, nbf, lenbuf):
+                chunk = v[start:start+lenbuf]
+                record(MO, struct.pack(f"<{len(chunk)}d", *chunk))
+
+
+def write_fchk(F, text, n=None, values=(), real=False):
+    """Write one item of an fchk file in the Gaussian format"""
+    t = "R" if real else "I"
+    if n is None:
+        if real:
+            F.write(f"{text:43s}{t}{values:27.15e}\n")
+        else:
+            F.write(f"{text:43s}{t}{values:17d}\n")
+        return
+    F.write(f"{text:43s}{t}   N={n:12d}\n")
+    per = 5 if real else 6
+    for start in range(0, n, per):
+        if real:
+            F.write("".join(f"{v:16.8e}" for v in values[start:start+per]) + "\n")
+        else:
+            F.write("".join(f"{v:12d}" for v in values[start:start+per]) + "\n")
+
+
+def psi4(argv):
+    """Stand-in for Psi4: writes the output file and the .fchk file"""
+    datafile = argv[1]
+    outfile = argv[2] if len(argv) > 2 else os.path.splitext(datafile)[0] + ".out"
+    with open(datafile) as IN:
+        text = IN.read()
+    #  The wavefunction is saved as an fchk file, or by the psi4_npz export
+    m = re.search(r"_camcasp_export\(wfn, '([^']+)', '([^']+)'\)", text)
+    npz, fchk = m.groups() if m else (None, re.search(r"\.write\('([^']+)'\)", text).group(1))
+    m = re.search(r'^\s*molecule[^{]*\{(.*?)^\s*\}', text, flags=re.M | re.S)
+    block = m.group(1) if m else ""
+    m = re.search(r'^\s*basis\s*\{(.*?)^\s*\}', text, flags=re.M | re.S)
+    assign = {}
+    for line in (m.group(1) if m else "").splitlines():
+        w = line.split()
+        if len(w) == 2 and w[0] == "assign":
+            assign["*"] = w[1]
+        elif len(w) == 3 and w[0] == "assign":
+            assign[w[1]] = w[2]
+    sites = []
+    charge, mult = 0, 1
+    for line in block.splitlines():
+        w = line.split()
+        if len(w) == 2 and re.match(r'-?\d+$', w[0]):
+            charge, mult = int(w[0]), int(w[1])
+        elif len(w) == 4 and not w[0].startswith("units"):
+            label = w[0]
+            el, z = element(label)
+            b = assign.get(label.lstrip("@"), assign.get("*", "cc-pvdz"))
+            if label.lstrip("@").endswith("_mb"):
+                z = 0
+            sites.append((label, z, b, [float(v) for v in w[1:]]))
+    nelec = int(sum(z for label, z, b, p in sites if not label.startswith("@"))) - charge
+
+    with open(outfile, "w") as OUT:
+        OUT.write(f"""
+    -----------------------------------------------------------------------
+          Psi4: An Open-Source Ab Initio Electronic Structure Package
+                               Psi4 stand-in
+    -----------------------------------------------------------------------
+
+  Input file {datafile}
+
+""")
+        OUT.write(text)
+        spend(re.sub(r'\.fchk$', '', fchk).split("_")[-1])
+        energies, vectors, total = orbitals(sites, nelec, zlib.crc32(text.encode()))
+        nbf = len(energies)
+        OUT.write(f"\n  Number of basis functions: {nbf}\n\n    Doubly Occupied:\n\n")
+        for i, e in enumerate(energies, start=1):
+            if i == nelec//2 + 1:
+                OUT.write("\n    Virtual:\n\n")
+            OUT.write(f"       {i:4d}A {e:14.6f}\n")
+        OUT.write(f"\n  @DFT Final Energy: {total:20.12f}\n\n*** Psi4 exiting successfully.\n")
+
+    shell_types = []
+    shell_atoms = []
+    for k, (label, z, b, p) in enumerate(sites, start=1):
+        for l in shells(b, z):
+            shell_types.append(l if l < 2 else -l)
+            shell_atoms.append(k)
+    nshell = len(shell_types)
+    with open(fchk, "w") as F:
+        F.write(f"Generated by Psi4 stand-in\n{'SP':10s}{'DFT':>30s}{'':20s}\n")
+        write_fchk(F, "Number of atoms", None, len(sites))
+        write_fchk(F, "Charge", None, charge)
+        write_fchk(F, "Multiplicity", None, mult)
+        write_fchk(F, "Number of electrons", None, nelec)
+        write_fchk(F, "Number of alpha electrons", None, (nelec + mult - 1)//2)
+        write_fchk(F, "Number of beta electrons", None, (nelec - mult + 1)//2)
+        write_fchk(F, "Number of basis functions", None, nbf)
+        write_fchk(F, "Number of independent functions", None, nbf)
+        write_fchk(F, "Atomic numbers", len(sites),
+                   [0 if label.startswith("@") else z for label, z, b, p in sites])
+        write_fchk(F, "Nuclear charges", len(sites),
+                   [0.0 if label.startswith("@") else float(z) for label, z, b, p in sites],
+                   real=True)
+        write_fchk(F, "Current cartesian coordinates", 3*len(sites),
+                   [c for s in sites for c in s[3]], real=True)
+        write_fchk(F, "Number of primitive shells", None, nshell)
+        write_fchk(F, "Number of contracted shells", None, nshell)
+        write_fchk(F, "Highest angular momentum", None, max(abs(t) for t in shell_types))
+        write_fchk(F, "Largest degree of contraction", None, 1)
+        write_fchk(F, "Shell types", nshell, shell_types)
+        write_fchk(F, "Number of primitives per shell", nshell, [1]*nshell)
+        write_fchk(F, "Shell to atom map", nshell, shell_atoms)
+        write_fchk(F, "Primitive exponents", nshell,
+                   [0.1*3.0**(k % 6) for k in range(nshell)], real=True)
+        write_fchk(F, "Contraction coefficients", nshell, [1.0]*nshell, real=True)
+        write_fchk(F, "Total Energy", None, total, real=True)
+        write_fchk(F, "Alpha Orbital Energies", nbf, energies, real=True)
+        write_fchk(F, "Alpha MO coefficients", nbf*nbf,
+                   [c for v in vectors for c in v], real=True)
+    if npz:
+        import psi4_npz
+        psi4_npz.save(psi4_npz.read_fchk(fchk), npz)
+        os.remove(fchk)
+
+
+def fortran(value):
+    """Format a value as Fortran's E14.7 would"""
+    if value == 0.0:
+        return "0.0000000E+00"
+    e = math.floor(math.log10(abs(value))) + 1
+    mantissa = value/10.0**e
+    if abs(mantissa) >= 0.99999995:
+        mantissa /= 10.0
+        e += 1
+    return f"{mantissa:.7f}E{e:+03d}"
+
+
+def camcasp(argv):
+    """Stand-in for CamCASP: checks the MO files, and writes the output to
+    stdout and the energy summary to data-summary.data"""
+    text = sys.stdin.read()
+    print(f"""              CamCASP version 6.0 (stand-in)
+
+Starting on {time.strftime('%d-%m-%Y at %H:%M:%S')}
+""")
+    print(text)
+    for movecs in re.findall(r'MO-file\s+(\S+)', text, flags=re.I):
+        try:
+            with open(movecs) as MO:
+                head = MO.read(1000)
+        except OSError:
+            print(f"ERROR: can't open MO file {movecs}")
+            exit(1)
+        m = re.search(r'^BFNS\s+(\d+)', head, flags=re.M)
+        if not m:
+            print(f"ERROR: {movecs} is not an ASCII MO file")
+            exit(1)
+        print(f"Read {m.group(1)} basis functions from {movecs}")
+    spend("C")
+
+    #  Molecule centres from the nuclear positions in the Basis sections
+    centres = []
+    for block in re.findall(r'^MOLECULE.*?^END', text, flags=re.M | re.S | re.I):
+        atoms = [[float(v) for v in m] for m in
+                 re.findall(r'^\s*\S+\s+([1-9]\d*\.\d*)\s+(\S+)\s+(\S+)\s+(\S+)', block, flags=re.M)]
+        if atoms:
+            centres.append([sum(a[i] for a in atoms)/len(atoms) for i in (1, 2, 3)])
+    if len(centres) >= 2:
+        r = math.dist(centres[0], centres[1])
+        factor = math.exp(r_template - r)
+    else:
+        factor = 1.0
+
+    lines = ["              CamCASP version 6.0 (stand-in)\n", " \n",
+             " Summary of CamCASP calculation\n", " ==============================\n"]
+    with open(summary_template) as T:
+        for line in T:
+            m = re.match(r'(\S+)\s+(-?\d\.\d+E[-+]\d+)(.*)', line)
+            if m:
+                lines.append(f"{m.group(1):<27s}{fortran(float(m.group(2))*factor):>14s}{m.group(3)}\n")
+            elif re.match(r'\s+Name|=+$|-+$', line):
+                lines.append(line)
+    with open("data-summary.data", "w") as S:
+        S.writelines(lines)
+    print("".join(lines[2:]))
+    print(f"CamCASP finished normally at {time.strftime('%H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    program = os.path.basename(sys.argv[0])
+    actions = {"cluster": cluster, "nwchem": nwchem, "psi4": psi4, "camcasp": camcasp}
+    if program not in actions:
+        print(f"Invoke this program as one of {', '.join(actions)}")
+        exit(1)
+    actions[program](sys.argv)
@@ -9,6 +9,7 @@ import re
 import os
 # import string
 import subprocess
+import sys
 
 this = __file__
 parser = argparse.ArgumentParser(
@@ -21,13 +22,15 @@ description="""Review the results of a formamide-isa test.
 
 parser.add_argument("--scfcode", help="SCF code used for the test")
 parser.add_argument("--dirname", help="name of test directory (default test)", default="test")
-parser.add_argument("--difftool", help="Difference display program", default="xxdiff")
+parser.add_argument("--difftool", help="Difference display program", default="")
 
 args = parser.parse_args()
 
 camcasp = os.getenv("CAMCASP")
 base = os.path.join(camcasp,"tests","formamide-isa")
 name = args.dirname
+sys.path.insert(0, os.path.join(camcasp, "bin"))
+from comparator import compare_files
 
 out = os.path.join(base,args.scfcode,name,"OUT")
 with open(os.path.join(out,"HCONH2.log")) as LOG:
@@ -40,28 +43,19 @@ with open(os.path.join(out,"HCONH2.log")) as LOG:
         exit(1)
 
 os.chdir(os.path.join(base,args.scfcode))
-try:
-    s = subprocess.check_output(f"cmp check/OUT/formamide_ISA-GRID.mom {name}/OUT/formamide_ISA-GRID.mom",
-                                shell=True, encoding="iso-8859-1")
+momfile = "formamide_ISA-GRID.mom"
+result = compare_files(os.path.join("check","OUT",momfile),
+                       os.path.join(name,"OUT",momfile), abs_tol=1.0e-5, rel_tol=0.0)
+if result is None:
+    print(f"{name}/OUT/{momfile} not found")
+    exit(4)
+if result.ok:
     print("Test successful")
     exit(0)
-except subprocess.CalledProcessError:
-    if os.path.exists(os.path.join(base,args.scfcode,name,"OUT","formamide_ISA-GRID.mom")):
-        print("Test and check results differ")
-        diff = args.difftool
-        #  Does the specified (or default) difftool exist?
-        try:
-            typeout = subprocess.check_output("type {}".format(diff), shell=True,
-                                      stderr=subprocess.STDOUT, encoding="iso-8859-1")
-            #  Yes, it does.
-            scf = args.scfcode
-            subprocess.Popen(f"{diff} {base}/{scf}/check/OUT/formamide_ISA-GRID.mom "
-                             f"{base}/{scf}/{name}/OUT/formamide_ISA-GRID.mom", shell=True)
-        except subprocess.CalledProcessError:
-            #  No, it doesn't.
-            print(f"{diff} not found. Can't display differences.")
-            diff = "<difftool>"
-            print(f"""To display differences, execute
-  {diff} {base}/{args.scfcode}/{{check/,{name}/}}OUT/formamide_ISA-GRID.mom""")
-            print(f"where {diff} is a difference display program such as xxdiff, meld or vimdiff.")
-        exit(2)
+print("Test and check results differ")
+print(result.report())
+if args.difftool:
+    scf = args.scfcode
+    subprocess.Popen(f"{args.difftool} {base}/{scf}/check/OUT/{momfile} "
+                     f"{base}/{scf}/{name}/OUT/{momfile}", shell=True)
+exit(3)
@@ -5,10 +5,12 @@
 """
 
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 import os
 import subprocess
-from time import strftime
+import sys
+from time import perf_counter, strftime
 
 parser = argparse.ArgumentParser(
 formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -31,15 +33,40 @@ At present the tests are:
   CO2-isa       ISA multipole moments for CO2.
   formamide-isa ISA multipole moments for formamide.
   H2O_props     Water ISA polarizabilities and dispersion coefficients.
+  startup       Start-up time of the camcasp module and the light scripts.
+  psi4_npz      MO and basis files from Psi4 wavefunction .npz files.
+  multipoles    Multipole-expansion energies used to screen scan geometries.
+  ipstore       Fingerprints and look-ups of the shared store of IPs.
 
 The --scfcode is ignored for the He2 tests, which use dalton.
 
 This script assumes that the test directories exist and contain the
 appropriate cluster files.
 
-Some of the tests use a diff program to display differences between the
-test results and a reference file. The default program is xxdiff, but a
-different one can be specified using the --difftool flag.
+The tests compare their results numerically with the check results,
+using bin/comparator.py, and a value agrees if it is within the tolerance
+for that quantity. When results differ, a report of the largest
+differences is included in the test report. A diff program, such as
+xxdiff or meld, can also be used to display the differences, by giving
+it with the --difftool flag.
+
+With --jobs N, up to N of the tests (each test with each SCF code
+counting separately) are run at the same time, each in its own test
+directory and with its own scratch directory under $SCRATCH. Each
+calculation uses the numbers of cores set in the usual way, so these
+should allow for the number of tests running at once. The startup test
+is run on its own after the others, since its time budgets are only
+meaningful on an otherwise idle node.
+
+At the end a summary table is printed, giving the elapsed time for each
+test with the baseline time for this type of node and number of tests
+run at once (--jobs) from the file tests/timing_baselines, so that times
+for tests that ran side by side are not compared with those for tests
+that ran alone. A test is flagged if it took longer than the
+baseline by more than the --threshold fraction (default 0.25). The time
+for a successful test becomes the baseline if there isn't one already,
+or with --update-baselines. This is useful for checking for loss of
+performance after changing the binaries with switch_binaries.py.
 """)
 
 ok = True
@@ -57,7 +84,9 @@ if not ok:
     exit(1)
 
 os.chdir(os.path.join(camcasp,"tests"))
-  
+sys.path.insert(0, os.path.join(camcasp,"bin"))
+import hardware
+
 parser.add_argument("test", help="Tests to run (default is all tests)",
                     nargs="*", default=[])
 #                   choices=["He2","H2O_dimer","CO2-isa","H2O_props",
@@ -77,13 +106,20 @@ parser.add_argument("--debug", action="store_true",
                     help="Don't delete working files")
 parser.add_argument("--clean", action="store_true",
                     help="Tidy up files produced by all tests and exit")
-parser.add_argument("--difftool", default="xxdiff",
-                    help="Difference tool for checking results")
+parser.add_argument("--difftool", default="",
+                    help="Difference tool to display results that differ")
+parser.add_argument("--jobs", "-j", type=int, default=1,
+                    help="Number of tests to run at the same time")
+parser.add_argument("--threshold", type=float, default=0.25,
+                    help="Fractional increase in time over the baseline to flag")
+parser.add_argument("--update-baselines", action="store_true",
+                    help="Replace the baseline times by those for this run")
                     
 args = parser.parse_args()
 
 all_tests = ["He2","H2O_dimer","CO2-isa","H2O_props", "formamide-isa",
-             "H2O_dimer_psi4", "H2O_dimer_scan"]
+             "H2O_dimer_psi4", "H2O_dimer_scan", "startup", "psi4_npz", "multipoles",
+             "ipstore"]
 
 if args.test:
     tests = args.test
@@ -142,6 +178,120 @@ else:
 # print tests
 # print scfcodes
 
+
+baseline_file = os.path.join(camcasp,"tests","timing_baselines")
+
+
+def read_baselines(file):
+    """Baseline times, keyed by (node type, test, SCF code, jobs at once)"""
+    baselines = {}
+    if os.path.exists(file):
+        with open(file) as B:
+            for line in B:
+                w = line.split()
+                if not w or w[0].startswith("#"):
+                    continue
+                if len(w) == 5:
+                    baselines[tuple(w[:4])] = float(w[4])
+                elif len(w) == 4:
+                    #  Written before --jobs was recorded: one at a time
+                    baselines[tuple(w[:3]) + ("1",)] = float(w[3])
+    return baselines
+
+
+def write_baselines(file, baselines):
+    with open(file,"w") as B:
+        B.write("#  node-type  test  scfcode  jobs  seconds\n")
+        for key in sorted(baselines):
+            B.write(f"{' '.join(key)}  {baselines[key]:.1f}\n")
+
+
+class Task:
+    """One test, with one SCF code, to be run in its own directory"""
+    def __init__(self, test, scfcode, testdir, cmnd, report=None, submit=False):
+        self.test = test
+        self.scfcode = scfcode
+        self.dir = testdir
+        self.cmnd = cmnd
+        self.report = report    # None if output is to the terminal
+        self.submit = submit    # Calculations are submitted to a queue
+        self.rc = None
+        self.time = 0.0
+
+    def key(self):
+        return (self.test, self.scfcode or "-")
+
+    def run(self):
+        if self.submit:
+            print(f"Submitting {self.test} test with SCF code {self.scfcode}")
+        elif self.scfcode:
+            print(f"Starting {self.test} test with SCF code {self.scfcode}")
+        else:
+            print(f"Starting {self.test} test at {strftime('%H:%M:%S')}")
+            if self.report and self.test == "He2":
+                print(f"Report will be written to {self.report}")
+        env = None
+        if args.jobs > 1 and os.getenv("SCRATCH"):
+            #  Separate scratch directories, so that tests running at the
+            #  same time don't share work directories
+            env = dict(os.environ)
+            env["SCRATCH"] = os.path.join(os.getenv("SCRATCH"),
+                                          f"tests-{self.test}-{self.scfcode or 'all'}")
+            os.makedirs(env["SCRATCH"], exist_ok=True)
+        t = perf_counter()
+        if self.report:
+            with open(self.report,"w") as OUT:
+                self.rc = subprocess.call(self.cmnd, stdout=OUT, stderr=subprocess.STDOUT,
+                                          cwd=self.dir, env=env)
+        else:
+            self.rc = subprocess.call(self.cmnd, stderr=subprocess.STDOUT,
+                                      cwd=self.dir, env=env)
+        self.time = perf_counter() - t
+        if not self.submit:
+            print(self.message())
+            if self.report:
+                print(f"See report at {self.report}")
+        return self
+
+    def message(self):
+        endtime = strftime('%H:%M:%S')
+        rc = self.rc
+        if self.scfcode:
+            buffer = f"{self.test} test with SCF code {self.scfcode}:\n"
+        else:
+            buffer = f"{self.test} test "
+        if rc == 4:
+            buffer += f"failed at {endtime}"
+        elif rc == 3:
+            if self.test == "startup":
+                buffer += f"completed at {endtime}. Start-up time budget exceeded -- see report."
+            else:
+                buffer += f"completed at {endtime}. Results differ from check output -- see report."
+        elif rc == 2:
+            if self.test == "He2":
+                buffer += f"failed at {endtime}."
+            else:
+                buffer += f"completed at {endtime}."
+        elif rc == 1:
+            buffer += f"error exit at {endtime}."
+        elif rc > 0:
+            buffer += f"calculation failed with rc = {rc:1d} at {endtime}."
+        else:
+            buffer += f"completed successfully at {endtime}."
+        return buffer
+
+    def result(self):
+        """Short description of the outcome, for the summary table"""
+        if self.rc is None:
+            return "not run"
+        elif self.submit:
+            return "submitted" if self.rc == 0 else f"rc = {self.rc}"
+        return {0: "ok", 1: "error exit", 2: "completed" if self.test != "He2" else "failed",
+                3: "differs", 4: "failed"}.get(self.rc, f"rc = {self.rc}")
+
+
+#  Make the list of tasks
+tasks = []
 for test in tests:
     base = os.path.join(camcasp,"tests",test)
     testcmnd = os.path.join(camcasp,"tests",f"test_{test}.py")
@@ -153,64 +303,60 @@ for test in tests:
 which is currently not guaranteed to be correct.""")
                 else:
                     continue
-            print(f"Starting {test} test with SCF code {scfcode}")
             testdir = os.path.join(base,scfcode)
             report = os.path.join(testdir,"test_report")
-            os.chdir(testdir)
             cmnd = [testcmnd, "--scfcode", scfcode,
               "-d", args.dirname, "--verbosity", str(verbosity)]
-            if test in ["CO2-isa", "H2O_props"]:
+            if test in ["CO2-isa", "H2O_props"] and args.difftool:
                 cmnd.extend(["--difftool", args.difftool])
             # if args.report:
             #     cmnd.append("--report")
             if args.debug:
                 cmnd.append("--debug")
-            # print cmnd
-            with open(report,"w") as OUT:
-                rc = subprocess.call(cmnd, stdout=OUT, stderr=subprocess.STDOUT)
-            buffer = f"{test} test with SCF code {scfcode}:\n"
-            endtime = strftime('%H:%M:%S')
-            if rc == 4:
-                buffer += f"failed at {endtime}"
-            elif rc == 3:
-                buffer += f"completed at {endtime}. Results differ from check output -- see report."
-            elif rc == 2:
-                buffer += f"completed at {endtime}."
-            elif rc == 1:
-                buffer += f"error exit at {endtime}."
-            elif rc > 0:
-                buffer += f"calculation failed with rc = {rc:1d} at {endtime}."
-            else:
-                buffer += f"completed successfully at {endtime}."
-            print (buffer)
-            print(f"See report at {report}")
-            # if rc in [1,4,]:
-            #     print(f"""See also {testdir}/{args.dirname}/OUT/*.log""")
+            tasks.append(Task(test, scfcode, testdir, cmnd, report))
 
     elif test == "formamide-isa":
         #  Submit jobs to a batch queue
         for scfcode in scfcodes:
-            print(f"Submitting {test} test with SCF code {scfcode}")
             testdir = os.path.join(base,scfcode)
-            report = os.path.join(testdir,"test_report")
-            os.chdir(testdir)
             cmnd = [testcmnd, "--scfcode", scfcode,
               "-d", args.dirname, "--verbosity", str(verbosity)]
             if args.debug:
                 cmnd.append("--debug")
-            rc = subprocess.call(cmnd, stderr=subprocess.STDOUT)
+            tasks.append(Task(test, scfcode, testdir, cmnd, submit=True))
 
     elif test == "H2O_dimer_scan":
         #  Use batch_camcasp.py to submit a series of jobs to a batch queue
         for scfcode in scfcodes:
-            print(f"Submitting {test} test with SCF code {scfcode}")
             testdir = os.path.join(base,scfcode)
-            os.chdir(testdir)
             cmnd = [testcmnd, "--scfcode", scfcode,
                     "--verbosity", str(verbosity)]
-            subprocess.call(cmnd, stderr=subprocess.STDOUT)
-        
-            
+            tasks.append(Task(test, scfcode, testdir, cmnd, submit=True))
+
+    elif test == "startup":
+        #  No SCF code needed
+        report = os.path.join(camcasp,"tests","startup_report")
+        tasks.append(Task(test, "", os.path.join(camcasp,"tests"),
+                          [testcmnd, "--verbosity", str(verbosity)], report))
+
+    elif test == "psi4_npz":
+        #  No SCF code needed: the .npz files are fixtures
+        report = os.path.join(camcasp,"tests","psi4_npz","test_report")
+        tasks.append(Task(test, "", os.path.join(camcasp,"tests","psi4_npz"),
+                          [testcmnd, "--verbosity", str(verbosity)], report))
+
+    elif test == "multipoles":
+        #  No SCF code needed
+        report = os.path.join(camcasp,"tests","multipoles_report")
+        tasks.append(Task(test, "", os.path.join(camcasp,"tests"),
+                          [testcmnd, "--verbosity", str(verbosity)], report))
+
+    elif test == "ipstore":
+        #  No SCF code needed
+        report = os.path.join(camcasp,"tests","ipstore_report")
+        tasks.append(Task(test, "", os.path.join(camcasp,"tests"),
+                          [testcmnd, "--verbosity", str(verbosity)], report))
+
     elif test == "He2":
         if "dalton" in scfcodes:
             pass
@@ -223,20 +369,49 @@ which is currently not guaranteed to be correct.""")
         #  He2 test
         #  This is only run if the predefined SCF code, i.e. dalton
         #  has been specified
-        print(f"Starting {test} test at {strftime('%H:%M:%S')}")
         report = os.path.join(base,"test_report")
-        print(f"Report will be written to {report}")
-        with open(report,"w") as OUT:
-            cmnd = [testcmnd, "-d", args.dirname, "--verbosity", str(verbosity)]
-            if args.debug:
-                cmnd.append("--debug")
-            rc = subprocess.call(cmnd, stdout=OUT, stderr=subprocess.STDOUT)
-            endtime = strftime('%H:%M:%S')
-            if rc == 4:
-                print(f"failed at {endtime}.")
-            elif rc == 2:
-                print(f"{test} test failed at {endtime}.")
-            elif rc == 3:
-                print(f"{test} test completed at {endtime}. Some results were different from check results.")
-            else:
-                print(f"{test} test completed successfully at {endtime}.")
+        cmnd = [testcmnd, "-d", args.dirname, "--verbosity", str(verbosity)]
+        if args.debug:
+            cmnd.append("--debug")
+        tasks.append(Task(test, "", base, cmnd, report))
+
+#  Run them, args.jobs at a time, and then the startup test alone
+if args.jobs > 1:
+    together = [task for task in tasks if task.test != "startup"]
+    print(f"Running {len(together)} tests, {args.jobs} at a time")
+    with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+        list(pool.map(Task.run, together))
+    for task in tasks:
+        if task.test == "startup":
+            task.run()
+else:
+    for task in tasks:
+        task.run()
+
+#  Compare the times with the baselines for this type of node
+node = hardware.detect().node_type()
+baselines = read_baselines(baseline_file)
+print(f"""
+Summary of tests on {node}:
+{'Test':16s} {'SCF code':9s} {'Result':12s} {'Time (s)':>10s} {'Baseline':>10s}""")
+slow = 0
+for task in tasks:
+    if task.submit or task.rc is None:
+        print(f"{task.test:16s} {task.scfcode or '-':9s} {task.result():12s}")
+        continue
+    #  The startup test always runs alone
+    jobs = "1" if task.test == "startup" else str(args.jobs)
+    key = (node,) + task.key() + (jobs,)
+    base = baselines.get(key)
+    line = f"{task.test:16s} {task.scfcode or '-':9s} {task.result():12s} {task.time:10.1f}"
+    if base:
+        line += f" {base:10.1f}"
+        if task.time > base*(1.0 + args.threshold):
+            line += f"  SLOWER by {100.0*(task.time/base - 1.0):.0f}%"
+            slow += 1
+    print(line)
+    if task.rc == 0 and (base is None or args.update_baselines):
+        baselines[key] = task.time
+write_baselines(baseline_file, baselines)
+if slow:
+    print(f"\n{slow} tests took more than {100.0*args.threshold:.0f}% longer than the baseline")
@@ -0,0 +1,140 @@
+#!/usr/bin/python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Test CamCASP using water dimer example.
+"""
+
+import argparse
+from datetime import date
+import re
+from glob import glob
+import os
+from pathlib import Path
+import subprocess
+from shutil import rmtree 
+import sys
+from sys import stdout
+from time import strftime
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Test CamCASP using water dimer example.
+""",epilog="""
+Normally called by the run_tests.py script.
+This version uses the standard CamCASP SAPT(DFT) calculation when
+called with the Psi4 scfcode.
+""")
+
+
+parser.add_argument("--scfcode", default="dalton",
+                    choices=["dalton","nwchem","psi4"],
+                    help="Ab initio code to use (dalton, nwchem or psi4)")
+# parser.add_argument("--done", help="List of completed CamCASP tasks",
+#                     nargs="*", default=["none"],
+#                     choices=["none","all","sapt-dft","delta-hf"])
+parser.add_argument("--verbosity", help="Verbosity level", type=int,
+                    default=0)
+parser.add_argument("--debug", action="store_true",
+                    help="Don't delete working files")
+parser.add_argument("--clean", action="store_true",
+                    help="Delete files created by previous tests and exit")
+parser.add_argument("--dirname", "-d", help="Name for test directories",
+                    default="test")
+parser.add_argument("--done", help="Tasks already completed", default=[],
+                    choices=["sapt-dft", "delta-hf"], nargs="*")
+
+args = parser.parse_args()
+
+
+ok = True
+camcasp = os.getenv("CAMCASP")
+if not camcasp:
+    print("""Environment variable CAMCASP must be set to the base CamCASP directory
+If that hasn't been done you probably also need to run the setup.py script""")
+    ok = False
+if not ok:
+    exit(1)
+sys.path.insert(0, os.path.join(camcasp, "bin"))
+from comparator import read_table, compare
+
+scfcode = args.scfcode.lower()
+base = os.path.join(camcasp,"tests","H2O_dimer",scfcode)
+# print base
+
+#  Clean up old test files and directories
+if args.clean:
+    os.chdir(base)
+    files = glob("*")
+    for file in files:
+        if file in ["README", "sapt-dft.clt", "delta-hf.clt", "check",
+                    "check_dHF", "test_report"]:
+            pass
+        elif Path(file).is_dir():
+            rmtree(file)
+        else:
+            os.remove(file)
+    if os.path.exists("test_report"):
+        os.rename("test_report","previous_test_report")
+    exit(0)
+
+# if args.scfcode == "psi4":
+#   tasks.remove("delta-hf")
+# if args.done:
+#     for task in args.done:
+#         tasks.remove(task)
+
+tasks = ["sapt-dft", "delta-hf"]
+name = {
+  "sapt-dft": args.dirname,
+  "delta-hf": args.dirname+"_dHF",
+}
+logfile = {
+  "sapt-dft": os.path.join(base,"sapt-dft.log"),
+  "delta-hf": os.path.join(base,"delta-hf.log"),
+}
+
+print("Water dimer test starting at " \
+      f"{strftime('%H:%M:%S')} on {date.isoformat(date.today())}")
+stdout.flush()
+
+for task in tasks:
+    os.chdir(base)
+    cmnd = ["runcamcasp.py", "H2O2", "--clt", task+".clt",
+                     "--verbosity", str(args.verbosity),
+                     "--directory", name[task], "--ifexists", "delete",
+            "--log", logfile[task]]
+    if args.debug:
+        cmnd.append("--debug")
+    rc = subprocess.call(cmnd, stderr=subprocess.STDOUT)
+    if rc > 0:
+        print(f"runcamcasp.py failed with rc = {rc:1d}")
+
+test_results = os.path.join(base,"test_results")
+if os.path.exists(test_results):
+    os.remove(test_results)
+
+os.chdir(base)
+#  Analyse results
+results = ""
+with open(test_results,"w") as Z:
+    subprocess.call(["extract_saptdft.py", "check", "check_dHF", name["sapt-dft"],
+                 name["delta-hf"], "--title", "SCF code {}".format(scfcode)],
+                stdout=Z)
+print("Finished")
+with open(test_results) as R:
+    results = R.read()
+print(results)
+
+#  Compare with check results, which agree if they differ by no more
+#  than 0.001 kJ/mol
+columns, rows = read_table(None, results)
+if "check" not in rows or name["sapt-dft"] not in rows:
+    print(f"{scfcode} test results not found")
+    exit(4)
+result = compare(dict(zip(columns, rows["check"])),
+                 dict(zip(columns, rows[name["sapt-dft"]])), abs_tol=1.0e-3, rel_tol=0.0)
+if result.ok:
+    print(f"{scfcode} test successful")
+    exit(0)
+print(result.report())
+exit(3)
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Test CamCASP using H2O distributed-polarizability example.
+"""
+
+import argparse
+import re
+from glob import glob
+import os.path
+from pathlib import Path
+import subprocess
+from time import sleep
+from shutil import rmtree
+import sys
+from sys import stdout
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Test CamCASP using H2O distributed-polarizability example.
+""",epilog="""
+Normally run via the CamCASP tests/run_tests.py script.
+""")
+
+
+parser.add_argument("--scfcode", default="dalton",
+                    choices=["dalton","nwchem","psi4"],
+                    help="Ab initio code to use (dalton, nwchem or psi4)")
+# parser.add_argument("--done", help="Main calculation already complete",
+#                     action="store_true")
+parser.add_argument("--clean", help="Delete files created by previous tests and exit",
+                    action="store_true")
+parser.add_argument("--dirname", "-d", default="test",
+                    help="Name of directory for test job (default test)")
+parser.add_argument("--verbosity", help="Verbosity level", type=int,
+                    default=0)
+parser.add_argument("--difftool", default="",
+                    help="Difference tool to display the results if they differ")
+args = parser.parse_args()
+
+
+camcasp = os.getenv("CAMCASP")
+sys.path.insert(0, os.path.join(camcasp, "bin"))
+from comparator import compare_files
+
+base = os.path.join(camcasp,"tests","H2O_props",args.scfcode)
+name = args.dirname
+
+#  Clean up old test files and directories
+if args.clean:
+    os.chdir(base)
+    files = glob("*")
+    for file in files:
+        if file in ["README", "H2O-avtz.clt", "check",
+                    "H2O.axes", "test_report"]:
+            pass
+        elif Path(file).is_dir():
+            rmtree(file)
+        else:
+            os.remove(file)
+    if os.path.exists("test_report"):
+        os.rename("test_report","previous_test_report")
+    exit(0)
+
+os.chdir(base)
+
+#  Run CamCASP calculation
+
+rc = subprocess.call(["runcamcasp.py", "H2O", "--clt", "H2O-avtz.clt",
+                      "--directory", name, "--ifexists", "delete",
+                      "--verbosity", str(args.verbosity)],
+                      stderr=subprocess.STDOUT)
+if rc:
+    print("Job failed")
+    exit(4)
+
+#  Localize polarizabilities and obtain dispersion coefficients
+#  Make sure that the Orient program can be found
+# try:
+#   s = subprocess.check_output("type orient", stderr=subprocess.STDOUT, shell=True)
+# except subprocess.CalledProcessError:
+#   print """
+# Can't find the Orient program, needed for the localization procedure.
+# Please ensure that the orient executable is in your PATH, or make a link
+# to it in the $CAMCASP/bin directory.
+# """
+#   exit(1)
+
+print("\nPerforming localization\n")
+stdout.flush()
+os.chdir(name)
+rc = subprocess.call(["localize.py", "H2O", "--limit", "2", "--hlimit", "1",
+                      "--subdir", "L2H1"], stderr=subprocess.STDOUT)
+if rc:
+    print(f"Error in localization -- see {base}/{name}/H2O_loc.log")
+    exit(1)
+
+os.chdir(base)
+potfile = "H2O_ref_wt3_L2_Cn.pot"
+#  Dispersion coefficients are printed to 7 significant figures
+result = compare_files(os.path.join("check","L2H1",potfile),
+                       os.path.join(name,"L2H1",potfile), abs_tol=1.0e-6, rel_tol=1.0e-5)
+if result is None:
+    print(f"{name}/L2H1/{potfile} not found")
+    exit(4)
+if result.ok:
+    print("Test successful")
+    exit(0)
+print("Test and check results differ")
+print(result.report())
+if args.difftool:
+    subprocess.Popen(f"{args.difftool} check/L2H1/{potfile} {name}/L2H1/{potfile}", shell=True)
+exit(3)
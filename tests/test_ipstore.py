@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Check the fingerprints and look-ups of the shared store of IPs and AC shifts.
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+from types import SimpleNamespace
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Check the fingerprints and look-ups of the shared store of IPs and AC shifts.
+""",epilog="""
+Normally run via the CamCASP tests/run_tests.py script.
+
+The fingerprint of a water molecule (see bin/ipstore.py) must not change
+when it is moved, rotated, given in angstrom or has its atoms reordered,
+and must change when it is distorted. A store in a temporary file is then
+filled with entries for several functionals and bases, and lookup must
+choose the entry for the same functional and basis, then the same
+functional, then an experimental value, and never one for another
+functional, or one without a geometry for a molecule whose geometry is
+known. Finally fill_missing must set the IP, and the HOMO energy only
+when the functional and basis match, for the molecules of a job that
+have neither an IP nor an AC shift. No SCF code is needed.
+""")
+
+parser.add_argument("--clean", action="store_true",
+                    help="Delete files created by previous tests and exit")
+parser.add_argument("--verbosity", help="Verbosity level", type=int,
+                    default=0)
+args = parser.parse_args()
+
+if args.clean:
+    exit(0)
+
+camcasp = os.getenv("CAMCASP")
+if not camcasp:
+    print("Environment variable CAMCASP must be set to the base CamCASP directory")
+    exit(1)
+sys.path.insert(0, os.path.join(camcasp, "bin"))
+
+import ipstore
+from camcasp import Mol
+from cltspec import MolSpec, JobSpec, bohr
+
+ok = True
+
+
+def check(name, good):
+    global ok
+    print(f"{name:56s} {'ok' if good else 'FAILED'}")
+    if not good:
+        ok = False
+
+
+def water(name="H2O", shift=(0.0, 0.0, 0.0), angle=0.0, order=(0, 1, 2),
+          units="bohr", stretch=1.0):
+    """MolSpec for a water molecule, moved, rotated about z and reordered"""
+    atoms = [["O", "8", 0.0, 0.0, 0.2217], ["H1", "1", 0.0, 1.4309*stretch, -0.8867],
+             ["H2", "1", 0.0, -1.4309, -0.8867]]
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    scale = bohr if units == "angstrom" else 1.0
+    mol = MolSpec(name)
+    mol.units = units
+    for i in order:
+        label, Z, x, y, z = atoms[i]
+        x, y = c*x - s*y, s*x + c*y
+        mol.atoms.append([label, Z] + [f"{(v + d)*scale:.8f}"
+                                       for v, d in zip((x, y, z), shift)])
+    return mol
+
+
+#  Fingerprints
+fp = ipstore.fingerprint(water())
+check("Formula of water", ipstore.formula(water()) == "H2O" and fp.startswith("H2O:"))
+check("Fingerprint unchanged by moving and rotating",
+      ipstore.fingerprint(water(shift=(1.0, -2.0, 3.0), angle=70.0)) == fp)
+check("Fingerprint unchanged by reordering the atoms",
+      ipstore.fingerprint(water(order=(2, 0, 1))) == fp)
+check("Fingerprint unchanged in angstrom", ipstore.fingerprint(water(units="angstrom")) == fp)
+check("Fingerprint changed by distortion", ipstore.fingerprint(water(stretch=1.05)) != fp)
+check("No fingerprint without atoms", ipstore.fingerprint(MolSpec("empty")) is None)
+
+with tempfile.TemporaryDirectory() as work:
+    store = ipstore.IPStore(os.path.join(work, "ip-store.jsonl"), seed=False)
+    h2o = water()
+
+    def found(functional, basis, **kwargs):
+        e = store.lookup(kwargs.pop("fp", fp), functional, basis, **kwargs)
+        return e and e["source"]
+
+    #  Ranking of the entries for the same geometry
+    store.add(h2o, "B3LYP", "aug-cc-pvtz", 0.460, -0.300, source="b3lyp")
+    check("Entry for another functional not used", found("PBE0", "aug-cc-pvtz") is None)
+    store.add(h2o, "EXPT", "", 0.4638, source="expt")
+    check("Experimental value used", found("PBE0", "aug-cc-pvtz") == "expt")
+    store.add(h2o, "PBE0", "aug-cc-pvdz", 0.452, -0.305, source="pbe0-avdz")
+    check("Same functional preferred to experiment", found("PBE0", "aug-cc-pvtz") == "pbe0-avdz")
+    store.add(h2o, "PBE0", "aug-cc-pvtz", 0.4585, -0.3075, source="pbe0-avtz")
+    check("Same functional and basis preferred", found("PBE0", "aug-cc-pvtz") == "pbe0-avtz")
+    store.add(h2o, "PBE0", "aug-cc-pvtz", 0.4586, -0.3074, source="later")
+    check("Later entry of the same rank preferred", found("PBE0", "aug-cc-pvtz") == "later")
+    check("Other charges not used", found("PBE0", "aug-cc-pvtz", charge=1) is None)
+
+    #  Entries without a geometry, as from the seed tables
+    store.entries.append(ipstore._entry("H2O", 0, "PBE0", "aug-cc-pvqz", 0.4590, -0.3070,
+                                        source="seed"))
+    check("Entry without geometry not used for a geometry",
+          found("PBE0", "aug-cc-pvqz") == "later")
+    check("Entry without geometry used for a formula",
+          found("PBE0", "aug-cc-pvqz", fp=None, formula="H2O") == "seed")
+    check("Entries with geometry not used for a formula",
+          found("PBE0", "aug-cc-pvtz", fp=None, formula="H2O") == "seed")
+    check("Nothing found without fingerprint or formula", found("PBE0", "", fp=None) is None)
+
+    #  The entries added must be read back from the file
+    again = ipstore.IPStore(store.file, seed=False)
+    check("Store file read back", len(again.entries) == 5
+          and again.lookup(fp, "PBE0", "aug-cc-pvtz")["source"] == "later")
+
+    #  fill_missing for the molecules of a job
+    spec = JobSpec()
+    spec.mols = {"A": water("A"), "B": water("B", angle=30.0), "water": MolSpec("water")}
+
+    def job(basis, a="A", b="B"):
+        return SimpleNamespace(mola=Mol(a), molb=Mol(b), func="PBE0", basis=basis)
+
+    J = job("aug-cc-pvtz")
+    messages = ipstore.fill_missing(J, spec, store)
+    check("fill_missing sets the IP and HOMO energy",
+          J.mola.ip == 0.4586 and J.mola.homo == -0.3074
+          and J.molb.ip == 0.4586 and len(messages) == 2)
+    J = job("sadlej-pvtz")
+    J.molb.ip = 0.5
+    ipstore.fill_missing(J, spec, store)
+    check("fill_missing sets only the IP for another basis",
+          J.mola.ip == 0.4586 and J.mola.homo == 0.0 and J.molb.ip == 0.5)
+    J = job("aug-cc-pvqz", b="water")
+    ipstore.fill_missing(J, spec, store)
+    check("fill_missing uses the formula without a geometry",
+          J.molb.ip == 0.4590 and J.molb.homo == -0.3070)
+    if args.verbosity > 0:
+        for e in store.entries:
+            print(e)
+
+if ok:
+    print("Test successful")
+    exit(0)
+else:
+    print("Results differ")
+    exit(3)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Check the multipole-expansion energies used to screen scan geometries.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Check the multipole-expansion energies used to screen scan geometries.
+""",epilog="""
+Normally run via the CamCASP tests/run_tests.py script.
+
+Two clusters of random point charges, and a polarizable site, are placed
+at random relative positions and orientations. The electrostatic energy
+from the rank-4 multipoles of the clusters (see bin/longrange.py) must
+agree with the exact Coulomb energy to within the truncation error of the
+expansion, which falls off as R^-6, and the induction energy of the
+polarizable site, with the full polarizability and with its isotropic
+part, must agree with that from the exact field. Then screen_scan.py is
+run on random geometries of the water dimer, with the multipoles,
+polarizabilities and dispersion coefficients of
+examples/properties/H2O, and must keep the expected points. No SCF code
+is needed, but NumPy is.
+""")
+
+parser.add_argument("--tol", type=float, default=1e-6,
+                    help="Tolerance for the energies, relative to the largest")
+parser.add_argument("--clean", action="store_true",
+                    help="Delete files created by previous tests and exit")
+parser.add_argument("--verbosity", help="Verbosity level", type=int,
+                    default=0)
+args = parser.parse_args()
+
+if args.clean:
+    exit(0)
+
+camcasp = os.getenv("CAMCASP")
+if not camcasp:
+    print("Environment variable CAMCASP must be set to the base CamCASP directory")
+    exit(1)
+bindir = os.path.join(camcasp, "bin")
+sys.path.insert(0, bindir)
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy is needed for the multipole energies")
+    exit(4)
+import longrange
+
+rng = np.random.default_rng(20)
+ok = True
+
+
+def cluster(n, rank):
+    """Random point charges near the origin, and a Molecule with their
+    multipoles about the origin"""
+    p = 0.6*rng.standard_normal((n, 3))
+    q = rng.standard_normal(n)
+    mol = longrange.Molecule("cluster")
+    mol.sites = ["X"]
+    mol.positions = np.zeros((1, 3))
+    mol.multipoles = [np.einsum('i,it->t', q, longrange.solid_harmonics(p, rank))]
+    return p, q, mol
+
+
+def geometries(n, R):
+    """Random geometries with B at distance R"""
+    d = rng.standard_normal((n, 3))
+    d *= R/np.linalg.norm(d, axis=1)[:, None]
+    return np.hstack([d, rng.uniform(0, 360, (n, 1)), rng.standard_normal((n, 3))])
+
+
+def check(name, E, exact, tol):
+    global ok
+    dev = np.max(np.abs(E - exact))/np.max(np.abs(exact))
+    good = dev <= tol
+    print(f"{name:40s} relative error {dev:9.2e}  {'ok' if good else 'FAILED'}")
+    if not good:
+        ok = False
+
+
+#  Electrostatics against Coulomb's law
+pa, qa, A = cluster(5, 4)
+pb, qb, B = cluster(4, 4)
+errors = []
+G0 = geometries(20, 1.0)
+for R in [12.0, 24.0]:
+    G = G0.copy()
+    G[:, :3] *= R
+    E = longrange.energies(A, B, G)["elst"]
+    rot = longrange.rotation_matrices(G[:, 3], G[:, 4:7])
+    exact = []
+    for g, m in zip(G, rot):
+        d = np.linalg.norm(pa[:, None, :] - (g[:3] + pb @ m.T)[None, :, :], axis=2)
+        exact.append(np.sum(qa[:, None]*qb[None, :]/d))
+    exact = np.array(exact)
+    check(f"Electrostatic energy, R = {R:g} bohr", E, exact, 1e-3)
+    errors.append(np.max(np.abs(E - exact)))
+#  Truncation error R^-6: a factor of 64 from R = 12 to 24
+ratio = errors[0]/errors[1]
+print(f"{'Truncation error ratio, R = 12 and 24':40s} {ratio:9.1f}"
+      f"  {'ok' if 40 < ratio < 100 else 'FAILED'}")
+if not 40 < ratio < 100:
+    ok = False
+
+#  Induction of a polarizable site on B by the charges of A
+pol = longrange.Molecule("pol")
+pol.sites = ["O1"]
+pol.positions = np.array([[0.3, -0.2, 0.1]])
+pol.multipoles = [np.zeros(1)]
+a = rng.standard_normal((3, 3))
+a = a @ a.T
+alpha = np.zeros((4, 4))
+alpha[1:, 1:] = a[np.ix_([2, 0, 1], [2, 0, 1])]     # z, x, y order
+pol.pol = {"O1": alpha}
+charges = longrange.Molecule("charges")
+charges.sites = [f"C{i}" for i in range(len(qa))]
+charges.positions = pa
+charges.multipoles = [np.array([q]) for q in qa]
+G = geometries(20, 6.0)
+rot = longrange.rotation_matrices(G[:, 3], G[:, 4:7])
+full, iso = [], []
+for g, m in zip(G, rot):
+    d = g[:3] + m @ pol.positions[0] - pa
+    F = np.sum(qa[:, None]*d/np.linalg.norm(d, axis=1)[:, None]**3, axis=0)
+    full.append(-0.5*F @ (m @ a @ m.T) @ F)
+    iso.append(-0.5*np.trace(a)/3*F @ F)
+check("Induction energy, full polarizability",
+      longrange.energies(charges, pol, G, full=True)["ind"], np.array(full), args.tol)
+check("Induction energy, isotropic", longrange.energies(charges, pol, G)["ind"],
+      np.array(iso), args.tol)
+
+#  Screening of water dimer geometries
+h2o = os.path.join(camcasp, "examples", "properties", "H2O")
+with tempfile.TemporaryDirectory() as work:
+    geomfile = os.path.join(work, "H2O2.geom")
+    G = geometries(2000, 1.0)
+    G[:, :3] *= rng.uniform(3.0, 16.0, (len(G), 1))
+    with open(geomfile, "w") as GEOM:
+        for i, g in enumerate(G):
+            GEOM.write(f"{i+1:5d}  " + "  ".join(f"{v:10.5f}" for v in g) + "\n")
+    cmnd = [sys.executable, os.path.join(bindir, "screen_scan.py"), geomfile,
+            "--mom", os.path.join(h2o, "output_1", "OUT", "H2O_aTZ_DMA2_L4.mom"),
+            "--pol", os.path.join(h2o, "output_2", "H2O_aTZ_ref_wt4_L2_0f10.pol"),
+            "--pot", os.path.join(h2o, "output_2", "H2O_aTZ_wt4_L2_C10.pot"),
+            "--beta", "1.5", "--rmin", "2.5",
+            "--output", os.path.join(work, "kept.geom"),
+            "--table", os.path.join(work, "energies")]
+    if args.verbosity > 0:
+        print(" ".join(cmnd))
+    if subprocess.call(cmnd, stdout=subprocess.DEVNULL):
+        print("screen_scan.py failed")
+        exit(4)
+    table = np.loadtxt(os.path.join(work, "energies"), comments="!")
+    kept = [line.split()[0] for line in open(os.path.join(work, "kept.geom"))
+            if not line.startswith("!")]
+    expected = (np.abs(table[:, 4]) >= 0.1) & (np.abs(table[:, 4]) <= 100) & (table[:, 5] >= 2.5)
+    good = kept == [str(int(i)) for i in table[expected, 0]] \
+        and np.array_equal(table[:, 6] == 1, expected) and 0 < len(kept) < len(G)
+    print(f"{'screen_scan.py, water dimer':40s} {len(kept):5d} of {len(G)} kept"
+          f"  {'ok' if good else 'FAILED'}")
+    if not good:
+        ok = False
+
+if ok:
+    print("Test successful")
+    exit(0)
+else:
+    print("Results differ")
+    exit(3)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Check the MO and basis files written from Psi4 wavefunction .npz files.
+"""
+
+import argparse
+from glob import glob
+import os
+import re
+import shutil
+import subprocess
+import sys
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Check the MO and basis files written from Psi4 wavefunction .npz files.
+""",epilog="""
+Normally run via the CamCASP tests/run_tests.py script.
+
+The .npz files in tests/psi4_npz hold the wavefunctions of the Psi4
+example calculations in interfaces/psi4/examples/H2Odimer (see the README
+there). Each is converted by read_psi4_npz.py, and the fchk file of the
+same calculation by readfchk.py, and the basis files must be identical
+and the MO files agree to the precision of the fchk file (--tol, relative
+to the largest coefficient of each MO). The .npz file made afresh from the
+fchk file must also give the same MO and basis files, so that the fixtures
+are known to be up to date. No SCF code is needed, but NumPy is.
+
+If Psi4 can be imported, a small SCF calculation on the water molecule is
+also run, and its wavefunction saved both by the export code that
+replaces FCHKWriter in CamCASP's Psi4 inputs and by FCHKWriter itself.
+The basis sets must be the same and the MOs agree to the precision of
+the fchk file. Otherwise this check is skipped.
+""")
+
+parser.add_argument("--tol", type=float, default=1e-8,
+                    help="Tolerance for the MO coefficients and energies")
+parser.add_argument("--debug", action="store_true",
+                    help="Don't delete working files")
+parser.add_argument("--clean", action="store_true",
+                    help="Delete files created by previous tests and exit")
+parser.add_argument("--verbosity", help="Verbosity level", type=int,
+                    default=0)
+args = parser.parse_args()
+
+camcasp = os.getenv("CAMCASP")
+if not camcasp:
+    print("Environment variable CAMCASP must be set to the base CamCASP directory")
+    exit(1)
+bindir = os.path.join(camcasp, "bin")
+base = os.path.join(camcasp, "tests", "psi4_npz")
+examples = os.path.join(camcasp, "interfaces", "psi4", "examples", "H2Odimer")
+work = os.path.join(base, "work")
+
+if args.clean:
+    if os.path.exists(work):
+        shutil.rmtree(work)
+    exit(0)
+
+try:
+    import numpy as np
+except ImportError:
+    print("NumPy is needed for the .npz files")
+    exit(4)
+
+
+def run(script, *arguments):
+    """Run a CamCASP script in the work directory; True if it succeeded"""
+    cmnd = [sys.executable, os.path.join(bindir, script)] + list(arguments)
+    if args.verbosity > 0:
+        print(" ".join(cmnd))
+    rc = subprocess.call(cmnd, cwd=work)
+    if rc:
+        print(f"{script} failed, rc = {rc}")
+    return rc == 0
+
+
+def export_check():
+    """Save the wavefunction of a Psi4 calculation by the CamCASP export
+    code and by FCHKWriter, and compare them. Returns True if they agree,
+    or None if Psi4 isn't available."""
+    try:
+        import psi4
+    except ImportError:
+        return None
+    sys.path.insert(0, bindir)
+    import psi4_npz
+    psi4.set_output_file(os.path.join(work, "psi4-H2O.out"), False)
+    psi4.core.be_quiet()
+    psi4.geometry("""
+0 1
+O   0.000000   0.000000   0.117790
+H   0.000000   0.755453  -0.471161
+H   0.000000  -0.755453  -0.471161
+symmetry c1
+""")
+    psi4.set_options({"basis": "cc-pvdz", "scf_type": "pk"})
+    energy, wfn = psi4.energy("scf", return_wfn=True)
+    npz = os.path.join(work, "psi4-H2O.npz")
+    fchk = os.path.join(work, "psi4-H2O.fchk")
+    exec(psi4_npz.export_code(npz, os.path.join(work, "unused.fchk")),
+         {"psi4": psi4, "wfn": wfn})
+    psi4.FCHKWriter(wfn).write(fchk)
+    mine = psi4_npz.read(npz)
+    theirs = psi4_npz.read_fchk(fchk)
+    ok = True
+    for key in ["shell_types", "nprim", "shell_atom"]:
+        if not np.array_equal(getattr(mine, key), getattr(theirs, key)):
+            print(f"  {key} differ")
+            ok = False
+    if not ok:
+        return False
+    for key in ["exponents", "coefficients"]:
+        a, b = getattr(mine, key), getattr(theirs, key)
+        d = np.max(np.abs(a - b)/np.abs(b))
+        print(f"  largest difference in {key}: {d:.1e}")
+        if d > args.tol:
+            ok = False
+    v0, v1 = theirs.vectors, mine.vectors
+    dv = np.max(np.abs(v1 - v0).max(axis=1)/np.abs(v0).max(axis=1))
+    print(f"  largest difference in MO coefficients: {dv:.1e}")
+    if dv > args.tol:
+        ok = False
+    if not ok:
+        print("  The exported wavefunction differs from the fchk file")
+    return ok
+
+
+def read_movecs(file):
+    """Orbital energies and MO coefficients, array (nmo, nbf), from an ASCII MO file"""
+    with open(file) as F:
+        text = F.read()
+    nbf = int(re.search(r'^BFNS\s+(\d+)', text, flags=re.M).group(1))
+    nmo = int(re.search(r'^NMOS\s+(\d+)', text, flags=re.M).group(1))
+    blocks = re.split(r'^\s*MO\s+\d+\s+Energy\s+\S+', text, flags=re.M)
+    energies = np.array(blocks[0].split("\n", 1)[1].split("Energies", 1)[1].split()[1:],
+                        dtype=float)
+    vectors = np.array([b.replace("END", "").split() for b in blocks[1:]], dtype=float)
+    if energies.shape != (nmo,) or vectors.shape != (nmo, nbf):
+        raise ValueError(f"Wrong numbers of values in {file}")
+    return energies, vectors
+
+
+def compare(fchk_prefix, npz_prefix):
+    """Compare the files from readfchk.py and read_psi4_npz.py. Returns True
+    if they agree."""
+    ok = True
+    with open(f"{fchk_prefix}.basis") as F, open(f"{npz_prefix}.basis") as N:
+        if F.read() != N.read():
+            print(f"  {npz_prefix}.basis differs from {fchk_prefix}.basis")
+            ok = False
+    e0, v0 = read_movecs(f"{fchk_prefix}-asc.movecs")
+    e1, v1 = read_movecs(f"{npz_prefix}-asc.movecs")
+    if v0.shape != v1.shape:
+        print(f"  {npz_prefix}-asc.movecs has {v1.shape[0]} MOs of {v1.shape[1]}"
+              f" basis functions, {fchk_prefix}-asc.movecs {v0.shape[0]} of {v0.shape[1]}")
+        return False
+    de = np.max(np.abs(e1 - e0)/np.maximum(np.abs(e0), 1.0))
+    dv = np.max(np.abs(v1 - v0).max(axis=1)/np.abs(v0).max(axis=1))
+    print(f"  largest differences: energies {de:.1e}, coefficients {dv:.1e}")
+    if de > args.tol or dv > args.tol:
+        print(f"  {npz_prefix}-asc.movecs differs from {fchk_prefix}-asc.movecs")
+        ok = False
+    return ok
+
+
+if os.path.exists(work):
+    shutil.rmtree(work)
+os.makedirs(work)
+labels = os.path.join(base, "H2Odimer.sitenames")
+
+ok = True
+failed = False
+for npz in sorted(glob(os.path.join(base, "*.npz"))):
+    name = os.path.basename(npz)[:-4]
+    fchk = os.path.join(examples, f"{name}.fchk")
+    print(f"{name}:")
+    if not (run("readfchk.py", fchk, "--prefix", f"fchk-{name}", "--labels", labels,
+                "--dalton", "--quiet")
+            and run("read_psi4_npz.py", npz, "--prefix", f"npz-{name}", "--labels", labels,
+                    "--dalton")
+            and run("read_psi4_npz.py", fchk, "--npz", f"{name}.npz",
+                    "--prefix", f"new-{name}", "--labels", labels, "--dalton")):
+        failed = True
+        continue
+    if not compare(os.path.join(work, f"fchk-{name}"), os.path.join(work, f"npz-{name}")):
+        ok = False
+    #  The fixture must match the fchk file exactly
+    for f in [".basis", "-asc.movecs"]:
+        with open(os.path.join(work, f"npz-{name}{f}")) as A, \
+             open(os.path.join(work, f"new-{name}{f}")) as B:
+            if A.read().split("\n", 1)[1] != B.read().split("\n", 1)[1]:
+                print(f"  {name}.npz is out of date: new-{name}{f} differs")
+                ok = False
+
+print("Psi4 export:")
+result = export_check()
+if result is None:
+    print("  Psi4 is not available: skipped")
+elif not result:
+    ok = False
+
+if not args.debug:
+    shutil.rmtree(work)
+
+if failed:
+    print("Conversion failed")
+    exit(4)
+elif ok:
+    print("Test successful")
+    exit(0)
+else:
+    print("Results differ")
+    exit(3)
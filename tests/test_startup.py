@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#  -*-  coding:  iso-8859-1  -*-
+
+"""Check the start-up time of the camcasp module and the light scripts.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+parser = argparse.ArgumentParser(
+formatter_class=argparse.RawDescriptionHelpFormatter,
+description="""Check the start-up time of the camcasp module and the light scripts.
+""",epilog="""
+Normally run via the CamCASP tests/run_tests.py script.
+
+The camcasp module must import without the CAMCASP environment variable,
+without importing readline or the modules that are only needed to set up
+and run jobs, and within the time budget (default 30 ms, in addition to
+the start-up time of python itself). Each script listed is run with
+--help and must complete within the script budget (default 150 ms, again
+in addition to the python start-up time). Each time is the best of
+--repeat runs.
+""")
+
+parser.add_argument("--budget", type=float, default=30.0,
+                    help="Time budget in ms for importing camcasp")
+parser.add_argument("--script-budget", type=float, default=150.0,
+                    help="Time budget in ms for running a light script with --help")
+parser.add_argument("--repeat", type=int, default=5,
+                    help="Number of runs for each timing")
+parser.add_argument("--scripts", nargs="*",
+                    default=["extract_saptdft.py", "extract_ct.py", "read_scan.py"],
+                    help="Scripts to time")
+parser.add_argument("--clean", help="Nothing to do for this test",
+                    action="store_true")
+parser.add_argument("--verbosity", help="Verbosity level", type=int,
+                    default=0)
+args = parser.parse_args()
+
+if args.clean:
+    exit(0)
+
+camcasp = os.getenv("CAMCASP")
+bindir = os.path.join(camcasp, "bin")
+env = dict(os.environ)
+del env["CAMCASP"]
+env["PYTHONPATH"] = bindir
+
+
+def best(command):
+    """Best of args.repeat wall-clock times in ms for command"""
+    times = []
+    for n in range(args.repeat):
+        t = perf_counter()
+        rc = subprocess.call(command, env=env, cwd=bindir,
+                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        times.append(1000.0*(perf_counter() - t))
+        if rc != 0:
+            return None
+    return min(times)
+
+
+ok = True
+base = best([sys.executable, "-c", "pass"])
+
+#  Modules that should not be loaded by "import camcasp"
+heavy = ["readline", "camcasp_files", "camcasp_run", "camrc", "basislib"]
+check = ("import sys, camcasp; "
+         f"print(' '.join(m for m in {heavy!r} if m in sys.modules))")
+try:
+    loaded = subprocess.check_output([sys.executable, "-c", check], env=env,
+                                     cwd=bindir, stderr=subprocess.STDOUT).decode().strip()
+except subprocess.CalledProcessError as e:
+    print("import camcasp failed without CAMCASP set:")
+    print(e.output.decode())
+    exit(4)
+if loaded:
+    print(f"import camcasp loads {loaded}")
+    ok = False
+
+t = best([sys.executable, "-c", "import camcasp"])
+print(f"{'import camcasp':24s} {t-base:8.1f} ms  (budget {args.budget:.0f} ms)")
+if t - base > args.budget:
+    ok = False
+
+for script in args.scripts:
+    t = best([sys.executable, os.path.join(bindir, script), "--help"])
+    if t is None:
+        print(f"{script} --help failed")
+        ok = False
+        continue
+    print(f"{script:24s} {t-base:8.1f} ms  (budget {args.script_budget:.0f} ms)")
+    if t - base > args.script_budget:
+        ok = False
+
+if ok:
+    print("Test successful")
+    exit(0)
+else:
+    print("Start-up time budget exceeded")
+    exit(3)